@@ -2,8 +2,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import Dict, List, Any, Optional
+from datetime import datetime, timedelta
 from ...models import database
 from ...services.reports_service import reports_service
+from ...services.report_rollup_service import report_rollup_service
+from ...services.question_outcome_service import question_outcome_service
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
@@ -93,6 +96,19 @@ async def get_questions_by_subject(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/rollup/rebuild")
+async def rebuild_rollup(db: Session = Depends(get_db)):
+    """
+    Recompute the report rollup from the questions table (backfill / repair).
+    The CO grain is read from question_outcome_mapping, so that table is
+    re-derived first (as in scripts/rebuild_report_rollup.py).
+    """
+    try:
+        mappings = question_outcome_service.backfill(db)
+        return {"rows": report_rollup_service.rebuild(db), "mapping_rows": mappings}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ─── Compatibility endpoints (match frontend's existing API calls) ───
 
 @router.get("/faculty")
@@ -124,12 +140,17 @@ async def get_vetter_report(db: Session = Depends(get_db)):
     """
     try:
         overview = reports_service.get_overview_stats(db)
-        reviewed = overview["approved"] + overview["rejected"]
         approval_rate = overview["approval_rate"] / 100.0 if overview["approval_rate"] else 0
 
+        # Rollup rows are bucketed by the day a question reached its current status
+        today = datetime.utcnow().date()
+        def reviewed_since(days: int) -> int:
+            totals = reports_service.get_status_totals(db, since_day=(today - timedelta(days=days)).isoformat())
+            return totals.get("approved", 0) + totals.get("rejected", 0) + totals.get("quarantined", 0)
+
         return {
-            "totalReviewedThisWeek": reviewed,   # Simplified: using total (no date filtering yet)
-            "totalReviewedThisMonth": reviewed,
+            "totalReviewedThisWeek": reviewed_since(7),
+            "totalReviewedThisMonth": reviewed_since(30),
             "approvalRate": approval_rate,
             "averageTimePerQuestion": 0,          # Not tracked yet
             "rejectionReasons": {},               # Not tracked yet
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Form, HTTPException, Depends, Response
+from fastapi import APIRouter, Form, HTTPException, Depends, Response, Header, Request
 from typing import Optional, List, Dict, Any
 import json
 import uuid
@@ -130,16 +130,20 @@ async def get_exam_preset(exam_type: str):
 @router.post("/{rubric_id}/generate-exam")
 async def generate_exam(
     rubric_id: str,
+    request: Request,
+    x_user_id: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
     Trigger generation of full exam based on rubric configuration.
-    Runs asynchronously.
+    Runs asynchronously as a batch job; poll generation-status for queue
+    position and estimated wait.
     """
     from ...services.generation_manager import generation_manager
     
     try:
-        batch_id = await generation_manager.start_rubric_generation(rubric_id, db)
+        user = x_user_id or (request.client.host if request.client else None)
+        batch_id = await generation_manager.start_rubric_generation(rubric_id, db, user=user)
         return {"batch_id": batch_id, "status": "queued", "message": "Exam generation started"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -150,6 +154,33 @@ async def get_generation_status(batch_id: str):
     from ...services.generation_manager import generation_manager
     return generation_manager.get_status(batch_id)
 
+@router.post("/generation/{batch_id}/cancel")
+async def cancel_generation(batch_id: str, abort_in_flight: bool = True):
+    """
+    Stop a generation job. Questions already saved stay on the batch.
+    abort_in_flight=false lets the current question finish first.
+    """
+    from ...services.generation_manager import generation_manager
+    if not generation_manager.cancel(batch_id, abort_in_flight=abort_in_flight):
+        raise HTTPException(status_code=404, detail="No running generation job with this id")
+    return generation_manager.get_status(batch_id)
+
+@router.post("/generation/{batch_id}/pause")
+async def pause_generation(batch_id: str):
+    """Pause a generation job after its current question, freeing its LLM slot."""
+    from ...services.generation_manager import generation_manager
+    if not generation_manager.pause(batch_id):
+        raise HTTPException(status_code=404, detail="No running generation job with this id")
+    return generation_manager.get_status(batch_id)
+
+@router.post("/generation/{batch_id}/resume")
+async def resume_generation(batch_id: str):
+    """Resume a paused generation job (it queues for a slot again)."""
+    from ...services.generation_manager import generation_manager
+    if not generation_manager.resume(batch_id):
+        raise HTTPException(status_code=404, detail="No paused generation job with this id")
+    return generation_manager.get_status(batch_id)
+
 @router.get("/{rubric_id}/latest-batch")
 async def get_latest_batch(rubric_id: str, db: Session = Depends(get_db)):
     """Get the latest generated batch for a rubric"""
@@ -162,6 +193,14 @@ async def get_latest_batch(rubric_id: str, db: Session = Depends(get_db)):
         
     return {"batch_id": batch.id}
 
+@router.get("/{rubric_id}/co-distribution")
+async def get_co_distribution(rubric_id: str, db: Session = Depends(get_db)):
+    """Target vs actual CO distribution of the questions generated for a rubric"""
+    try:
+        return rubric_service.check_co_distribution(db, rubric_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.get("/{rubric_id}/export-docx")
 async def export_rubric_docx(rubric_id: str, db: Session = Depends(get_db)):
     """Export the generated questions for a rubric to a DOCX file"""
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Body
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Body, Request, Response
+from fastapi.responses import JSONResponse
 from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func
 from ...models import database, schemas
 
 import re
@@ -17,6 +19,8 @@ router = APIRouter(prefix="/subjects", tags=["subjects"])
 # Initialize services
 from ...services.rag_service import RAGService
 from ...services.textbook_processor import TextbookProcessor
+from ...services.topic_outcome_cache import topic_outcome_cache
+from ...services.change_tracker import change_tracker, SUBJECT_LIST_SCOPE
 
 rag_service = RAGService()
 textbook_processor = TextbookProcessor()
@@ -29,14 +33,23 @@ def get_db():
         db.close()
 
 @router.get("")
-async def list_subjects(db: Session = Depends(get_db)):
-    subjects = db.query(database.Subject).all()
+async def list_subjects(request: Request, db: Session = Depends(get_db)):
+    # Cheap revalidation: the ETag only moves when a subject/topic/CO or question is added/changed
+    etag = f'W/"subjects-{change_tracker.get_version(db, SUBJECT_LIST_SCOPE)}"'
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    subjects = db.query(database.Subject).options(
+        selectinload(database.Subject.course_outcomes),
+        selectinload(database.Subject.topics)
+    ).all()
+    question_totals = dict(
+        db.query(database.Question.subject_id, func.count(database.Question.id))
+        .group_by(database.Question.subject_id).all()
+    )
+
     result = []
     for s in subjects:
-        total_q = db.query(database.Question).filter(database.Question.subject_id == s.id).count()
-        # Load topics from DB
-        # topics are loaded via relationship automatically if not lazy=dynamic, otherwise use s.topics
-        # But we accessed s.topics below, so it should be fine.
         result.append({
             "id": s.id,
             "name": s.name,
@@ -45,13 +58,11 @@ async def list_subjects(db: Session = Depends(get_db)):
             "credits": s.credits,
             "terminology_detected": s.terminology_detected,
             "courseOutcomes": [{"id": co.id, "code": co.code, "description": co.description} for co in s.course_outcomes],
-            "terminology_detected": s.terminology_detected,
-            "courseOutcomes": [{"id": co.id, "code": co.code, "description": co.description} for co in s.course_outcomes],
             "topics": [{"id": t.id, "name": t.name, "order": t.order} for t in s.topics],
-            "totalQuestions": total_q,
+            "totalQuestions": question_totals.get(s.id, 0),
             "createdAt": None,
         })
-    return result
+    return JSONResponse(content=result, headers={"ETag": etag})
 
 @router.post("", response_model=schemas.SubjectSchema)
 async def create_subject(
@@ -237,7 +248,8 @@ from ...models.topic_question import TopicQuestion
 @router.get("/{subject_id}/topics/{topic_id}")
 async def get_topic_detail(subject_id: int, topic_id: int, db: Session = Depends(get_db)):
     """Get topic details"""
-    topic = db.query(database.Topic).filter(database.Topic.id == topic_id).first()
+    # Topic + weighted CO / LO mappings in one joined query (TTL-cached)
+    topic = topic_outcome_cache.get(db, topic_id)
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found")
         
@@ -249,21 +261,8 @@ async def get_topic_detail(subject_id: int, topic_id: int, db: Session = Depends
     
     notes = db.query(database.TopicNotes).filter(database.TopicNotes.topic_id == topic_id).all()
     
-    # Manually map mappings since schema might be tricky with secondary
-    topic_co_mappings = db.query(database.TopicCOMapping).filter(database.TopicCOMapping.topic_id == topic_id).all()
-    
-    mapped_cos = []
-    for mapping in topic_co_mappings:
-        co = db.query(database.CourseOutcome).filter(database.CourseOutcome.id == mapping.course_outcome_id).first()
-        if co:
-            mapped_cos.append({
-                "id": co.id, 
-                "code": co.code, 
-                "description": co.description,
-                "weight": mapping.weight
-            })
-
-    mapped_los = [{"id": lo.id, "code": lo.code, "description": lo.description} for lo in topic.mapped_los]
+    mapped_cos = topic["cos"]
+    mapped_los = topic["los"]
 
     today_date = datetime.utcnow()
     
@@ -323,9 +322,9 @@ async def get_topic_detail(subject_id: int, topic_id: int, db: Session = Depends
         })
 
     return {
-        "id": topic.id,
-        "name": topic.name,
-        "subject_id": topic.subject_id,
+        "id": topic["id"],
+        "name": topic["name"],
+        "subject_id": topic["subject_id"],
         "stats": question_counts,
         "questionCount": total_questions, # Add total count
         "questions": questions_list,      # Add questions list
@@ -386,6 +385,7 @@ async def update_topic_mappings(
         topic.mapped_los = los
         
     db.commit()
+    topic_outcome_cache.invalidate(topic_id)
     
     return {
         "message": "Mappings updated",
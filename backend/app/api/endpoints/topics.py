@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Body, UploadFile, File, Form, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, Body, UploadFile, File, Form, HTTPException, Depends, BackgroundTasks, Header, Request
 from typing import Optional, List, Dict
 from sqlalchemy.orm import Session
 from ...models import database, schemas
 from ...models.database import SessionLocal
 from ...services.topic_actions_service import topic_actions_service
+from ...services.topic_outcome_cache import topic_outcome_cache
+from ...services.generation_scheduler import generation_scheduler
 from ...services.rag_service import RAGService
 from ...services.topic_question_generator import topic_question_generator
 from ...services.sample_parser import SampleParser
@@ -12,6 +14,8 @@ from ...services.sample_vector_store import SampleVectorStore
 from ...models.topic_question import TopicQuestion
 from ...models.sample_question import SampleQuestion
 from datetime import datetime
+from uuid import uuid4
+import asyncio
 import os
 from pathlib import Path
 import logging
@@ -57,6 +61,7 @@ async def map_outcomes(
              topic.mapped_los = los
             
         db.commit()
+        topic_outcome_cache.invalidate(topic_id)
         return {"message": "Updated outcome mappings"}
     except Exception as e:
         db.rollback()
@@ -67,11 +72,15 @@ async def quick_generate(
     subject_id: int,
     topic_id: int,
     request: schemas.QuickGenerateRequest,
+    http_request: Request,
+    x_user_id: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
     Generate questions for faculty reference (not for vetting).
     Uses RAG + few-shot learning from sample questions.
+    Runs as an interactive job: ahead of queued rubric batches, which yield
+    to it between questions.
     """
     try:
         # Validate topic_id matches URL if provided in body
@@ -79,14 +88,18 @@ async def quick_generate(
              # Just a warning or strict check? Let's proceed with URL param
              pass
              
-        result = await topic_actions_service.quick_generate_questions(
-            db=db,
-            subject_id=subject_id,
-            topic_id=topic_id,
-            question_type=request.question_type,
-            count=request.count,
-            difficulty=request.difficulty
-        )
+        user = x_user_id or (http_request.client.host if http_request.client else None)
+        async with generation_scheduler.slot(f"quick-{uuid4()}", "interactive", user,
+                                             total_steps=request.count) as ticket:
+            result = await topic_actions_service.quick_generate_questions(
+                db=db,
+                subject_id=subject_id,
+                topic_id=topic_id,
+                question_type=request.question_type,
+                count=request.count,
+                difficulty=request.difficulty,
+                checkpoint=ticket.checkpoint
+            )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -500,9 +513,9 @@ async def upload_samples(
         # Parse
         result = sample_processor.process_file(db, subject_id, content, file.filename, topic_id=topic_id)
         
-        # Add to Vector Store
+        # Add to Vector Store (off the event loop; embedding can be slow)
         if result.get("questions"):
-            sample_store.add_samples(topic_id, result["questions"])
+            await asyncio.to_thread(sample_store.add_samples, topic_id, result["questions"])
         
         return {
             "message": f"Successfully added {len(result.get('questions', []))} sample questions for few-shot learning.",
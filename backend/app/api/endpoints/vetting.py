@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Form
+from fastapi import APIRouter, Depends, HTTPException, Form, Query
 from typing import List, Optional, Dict
 from sqlalchemy.orm import Session
 from ...models.database import SessionLocal
 from ...services.vetting_service import vetting_service
+from ...services.question_counter_service import question_counter_service
 import json
 
 router = APIRouter(prefix="/vetting", tags=["vetting"])
@@ -19,49 +20,35 @@ async def get_pending_batches(db: Session = Depends(get_db)):
     """Get all batches with pending questions"""
     return await vetting_service.get_pending_batches(db)
 
+@router.post("/counters/reconcile")
+async def reconcile_counters(db: Session = Depends(get_db)):
+    """Recompute batch/subject question counters from the questions table and repair drift"""
+    return question_counter_service.reconcile(db)
+
 @router.get("/batches")
 async def get_batches(status: Optional[str] = None, db: Session = Depends(get_db)):
     """List batches with optional status filtering"""
     from ...models import database
-    import json
-    from datetime import datetime
     
     rubrics = db.query(database.Rubric).order_by(
         database.Rubric.created_at.desc()
     ).all()
+    rubric_counts = vetting_service.count_questions_by_status(db, database.Question.rubric_id)
     
     batches = []
     for r in rubrics:
-        total = db.query(database.Question).filter(
-            database.Question.rubric_id == r.id
-        ).count()
-        if total == 0:
+        counts = rubric_counts.get(str(r.id))
+        if not counts:
             continue
             
-        pending = db.query(database.Question).filter(
-            database.Question.rubric_id == r.id, 
-            database.Question.status == "pending"
-        ).count()
-        approved = db.query(database.Question).filter(
-            database.Question.rubric_id == r.id, 
-            database.Question.status == "approved"
-        ).count()
-        rejected = db.query(database.Question).filter(
-            database.Question.rubric_id == r.id, 
-            database.Question.status == "rejected"
-        ).count()
-        quarantined = db.query(database.Question).filter(
-            database.Question.rubric_id == r.id, 
-            database.Question.status == "quarantined"
-        ).count()
+        total = counts["total"]
+        pending = counts["pending"]
+        approved = counts["approved"]
+        rejected = counts["rejected"]
+        quarantined = counts["quarantined"]
         
         reviewed = approved + rejected + quarantined
-        
-        batch_status = "pending"
-        if pending == 0 and total > 0:
-            batch_status = "completed"
-        elif reviewed > 0:
-            batch_status = "in_progress"
+        batch_status = vetting_service.review_status(counts)
             
         if status and batch_status != status:
             continue
@@ -94,11 +81,18 @@ async def get_batches(status: Optional[str] = None, db: Session = Depends(get_db
     return batches
 
 @router.get("/batches/{batch_id}")
-async def get_batch_detail(batch_id: str, db: Session = Depends(get_db)):
+async def get_batch_detail(
+    batch_id: str,
+    include_context: bool = False,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
     """
-    Get batch with questions grouped by type
+    Get batch with questions grouped by type.
+    RAG context is omitted unless include_context=true; use GET /questions/{id}/provenance.
     """
-    result = await vetting_service.get_batch_detail(db, batch_id)
+    result = await vetting_service.get_batch_detail(db, batch_id, include_context, cursor, limit)
     if not result:
         raise HTTPException(status_code=404, detail="Batch not found")
     return result
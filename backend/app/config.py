@@ -32,6 +32,22 @@ CHAIRMAN_MODEL = "qwen2.5:7b"
 OLLAMA_NUM_THREAD = 6  # Optimized for M2 Air (8 cores)
 OLLAMA_CONTEXT_SIZE = 8192  # qwen2.5 supports up to 32k, 8k is safe for RAM
 MAX_TOKENS = 2000  # 7B model can generate longer, more complete JSON
+
+# Prompt token budgeting (see services/prompt_budget.py)
+# Optional local HF tokenizer files (tokenizer.json) for GENERATION_MODEL; without it
+# tokens are estimated from characters and calibrated against Ollama's prompt_eval_count
+GENERATION_TOKENIZER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ml_models", "qwen2.5-tokenizer")
+PROMPT_SAFETY_TOKENS = 256  # headroom for estimation error and chat-template tokens
+PROMPT_MIN_CHUNK_TOKENS = 64  # don't bother keeping a trimmed chunk smaller than this
+# Upper bound on RAG context tokens per prompt (the window may allow more)
+PROMPT_CONTEXT_TOKEN_CAP = {
+    "mcq": 3000,
+    "short_answer": 1200,
+    "essay": 1500,
+    "assignment": 1200,
+    "subtopics": 1500,
+    "default": 1200,
+}
 TEMPERATURE = 0.7
 
 # Legacy aliases for backward compatibility
@@ -45,18 +61,21 @@ MODEL_CAPABILITIES = {
         "json_reliable": True,
         "best_for": ["mcq", "short_answer", "essay", "reasoning", "extraction"],
         "avg_tokens_per_second": 25,
+        "memory_gb": 4.7,
     },
     "llama3.2:3b": {
         "max_context": 128000, 
         "json_reliable": True,
         "best_for": ["mcq", "short_answer", "fast_generation"],
         "avg_tokens_per_second": 50,
+        "memory_gb": 2.0,
     },
     "qwen2.5:3b": {
         "max_context": 32768,
         "json_reliable": True,
         "best_for": ["mcq", "short_answer", "essay", "reasoning"],
         "avg_tokens_per_second": 35,  
+        "memory_gb": 1.9,
     },
 }
 
@@ -83,14 +102,77 @@ GENERATION_SETTINGS = {
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 LLM_BASE_URL = OLLAMA_BASE_URL # Legacy alias
 OLLAMA_TIMEOUT = 600  # 10 minutes — 7B model needs more time
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # keep models (and their prompt KV cache) loaded between calls
+# Model residency (see services/model_residency.py)
+OLLAMA_PINNED_KEEP_ALIVE = -1  # while generation jobs are queued: never unload
+OLLAMA_MODEL_MEMORY_GB = float(os.getenv("OLLAMA_MODEL_MEMORY_GB", "6"))  # RAM available to Ollama for resident models
+OLLAMA_PS_CACHE_SECONDS = 10  # how long a /api/ps snapshot is trusted
+COLD_START_THRESHOLD_SECONDS = 0.5  # load_duration above this is reported as a cold start
+
+# LLM call resilience (see services/llm_resilience.py)
+LLM_BREAKER_FAILURE_THRESHOLD = 3  # consecutive failures before a model/backend circuit opens
+LLM_BREAKER_RESET_SECONDS = 30  # first open period; doubles on each failed half-open trial
+LLM_BREAKER_MAX_RESET_SECONDS = 300
+LLM_TIMEOUT_BASE_SECONDS = 10  # fixed overhead added to the expected duration
+LLM_TIMEOUT_SAFETY_FACTOR = 3.0  # multiplier on the expected duration from observed tokens/sec
+LLM_TIMEOUT_MIN_SECONDS = 20
+LLM_MODEL_LOAD_SECONDS = 60  # extra allowance when the model is not resident
+LLM_DEFAULT_TOKENS_PER_SECOND = 20  # for models missing from MODEL_CAPABILITIES
+LLM_MAX_ATTEMPTS = 3
+
+# LLM backends (see services/llm_router.py)
+# Comma-separated Ollama hosts, each optionally with its concurrency limit:
+#   OLLAMA_BACKENDS="http://box1:11434=1,http://box2:11434=2"
+# Unset: OLLAMA_BASE_URL alone, with OLLAMA_HOST_CONCURRENCY slots.
+OLLAMA_HOST_CONCURRENCY = int(os.getenv("OLLAMA_HOST_CONCURRENCY", "1"))  # parallel requests per host (OLLAMA_NUM_PARALLEL)
+
+
+def _parse_backends(spec: str):
+    backends = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        url, _, limit = item.partition("=")
+        backends.append((url.strip().rstrip("/"), int(limit) if limit else OLLAMA_HOST_CONCURRENCY))
+    return backends
+
+
+OLLAMA_BACKENDS = _parse_backends(os.getenv("OLLAMA_BACKENDS", "")) or [(OLLAMA_BASE_URL, OLLAMA_HOST_CONCURRENCY)]
+LLM_ROUTER_AFFINITY_SESSIONS = 256  # session hint -> last host, so shared prompt prefixes hit a warm KV cache
+
+# Generation job scheduling (see services/generation_scheduler.py)
+GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", "0"))  # jobs running at once; 0 = LLM router capacity
+GENERATION_FAIR_QUANTUM = 5  # questions a job runs before yielding to another user's job of the same class
+GENERATION_SECONDS_PER_QUESTION = 45  # wait estimate until a real per-question time has been observed
+
+# Rubric topic spread (see services/topic_allocation.py)
+TOPIC_ALLOCATION_CHUNK_HALF = 20  # indexed chunks at which a topic gets half its full content weight
+SUBTOPIC_CACHE_TTL_SECONDS = 600  # extracted subtopics reused across a rubric's units for the same topic
 
 # RAG Configuration
 EMBEDDING_MODEL = "nomic-embed-text"
 EMBEDDING_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ml_models", "all-MiniLM-L6-v2")
+EMBEDDING_CACHE_SIZE = 4096  # text -> vector entries kept by the shared EmbeddingService
 CHROMA_DB_PATH = "data/chroma_data"
+# "hybrid": dense + per-subject BM25 fused by reciprocal rank (VectorStore.query_hybrid); "dense": Chroma only
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+HYBRID_FETCH_K_FACTOR = 3  # candidates per side = k x this (dense-only MMR fetches k x 8)
+HYBRID_RRF_K = 60  # reciprocal rank fusion constant
+# Embedding storage for NEW subject collections: "float32" (Chroma), "float16" or "int8" (QuantizedIndex
+# scan + full-precision rescoring). Existing collections keep the mode they were created with.
+EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "float32")
+QUANTIZED_RESCORE_FACTOR = 4  # quantized scan keeps n x this candidates for exact rescoring down to n
 # RAG Configuration Paths (for clarity/compatibility)
 RAG_VECTOR_DB_PATH = CHROMA_DB_PATH
 CHUNKS_METADATA_PATH = "data/chroma_data/chroma.sqlite3"
 UPLOAD_DIR = "data/temp_uploads"
 
+# Few-shot sample store (per-topic FAISS indexes)
+# "ollama": OllamaEmbeddings(EMBEDDING_MODEL) over HTTP
+# "local": the shared in-process SentenceTransformer (EMBEDDING_MODEL_PATH), keeps Ollama free for generation
+# Each backend has its own index tree; after switching run: python -m scripts.reindex_sample_vectors
+SAMPLE_EMBEDDING_BACKEND = os.getenv("SAMPLE_EMBEDDING_BACKEND", "ollama")
+SAMPLE_INDEX_CACHE_SIZE = int(os.getenv("SAMPLE_INDEX_CACHE_SIZE", "8"))  # topics kept loaded in memory (LRU)
+SAMPLE_INDEX_MAX_SHARDS = 8  # append-only shards per topic before they are compacted into the base index
+SAMPLE_FEW_SHOT_K = 3  # few-shot examples per generation call
+SAMPLE_MMR_LAMBDA = 0.7  # 1.0 = most relevant only, lower = more diverse examples
+
 DIFFICULTY_LEVELS = ['easy', 'medium', 'hard']
@@ -1,12 +1,22 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Depends, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from .services.rag_service import RAGService
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 from sqlalchemy import func
 from .models import database, schemas
 from .services.question_generator import QuestionGenerator
 from .services.question_validator import QuestionValidator
+from .services.question_counter_service import question_counter_service
+from .services.report_rollup_service import report_rollup_service
+from .services.question_outcome_service import question_outcome_service
+from .services.vetting_service import vetting_service
+from .services.rag_context_store import rag_context_store
+from .services.model_residency import model_residency_manager
+from .services.llm_resilience import circuit_breakers, model_speed_tracker
+from .services.llm_router import llm_router
+from .services.generation_scheduler import generation_scheduler
+from . import config
 from .api.endpoints import subjects, topics, rubrics, vetting, reports, training, upload, outcomes
 import shutil
 import os
@@ -30,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # pagination cursor of GET /questions
 )
 
 app.include_router(subjects.router)
@@ -123,6 +134,22 @@ def startup():
     finally:
         db.close()
 
+    # Backfill / repair batch and subject question counters and the report rollup
+    db = database.SessionLocal()
+    try:
+        question_counter_service.reconcile(db)
+        question_outcome_service.ensure_backfilled(db)
+        report_rollup_service.ensure_backfilled(db)
+    except Exception as e:
+        logger.error(f"Counter reconciliation error: {e}")
+    finally:
+        db.close()
+
+@app.on_event("startup")
+async def warm_generation_model():
+    # Load the generation model in the background so the first request doesn't pay the cold start
+    asyncio.create_task(model_residency_manager.warm(config.GENERATION_MODEL, reason="startup"))
+
 @app.get("/")
 async def root():
     return {"status": "healthy", "service": "LMS-SIMATS API", "version": "1.0.0"}
@@ -149,14 +176,20 @@ async def health_check():
     ollama_status = await check_ollama_connection()
     chroma_status = check_chroma_connection()
     
+    breakers = circuit_breakers.snapshot()
     return {
-        "status": "healthy" if all([ollama_status, chroma_status]) else "degraded",
+        "status": "healthy" if all([ollama_status, chroma_status]) and not circuit_breakers.any_open() else "degraded",
         "components": {
             "api": True,
             "ollama": ollama_status,
             "chromadb": chroma_status,
             "database": True,
-        }
+        },
+        "models": model_residency_manager.status(),
+        "backends": llm_router.status(),
+        "scheduler": generation_scheduler.status(),
+        "circuits": breakers,
+        "model_speed": model_speed_tracker.snapshot()
     }
 
  
@@ -324,6 +357,7 @@ async def generate_questions(request: schemas.GenerateQuestionRequest, db: Sessi
             )
 
             db.add(new_q)
+            question_counter_service.record_insert(db, [new_q])
             db.commit()
             db.refresh(new_q)
             
@@ -347,32 +381,90 @@ async def generate_questions(request: schemas.GenerateQuestionRequest, db: Sessi
 
 # --- Question Management ---
 
-@app.get("/questions", response_model=List[schemas.QuestionSchema])
+@app.get("/questions", response_model=List[schemas.QuestionSchema], response_model_exclude_unset=True)
 async def list_questions(
+    response: Response,
     subject_id: Optional[int] = None, 
     status: Optional[str] = None,
+    cursor: Optional[int] = Query(None, description="Return questions with id greater than this"),
+    limit: int = Query(100, ge=1, le=500),
+    fields: Optional[str] = Query(None, description="Comma-separated fields; rag_context is opt-in"),
     db: Session = Depends(get_db)
 ):
-    query = db.query(database.Question)
+    """
+    Keyset-paginated question listing. The next page's cursor is returned in
+    the X-Next-Cursor header (absent on the last page).
+    """
+    selected = list(schemas.QUESTION_DEFAULT_FIELDS)
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in schemas.QUESTION_SELECTABLE_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        selected = list(schemas.QUESTION_REQUIRED_FIELDS) + [
+            f for f in requested if f not in schemas.QUESTION_REQUIRED_FIELDS
+        ]
+
+    query = db.query(database.Question).options(
+        load_only(*[getattr(database.Question, f) for f in selected])
+    )
     if subject_id:
         query = query.filter(database.Question.subject_id == subject_id)
     if status:
         query = query.filter(database.Question.status == status)
+    if cursor is not None:
+        query = query.filter(database.Question.id > cursor)
     
-    questions = query.all()
+    # Fetch one extra row to know whether another page exists
+    questions = query.order_by(database.Question.id).limit(limit + 1).all()
+    if len(questions) > limit:
+        questions = questions[:limit]
+        response.headers["X-Next-Cursor"] = str(questions[-1].id)
     
+    rag_contexts = []
+    if "rag_context" in selected:
+        rag_contexts = rag_context_store.load(db, [q.rag_context for q in questions])
+
     results = []
-    for q in questions:
-        q_dict = q.__dict__.copy()
-        if q.options:
+    for i, q in enumerate(questions):
+        q_dict = {f: getattr(q, f) for f in selected}
+        if q_dict.get("options"):
             try:
                 q_dict["options"] = json.loads(q.options)
             except:
                 q_dict["options"] = {}
+        if "rag_context" in q_dict:
+            q_dict["rag_context"] = rag_contexts[i]
         results.append(schemas.QuestionSchema(**q_dict))
         
     return results
 
+@app.get("/questions/{question_id}/provenance")
+async def get_question_provenance(question_id: int, db: Session = Depends(get_db)):
+    """Lazily fetch the RAG provenance (source context + reasoning) for one question"""
+    row = db.query(database.Question.id, database.Question.rag_context).filter(
+        database.Question.id == question_id
+    ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Question not found")
+    rag_context = rag_context_store.load_one(db, row.rag_context)
+    return {"id": row.id, "ragContext": rag_context, "rag_context": rag_context}
+
+
+@app.get("/questions/{question_id}/sources")
+async def get_question_sources(question_id: int, full: bool = False, db: Session = Depends(get_db)):
+    """
+    The source chunks a question was generated from, as {ref, page_number,
+    source, text}. Text is a short snippet unless full=true; chunks are
+    resolved by reference only for the question asked for.
+    """
+    row = db.query(database.Question.id, database.Question.rag_context).filter(
+        database.Question.id == question_id
+    ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Question not found")
+    return {"id": row.id, "sources": rag_context_store.sources(db, row.rag_context, full=full)}
+
 
 # --- Vetting ---
 # Endpoints handled by app.include_router(vetting.router)
@@ -179,14 +179,89 @@ class GeneratedBatch(Base):
     approved_count = Column(Integer, default=0)
     rejected_count = Column(Integer, default=0)
     pending_count = Column(Integer)
+    quarantined_count = Column(Integer, default=0)
     
-    status = Column(String, default="pending")  # pending, in_progress, complete
+    status = Column(String, default="pending")  # pending, in_progress, complete, cancelled
     
     # Relationships
     rubric = relationship("Rubric")
     questions = relationship("GeneratedQuestion", back_populates="batch")
 
 
+class SubjectQuestionStats(Base):
+    """Materialized per-subject question counters, maintained by QuestionCounterService"""
+    __tablename__ = "subject_question_stats"
+    
+    subject_id = Column(Integer, ForeignKey("subjects.id"), primary_key=True)
+    total_count = Column(Integer, default=0)
+    pending_count = Column(Integer, default=0)
+    approved_count = Column(Integer, default=0)
+    rejected_count = Column(Integer, default=0)
+    quarantined_count = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class QuestionOutcomeMapping(Base):
+    """
+    Normalized CO/LO mappings of a question (one row per code), derived from
+    Question.co_id / lo_id by QuestionOutcomeService so coverage and intensity
+    queries can GROUP BY in SQL instead of parsing strings per row.
+    """
+    __tablename__ = "question_outcome_mapping"
+    
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    kind = Column(String, primary_key=True)  # "co" or "lo"
+    outcome_code = Column(String, primary_key=True)  # CO1, LO1.2
+    intensity = Column(Integer, nullable=True)  # 1-3 when set by a vetter, else NULL
+    
+    __table_args__ = (
+        Index('idx_qom_kind_code', 'kind', 'outcome_code', 'question_id'),
+    )
+
+
+class QuestionReportRollup(Base):
+    """
+    Pre-aggregated question counts for /reports, maintained incrementally by
+    ReportRollupService. One row per (subject, topic, CO, status, bloom, day);
+    co_code '*' rows count each question once, other rows count per mapped CO.
+    Unknown topic/bloom/day are stored as 0/'' so the composite key stays unique.
+    """
+    __tablename__ = "question_report_rollup"
+    
+    subject_id = Column(Integer, primary_key=True)
+    topic_id = Column(Integer, primary_key=True)
+    co_code = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    bloom_level = Column(String, primary_key=True)
+    day = Column(String, primary_key=True)  # YYYY-MM-DD of status_changed_at
+    count = Column(Integer, default=0)
+    
+    __table_args__ = (
+        Index('idx_rollup_subject_status_co', 'subject_id', 'status', 'co_code'),
+    )
+
+
+class ChangeCounter(Base):
+    """Monotonic version per cache scope (e.g. the subject list); bumped by ChangeTracker on flush"""
+    __tablename__ = "change_counters"
+    
+    name = Column(String, primary_key=True)
+    version = Column(Integer, default=0)
+
+
+class RagContextChunk(Base):
+    """
+    Write-once, content-addressed store for the source snippets questions were
+    generated from (see RagContextStore). Questions generated from the same
+    chunks share one row instead of each copying the text into rag_context.
+    """
+    __tablename__ = "rag_context_chunks"
+
+    hash = Column(String, primary_key=True)  # vector-store chunk id, else sha256 prefix of the canonical JSON
+    content = Column(Text)  # JSON of one context item ({text, page_number, source} or a plain string)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Question(Base):
     __tablename__ = "questions"
 
@@ -211,9 +286,10 @@ class Question(Base):
     # Validation & Vetting
     status = Column(String, default="pending") # pending, approved, rejected, quarantined
     rejection_reason = Column(Text, nullable=True)
-    rag_context = Column(Text, nullable=True)  # JSON string of retrieved chunks
+    rag_context = Column(Text, nullable=True)  # JSON: {"context_refs": [{"id": RagContextChunk.hash, "page"}], "reasoning"}
     approval_feedback = Column(Text, nullable=True)  # JSON: positive notes
     validation_score = Column(Integer, nullable=True)
+    status_changed_at = Column(DateTime, nullable=True)  # Set on insert and on each vetting decision
     
     # Vetting Context
     batch_id = Column(String, ForeignKey("generated_batches.id"), nullable=True) # Link to batch
@@ -223,6 +299,8 @@ class Question(Base):
     
     __table_args__ = (
         Index('idx_question_status', 'status'),
+        Index('idx_question_batch_status', 'batch_id', 'status'),
+        Index('idx_question_rubric_status', 'rubric_id', 'status'),
         {'extend_existing': True}
     )
 
@@ -254,7 +332,7 @@ def init_db():
     # Auto-migration for schema updates
     try:
         from sqlalchemy import text
-        with engine.connect() as conn:
+        with engine.begin() as conn:
             # Check if title column exists in generated_batches
             result = conn.execute(text("PRAGMA table_info(generated_batches)"))
             columns = [row[1] for row in result.fetchall()]
@@ -262,6 +340,15 @@ def init_db():
             if "generated_batches" in Base.metadata.tables and "title" not in columns:
                 print("Migrating: Adding title column to generated_batches")
                 conn.execute(text("ALTER TABLE generated_batches ADD COLUMN title TEXT"))
+            if "generated_batches" in Base.metadata.tables and "quarantined_count" not in columns:
+                print("Migrating: Adding quarantined_count column to generated_batches")
+                conn.execute(text("ALTER TABLE generated_batches ADD COLUMN quarantined_count INTEGER DEFAULT 0"))
+
+            result = conn.execute(text("PRAGMA table_info(questions)"))
+            columns = [row[1] for row in result.fetchall()]
+            if columns and "status_changed_at" not in columns:
+                print("Migrating: Adding status_changed_at column to questions")
+                conn.execute(text("ALTER TABLE questions ADD COLUMN status_changed_at DATETIME"))
 
             # Check for weight column in topic_co_mapping
             result = conn.execute(text("PRAGMA table_info(topic_co_mapping)"))
@@ -284,5 +371,11 @@ def init_db():
                 print("Migrating: Adding bloom_level column to generated_questions")
                 conn.execute(text("ALTER TABLE generated_questions ADD COLUMN bloom_level TEXT"))
 
+        # Composite indexes for the vetting status aggregates (create_all skips existing tables)
+        with engine.begin() as conn:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_question_batch_status ON questions (batch_id, status)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_question_rubric_status ON questions (rubric_id, status)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_sample_topic_type ON sample_questions (topic_id, question_type)"))
+
     except Exception as e:
         print(f"Migration check failed: {e}")
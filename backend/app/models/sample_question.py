@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, ForeignKey, Index
 from datetime import datetime
 from .database import Base
 
 class SampleQuestion(Base):
     __tablename__ = 'sample_questions'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index('idx_sample_topic_type', 'topic_id', 'question_type'),
+        {'extend_existing': True},
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     subject_id = Column(Integer, ForeignKey('subjects.id'))
@@ -147,9 +147,20 @@ class QuestionSchema(BaseModel):
     lo_id: Optional[str] = None
     rejection_reason: Optional[str] = None
 
+    # Large provenance blob — only returned when requested via ?fields=...,rag_context
+    rag_context: Optional[Any] = None
+
     class Config:
         from_attributes = True
 
+# Columns always loaded for QuestionSchema (required fields + cursor key)
+QUESTION_REQUIRED_FIELDS = ("id", "question_text", "question_type", "difficulty", "marks", "status")
+# Default projection for GET /questions: every schema field except rag_context
+QUESTION_DEFAULT_FIELDS = QUESTION_REQUIRED_FIELDS + (
+    "options", "correct_answer", "validation_score", "topic_id", "co_id", "lo_id", "rejection_reason"
+)
+QUESTION_SELECTABLE_FIELDS = QUESTION_DEFAULT_FIELDS + ("rag_context",)
+
 class VettingActionRequest(BaseModel):
     reason: Optional[str] = None
     notes: Optional[str] = None
@@ -162,6 +173,12 @@ class GenerationStatusResponse(BaseModel):
     questions_validated: int
     # result: Optional[GenerationResultResponse] = None # Define if needed
     error: Optional[str] = None
+    # Scheduler info while the job is known to it (see GenerationScheduler.queue_info)
+    priority: Optional[str] = None
+    queue_position: Optional[int] = None  # 0 = running
+    estimated_wait_seconds: Optional[int] = None
+    # Rubric jobs: one entry per (section, topic) work unit
+    units: Optional[List[Dict[str, Any]]] = None
 
 class VettingBatchResponse(BaseModel):
     id: str
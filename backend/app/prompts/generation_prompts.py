@@ -113,6 +113,11 @@ def get_random_answer_letter() -> str:
     return _random.choice(['A', 'B', 'C', 'D'])
 
 # ─── Core Prompt Templates ────────────────────────────────────────────────
+# Layout: everything that is constant for a topic (instructions, CO/LO, Bloom
+# guidance, output format) comes first; per-call parts (few-shot blueprints,
+# which are selected per subtopic, then the novelty block, reference material
+# and task line) come last so Ollama can reuse the prompt's KV cache across
+# the per-question calls for one topic.
 
 MCQ_PROMPT_TEMPLATE = """
 You are an experienced university faculty member setting exam questions for {subject_name}.
@@ -190,11 +195,6 @@ OUTPUT FORMAT (strict JSON — reasoning MUST be filled):
 SHORT_ANSWER_PROMPT_TEMPLATE = """
 You are an experienced university faculty member setting exam questions for {subject_name}.
 
-REFERENCE MATERIAL:
-{rag_context}
-
-TASK: Generate EXACTLY 1 Short Answer Question based on the reference material above.
-
 CONSTRAINTS:
 Topic: {topic}
 Difficulty: {difficulty}
@@ -204,8 +204,6 @@ Learning Outcome: {lo_desc}
 
 {bloom_guidance}
 
-{novelty_exclusion}
-
 QUESTION QUALITY RULES:
 1. The question MUST test a specific concept from the reference material.
 2. The question FORMAT must match the Bloom level assigned above:
@@ -235,15 +233,17 @@ OUTPUT FORMAT (strict JSON — reasoning MUST be filled):
     }}
   ]
 }}
-"""
 
-ESSAY_PROMPT_TEMPLATE = """
-You are an experienced university faculty member setting exam questions for {subject_name}.
+{novelty_exclusion}
 
 REFERENCE MATERIAL:
 {rag_context}
 
-TASK: Generate EXACTLY 1 Essay/Long Answer Question based on the reference material above.
+TASK: Generate EXACTLY 1 Short Answer Question based on the reference material above.
+"""
+
+ESSAY_PROMPT_TEMPLATE = """
+You are an experienced university faculty member setting exam questions for {subject_name}.
 
 CONSTRAINTS:
 Topic: {topic}
@@ -254,8 +254,6 @@ Learning Outcome: {lo_desc}
 
 {bloom_guidance}
 
-{novelty_exclusion}
-
 QUESTION QUALITY RULES:
 1. The question MUST test a specific concept from the reference material.
 2. The question FORMAT must match the Bloom level assigned above:
@@ -292,6 +290,13 @@ OUTPUT FORMAT (strict JSON — reasoning MUST be filled):
     }}
   ]
 }}
+
+{novelty_exclusion}
+
+REFERENCE MATERIAL:
+{rag_context}
+
+TASK: Generate EXACTLY 1 Essay/Long Answer Question based on the reference material above.
 """
 
 
@@ -306,19 +311,8 @@ TOPIC: {topic_name}
 COURSE OUTCOMES: {co_desc}
 LEARNING OUTCOMES: {lo_desc}
 
-REFERENCE MATERIAL:
----
-{rag_context}
----
-
-{few_shot_section}
-
 {bloom_guidance}
 
-{novelty_exclusion}
-
-TASK: Generate EXACTLY {count} Multiple Choice Question(s).
-
 BANNED PHRASES — NEVER use these to start a question (instant fail):
 - "In the context of..."
 - "During the process of..."
@@ -408,7 +402,7 @@ OUTPUT FORMAT (strict JSON — reasoning MUST be filled):
       "question_text": "...",
       "question_type": "mcq",
       "options": {{"A": "...", "B": "...", "C": "...", "D": "..."}},
-      "correct_answer": "{example_answer}",
+      "correct_answer": "A|B|C|D",
       "explanation": "...",
       "bloom_level": "K3-Apply",
       "mapped_co": "{co_code}",
@@ -417,6 +411,17 @@ OUTPUT FORMAT (strict JSON — reasoning MUST be filled):
     }}
   ]
 }}
+
+{few_shot_section}
+
+{novelty_exclusion}
+
+REFERENCE MATERIAL:
+---
+{rag_context}
+---
+
+TASK: Generate EXACTLY {count} Multiple Choice Question(s). Make option "{example_answer}" the correct answer.
 '''
 
 
@@ -431,7 +436,8 @@ You MUST use these blueprints to understand the ARCHITECTURE of a good question,
 but you MUST NOT copy the clinical content. You must invent your own!
 
 """
-    for i, q in enumerate(sample_questions, 1):
+    # Stable order: the same sample set renders identically whatever order it was selected in
+    for i, q in enumerate(sorted(sample_questions, key=lambda sq: sq.get('question_text', '')), 1):
         q_text = q.get('question_text', '')
         
         # Determine archetype based on text
@@ -444,10 +450,12 @@ but you MUST NOT copy the clinical content. You must invent your own!
         examples += f"Blueprint {i}: {archetype}\n"
         
         if q.get('options'):
-            # Randomize which option is labeled as correct in the blueprint
-            correct_pos = _random.choice(['A', 'B', 'C', 'D'])
+            # Vary which option is labeled as correct per blueprint; seeded by the
+            # sample so the same samples always render the same (cacheable) section
+            rng = _random.Random(q_text)
+            correct_pos = rng.choice(['A', 'B', 'C', 'D'])
             other_labels = ['Common misconception/error', 'Outdated or universally incorrect approach', 'Plausible but completely wrong domain']
-            _random.shuffle(other_labels)
+            rng.shuffle(other_labels)
             label_idx = 0
             for letter in ['A', 'B', 'C', 'D']:
                 if letter == correct_pos:
@@ -545,11 +553,6 @@ OUTPUT FORMAT (strict JSON):
 ASSIGNMENT_PROMPT_TEMPLATE = """
 You are an experienced university faculty member creating assignments for {subject_name}.
 
-REFERENCE MATERIAL:
-{rag_context}
-
-TASK: Generate {count} assignment question(s) / task(s) for the topic "{topic}".
-
 These are ASSIGNMENT tasks — not exam questions. They should be:
 - Practical, applied, and in-depth
 - Suitable for take-home work (students have time to research and write)
@@ -578,6 +581,11 @@ OUTPUT FORMAT (strict JSON):
     }}
   ]
 }}
+
+REFERENCE MATERIAL:
+{rag_context}
+
+TASK: Generate {count} assignment question(s) / task(s) for the topic "{topic}".
 """
 
 
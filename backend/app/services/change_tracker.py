@@ -0,0 +1,71 @@
+import logging
+from typing import Dict, Iterable, Tuple, Type
+
+from sqlalchemy import event, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Query, Session
+
+from ..models.database import ChangeCounter, Subject, Topic, CourseOutcome, Question
+
+logger = logging.getLogger(__name__)
+
+# Scope backing the GET /subjects payload (subjects, their COs/topics, per-subject question totals)
+SUBJECT_LIST_SCOPE = "subject_list"
+
+
+class ChangeTracker:
+    """
+    Bumps a per-scope version in `change_counters` whenever a flush touches a
+    model that feeds that scope. The bump runs on the flushing connection, so
+    it commits (or rolls back) together with the change itself.
+
+    Endpoints derive ETags from get_version() and answer 304 when it hasn't moved.
+    Writes made with Query.update()/delete() bypass flush and are not counted;
+    delete through bulk_delete() (or call bump()) instead.
+    """
+
+    # scope -> (models where any insert/update/delete counts, models where only insert/delete counts)
+    SCOPES: Dict[str, Tuple[Tuple[Type, ...], Tuple[Type, ...]]] = {
+        SUBJECT_LIST_SCOPE: ((Subject, Topic, CourseOutcome), (Question,)),
+    }
+
+    def __init__(self):
+        event.listen(Session, "after_flush", self._after_flush)
+
+    def _touched_scopes(self, session: Session) -> Iterable[str]:
+        for scope, (any_change, membership) in self.SCOPES.items():
+            if any(isinstance(o, any_change + membership) for o in session.new) \
+                    or any(isinstance(o, any_change + membership) for o in session.deleted) \
+                    or any(isinstance(o, any_change) and session.is_modified(o) for o in session.dirty):
+                yield scope
+
+    def _after_flush(self, session: Session, flush_context):
+        for scope in self._touched_scopes(session):
+            self.bump(session, scope)
+
+    def bulk_delete(self, query: Query) -> int:
+        """Query.delete() that also bumps every scope fed by the query's model."""
+        model = query.column_descriptions[0]["entity"]
+        deleted = query.delete()
+        if deleted:
+            for scope, (any_change, membership) in self.SCOPES.items():
+                if issubclass(model, any_change + membership):
+                    self.bump(query.session, scope)
+        return deleted
+
+    def bump(self, db: Session, scope: str):
+        conn = db.connection()
+        conn.execute(
+            sqlite_insert(ChangeCounter).values(name=scope, version=0)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        conn.execute(
+            update(ChangeCounter).where(ChangeCounter.name == scope)
+            .values(version=ChangeCounter.version + 1)
+        )
+
+    def get_version(self, db: Session, scope: str) -> int:
+        return db.query(ChangeCounter.version).filter(ChangeCounter.name == scope).scalar() or 0
+
+
+change_tracker = ChangeTracker()
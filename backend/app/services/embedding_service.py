@@ -1,5 +1,7 @@
 from sentence_transformers import SentenceTransformer
-from typing import List
+from collections import OrderedDict
+from typing import Dict, List
+import threading
 import logging
 
 # Configure logging
@@ -7,20 +9,30 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EmbeddingService:
+    # Loaded models and text -> vector cache are shared by every instance, so
+    # RAG, validation and the sample store use one in-process model.
+    _models: Dict[str, SentenceTransformer] = {}
+    _cache: "OrderedDict[tuple, List[float]]" = OrderedDict()
+    _lock = threading.Lock()
+
     def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
         from app.config import EMBEDDING_MODEL_PATH
         import os
 
         try:
             # Check if local model exists
-            if os.path.exists(EMBEDDING_MODEL_PATH):
-                logger.info(f"Loading embedding model from local path: {EMBEDDING_MODEL_PATH}")
-                self.model = SentenceTransformer(EMBEDDING_MODEL_PATH)
-            else:
-                logger.warning(f"Local model not found at {EMBEDDING_MODEL_PATH}. Downloading from Hugging Face.")
-                self.model = SentenceTransformer(model_name)
-            
-            logger.info(f"Loaded embedding model: {model_name}")
+            source = EMBEDDING_MODEL_PATH if os.path.exists(EMBEDDING_MODEL_PATH) else model_name
+            self.model_key = source
+            with self._lock:
+                self.model = self._models.get(source)
+                if self.model is None:
+                    if source == EMBEDDING_MODEL_PATH:
+                        logger.info(f"Loading embedding model from local path: {EMBEDDING_MODEL_PATH}")
+                    else:
+                        logger.warning(f"Local model not found at {EMBEDDING_MODEL_PATH}. Downloading from Hugging Face.")
+                    self.model = SentenceTransformer(source)
+                    self._models[source] = self.model
+                    logger.info(f"Loaded embedding model: {model_name}")
         except Exception as e:
             logger.error(f"Failed to load embedding model {model_name}: {e}")
             raise
@@ -29,15 +41,40 @@ class EmbeddingService:
         """
         Generates embeddings for a list of texts.
 
+        Cached texts are served from memory; the rest are encoded in one batch.
+
         Args:
             texts (List[str]): List of texts to embed.
 
         Returns:
             List[List[float]]: List of embeddings.
         """
+        from app.config import EMBEDDING_CACHE_SIZE
+
         try:
-            embeddings = self.model.encode(texts)
-            return embeddings.tolist()
+            results: List = [None] * len(texts)
+            missing: Dict[str, List[int]] = {}
+            with self._lock:
+                for i, text in enumerate(texts):
+                    cached = self._cache.get((self.model_key, text))
+                    if cached is not None:
+                        self._cache.move_to_end((self.model_key, text))
+                        results[i] = cached
+                    else:
+                        missing.setdefault(text, []).append(i)
+
+            if missing:
+                to_encode = list(missing)
+                embeddings = self.model.encode(to_encode).tolist()
+                with self._lock:
+                    for text, vector in zip(to_encode, embeddings):
+                        for i in missing[text]:
+                            results[i] = vector
+                        self._cache[(self.model_key, text)] = vector
+                    while len(self._cache) > EMBEDDING_CACHE_SIZE:
+                        self._cache.popitem(last=False)
+
+            return results
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
             raise
@@ -4,8 +4,13 @@ from typing import Dict, Any, Optional, List
 import json
 import logging
 from datetime import datetime
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from ..models import schemas, database
+from .question_counter_service import question_counter_service
+from .model_residency import model_residency_manager
+from .generation_scheduler import generation_scheduler
+from .topic_allocation import topic_allocation_planner
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -14,22 +19,27 @@ logger = logging.getLogger(__name__)
 generation_status = {}
 
 class GenerationManager:
+    # Jobs are admitted by generation_scheduler: one job per LLM slot (a single
+    # 8GB host runs one at a time), interactive before rubric batches, and a
+    # running job can be preempted, paused or cancelled between questions.
+
     def __init__(self):
-        # Restriction for 8GB RAM: Only one generation process at a time
-        self._lock = None
+        self._tasks: Dict[str, asyncio.Task] = {}  # batch_id -> running job task
 
-    def _get_lock(self):
-        if self._lock is None:
-            self._lock = asyncio.Semaphore(1)
-        return self._lock
+    def _spawn(self, batch_id: str, coro):
+        task = asyncio.create_task(coro)
+        self._tasks[batch_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(batch_id, None))
 
-    async def start_quick_generation(self, params: schemas.QuickGenerateRequest, db: Session) -> str:
+    async def start_quick_generation(self, params: schemas.QuickGenerateRequest, db: Session,
+                                     user: Optional[str] = None) -> str:
         """
         Starts a quick generation task. 
         Questions are marked as is_reference=True and NOT sent to vetting.
         """
         batch_id = str(uuid4())
         self._init_status(batch_id)
+        ticket = generation_scheduler.ticket(batch_id, "interactive", user, total_steps=params.count)
         
         gen_params = schemas.GenerateQuestionRequest(
             subject_id=params.subject_id,
@@ -39,11 +49,12 @@ class GenerationManager:
             difficulty="medium"
         )
         
-        # Use sequential wrapper
-        asyncio.create_task(self._generate_batches_sequentially(batch_id, gen_params, db, is_reference=True))
+        # Use sequential wrapper; keep the generation model pinned until the job is done
+        model_residency_manager.job_queued()
+        self._spawn(batch_id, self._generate_batches_sequentially(batch_id, gen_params, db, is_reference=True, ticket=ticket))
         return batch_id
 
-    async def start_rubric_generation(self, rubric_id: str, db: Session) -> str:
+    async def start_rubric_generation(self, rubric_id: str, db: Session, user: Optional[str] = None) -> str:
         """
         Starts a rubric-based generation task.
         Reads rubric config, generates questions for all sections using real LLM + RAG.
@@ -58,7 +69,14 @@ class GenerationManager:
             generation_status[batch_id]["error"] = "Rubric not found"
             return batch_id
 
-        asyncio.create_task(self._generate_rubric_sequentially(batch_id, rubric, db))
+        try:
+            total_questions = sum(t["count"] for t in self._parse_sections(rubric.sections))
+        except Exception:
+            total_questions = 1  # the job itself reports the parse error
+        ticket = generation_scheduler.ticket(batch_id, "batch", user, total_steps=total_questions)
+
+        model_residency_manager.job_queued()
+        self._spawn(batch_id, self._generate_rubric_sequentially(batch_id, rubric, db, ticket=ticket))
         return batch_id
 
     def _init_status(self, batch_id: str):
@@ -70,14 +88,25 @@ class GenerationManager:
             "error": None,
         }
 
-    async def _generate_batches_sequentially(self, batch_id: str, params: schemas.GenerateQuestionRequest, db: Session, is_reference: bool):
-        lock = self._get_lock()
-        async with lock:
-             await self._generate_batch(batch_id, params, db, is_reference)
+    async def _generate_batches_sequentially(self, batch_id: str, params: schemas.GenerateQuestionRequest, db: Session,
+                                             is_reference: bool, ticket=None):
+        try:
+            async with generation_scheduler.slot(batch_id, ticket=ticket) as ticket:
+                if not await self._admitted(batch_id, ticket):
+                    return
+                await self._generate_batch(batch_id, params, db, is_reference, ticket=ticket)
+        except asyncio.CancelledError:
+            # Also reached when cancelled while still queued for the slot
+            generation_status[batch_id]["status"] = "cancelled"
+            raise
+        finally:
+            model_residency_manager.job_finished()
 
-    async def _generate_batch(self, batch_id: str, params: schemas.GenerateQuestionRequest, db: Session, is_reference: bool):
+    async def _generate_batch(self, batch_id: str, params: schemas.GenerateQuestionRequest, db: Session,
+                              is_reference: bool, ticket=None):
         """Generate a batch using TopicActionsService for real LLM generation."""
         session = database.SessionLocal()
+        saved_ids = []  # filled even if the job is aborted mid-question
         try:
             from ..services.topic_actions_service import topic_actions_service
             
@@ -89,12 +118,14 @@ class GenerationManager:
                 topic_id=params.topic_id,
                 question_type=params.question_type,
                 count=params.count,
-                difficulty=params.difficulty or "medium"
+                difficulty=params.difficulty or "medium",
+                checkpoint=ticket.checkpoint if ticket else None,
+                saved_ids=saved_ids
             )
             
             generated_ids = [q.id for q in result.get("questions", [])]
             
-            generation_status[batch_id]["status"] = "completed"
+            generation_status[batch_id]["status"] = "cancelled" if ticket and ticket.cancel_requested else "completed"
             generation_status[batch_id]["questions_generated"] = len(generated_ids)
             generation_status[batch_id]["progress"] = 100
             generation_status[batch_id]["result"] = {
@@ -102,6 +133,15 @@ class GenerationManager:
                 "question_ids": generated_ids
             }
             
+        except asyncio.CancelledError:
+            # Questions finished before the abort were saved by quick_generate_questions
+            generated_ids = list(saved_ids)
+            session.rollback()
+            generation_status[batch_id]["status"] = "cancelled"
+            generation_status[batch_id]["questions_generated"] = len(generated_ids)
+            generation_status[batch_id]["result"] = {"count": len(generated_ids), "question_ids": generated_ids}
+            logger.info(f"Quick generation {batch_id} cancelled after {len(generated_ids)} questions")
+            raise
         except Exception as e:
             generation_status[batch_id]["status"] = "failed"
             generation_status[batch_id]["error"] = str(e)
@@ -109,22 +149,44 @@ class GenerationManager:
         finally:
             session.close()
 
-    async def _generate_rubric_sequentially(self, batch_id: str, rubric: database.Rubric, db: Session):
-        lock = self._get_lock()
-        async with lock:
-            await self._generate_rubric_batch(batch_id, rubric, db)
+    async def _generate_rubric_sequentially(self, batch_id: str, rubric: database.Rubric, db: Session, ticket=None):
+        try:
+            async with generation_scheduler.slot(batch_id, ticket=ticket) as ticket:
+                if not await self._admitted(batch_id, ticket):
+                    return
+                await self._generate_rubric_batch(batch_id, rubric, db, ticket=ticket)
+        except asyncio.CancelledError:
+            # Also reached when cancelled while still queued for the slot
+            generation_status[batch_id]["status"] = "cancelled"
+            raise
+        finally:
+            model_residency_manager.job_finished()
+
+    @staticmethod
+    async def _admitted(batch_id: str, ticket) -> bool:
+        """False (and the job settled as cancelled) if it was cancelled while queued."""
+        if await generation_scheduler.gate(ticket):
+            return True
+        generation_status[batch_id]["status"] = "cancelled"
+        generation_status[batch_id]["result"] = {"count": 0, "question_ids": []}
+        logger.info(f"Job {batch_id} cancelled before it started")
+        return False
 
-    async def _generate_rubric_batch(self, batch_id: str, rubric: database.Rubric, db: Session):
+    async def _generate_rubric_batch(self, batch_id: str, rubric: database.Rubric, db: Session, ticket=None):
         """
         Generate questions from rubric using real RAG + Ollama.
         1) Parse rubric sections for question types/counts
         2) Get all topics for the subject
-        3) Generate real questions per section using TopicActionsService
+        3) Generate real questions per section using TopicActionsService,
+           sections in parallel (see _run_rubric_unit)
         """
         session = database.SessionLocal()
+        total_questions = 0
+        units = []
+        unit_tasks = []
+        saved_by_unit: Dict[int, List[int]] = {}  # unit -> its saved question ids, filled even if aborted
+        attached = set()  # units whose questions are on the batch
         try:
-            from ..services.topic_actions_service import topic_actions_service
-            from ..models import vetting_models
             from ..models.database import GeneratedBatch
             
             # Re-fetch rubric in this session to ensure it's attached
@@ -137,35 +199,8 @@ class GenerationManager:
             logger.info(f"Starting rubric generation for rubric {rubric.id}, subject {rubric.subject_id}")
             
             # 1) Parse sections (question distribution)
-            sections_raw = rubric.sections
-            if not sections_raw:
-                raise ValueError("Rubric has no sections/question_distribution configured")
-            
-            sections = json.loads(sections_raw) if isinstance(sections_raw, str) else sections_raw
-            logger.info(f"Parsed sections: {sections}")
-            
-            # Build generation tasks from sections
-            # sections can be dict like {"mcq": {"count": 20, "marks_each": 2}, ...}
-            # or array like [{"type": "mcq", "count": 20, ...}]
-            gen_tasks = []
-            if isinstance(sections, dict):
-                for q_type, config in sections.items():
-                    if isinstance(config, dict) and config.get("count", 0) > 0:
-                        gen_tasks.append({
-                            "question_type": self._normalize_question_type(q_type),
-                            "count": config["count"],
-                            "marks_each": config.get("marks_each", 1),
-                            "difficulty": config.get("difficulty", "medium") or "medium",
-                        })
-            elif isinstance(sections, list):
-                for s in sections:
-                    if s.get("count", 0) > 0:
-                        gen_tasks.append({
-                            "question_type": self._normalize_question_type(s.get("type", "mcq")),
-                            "count": s["count"],
-                            "marks_each": s.get("marks_each", s.get("marksEach", 1)),
-                            "difficulty": s.get("difficulty", "medium") or "medium",
-                        })
+            gen_tasks = self._parse_sections(rubric.sections)
+            logger.info(f"Parsed sections: {gen_tasks}")
             
             if not gen_tasks:
                 raise ValueError("No valid question types found in rubric sections")
@@ -194,92 +229,61 @@ class GenerationManager:
                 title=rubric.title,  # Populate title from Rubric
                 generated_by="Faculty",
                 total_questions=total_questions,
-                pending_count=total_questions,
+                pending_count=0,  # maintained by question_counter_service as questions land
                 status="in_progress"
             )
             session.add(batch)
             session.commit()
             
-            # 4) Per-topic RAG retrieval: each question type gets
-            #    context from its target topic (instead of one combined query)
-            from ..services.rag_service import RAGService
-            rag_service = RAGService()
+            # 4) One work unit per (section, topic): the planner spreads each
+            #    section across topics by CO weight, indexed content and current
+            #    coverage. Units share nothing but the batch, so each runs in its
+            #    own scheduler slot and DB session; with enough backend capacity
+            #    the rubric takes about as long as its longest unit.
+            from ..services.topic_actions_service import topic_actions_service
+            chunk_counts = topic_allocation_planner.chunk_counts(
+                topic_actions_service.vector_store, rubric.subject_id, topic_ids
+            )
+            units = [
+                {
+                    "unit": index,
+                    "question_type": planned["question_type"],
+                    "count": planned["count"],
+                    "marks_each": planned["marks_each"],
+                    "difficulty": planned.get("difficulty", "medium"),
+                    "topic_id": planned["topic_id"],
+                    "generated": 0,
+                    "status": "queued",
+                }
+                for index, planned in enumerate(
+                    topic_allocation_planner.plan(session, rubric.subject_id, gen_tasks, topic_ids, chunk_counts)
+                )
+            ]
+            generation_status[batch_id]["units"] = units
+            if ticket:
+                # The job's own slot only admitted it; the units queue for theirs
+                await generation_scheduler.release(ticket)
+            unit_tasks = [
+                asyncio.create_task(self._run_rubric_unit(
+                    batch_id, rubric.subject_id, unit, ticket, saved_ids=saved_by_unit.setdefault(unit["unit"], [])
+                ))
+                for unit in units
+            ]
             
-            # 5) Generate questions for each section type
+            # 5) Aggregate: this coroutine is the only writer of the batch. Each
+            #    unit's questions are moved onto it and committed as the unit lands.
             generated_ids = []
-            current_count = 0
-            topic_index = 0
             
-            for task in gen_tasks:
-                q_type = task["question_type"]
-                count = task["count"]
-                logger.info(f"Generating {count} {q_type} questions...")
-                
-                # Distribute across topics round-robin
-                target_topic_id = topic_ids[topic_index % len(topic_ids)] if topic_ids else None
-                topic_index += 1
-                
-                # Retrieve topic-specific context via MMR
-                target_topic = None
-                if target_topic_id:
-                    target_topic = next((t for t in topics if t.id == target_topic_id), None)
-                
-                topic_query = target_topic.name if target_topic else rubric.title
-                
-                try:
-                    result = await topic_actions_service.quick_generate_questions(
-                        db=session,
-                        subject_id=rubric.subject_id,
-                        topic_id=target_topic_id,
-                        question_type=q_type,
-                        count=count,
-                        difficulty=task.get("difficulty", "medium"),
-                        pre_retrieved_context=None  # Force per-question RAG retrieval for diverse contexts
-                    )
-                    
-                    # Safety: ensure result is a dict
-                    if not isinstance(result, dict):
-                        logger.warning(f"quick_generate_questions returned non-dict: {type(result)}")
-                        result = {"questions": []}
-                    
-                    questions = result.get("questions", [])
-                    
-                    if not questions:
-                        logger.warning(f"Generated 0 {q_type} questions. Skipping type.")
-                        continue
-
-                    # Process and save all generated questions
-                    for q in questions:
-                        # Update question with rubric/batch info
-                        q.rubric_id = str(rubric.id)
-                        q.batch_id = batch_id
-                        q.is_reference = 0  # These go to vetting
-                        q.status = "pending"
-                        q.marks = task["marks_each"]
-                        
-                        generated_ids.append(q.id)
-                        
-                    # Commit the batch
-                    session.commit()
-                    
-                    current_count += len(questions)
-                    generation_status[batch_id]["questions_generated"] = current_count
-                    generation_status[batch_id]["progress"] = int((current_count / total_questions) * 100)
-                    
-                    logger.info(f"Batch generated {len(questions)} {q_type} questions")
-                    
-                    # Yield control briefly
-                    await asyncio.sleep(0.1)
-                        
-                except Exception as e:
-                    logger.error(f"Error producing batch for {q_type}: {e}", exc_info=True)
-                    # Don't crash the whole rubric, just log and continue? 
-                    # Or maybe re-raise? Failing a whole section is bad but better than hanging.
-                    continue
-
-            # 5) Update batch status AND Rubric status
+            for finished in asyncio.as_completed(unit_tasks):
+                unit, question_ids = await finished
+                generated_ids += self._attach_unit(session, batch_id, rubric.id, unit, question_ids,
+                                                   total_questions, attached)
+
+            if ticket and ticket.cancelled:
+                raise asyncio.CancelledError()
+
+            # 6) Update batch status AND Rubric status
             batch.status = "complete"
-            batch.pending_count = len(generated_ids)
             
             # Update Rubric status to "generated" so frontend knows to show "View Questions"
             rubric_in_session.status = "generated"
@@ -296,13 +300,180 @@ class GenerationManager:
             
             logger.info(f"Rubric generation complete: {len(generated_ids)} questions generated")
         
+        except asyncio.CancelledError:
+            await self._stop_units(session, batch_id, rubric.id, units, unit_tasks, saved_by_unit,
+                                   total_questions, attached, "cancelled")
+            generation_status[batch_id]["status"] = "cancelled"
+            logger.info(f"Rubric generation {batch_id} cancelled after "
+                        f"{generation_status[batch_id]['questions_generated']} questions")
+            raise
         except Exception as e:
             generation_status[batch_id]["status"] = "failed"
             generation_status[batch_id]["error"] = str(e)
             logger.error(f"Rubric Gen Error: {e}", exc_info=True)
+            try:
+                await self._stop_units(session, batch_id, rubric.id, units, unit_tasks, saved_by_unit,
+                                       total_questions, attached, "failed")
+            except Exception as cleanup_error:
+                logger.error(f"Failed to close batch {batch_id} after error: {cleanup_error}", exc_info=True)
+        finally:
+            session.close()
+
+    async def _stop_units(self, session: Session, batch_id: str, rubric_id, units: List[Dict[str, Any]],
+                          unit_tasks: List[asyncio.Task], saved_by_unit: Dict[int, List[int]],
+                          total_questions: int, attached: set, status: str):
+        """
+        Stop a rubric's unit tasks and close its batch with `status`. Questions
+        the units already saved (units the aggregator hadn't got to, or aborted
+        mid-question) are standalone approved rows until moved: move them too.
+        """
+        for t in unit_tasks:
+            t.cancel()
+        await asyncio.gather(*unit_tasks, return_exceptions=True)
+        session.rollback()
+        for unit in units:
+            question_ids = saved_by_unit.get(unit["unit"])
+            if question_ids:
+                self._attach_unit(session, batch_id, rubric_id, unit, question_ids,
+                                  total_questions, attached)
+        self._close_batch(session, batch_id, status)
+
+    @staticmethod
+    def _attach_unit(session: Session, batch_id: str, rubric_id, unit: Dict[str, Any],
+                     question_ids: List[int], total_questions: int, attached: set) -> List[int]:
+        """Move one finished unit's questions onto the batch (once per unit); returns their ids."""
+        if unit["unit"] in attached:
+            return []
+        attached.add(unit["unit"])
+        if not question_ids:
+            logger.warning(f"Unit {unit['unit']} produced 0 {unit['question_type']} questions")
+            return []
+        questions = session.query(database.Question).filter(
+            database.Question.id.in_(question_ids)
+        ).all()
+
+        # Quick-gen saved these as standalone questions; move their
+        # counts onto this batch in the same commit as the reassignment
+        question_counter_service.record_delete(session, questions)
+
+        for q in questions:
+            # Update question with rubric/batch info
+            q.rubric_id = str(rubric_id)
+            q.batch_id = batch_id
+            q.is_reference = 0  # These go to vetting
+            q.status = "pending"
+            q.status_changed_at = datetime.utcnow()
+            q.marks = unit["marks_each"]
+
+        question_counter_service.record_insert(session, questions)
+        session.commit()
+
+        current_count = generation_status[batch_id]["questions_generated"] + len(questions)
+        generation_status[batch_id]["questions_generated"] = current_count
+        generation_status[batch_id]["progress"] = int((current_count / total_questions) * 100)
+        logger.info(f"Unit {unit['unit']} added {len(questions)} {unit['question_type']} questions")
+        return [q.id for q in questions]
+
+    async def _run_rubric_unit(self, batch_id: str, subject_id: int, unit: Dict[str, Any], parent=None,
+                               saved_ids: Optional[List[int]] = None):
+        """
+        Generate one rubric section for one topic in its own scheduler slot and
+        DB session. Returns (unit, saved question ids); the aggregator in
+        _generate_rubric_batch moves them onto the batch. `saved_ids` also
+        receives the ids of questions saved before an abort.
+        """
+        from ..services.topic_actions_service import topic_actions_service
+
+        job_id = f"{batch_id}/{unit['unit']}"
+        ticket = (generation_scheduler.child(parent, job_id, total_steps=unit["count"]) if parent
+                  else generation_scheduler.ticket(job_id, "batch", total_steps=unit["count"]))
+        session = database.SessionLocal()
+        try:
+            async with generation_scheduler.slot(job_id, ticket=ticket):
+                if not await generation_scheduler.gate(ticket):
+                    unit["status"] = "cancelled"
+                    return unit, []
+                unit["status"] = "running"
+
+                async def checkpoint():
+                    unit["generated"] += 1
+                    return await ticket.checkpoint()
+
+                result = await topic_actions_service.quick_generate_questions(
+                    db=session,
+                    subject_id=subject_id,
+                    topic_id=unit["topic_id"],
+                    question_type=unit["question_type"],
+                    count=unit["count"],
+                    difficulty=unit["difficulty"],
+                    pre_retrieved_context=None,  # Force per-question RAG retrieval for diverse contexts
+                    checkpoint=checkpoint,
+                    saved_ids=saved_ids
+                )
+            # Safety: ensure result is a dict
+            if not isinstance(result, dict):
+                logger.warning(f"quick_generate_questions returned non-dict: {type(result)}")
+                result = {"questions": []}
+            question_ids = [q.id for q in result.get("questions", [])]
+            unit["generated"] = len(question_ids)
+            unit["status"] = "cancelled" if ticket.cancelled else "done"
+            return unit, question_ids
+        except asyncio.CancelledError:
+            unit["status"] = "cancelled"
+            if saved_ids:
+                unit["generated"] = len(saved_ids)
+            raise
+        except Exception as e:
+            # Don't crash the whole rubric: the other units carry on
+            logger.error(f"Error producing unit {unit['unit']} ({unit['question_type']}): {e}", exc_info=True)
+            unit["status"] = "failed"
+            unit["error"] = str(e)
+            return unit, []
         finally:
             session.close()
 
+    @staticmethod
+    def _close_batch(session: Session, batch_id: str, status: str):
+        batch = session.query(database.GeneratedBatch).filter(database.GeneratedBatch.id == batch_id).first()
+        if not batch:
+            return
+        batch.total_questions = session.query(func.count(database.Question.id)).filter(
+            database.Question.batch_id == batch_id
+        ).scalar()
+        batch.status = status
+        session.commit()
+
+    @classmethod
+    def _parse_sections(cls, sections_raw) -> List[Dict[str, Any]]:
+        """Rubric sections -> [{question_type, count, marks_each, difficulty}]."""
+        if not sections_raw:
+            raise ValueError("Rubric has no sections/question_distribution configured")
+        
+        sections = json.loads(sections_raw) if isinstance(sections_raw, str) else sections_raw
+        
+        # sections can be dict like {"mcq": {"count": 20, "marks_each": 2}, ...}
+        # or array like [{"type": "mcq", "count": 20, ...}]
+        gen_tasks = []
+        if isinstance(sections, dict):
+            for q_type, config in sections.items():
+                if isinstance(config, dict) and config.get("count", 0) > 0:
+                    gen_tasks.append({
+                        "question_type": cls._normalize_question_type(q_type),
+                        "count": config["count"],
+                        "marks_each": config.get("marks_each", 1),
+                        "difficulty": config.get("difficulty", "medium") or "medium",
+                    })
+        elif isinstance(sections, list):
+            for s in sections:
+                if s.get("count", 0) > 0:
+                    gen_tasks.append({
+                        "question_type": cls._normalize_question_type(s.get("type", "mcq")),
+                        "count": s["count"],
+                        "marks_each": s.get("marks_each", s.get("marksEach", 1)),
+                        "difficulty": s.get("difficulty", "medium") or "medium",
+                    })
+        return gen_tasks
+
     @staticmethod
     def _normalize_question_type(q_type: str) -> str:
         """Normalize question type names to what TopicActionsService expects."""
@@ -316,8 +487,39 @@ class GenerationManager:
         }
         return mapping.get(q_type.lower(), q_type.lower())
 
+    def cancel(self, batch_id: str, abort_in_flight: bool = True) -> bool:
+        """
+        Cancel a queued, running or paused job. With abort_in_flight the job's
+        task is cancelled right away, which also aborts its Ollama request;
+        otherwise it stops at the next question boundary.
+        """
+        task = self._tasks.get(batch_id)
+        if task is None or task.done():
+            return False
+        generation_status[batch_id]["status"] = "cancelling"
+        generation_scheduler.cancel(batch_id)
+        if abort_in_flight:
+            task.cancel()
+        return True
+
+    def pause(self, batch_id: str) -> bool:
+        """Pause at the next question boundary; the job's slot is freed until resume."""
+        return batch_id in self._tasks and generation_scheduler.pause(batch_id)
+
+    def resume(self, batch_id: str) -> bool:
+        return batch_id in self._tasks and generation_scheduler.resume(batch_id)
+
     def get_status(self, batch_id: str) -> dict:
-        return generation_status.get(batch_id, {"error": "Batch not found"})
+        status = generation_status.get(batch_id)
+        if status is None:
+            return {"error": "Batch not found"}
+        ticket = generation_scheduler.tickets.get(batch_id)
+        if ticket is None:
+            return status
+        status = {**status, **generation_scheduler.queue_info(batch_id)}
+        if ticket.pause_requested and status["status"] in ("queued", "processing"):
+            status["status"] = "pausing" if ticket.active else "paused"
+        return status
 
 generation_manager = GenerationManager()
 
@@ -0,0 +1,314 @@
+import asyncio
+import itertools
+import time
+import logging
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from .. import config
+from .llm_router import llm_router
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first
+PRIORITY_CLASSES = {
+    "interactive": 0,  # faculty quick-generate, someone is waiting on the page
+    "batch": 1,        # rubric / exam generation
+    "training": 2,     # background work that can always wait
+}
+
+
+class Ticket:
+    """One job's place in the scheduler. `steps` are questions (preemption points)."""
+
+    def __init__(self, scheduler: "GenerationScheduler", job_id: str, priority: str,
+                 user: Optional[str], total_steps: int, parent: Optional["Ticket"] = None):
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority}")
+        self.scheduler = scheduler
+        self.job_id = job_id
+        self.priority = priority
+        self.rank = PRIORITY_CLASSES[priority]
+        self.user = user or "anonymous"
+        self.total_steps = max(1, total_steps)
+        self.steps_done = 0
+        self.steps_this_turn = 0
+        self.seq = 0
+        self.running = False
+        self.preemptions = 0
+        self.pause_requested = False
+        self.cancel_requested = False
+        self._resume: Optional[asyncio.Event] = None
+        # Work units of one job (see GenerationScheduler.child) follow its pause/cancel
+        self.parent = parent
+        self.children: List["Ticket"] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_requested or bool(self.parent and self.parent.cancel_requested)
+
+    @property
+    def pausing(self) -> bool:
+        return self.pause_requested or bool(self.parent and self.parent.pause_requested)
+
+    @property
+    def paused(self) -> bool:
+        return self._resume is not None
+
+    @property
+    def active(self) -> bool:
+        """Holding a slot itself or through one of its work units."""
+        return self.running or any(t.running for t in self.children)
+
+    @property
+    def remaining_steps(self) -> int:
+        return max(1, self.total_steps - self.steps_done)
+
+    async def checkpoint(self) -> bool:
+        """
+        Call between questions: lets a more urgent (or fairer) job take the slot
+        and parks the job while it is paused. Returns False once the job has
+        been cancelled: the caller should stop and keep what it has.
+        """
+        return await self.scheduler.checkpoint(self)
+
+
+class GenerationScheduler:
+    """
+    Admits generation jobs onto a fixed number of slots (default: the LLM
+    router's capacity, see GENERATION_CONCURRENCY).
+
+    Waiting jobs are ordered by priority class, then by how many slots their
+    user already holds and how many questions the user's jobs have already run
+    (fair sharing), then by arrival. A running job gives up its slot at its
+    next checkpoint (between questions, never mid-call) when a higher-priority
+    job is waiting, or - after GENERATION_FAIR_QUANTUM questions - when a job
+    of the same class from a user with no larger share is waiting.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self._concurrency = concurrency
+        self.waiting: List[Ticket] = []
+        self.running: List[Ticket] = []
+        self.tickets: Dict[str, Ticket] = {}
+        self.seconds_per_step: Optional[float] = None  # EMA of time per question
+        self.user_steps: Counter = Counter()  # questions run per user with jobs still pending
+        self._seq = itertools.count()
+        self._last_step_at: Dict[str, float] = {}
+        self._condition: Optional[asyncio.Condition] = None
+        self._condition_loop = None
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency or config.GENERATION_CONCURRENCY or llm_router.capacity
+
+    def _get_condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._condition_loop is not loop:
+            self._condition = asyncio.Condition()
+            self._condition_loop = loop
+        return self._condition
+
+    def ticket(self, job_id: str, priority: str = "batch", user: Optional[str] = None,
+               total_steps: int = 1) -> Ticket:
+        """Register a job so its queue position is visible before it starts waiting."""
+        ticket = Ticket(self, job_id, priority, user, total_steps)
+        ticket.seq = next(self._seq)
+        self.waiting.append(ticket)
+        self.tickets[job_id] = ticket
+        return ticket
+
+    def child(self, parent: Ticket, job_id: str, total_steps: int = 1) -> Ticket:
+        """
+        A work unit of `parent` that needs a slot of its own (e.g. one rubric
+        section run in parallel with the others). It queues like any job of the
+        parent's class and user, and honours the parent's pause and cancel.
+        """
+        ticket = Ticket(self, job_id, parent.priority, parent.user, total_steps, parent=parent)
+        ticket.seq = next(self._seq)
+        self.waiting.append(ticket)
+        self.tickets[job_id] = ticket
+        parent.children.append(ticket)
+        return ticket
+
+    def _order(self, ticket: Ticket):
+        user_slots = sum(1 for t in self.running if t.user == ticket.user)
+        return (ticket.rank, user_slots, self.user_steps[ticket.user], ticket.seq)
+
+    def _queue(self) -> List[Ticket]:
+        return sorted(self.waiting, key=self._order)
+
+    def _can_start(self, ticket: Ticket) -> bool:
+        if len(self.running) >= self.concurrency:
+            return False
+        free = self.concurrency - len(self.running)
+        return ticket in self._queue()[:free]
+
+    async def acquire(self, ticket: Ticket):
+        condition = self._get_condition()
+        async with condition:
+            if ticket not in self.waiting:
+                ticket.seq = next(self._seq)
+                self.waiting.append(ticket)
+            try:
+                await condition.wait_for(lambda: self._can_start(ticket))
+            except BaseException:
+                self.waiting.remove(ticket)
+                condition.notify_all()
+                raise
+            self.waiting.remove(ticket)
+            self.running.append(ticket)
+            ticket.running = True
+            ticket.steps_this_turn = 0
+            self._last_step_at[ticket.job_id] = time.monotonic()
+
+    async def release(self, ticket: Ticket):
+        condition = self._get_condition()
+        async with condition:
+            if ticket in self.running:
+                self.running.remove(ticket)
+            ticket.running = False
+            condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, job_id: str, priority: str = "batch", user: Optional[str] = None,
+                   total_steps: int = 1, ticket: Optional[Ticket] = None):
+        """Run a job under the scheduler; yields its Ticket (call ticket.checkpoint() between questions)."""
+        ticket = ticket or self.ticket(job_id, priority, user, total_steps)
+        try:
+            await self.acquire(ticket)
+            try:
+                yield ticket
+            finally:
+                await self.release(ticket)
+        finally:
+            self.tickets.pop(ticket.job_id, None)
+            self._last_step_at.pop(ticket.job_id, None)
+            if ticket.parent is not None and ticket in ticket.parent.children:
+                ticket.parent.children.remove(ticket)
+            if not any(t.user == ticket.user for t in self.tickets.values()):
+                self.user_steps.pop(ticket.user, None)
+
+    def _should_yield(self, ticket: Ticket) -> bool:
+        if not self.waiting:
+            return False
+        best = min(self.waiting, key=self._order)
+        if best.rank < ticket.rank:
+            return True
+        return (best.rank == ticket.rank and best.user != ticket.user
+                and ticket.steps_this_turn >= config.GENERATION_FAIR_QUANTUM
+                and self.user_steps[best.user] <= self.user_steps[ticket.user])
+
+    async def checkpoint(self, ticket: Ticket) -> bool:
+        now = time.monotonic()
+        last = self._last_step_at.get(ticket.job_id)
+        if last is not None:
+            elapsed = now - last
+            self.seconds_per_step = elapsed if self.seconds_per_step is None else (
+                self.seconds_per_step * 0.8 + elapsed * 0.2
+            )
+        self._last_step_at[ticket.job_id] = now
+        ticket.steps_done += 1
+        ticket.steps_this_turn += 1
+        self.user_steps[ticket.user] += 1
+        if not await self.gate(ticket):
+            return False
+        if not ticket.running or not self._should_yield(ticket):
+            return True
+        ticket.preemptions += 1
+        logger.info(f"Job {ticket.job_id} ({ticket.priority}) yields its slot after "
+                    f"{ticket.steps_done}/{ticket.total_steps} steps")
+        await self.release(ticket)
+        await self.acquire(ticket)
+        return True
+
+    async def gate(self, ticket: Ticket) -> bool:
+        """Wait out a pause; False once the job is cancelled. Does not count a step."""
+        if ticket.cancelled:
+            return False
+        if ticket.pausing:
+            return await self._park(ticket)
+        return True
+
+    async def _park(self, ticket: Ticket) -> bool:
+        """Paused: free the slot until resume(), then queue for it again."""
+        logger.info(f"Job {ticket.job_id} paused after {ticket.steps_done}/{ticket.total_steps} steps")
+        ticket._resume = asyncio.Event()
+        await self.release(ticket)
+        try:
+            await ticket._resume.wait()
+        finally:
+            ticket._resume = None
+        if ticket.cancelled:
+            return False
+        await self.acquire(ticket)
+        return True
+
+    def pause(self, job_id: str) -> bool:
+        """Pause a job at its next question boundary (it keeps its place in line)."""
+        ticket = self.tickets.get(job_id)
+        if ticket is None or ticket.cancel_requested:
+            return False
+        ticket.pause_requested = True
+        return True
+
+    def resume(self, job_id: str) -> bool:
+        ticket = self.tickets.get(job_id)
+        if ticket is None or not ticket.pause_requested:
+            return False
+        ticket.pause_requested = False
+        for t in [ticket] + ticket.children:
+            if t._resume is not None and not t.pausing:
+                t._resume.set()
+        return True
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop a job at its next question boundary (or right away if paused)."""
+        ticket = self.tickets.get(job_id)
+        if ticket is None:
+            return False
+        ticket.cancel_requested = True
+        for t in [ticket] + ticket.children:
+            if t._resume is not None:
+                t._resume.set()
+        return True
+
+    def queue_info(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Queue position (1-based, 0 = running) and estimated wait for a job."""
+        ticket = self.tickets.get(job_id)
+        if ticket is None:
+            return None
+        per_step = self.seconds_per_step or config.GENERATION_SECONDS_PER_QUESTION
+        if ticket.pausing and not ticket.active:
+            return {"priority": ticket.priority, "queue_position": None, "estimated_wait_seconds": None}
+        if ticket.active:
+            return {"priority": ticket.priority, "queue_position": 0, "estimated_wait_seconds": 0}
+        if ticket not in self.waiting:
+            # Handed its slot over to work units that are all still queued
+            waiting_children = [t for t in ticket.children if t in self.waiting]
+            if not waiting_children:
+                return {"priority": ticket.priority, "queue_position": 0, "estimated_wait_seconds": 0}
+            ticket = min(waiting_children, key=self._order)
+        queue = self._queue()
+        ahead = queue[:queue.index(ticket)]
+        # Running jobs of a lower class give up their slot at the next question
+        work = sum(t.remaining_steps if t.rank <= ticket.rank else 1 for t in self.running)
+        work += sum(t.remaining_steps for t in ahead)
+        return {
+            "priority": ticket.priority,
+            "queue_position": len(ahead) + 1,
+            "estimated_wait_seconds": round(work * per_step / self.concurrency),
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "running": [t.job_id for t in self.running],
+            "waiting": [t.job_id for t in self._queue()],
+            "by_class": dict(Counter(t.priority for t in self.waiting + self.running)),
+            "seconds_per_question": round(self.seconds_per_step, 1) if self.seconds_per_step else None,
+        }
+
+
+generation_scheduler = GenerationScheduler()
@@ -0,0 +1,179 @@
+import time
+import threading
+import logging
+from typing import Any, Dict, Optional
+
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without contacting the backend while its circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Per model/backend breaker: after `failure_threshold` consecutive failures
+    the circuit opens and calls fail fast for `reset_timeout` seconds; then one
+    trial call is let through (half-open). Success closes it, failure re-opens
+    it with the timeout doubled (up to `max_reset_timeout`).
+    """
+
+    def __init__(self, name: str,
+                 failure_threshold: int = config.LLM_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = config.LLM_BREAKER_RESET_SECONDS,
+                 max_reset_timeout: float = config.LLM_BREAKER_MAX_RESET_SECONDS,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Raise CircuitOpenError if calls should not be attempted right now."""
+        with self._lock:
+            if self.state == "open":
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(
+                        f"{self.name} circuit open ({self.last_error}); retry in "
+                        f"{self.reset_timeout - (self.clock() - self.opened_at):.0f}s"
+                    )
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open":
+                if self._trial_in_flight:
+                    raise CircuitOpenError(f"{self.name} circuit half-open: trial call in progress")
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"Circuit {self.name} closed")
+            self.state = "closed"
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give back the half-open trial slot of a call that was abandoned (no verdict on the host)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self, error: Any = None):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)[:200] if error is not None else self.last_error
+            if self.state == "half_open":
+                self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+                self._open()
+            elif self.state == "closed" and self.failures >= self.failure_threshold:
+                self._open()
+            self._trial_in_flight = False
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = self.clock()
+        logger.warning(f"Circuit {self.name} opened for {self.reset_timeout:.0f}s after "
+                       f"{self.failures} failures: {self.last_error}")
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == "open" and self.clock() - self.opened_at < self.reset_timeout
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": "open" if self.is_open else ("half_open" if self.state != "closed" else "closed"),
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "retry_in_seconds": max(0, round(self.reset_timeout - (self.clock() - self.opened_at)))
+            if self.is_open else 0,
+        }
+
+
+class CircuitBreakerRegistry:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(key)
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {key: b.snapshot() for key, b in self._breakers.items()}
+
+    def any_open(self) -> bool:
+        with self._lock:
+            return any(b.is_open for b in self._breakers.values())
+
+
+class ModelSpeedTracker:
+    """
+    Observed prompt-eval and generation tokens/sec per model (EMA), seeded from
+    MODEL_CAPABILITIES["avg_tokens_per_second"], used to size per-call timeouts.
+    """
+
+    ALPHA = 0.3
+
+    def __init__(self):
+        self._gen_tps: Dict[str, float] = {}
+        self._prompt_tps: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def generation_tps(self, model: str) -> float:
+        return self._gen_tps.get(model) or config.MODEL_CAPABILITIES.get(model, {}).get(
+            "avg_tokens_per_second", config.LLM_DEFAULT_TOKENS_PER_SECOND)
+
+    def prompt_tps(self, model: str) -> float:
+        # Prompt processing is batched, typically ~10x faster than generation
+        return self._prompt_tps.get(model) or self.generation_tps(model) * 10
+
+    def observe(self, model: str, response: Any):
+        if response is None:
+            return
+        with self._lock:
+            for count_key, duration_key, store in (
+                ("eval_count", "eval_duration", self._gen_tps),
+                ("prompt_eval_count", "prompt_eval_duration", self._prompt_tps),
+            ):
+                count, duration = response.get(count_key), response.get(duration_key)
+                # Skip tiny samples (e.g. KV-cache hits) that would inflate the rate
+                if not count or not duration or count < 16:
+                    continue
+                tps = count / (duration / 1e9)
+                previous = store.get(model)
+                store[model] = tps if previous is None else previous * (1 - self.ALPHA) + tps * self.ALPHA
+
+    def timeout_for(self, model: str, prompt_tokens: int, max_tokens: int, cold: bool = False) -> float:
+        """Expected duration x safety factor, plus load time for a non-resident model."""
+        expected = prompt_tokens / self.prompt_tps(model) + max_tokens / self.generation_tps(model)
+        timeout = config.LLM_TIMEOUT_BASE_SECONDS + expected * config.LLM_TIMEOUT_SAFETY_FACTOR
+        if cold:
+            timeout += config.LLM_MODEL_LOAD_SECONDS
+        return min(max(timeout, config.LLM_TIMEOUT_MIN_SECONDS), config.OLLAMA_TIMEOUT)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            model: {
+                "generation_tps": round(self.generation_tps(model), 1),
+                "prompt_tps": round(self.prompt_tps(model), 1),
+            }
+            for model in set(self._gen_tps) | set(self._prompt_tps)
+        }
+
+
+circuit_breakers = CircuitBreakerRegistry()
+model_speed_tracker = ModelSpeedTracker()
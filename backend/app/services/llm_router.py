@@ -0,0 +1,181 @@
+import asyncio
+import time
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import ollama
+
+from .. import config
+from .llm_resilience import CircuitOpenError, circuit_breakers
+
+logger = logging.getLogger(__name__)
+
+
+class Backend:
+    """One Ollama host: its client, concurrency limit and live load/latency."""
+
+    LATENCY_ALPHA = 0.3
+
+    def __init__(self, url: str, max_concurrency: int = 1):
+        self.url = url
+        self.max_concurrency = max(1, max_concurrency)
+        self.client = ollama.AsyncClient(host=url)
+        self.in_flight = 0
+        self.latency_ema: Optional[float] = None  # seconds per request
+        self.requests = 0
+        self.failures = 0
+        self.models: Set[str] = set()  # models this host has answered for (resident)
+
+    def breaker(self, model: str):
+        return circuit_breakers.get(f"{self.url}|{model}")
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.in_flight < self.max_concurrency
+
+    def load_score(self, default_latency: float) -> float:
+        """Expected time for a new request to finish here: queue depth x latency."""
+        return (self.in_flight + 1) / self.max_concurrency * (self.latency_ema or default_latency)
+
+    def record_success(self, model: str, seconds: float):
+        self.requests += 1
+        self.models.add(model)
+        self.latency_ema = seconds if self.latency_ema is None else (
+            self.latency_ema * (1 - self.LATENCY_ALPHA) + seconds * self.LATENCY_ALPHA
+        )
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "latency_ms": round(self.latency_ema * 1000) if self.latency_ema is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "models": sorted(self.models),
+        }
+
+
+class LLMRouter:
+    """
+    Dispatches LLM calls across several Ollama hosts.
+
+    Each call takes a slot on the least-loaded healthy backend: the one with the
+    lowest (in_flight + 1) / max_concurrency x recent latency, skipping hosts
+    whose circuit for the model is open. Calls wait when every healthy host is
+    at its concurrency limit. Callers retrying a failed call pass the hosts
+    already tried in `exclude` so the retry lands elsewhere when possible.
+
+    A `session` hint (see LLMService.query) sticks to the host that served it
+    last while that host has a free slot, so per-question calls sharing a prompt
+    prefix keep hitting the same KV cache.
+    """
+
+    def __init__(self, backends: Iterable[Union[str, Tuple[str, int]]] = None):
+        """`backends`: URLs or (url, max_concurrency) pairs; defaults to OLLAMA_BACKENDS."""
+        self.backends: List[Backend] = [
+            Backend(b) if isinstance(b, str) else Backend(*b)
+            for b in (backends or config.OLLAMA_BACKENDS)
+        ]
+        if not self.backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.affinity: "OrderedDict[str, str]" = OrderedDict()
+        self._condition: Optional[asyncio.Condition] = None
+        self._condition_loop = None
+
+    @property
+    def primary(self) -> Backend:
+        return self.backends[0]
+
+    @property
+    def capacity(self) -> int:
+        """Total concurrent calls the configured hosts accept."""
+        return sum(b.max_concurrency for b in self.backends)
+
+    def _get_condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._condition_loop is not loop:
+            self._condition = asyncio.Condition()
+            self._condition_loop = loop
+        return self._condition
+
+    def _pick(self, model: str, exclude: Set[str], session: Optional[str],
+              busy_trial: Set[str] = frozenset()) -> Optional[Backend]:
+        healthy = [b for b in self.backends if not b.breaker(model).is_open and b.url not in busy_trial]
+        if not healthy:
+            raise CircuitOpenError(f"All backends have an open circuit for {model}")
+        # Prefer hosts not yet tried for this call; reuse them only if nothing else is up
+        candidates = [b for b in healthy if b.url not in exclude] or healthy
+        free = [b for b in candidates if b.has_capacity]
+        if not free:
+            return None
+        sticky = self.affinity.get(session) if session else None
+        for b in free:
+            if b.url == sticky and b.url not in exclude:
+                return b
+        # Hosts without a latency sample yet are scored as the best known one, and
+        # ties go to the host with fewer requests, so every host gets measured
+        known = [b.latency_ema for b in self.backends if b.latency_ema is not None]
+        default_latency = min(known) if known else 1.0
+        return min(free, key=lambda b: (b.load_score(default_latency), b.requests))
+
+    @asynccontextmanager
+    async def slot(self, model: str, exclude: Optional[Set[str]] = None, session: Optional[str] = None):
+        """
+        Reserve a slot on the best backend for `model`; yields the Backend.
+        Raises CircuitOpenError when every host's circuit for the model is open.
+        """
+        exclude = exclude or set()
+        busy_trial: Set[str] = set()
+        condition = self._get_condition()
+        async with condition:
+            while True:
+                backend = self._pick(model, exclude, session, busy_trial)
+                if backend is not None:
+                    try:
+                        backend.breaker(model).allow()
+                    except CircuitOpenError:
+                        # Half-open host already running its trial call: use the others
+                        busy_trial.add(backend.url)
+                        continue
+                    break
+                await condition.wait()
+                busy_trial.clear()
+            backend.in_flight += 1
+
+        start = time.perf_counter()
+        try:
+            yield backend
+        except asyncio.CancelledError:
+            # Caller gave up (job cancelled): not the host's fault, but free a half-open trial
+            backend.breaker(model).release_trial()
+            raise
+        except BaseException:
+            backend.failures += 1
+            raise
+        else:
+            backend.record_success(model, time.perf_counter() - start)
+            if session:
+                self._remember(session, backend.url)
+        finally:
+            async with condition:
+                backend.in_flight -= 1
+                condition.notify_all()
+
+    def all_open(self, model: str) -> bool:
+        """True when no host would currently accept a call for `model`."""
+        return all(b.breaker(model).is_open for b in self.backends)
+
+    def _remember(self, session: str, url: str):
+        self.affinity.pop(session, None)
+        self.affinity[session] = url
+        while len(self.affinity) > config.LLM_ROUTER_AFFINITY_SESSIONS:
+            self.affinity.popitem(last=False)
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [b.status() for b in self.backends]
+
+
+llm_router = LLMRouter()
@@ -1,11 +1,17 @@
 
 import ollama
 import asyncio
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Union
 import json
+import random
 import re
 import logging
 from .. import config
+from .prompt_budget import token_counter
+from .model_residency import model_residency_manager
+from .llm_resilience import CircuitOpenError, model_speed_tracker
+from .llm_router import LLMRouter, llm_router
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -14,16 +20,47 @@ logger = logging.getLogger(__name__)
 class LLMService:
     _model_cache = {}  # Class-level cache for loaded models status (simplified)
 
-    def __init__(self):
-        self.client = ollama.AsyncClient(host=config.OLLAMA_BASE_URL)
+    MAX_TRACKED_SESSIONS = 256
+
+    def __init__(self, router: Optional[LLMRouter] = None):
+        # Generation calls go through the router (one or more Ollama hosts);
+        # model management (list/pull/chat) uses the primary host's client
+        self.router = router or llm_router
+        self.client = self.router.primary.client
         self.primary_model = config.PRIMARY_MODEL
         self.fallback_model = config.FALLBACK_MODEL
+        # session hint -> prompt-eval timings, to see how much of each prompt the server reused
+        self.session_stats: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         
-    async def query(self, prompt: str, model: str = None, max_tokens: int = 300, temperature: float = 0.7, timeout: int = 30, format: str = None) -> str:
+    async def query(
+        self,
+        prompt: str,
+        model: str = None,
+        max_tokens: int = 300,
+        temperature: float = 0.7,
+        timeout: int = 30,
+        format: str = None,
+        keep_alive: Optional[Union[str, int]] = None,
+        session: Optional[str] = None
+    ) -> str:
         """
         Query with timeout, retry, and performance options.
+
+        timeout: upper bound per attempt. The actual attempt timeout is sized from
+            the prompt/output token counts and the model's observed tokens/sec
+            (widened on each retry), so a stuck call fails in seconds, not minutes.
+        Each attempt is dispatched by the router to the least-loaded healthy host;
+        a failed attempt is retried on a different host when there is one. Each
+        host/model pair has a circuit breaker: once every host's circuit for the
+        model is open, calls raise CircuitOpenError immediately.
+        keep_alive: how long Ollama keeps the model (and its prompt cache) loaded;
+            defaults to the residency manager's (pinned while jobs are queued).
+        session: hint naming a run of calls that share a prompt prefix (e.g. one
+            topic's per-question generation); timings are aggregated per session.
         """
         model = model or self.primary_model
+        if keep_alive is None:
+            keep_alive = model_residency_manager.keep_alive()
         
         # Performance options
         options = {
@@ -39,44 +76,110 @@ class LLMService:
         if format == "json" and "qwen" in (model or "").lower():
             actual_prompt = prompt + "\n/no_think"
 
-        for attempt in range(3):
+        prompt_tokens = token_counter.count(actual_prompt)
+        attempts = config.LLM_MAX_ATTEMPTS
+        tried = set()
+
+        for attempt in range(attempts):
+            backend = None
             try:
-                response = await asyncio.wait_for(
-                    self.client.generate(
-                        model=model,
-                        prompt=actual_prompt,
-                        options=options,
-                        format=format,
-                        stream=False
-                    ),
-                    timeout=timeout
-                )
-                raw = response['response']
-                # Strip any residual <think>...</think> tags (closed or unclosed)
-                cleaned = re.sub(r'<think>[\s\S]*?</think>', '', raw)
-                # Also handle unclosed <think> (model ran out of tokens mid-thinking)
-                cleaned = re.sub(r'<think>[\s\S]*$', '', cleaned)
-                cleaned = cleaned.strip()
-                
-                if not cleaned and raw:
-                    logger.warning(f"Response was entirely thinking block ({len(raw)} chars). Stripping failed.")
-                    # Try to extract JSON from inside the thinking block as last resort
-                    json_in_think = re.search(r'\{[\s\S]*\}', raw)
-                    if json_in_think:
-                        cleaned = json_in_think.group(0)
-                        logger.info(f"Recovered JSON from thinking block ({len(cleaned)} chars)")
-                
-                return cleaned
+                # Raises CircuitOpenError when every host's circuit is open: fail fast, no sleep
+                async with self.router.slot(model, exclude=tried, session=session) as backend:
+                    expected = model_speed_tracker.timeout_for(
+                        model, prompt_tokens, max_tokens, cold=model not in backend.models
+                    )
+                    attempt_timeout = min(timeout, expected * (1.5 ** attempt))
+                    response = await asyncio.wait_for(
+                        backend.client.generate(
+                            model=model,
+                            prompt=actual_prompt,
+                            options=options,
+                            format=format,
+                            stream=False,
+                            keep_alive=keep_alive
+                        ),
+                        timeout=attempt_timeout
+                    )
+            except CircuitOpenError:
+                raise
             except asyncio.TimeoutError:
-                logger.warning(f"Timeout querying {model} (attempt {attempt+1}/3)")
-                if attempt == 2:
+                logger.warning(f"Timeout querying {model} on {backend.url} after {attempt_timeout:.0f}s "
+                               f"(attempt {attempt+1}/{attempts})")
+                backend.breaker(model).record_failure(f"timeout after {attempt_timeout:.0f}s")
+                tried.add(backend.url)
+                if attempt == attempts - 1:
                     raise
-                await asyncio.sleep(2 ** attempt)
+                await self._before_retry(attempt, tried)
+                continue
             except Exception as e:
-                logger.error(f"Error querying {model}: {e}")
-                if attempt == 2:
+                if backend is None:
                     raise
-                await asyncio.sleep(1)
+                logger.error(f"Error querying {model} on {backend.url}: {e}")
+                backend.breaker(model).record_failure(e)
+                tried.add(backend.url)
+                if attempt == attempts - 1:
+                    raise
+                await self._before_retry(attempt, tried)
+                continue
+
+            backend.breaker(model).record_success()
+            raw = response['response']
+            model_residency_manager.observe(model, response, url=backend.url)
+            model_speed_tracker.observe(model, response)
+            # Calibrate prompt token estimates against the server's count
+            token_counter.observe(len(actual_prompt), response.get('prompt_eval_count'))
+            if session:
+                self._record_session(session, response)
+            # Strip any residual <think>...</think> tags (closed or unclosed)
+            cleaned = re.sub(r'<think>[\s\S]*?</think>', '', raw)
+            # Also handle unclosed <think> (model ran out of tokens mid-thinking)
+            cleaned = re.sub(r'<think>[\s\S]*$', '', cleaned)
+            cleaned = cleaned.strip()
+            
+            if not cleaned and raw:
+                logger.warning(f"Response was entirely thinking block ({len(raw)} chars). Stripping failed.")
+                # Try to extract JSON from inside the thinking block as last resort
+                json_in_think = re.search(r'\{[\s\S]*\}', raw)
+                if json_in_think:
+                    cleaned = json_in_think.group(0)
+                    logger.info(f"Recovered JSON from thinking block ({len(cleaned)} chars)")
+            
+            return cleaned
+
+    async def _before_retry(self, attempt: int, tried: set):
+        # Another host is untried: go there straight away. Otherwise back off.
+        if len(tried) >= len(self.router.backends):
+            await asyncio.sleep(self._backoff(attempt))
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Exponential backoff with full jitter, so concurrent retries don't re-align."""
+        return random.uniform(0, min(8.0, 2 ** attempt))
+
+    def _record_session(self, session: str, response):
+        stats = self.session_stats.pop(session, None) or {
+            "calls": 0, "prompt_eval_count": 0, "prompt_eval_duration_ns": 0, "eval_count": 0,
+        }
+        stats["calls"] += 1
+        stats["prompt_eval_count"] += response.get('prompt_eval_count') or 0
+        stats["prompt_eval_duration_ns"] += response.get('prompt_eval_duration') or 0
+        stats["eval_count"] += response.get('eval_count') or 0
+        stats["last_prompt_eval_count"] = response.get('prompt_eval_count') or 0
+        self.session_stats[session] = stats
+        while len(self.session_stats) > self.MAX_TRACKED_SESSIONS:
+            self.session_stats.popitem(last=False)
+
+    def get_session_stats(self, session: str) -> Optional[Dict[str, Any]]:
+        """Aggregated prompt-eval timings for a session hint, with per-call averages."""
+        stats = self.session_stats.get(session)
+        if not stats:
+            return None
+        calls = stats["calls"]
+        return {
+            **stats,
+            "avg_prompt_eval_count": stats["prompt_eval_count"] / calls,
+            "avg_prompt_eval_ms": stats["prompt_eval_duration_ns"] / calls / 1e6,
+        }
 
     async def generate(
         self,
@@ -86,7 +189,9 @@ class LLMService:
         max_tokens: int = 2000,
         expect_json: bool = True,
         retry_on_fail: bool = True,
-        format: str = None 
+        format: str = None,
+        keep_alive: Optional[Union[str, int]] = None,
+        session: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate response with:
@@ -103,7 +208,9 @@ class LLMService:
                 max_tokens=max_tokens,
                 temperature=temperature,
                 timeout=config.OLLAMA_TIMEOUT,
-                format="json" if expect_json or format == "json" else None
+                format="json" if expect_json or format == "json" else None,
+                keep_alive=keep_alive,
+                session=session
             )
             
             if expect_json:
@@ -115,7 +222,11 @@ class LLMService:
             
         except Exception as e:
             logger.error(f"Generation failed with {model}: {e}")
-            if retry_on_fail and model != self.fallback_model and self.fallback_model != self.primary_model:
+            if (retry_on_fail and model != self.fallback_model and self.fallback_model != self.primary_model
+                    and not self.router.all_open(self.fallback_model)
+                    # An open primary circuit means it's failing anyway: no residency to protect
+                    and (isinstance(e, CircuitOpenError)
+                         or await model_residency_manager.allow_fallback(model, self.fallback_model))):
                 logger.info(f"Retrying with fallback model: {self.fallback_model}")
                 return await self.generate(
                     prompt=prompt,
@@ -124,7 +235,9 @@ class LLMService:
                     max_tokens=max_tokens,
                     expect_json=expect_json,
                     retry_on_fail=False,
-                    format=format
+                    format=format,
+                    keep_alive=keep_alive,
+                    session=session
                 )
             raise
     
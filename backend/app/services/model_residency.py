@@ -0,0 +1,164 @@
+import asyncio
+import time
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set, Union
+
+from .. import config
+from .llm_router import Backend, LLMRouter, llm_router
+
+logger = logging.getLogger(__name__)
+
+
+class ModelResidencyManager:
+    """
+    Keeps the generation model loaded on every Ollama host of the router and
+    reports when it is not.
+
+    - warm(): loads a model with an empty prompt on each host (startup, or before a job).
+    - job_queued()/job_finished(): while any generation job is queued or running,
+      keep_alive() returns OLLAMA_PINNED_KEEP_ALIVE so the model is never
+      unloaded between calls; the last job to finish re-applies the normal
+      OLLAMA_KEEP_ALIVE.
+    - loaded_models(): each host's /api/ps, cached per host for OLLAMA_PS_CACHE_SECONDS.
+    - allow_fallback(): refuses a primary -> fallback switch that would evict a
+      resident primary because both models don't fit in OLLAMA_MODEL_MEMORY_GB.
+    - observe(): records cold starts from each response's load_duration.
+    """
+
+    MAX_EVENTS = 50
+
+    def __init__(self, router: Optional[LLMRouter] = None):
+        self.router = router or llm_router
+        self.pinned_jobs = 0
+        self.cold_starts: deque = deque(maxlen=self.MAX_EVENTS)
+        self.cold_start_count = 0
+        self.cold_start_seconds = 0.0
+        self.fallbacks_refused = 0
+        self._loaded: Dict[str, Set[str]] = {}  # host url -> resident models
+        self._loaded_at: Dict[str, float] = {}
+
+    # --- keep_alive / pinning ---
+
+    def keep_alive(self) -> Union[str, int]:
+        return config.OLLAMA_PINNED_KEEP_ALIVE if self.pinned_jobs > 0 else config.OLLAMA_KEEP_ALIVE
+
+    def job_queued(self, model: str = config.GENERATION_MODEL):
+        self.pinned_jobs += 1
+        if self.pinned_jobs == 1:
+            self._spawn(self.warm(model, reason="job queued"))
+
+    def job_finished(self, model: str = config.GENERATION_MODEL):
+        self.pinned_jobs = max(0, self.pinned_jobs - 1)
+        if self.pinned_jobs == 0:
+            # Unpin: re-issue the normal keep_alive so the model can idle out
+            self._spawn(self._touch(model, config.OLLAMA_KEEP_ALIVE))
+
+    @staticmethod
+    def _spawn(coro):
+        try:
+            asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()  # no loop (sync caller/tests): nothing to warm
+
+    async def _touch(self, model: str, keep_alive):
+        async def touch(backend: Backend):
+            try:
+                await backend.client.generate(model=model, prompt="", keep_alive=keep_alive)
+            except Exception as e:
+                logger.warning(f"Failed to update keep_alive for {model} on {backend.url}: {e}")
+        await asyncio.gather(*(touch(b) for b in self.router.backends))
+
+    # --- residency ---
+
+    async def loaded_models(self, refresh: bool = False, url: Optional[str] = None) -> Set[str]:
+        """Models resident on the host `url`, or on any host when url is None."""
+        backends = [b for b in self.router.backends if url is None or b.url == url]
+        await asyncio.gather(*(self._refresh(b, refresh) for b in backends))
+        return set().union(*(self._loaded.get(b.url, set()) for b in backends))
+
+    async def _refresh(self, backend: Backend, force: bool):
+        if not force and time.monotonic() - self._loaded_at.get(backend.url, 0.0) <= config.OLLAMA_PS_CACHE_SECONDS:
+            return
+        try:
+            resp = await backend.client.ps()
+            self._loaded[backend.url] = {m.get("model") or m.get("name") for m in resp.get("models", [])}
+        except Exception as e:
+            logger.warning(f"Ollama /api/ps failed on {backend.url}: {e}")
+            self._loaded[backend.url] = set()
+        self._loaded_at[backend.url] = time.monotonic()
+
+    async def warm(self, model: str = config.GENERATION_MODEL, reason: str = "startup") -> Optional[float]:
+        """Load `model` on every host if needed; returns the slowest load in seconds (None if all failed)."""
+        async def warm_one(backend: Backend) -> Optional[float]:
+            start = time.perf_counter()
+            try:
+                response = await backend.client.generate(model=model, prompt="", keep_alive=self.keep_alive())
+            except Exception as e:
+                logger.warning(f"Failed to warm {model} on {backend.url}: {e}")
+                return None
+            self.observe(model, response, reason=reason, url=backend.url)
+            elapsed = time.perf_counter() - start
+            logger.info(f"Model {model} warm on {backend.url} ({reason}) in {elapsed:.2f}s")
+            return elapsed
+
+        times = [t for t in await asyncio.gather(*(warm_one(b) for b in self.router.backends)) if t is not None]
+        return max(times) if times else None
+
+    @staticmethod
+    def model_memory_gb(model: str) -> float:
+        return config.MODEL_CAPABILITIES.get(model, {}).get("memory_gb", config.OLLAMA_MODEL_MEMORY_GB)
+
+    def fits_together(self, models: Iterable[str]) -> bool:
+        return sum(self.model_memory_gb(m) for m in set(models)) <= config.OLLAMA_MODEL_MEMORY_GB
+
+    async def allow_fallback(self, primary: str, fallback: str) -> bool:
+        """
+        Whether switching from `primary` to `fallback` is worth it. If both can't
+        be resident and the primary is loaded, the switch would evict it and the
+        next call would cold-load it back — so retry the primary instead.
+        """
+        if self.fits_together([primary, fallback]):
+            return True
+        # The router may send the fallback call to any host whose circuit for it is closed
+        hosts = [b for b in self.router.backends if not b.breaker(fallback).is_open] or self.router.backends
+        for backend in hosts:
+            if primary not in await self.loaded_models(url=backend.url):
+                return True  # a host without a resident primary (failed to load?): nothing to thrash there
+        self.fallbacks_refused += 1
+        logger.warning(f"Not falling back {primary} -> {fallback}: both don't fit in "
+                       f"{config.OLLAMA_MODEL_MEMORY_GB} GB and {primary} is resident on every host")
+        return False
+
+    def observe(self, model: str, response: Any, reason: str = "request", url: Optional[str] = None):
+        """Record a cold start if the host (`url`, default the primary) had to load the model for this response."""
+        load_seconds = (response.get("load_duration") or 0) / 1e9 if response is not None else 0
+        self._loaded.setdefault(url or self.router.primary.url, set()).add(model)
+        if load_seconds < config.COLD_START_THRESHOLD_SECONDS:
+            return
+        self.cold_start_count += 1
+        self.cold_start_seconds += load_seconds
+        self.cold_starts.append({
+            "model": model,
+            "host": url or self.router.primary.url,
+            "seconds": round(load_seconds, 2),
+            "reason": reason,
+            "at": datetime.utcnow().isoformat(),
+        })
+        logger.warning(f"Cold start: {model} took {load_seconds:.1f}s to load ({reason})")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "loaded": sorted(set().union(*self._loaded.values())),
+            "loaded_by_host": {url: sorted(models) for url, models in self._loaded.items()},
+            "pinned_jobs": self.pinned_jobs,
+            "keep_alive": self.keep_alive(),
+            "cold_starts": self.cold_start_count,
+            "cold_start_seconds": round(self.cold_start_seconds, 2),
+            "recent_cold_starts": list(self.cold_starts)[-10:],
+            "fallbacks_refused": self.fallbacks_refused,
+        }
+
+
+model_residency_manager = ModelResidencyManager()
@@ -0,0 +1,69 @@
+import json
+import re
+from typing import List, Optional, Tuple
+
+_CODE_PATTERNS = {
+    "co": re.compile(r"\bCO\s*-?\s*(\d+)", re.IGNORECASE),
+    "lo": re.compile(r"\bLO\s*-?\s*(\d+(?:\.\d+)*)", re.IGNORECASE),
+}
+
+
+def parse_outcome_mappings(value, kind: str = "co") -> List[Tuple[str, Optional[int]]]:
+    """
+    Normalize a stored Question.co_id / lo_id value into [(code, intensity)].
+
+    Handles the formats the app writes today:
+    - vetter adjustments: JSON '[{"co_code": "CO1", "intensity": 3}, ...]'
+      (intensity 0 means "not mapped" and is dropped)
+    - LLM / topic fallbacks: "CO1", "CO1, CO3", "CO2 (High Priority): ..."
+    Codes are upper-cased and de-duplicated in first-seen order; intensity is
+    None when the source didn't carry one.
+    """
+    if value is None or value == "":
+        return []
+
+    if isinstance(value, str):
+        stripped = value.strip()
+        if stripped.startswith("[") or stripped.startswith("{"):
+            try:
+                value = json.loads(stripped)
+            except ValueError:
+                pass
+
+    results: List[Tuple[str, Optional[int]]] = []
+    seen = set()
+
+    def _add(code: str, intensity: Optional[int]):
+        if code not in seen:
+            seen.add(code)
+            results.append((code, intensity))
+
+    if isinstance(value, dict):
+        value = [value]
+
+    if isinstance(value, list):
+        for item in value:
+            if isinstance(item, dict):
+                raw_code = item.get(f"{kind}_code") or item.get("code") or ""
+                intensity = item.get("intensity")
+                try:
+                    intensity = int(intensity) if intensity is not None else None
+                except (TypeError, ValueError):
+                    intensity = None
+                if intensity == 0:
+                    continue
+                for code in _extract_codes(str(raw_code), kind):
+                    _add(code, intensity)
+            elif item is not None:
+                for code in _extract_codes(str(item), kind):
+                    _add(code, None)
+        return results
+
+    for code in _extract_codes(str(value), kind):
+        _add(code, None)
+    return results
+
+
+def _extract_codes(text: str, kind: str) -> List[str]:
+    prefix = kind.upper()
+    return [f"{prefix}{num}" for num in _CODE_PATTERNS[kind].findall(text)]
@@ -5,6 +5,7 @@ from typing import List, Dict, Any
 from sqlalchemy.orm import Session
 from ..models.database import Topic, CourseOutcome, LearningOutcome, TopicCOMapping, topic_lo_association
 from ..services.llm_service import LLMService
+from .topic_outcome_cache import topic_outcome_cache
 from .. import config
 
 logger = logging.getLogger(__name__)
@@ -84,6 +85,8 @@ Respond in JSON format:
                 db.add(mapping)
         
         db.commit()
+        for t_id in topic_ids:
+            topic_outcome_cache.invalidate(t_id)
     
     def bulk_map_with_weights(self, db: Session, co_id: int, topic_mappings: list):
         """Map multiple topics to a CO with per-topic weights. Replaces all existing mappings for this CO."""
@@ -100,10 +103,13 @@ Respond in JSON format:
             db.add(new_mapping)
         
         db.commit()
+        # Previously mapped topics may have lost this CO, so drop everything
+        topic_outcome_cache.invalidate()
     
     def remove_mapping(self, db: Session, co_id: int, topic_id: int):
         db.query(TopicCOMapping).filter_by(topic_id=topic_id, course_outcome_id=co_id).delete()
         db.commit()
+        topic_outcome_cache.invalidate(topic_id)
 
     # ── LO Mapping Methods ──
 
@@ -173,6 +179,7 @@ Respond in JSON format:
             )
 
         db.commit()
+        topic_outcome_cache.invalidate()
 
     def remove_lo_mapping(self, db: Session, lo_id: int, topic_id: int):
         from sqlalchemy import delete
@@ -183,5 +190,6 @@ Respond in JSON format:
             )
         )
         db.commit()
+        topic_outcome_cache.invalidate(topic_id)
 
 outcome_mapping_service = OutcomeMappingService()
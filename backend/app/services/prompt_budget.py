@@ -0,0 +1,193 @@
+"""
+Token-budgeted prompt assembly.
+
+Every generation prompt is a template plus optional parts (skill text, few-shot
+section, novelty block) plus ranked RAG chunks. The planner counts tokens for
+each part, fits them into OLLAMA_CONTEXT_SIZE minus the output reservation,
+trims optional parts and drops the lowest-ranked chunks first, and returns a
+per-call report of where the budget went. Ollama silently truncates prompts
+that exceed num_ctx, which is what used to cut off the JSON instructions.
+"""
+import math
+import os
+import threading
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCounter:
+    """
+    Counts tokens with the generation model's tokenizer when its files are
+    available locally (config.GENERATION_TOKENIZER_PATH), otherwise estimates
+    from characters. The estimate is calibrated from Ollama's prompt_eval_count
+    via `observe`.
+    """
+
+    MIN_CHARS_PER_TOKEN = 2.0
+    MAX_CHARS_PER_TOKEN = 6.0
+
+    def __init__(self, tokenizer_path: Optional[str] = config.GENERATION_TOKENIZER_PATH,
+                 chars_per_token: float = 3.2):
+        self.chars_per_token = chars_per_token
+        self._lock = threading.Lock()
+        self.tokenizer = None
+        if tokenizer_path and os.path.exists(os.path.join(tokenizer_path, "tokenizer.json")):
+            try:
+                from tokenizers import Tokenizer
+                self.tokenizer = Tokenizer.from_file(os.path.join(tokenizer_path, "tokenizer.json"))
+                logger.info(f"Prompt budgeting with tokenizer from {tokenizer_path}")
+            except Exception as e:
+                logger.warning(f"Could not load tokenizer from {tokenizer_path}, estimating tokens: {e}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def observe(self, prompt_chars: int, prompt_tokens: Optional[int]):
+        """Calibrate the estimate from a real prompt_eval_count."""
+        if self.tokenizer is not None or not prompt_tokens or prompt_chars <= 0:
+            return
+        ratio = prompt_chars / prompt_tokens
+        # A KV-cache hit reports only the uncached suffix; those samples are out of range
+        if not (self.MIN_CHARS_PER_TOKEN <= ratio <= self.MAX_CHARS_PER_TOKEN):
+            return
+        with self._lock:
+            self.chars_per_token = self.chars_per_token * 0.8 + ratio * 0.2
+
+    def trim(self, text: str, max_tokens: int) -> str:
+        """Cut `text` to at most `max_tokens`, preferring a sentence or line boundary."""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        if self.tokenizer is not None:
+            encoding = self.tokenizer.encode(text, add_special_tokens=False)
+            cut = text[:encoding.offsets[max_tokens - 1][1]]
+        else:
+            cut = text[:int(max_tokens * self.chars_per_token)]
+        boundary = max(cut.rfind("\n"), cut.rfind(". "))
+        if boundary > len(cut) // 2:
+            cut = cut[:boundary + 1]
+        return cut.rstrip()
+
+
+@dataclass
+class BudgetPlan:
+    prompt: str
+    chunk_indices: List[int]  # ranks of the chunks that made it in (some possibly trimmed)
+    parts: Dict[str, str]
+    report: Dict[str, Any] = field(default_factory=dict)
+
+
+class PromptBudgetPlanner:
+    def __init__(self, counter: Optional[TokenCounter] = None,
+                 context_window: int = config.OLLAMA_CONTEXT_SIZE,
+                 safety_tokens: int = config.PROMPT_SAFETY_TOKENS,
+                 min_chunk_tokens: int = config.PROMPT_MIN_CHUNK_TOKENS):
+        self.counter = counter or TokenCounter()
+        self.context_window = context_window
+        self.safety_tokens = safety_tokens
+        self.min_chunk_tokens = min_chunk_tokens
+
+    def plan(
+        self,
+        render: Callable[[Dict[str, str], str], str],
+        parts: Dict[str, str],
+        chunks: Sequence[str],
+        max_output_tokens: int,
+        trim_order: Sequence[str] = (),
+        separator: str = "\n\n---\n\n",
+        label: str = "prompt",
+        max_context_tokens: Optional[int] = None,
+    ) -> BudgetPlan:
+        """
+        Fit `parts` and ranked `chunks` (best first) into the prompt budget.
+
+        render(parts, context) must return the full prompt. Parts named in
+        `trim_order` may be trimmed, first entry first, when the fixed prompt
+        alone leaves no room for context; the rest are never touched.
+        `max_context_tokens` caps the RAG section below what would fit, to keep
+        prompt processing time down where more context doesn't help.
+        """
+        parts = dict(parts)
+        budget = self.context_window - max_output_tokens - self.safety_tokens
+        count = self.counter.count
+
+        fixed = count(render(parts, ""))
+        trimmed_parts = []
+        for name in trim_order:
+            overflow = fixed + self.min_chunk_tokens - budget
+            if overflow <= 0:
+                break
+            if not parts.get(name):
+                continue
+            before = count(parts[name])
+            parts[name] = self.counter.trim(parts[name], before - overflow)
+            trimmed_parts.append(name)
+            fixed = count(render(parts, ""))
+
+        available = budget - fixed
+        if max_context_tokens is not None:
+            available = min(available, max_context_tokens)
+        sep_tokens = count(separator)
+        kept: List[str] = []
+        kept_indices: List[int] = []
+        used = 0
+        trimmed_chunk = None
+        for rank, chunk in enumerate(chunks):
+            if not chunk:
+                continue
+            cost = count(chunk) + (sep_tokens if kept else 0)
+            if used + cost <= available:
+                kept.append(chunk)
+                kept_indices.append(rank)
+                used += cost
+                continue
+            remaining = available - used - (sep_tokens if kept else 0)
+            if remaining >= self.min_chunk_tokens:
+                kept.append(self.counter.trim(chunk, remaining))
+                kept_indices.append(rank)
+                trimmed_chunk = rank
+                used += count(kept[-1]) + (sep_tokens if len(kept) > 1 else 0)
+            break
+
+        context = separator.join(kept)
+        prompt = render(parts, context)
+        prompt_tokens = count(prompt)
+        report = {
+            "label": label,
+            "context_window": self.context_window,
+            "output_reserved": max_output_tokens,
+            "safety": self.safety_tokens,
+            "prompt_tokens": prompt_tokens,
+            "free_tokens": self.context_window - max_output_tokens - prompt_tokens,
+            "parts": {name: count(text) for name, text in parts.items()},
+            "template_tokens": prompt_tokens - used - sum(count(t) for t in parts.values()),
+            "context_tokens": used,
+            "chunks_total": len(chunks),
+            "chunks_kept": len(kept),
+            "chunks_dropped": len(chunks) - len(kept),
+            "chunk_trimmed": trimmed_chunk,
+            "parts_trimmed": trimmed_parts,
+            "estimated": self.counter.tokenizer is None,
+        }
+        logger.info(
+            f"Prompt budget [{label}]: {prompt_tokens}/{budget} tokens "
+            f"(context {used}, {len(kept)}/{len(chunks)} chunks"
+            f"{', trimmed #%d' % trimmed_chunk if trimmed_chunk is not None else ''}"
+            f"{', trimmed ' + ','.join(trimmed_parts) if trimmed_parts else ''}; "
+            f"parts {report['parts']}; output reserve {max_output_tokens})"
+        )
+        return BudgetPlan(prompt=prompt, chunk_indices=kept_indices, parts=parts, report=report)
+
+
+token_counter = TokenCounter()
+prompt_budget_planner = PromptBudgetPlanner(token_counter)
@@ -0,0 +1,240 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STORAGE_MODES = ("float32", "float16", "int8")
+
+
+class QuantizedIndex:
+    """
+    Flat cosine-similarity scan over one collection's embeddings stored as
+    float16 or int8 (symmetric, one float32 scale per vector), about a half or
+    a quarter of float32's footprint.
+
+    The full-precision vectors are kept next to the codes but memory-mapped:
+    only the rows of the scan's top candidates are read, to rescore them
+    exactly and to give MMR exact vectors, so the resident part of the index
+    is the codes alone. Each row's topic_id is kept too, so topic-filtered
+    queries (the common case in RAGService) need no metadata lookup.
+    """
+
+    SCAN_BLOCK = 4096  # rows decoded to float32 at a time while scanning (stays in cache)
+
+    def __init__(self, storage: str, ids: List[str], topics: List[Optional[str]],
+                 codes: np.ndarray, scales: np.ndarray, full: np.ndarray):
+        if storage not in STORAGE_MODES[1:]:
+            raise ValueError(f"Unsupported quantized storage: {storage}")
+        self.storage = storage
+        self.ids = ids
+        self.topics = topics
+        self.codes = codes
+        self.scales = scales
+        self.full = full
+        self._rows = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        self._topic_array: Optional[np.ndarray] = None
+
+    @classmethod
+    def empty(cls, storage: str, dim: int) -> "QuantizedIndex":
+        dtype = np.int8 if storage == "int8" else np.float16
+        return cls(storage, [], [], np.zeros((0, dim), dtype=dtype),
+                   np.zeros(0, dtype=np.float32), np.zeros((0, dim), dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Resident bytes of the scanned part (codes and scales)."""
+        return int(self.codes.nbytes + self.scales.nbytes)
+
+    def encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        unit = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-10)
+        if self.storage == "float16":
+            return unit.astype(np.float16), np.ones(len(unit), dtype=np.float32)
+        scales = (np.abs(unit).max(axis=1) / 127.0).astype(np.float32)
+        scales[scales == 0] = 1.0
+        return np.round(unit / scales[:, None]).astype(np.int8), scales
+
+    def unseen(self, ids: Sequence[str], embeddings: Sequence[Sequence[float]],
+               metadatas: Optional[Sequence[Dict[str, Any]]] = None
+               ) -> Tuple[List[str], np.ndarray, List[Optional[str]]]:
+        """Ids, float32 vectors and topics of the rows not indexed yet (chunks are immutable once indexed)."""
+        metadatas = metadatas or [{}] * len(ids)
+        new_rows = [(chunk_id, emb, meta) for chunk_id, emb, meta in zip(ids, embeddings, metadatas)
+                    if chunk_id not in self._rows]
+        vectors = np.asarray([emb for _, emb, _ in new_rows], dtype=np.float32).reshape(-1, self.codes.shape[1])
+        topics = [(meta or {}).get("topic_id") for _, _, meta in new_rows]
+        return ([chunk_id for chunk_id, _, _ in new_rows], vectors,
+                [str(t) if t not in (None, "") else None for t in topics])
+
+    def extend(self, ids: List[str], vectors: np.ndarray, topics: List[Optional[str]],
+               full: np.ndarray) -> "QuantizedIndex":
+        """
+        A new index with these rows appended, backed by `full` (the full-precision
+        vectors of every row). This one is left untouched: it may be serving queries.
+        """
+        codes, scales = self.encode(vectors)
+        return QuantizedIndex(self.storage, self.ids + list(ids), self.topics + list(topics),
+                              np.concatenate([self.codes, codes]), np.concatenate([self.scales, scales]), full)
+
+    def add(self, ids: Sequence[str], embeddings: Sequence[Sequence[float]],
+            metadatas: Optional[Sequence[Dict[str, Any]]] = None) -> "QuantizedIndex":
+        """A new in-memory index with the unseen rows added (QuantizedIndexStore.add appends on disk)."""
+        ids, vectors, topics = self.unseen(ids, embeddings, metadatas)
+        if not ids:
+            return self
+        return self.extend(ids, vectors, topics, np.concatenate([np.asarray(self.full), vectors]))
+
+    def mask(self, ids: Sequence[str]) -> np.ndarray:
+        allowed = np.zeros(len(self.ids), dtype=bool)
+        allowed[[self._rows[i] for i in ids if i in self._rows]] = True
+        return allowed
+
+    def topic_mask(self, topic_id: Any) -> np.ndarray:
+        if self._topic_array is None:
+            self._topic_array = np.array([t or "" for t in self.topics], dtype=str)
+        return self._topic_array == str(topic_id)
+
+    def search(self, query: Sequence[float], n: int, allowed: Optional[np.ndarray] = None) -> List[int]:
+        """Rows of the top-n approximate cosine matches, best first."""
+        if not self.ids or n <= 0:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        q = q / (np.linalg.norm(q) + 1e-10)
+        scores = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), self.SCAN_BLOCK):
+            block = slice(start, start + self.SCAN_BLOCK)
+            scores[block] = (self.codes[block].astype(np.float32) @ q) * self.scales[block]
+        if allowed is not None:
+            scores[~allowed] = -np.inf
+            n = min(n, int(allowed.sum()))
+        if n <= 0:
+            return []
+        top = np.argpartition(scores, len(scores) - n)[-n:] if n < len(scores) else np.arange(len(scores))
+        return top[np.argsort(-scores[top])].tolist()
+
+    def rescore(self, rows: Sequence[int], query: Sequence[float], n: int) -> Tuple[List[int], List[float]]:
+        """The best n of `rows` by exact cosine similarity, with their scores."""
+        if not rows:
+            return [], []
+        vectors = self.vectors(rows)
+        q = np.asarray(query, dtype=np.float32)
+        sims = (vectors @ q) / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(q) + 1e-10)
+        order = np.argsort(-sims)[:n]
+        return [rows[i] for i in order], [float(sims[i]) for i in order]
+
+    def vectors(self, rows: Sequence[int]) -> np.ndarray:
+        """Full-precision vectors of `rows` (read in row order, which suits the memory map)."""
+        rows = np.asarray(rows)
+        order = np.argsort(rows)
+        out = np.empty((len(rows), self.full.shape[1]), dtype=np.float32)
+        out[order] = self.full[rows[order]]
+        return out
+
+    def rows(self, ids: Sequence[str]) -> List[Optional[int]]:
+        return [self._rows.get(i) for i in ids]
+
+
+class QuantizedIndexStore:
+    """
+    Per-collection QuantizedIndex files next to the Chroma data: codes.npy,
+    scales.npy, full.f32 (raw float32 rows, appended to and opened
+    memory-mapped) and ids.json (ids and topics), written last.
+    Indexes are append-only, so a reader that catches a save halfway simply
+    ignores rows beyond ids.json. Loaded indexes are shared by every
+    VectorStore on the same directory and reloaded when ids.json changes;
+    adds build a new index and swap it in, so queries on the shared one
+    never see it half-updated. Adds are serialized so none is lost.
+    """
+
+    _cache: Dict[str, Tuple[float, QuantizedIndex]] = {}
+    _lock = threading.Lock()
+    _write_lock = threading.Lock()
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, collection_name: str) -> str:
+        return os.path.join(self.directory, collection_name)
+
+    def get(self, collection_name: str) -> Optional[QuantizedIndex]:
+        path = self.path(collection_name)
+        ids_path = os.path.join(path, "ids.json")
+        with self._lock:
+            if not os.path.exists(ids_path):
+                return None
+            mtime = os.path.getmtime(ids_path)
+            cached = self._cache.get(path)
+            if cached and cached[0] == mtime:
+                return cached[1]
+            with open(ids_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            n = len(meta["ids"])
+            codes = np.load(os.path.join(path, "codes.npy"))[:n]
+            index = QuantizedIndex(
+                meta["storage"], meta["ids"], meta["topics"], codes,
+                np.load(os.path.join(path, "scales.npy"))[:n],
+                self._open_full(path, n, codes.shape[1]),
+            )
+            self._cache[path] = (mtime, index)
+            return index
+
+    def add(self, collection_name: str, storage: str, ids: Sequence[str], embeddings: Sequence[Sequence[float]],
+            metadatas: Optional[Sequence[Dict[str, Any]]] = None) -> QuantizedIndex:
+        with self._write_lock:
+            index = self.get(collection_name)
+            if index is None:
+                index = QuantizedIndex.empty(storage, len(embeddings[0]))
+            new_ids, vectors, topics = index.unseen(ids, embeddings, metadatas)
+            if not new_ids:
+                return index
+            full = self._append_full(self.path(collection_name), len(index), vectors)
+            index = index.extend(new_ids, vectors, topics, full)
+            self.save(collection_name, index)
+        return index
+
+    @staticmethod
+    def _open_full(path: str, rows: int, dim: int) -> np.ndarray:
+        if rows == 0:
+            return np.zeros((0, dim), dtype=np.float32)  # np.memmap refuses empty files
+        return np.memmap(os.path.join(path, "full.f32"), dtype=np.float32, mode="r", shape=(rows, dim))
+
+    def _append_full(self, path: str, rows: int, vectors: np.ndarray) -> np.ndarray:
+        """Append `vectors` after the first `rows` rows of full.f32 and memory-map the result."""
+        os.makedirs(path, exist_ok=True)
+        full_path = os.path.join(path, "full.f32")
+        with open(full_path, "r+b" if os.path.exists(full_path) else "wb") as f:
+            f.truncate(rows * vectors.shape[1] * 4)  # rows of an interrupted add that ids.json never listed
+            f.seek(0, os.SEEK_END)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        return self._open_full(path, rows + len(vectors), vectors.shape[1])
+
+    def save(self, collection_name: str, index: QuantizedIndex):
+        """Write the codes, scales and ids; full.f32 must already hold every row (see add)."""
+        path = self.path(collection_name)
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            for name, array in (("codes", index.codes), ("scales", index.scales)):
+                tmp_path = os.path.join(path, f"{name}.tmp.npy")
+                np.save(tmp_path, np.asarray(array))
+                os.replace(tmp_path, os.path.join(path, f"{name}.npy"))
+            ids_path = os.path.join(path, "ids.json")
+            with open(f"{ids_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump({"storage": index.storage, "ids": index.ids, "topics": index.topics}, f)
+            os.replace(f"{ids_path}.tmp", ids_path)
+            self._cache[path] = (os.path.getmtime(ids_path), index)
+        logger.info(f"{index.storage} index for {collection_name}: {len(index)} vectors, "
+                    f"{index.nbytes / 1024:.0f} KB resident")
+
+    def drop(self, collection_name: str):
+        path = self.path(collection_name)
+        with self._lock:
+            self._cache.pop(path, None)
+            shutil.rmtree(path, ignore_errors=True)
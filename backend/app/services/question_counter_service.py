@@ -0,0 +1,188 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+import logging
+
+from sqlalchemy import func, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..models.database import GeneratedBatch, Question, SubjectQuestionStats
+from .report_rollup_service import report_rollup_service
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionCounterService:
+    """
+    Keeps GeneratedBatch and SubjectQuestionStats counters in step with the
+    `questions` table so list/dashboard endpoints read O(1) counters instead of
+    re-counting rows.
+
+    All record_* methods only issue UPDATE/INSERT statements on the caller's
+    session — they never commit — so the counter change lands in the same
+    transaction as the question insert or status change that caused it.
+    """
+
+    STATUSES = ("pending", "approved", "rejected", "quarantined")
+
+    BATCH_COLUMNS = {
+        "pending": GeneratedBatch.pending_count,
+        "approved": GeneratedBatch.approved_count,
+        "rejected": GeneratedBatch.rejected_count,
+        "quarantined": GeneratedBatch.quarantined_count,
+    }
+
+    SUBJECT_COLUMNS = {
+        "pending": SubjectQuestionStats.pending_count,
+        "approved": SubjectQuestionStats.approved_count,
+        "rejected": SubjectQuestionStats.rejected_count,
+        "quarantined": SubjectQuestionStats.quarantined_count,
+    }
+
+    def record_insert(self, db: Session, questions: Iterable[Question]):
+        """Count newly added questions (call before commit). Also feeds the report rollup."""
+        questions = list(questions)
+        deltas = Counter()
+        for q in questions:
+            deltas[(q.subject_id, q.batch_id, q.status or "pending")] += 1
+        self._apply(db, deltas)
+        report_rollup_service.record_insert(db, questions)
+
+    def record_delete(self, db: Session, questions: Iterable[Question]):
+        """Uncount questions that are being removed or moved to another batch."""
+        questions = list(questions)
+        deltas = Counter()
+        for q in questions:
+            deltas[(q.subject_id, q.batch_id, q.status or "pending")] -= 1
+        self._apply(db, deltas)
+        report_rollup_service.record_delete(db, questions)
+
+    def record_status_change(self, db: Session, question: Question, old_status: Optional[str]):
+        """Move one question from `old_status` to its current status within its batch."""
+        new_status = question.status
+        if old_status == new_status:
+            return
+        deltas = Counter()
+        deltas[(question.subject_id, question.batch_id, old_status or "pending")] -= 1
+        deltas[(question.subject_id, question.batch_id, new_status)] += 1
+        self._apply(db, deltas)
+
+    def _apply(self, db: Session, deltas: Counter):
+        batch_deltas: Dict[str, Counter] = {}
+        subject_deltas: Dict[int, Counter] = {}
+        for (subject_id, batch_id, status), delta in deltas.items():
+            if not delta:
+                continue
+            if batch_id:
+                batch_deltas.setdefault(batch_id, Counter())[status] += delta
+            if subject_id:
+                subject_deltas.setdefault(subject_id, Counter())[status] += delta
+
+        for batch_id, by_status in batch_deltas.items():
+            values = {
+                col: col + by_status[s]
+                for s, col in self.BATCH_COLUMNS.items() if by_status[s]
+            }
+            if by_status["pending"]:
+                # SET expressions see the pre-update row, so compare against the new value
+                values[GeneratedBatch.status] = case(
+                    (func.coalesce(GeneratedBatch.pending_count, 0) + by_status["pending"] <= 0, "complete"),
+                    else_="in_progress"
+                )
+            if values:
+                db.query(GeneratedBatch).filter(
+                    GeneratedBatch.id == batch_id
+                ).update(values, synchronize_session=False)
+
+        for subject_id, by_status in subject_deltas.items():
+            db.execute(
+                sqlite_insert(SubjectQuestionStats)
+                .values(subject_id=subject_id, total_count=0, pending_count=0, approved_count=0,
+                        rejected_count=0, quarantined_count=0)
+                .on_conflict_do_nothing(index_elements=["subject_id"])
+            )
+            values = {
+                col: col + by_status[s]
+                for s, col in self.SUBJECT_COLUMNS.items() if by_status[s]
+            }
+            total_delta = sum(by_status.values())
+            if total_delta:
+                values[SubjectQuestionStats.total_count] = SubjectQuestionStats.total_count + total_delta
+            values[SubjectQuestionStats.updated_at] = datetime.utcnow()
+            db.query(SubjectQuestionStats).filter(
+                SubjectQuestionStats.subject_id == subject_id
+            ).update(values, synchronize_session=False)
+
+    def get_subject_stats(self, db: Session, subject_id: Optional[int] = None) -> Dict[str, int]:
+        """Read materialized counters for one subject, or summed across all subjects."""
+        query = db.query(
+            func.coalesce(func.sum(SubjectQuestionStats.total_count), 0),
+            *[func.coalesce(func.sum(col), 0) for col in self.SUBJECT_COLUMNS.values()]
+        )
+        if subject_id:
+            query = query.filter(SubjectQuestionStats.subject_id == subject_id)
+        total, *per_status = query.one()
+        stats = {"total": int(total)}
+        for s, n in zip(self.SUBJECT_COLUMNS.keys(), per_status):
+            stats[s] = int(n)
+        return stats
+
+    def reconcile(self, db: Session) -> Dict[str, int]:
+        """
+        Recompute every batch and subject counter from `questions` in one grouped
+        scan and repair any drift. Safe to run at any time; commits on success.
+        """
+        rows = db.query(
+            Question.subject_id,
+            Question.batch_id,
+            Question.status,
+            func.count(Question.id)
+        ).group_by(Question.subject_id, Question.batch_id, Question.status).all()
+
+        batch_actual: Dict[str, Counter] = {}
+        subject_actual: Dict[int, Counter] = {}
+        for subject_id, batch_id, status, count in rows:
+            status = status or "pending"
+            if batch_id:
+                batch_actual.setdefault(str(batch_id), Counter())[status] += count
+            if subject_id:
+                subject_actual.setdefault(subject_id, Counter())[status] += count
+                subject_actual[subject_id]["__total__"] += count
+
+        batches_repaired = 0
+        for batch in db.query(GeneratedBatch).all():
+            actual = batch_actual.get(str(batch.id), Counter())
+            drifted = False
+            for s, col in self.BATCH_COLUMNS.items():
+                if (getattr(batch, col.key) or 0) != actual[s]:
+                    setattr(batch, col.key, actual[s])
+                    drifted = True
+            if drifted:
+                batches_repaired += 1
+
+        subjects_repaired = 0
+        existing = {row.subject_id: row for row in db.query(SubjectQuestionStats).all()}
+        for subject_id in set(existing) | set(subject_actual):
+            actual = subject_actual.get(subject_id, Counter())
+            row = existing.get(subject_id)
+            if row is None:
+                row = SubjectQuestionStats(subject_id=subject_id)
+                db.add(row)
+            drifted = (row.total_count or 0) != actual["__total__"]
+            row.total_count = actual["__total__"]
+            for s, col in self.SUBJECT_COLUMNS.items():
+                if (getattr(row, col.key) or 0) != actual[s]:
+                    setattr(row, col.key, actual[s])
+                    drifted = True
+            if drifted:
+                row.updated_at = datetime.utcnow()
+                subjects_repaired += 1
+
+        db.commit()
+        if batches_repaired or subjects_repaired:
+            logger.info(f"Counter reconciliation repaired {batches_repaired} batches, {subjects_repaired} subjects")
+        return {"batches_repaired": batches_repaired, "subjects_repaired": subjects_repaired}
+
+
+question_counter_service = QuestionCounterService()
@@ -0,0 +1,123 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, event, func, inspect, insert
+from sqlalchemy.orm import Session
+
+from ..models.database import Question, QuestionOutcomeMapping
+from .outcome_codes import parse_outcome_mappings
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionOutcomeService:
+    """
+    Keeps question_outcome_mapping in step with Question.co_id / lo_id.
+
+    Mapper events rewrite a question's rows on the flushing connection whenever
+    it is inserted, its co_id/lo_id change, or it is deleted — so every ORM save
+    path is covered without callers doing anything. backfill() fills the table
+    for rows written before it existed (or by bulk/raw SQL).
+    """
+
+    KINDS = ("co", "lo")
+
+    def __init__(self):
+        event.listen(Question, "after_insert", self._after_insert)
+        event.listen(Question, "after_update", self._after_update)
+        event.listen(Question, "after_delete", self._after_delete)
+
+    @staticmethod
+    def mapping_rows(question_id: int, co_value, lo_value) -> List[Dict]:
+        rows = []
+        for kind, value in (("co", co_value), ("lo", lo_value)):
+            for code, intensity in parse_outcome_mappings(value, kind):
+                rows.append({"question_id": question_id, "kind": kind,
+                             "outcome_code": code, "intensity": intensity})
+        return rows
+
+    def _write(self, connection, target: Question):
+        connection.execute(delete(QuestionOutcomeMapping).where(QuestionOutcomeMapping.question_id == target.id))
+        rows = self.mapping_rows(target.id, target.co_id, target.lo_id)
+        if rows:
+            connection.execute(insert(QuestionOutcomeMapping), rows)
+
+    def _after_insert(self, mapper, connection, target):
+        if target.co_id or target.lo_id:
+            self._write(connection, target)
+
+    def _after_update(self, mapper, connection, target):
+        state = inspect(target)
+        if state.attrs.co_id.history.has_changes() or state.attrs.lo_id.history.has_changes():
+            self._write(connection, target)
+
+    def _after_delete(self, mapper, connection, target):
+        connection.execute(delete(QuestionOutcomeMapping).where(QuestionOutcomeMapping.question_id == target.id))
+
+    def write_many(self, db: Session, questions: Iterable[Question]):
+        """Mapping rows for freshly bulk-inserted questions (bulk INSERT skips the mapper events)."""
+        rows = [row for q in questions for row in self.mapping_rows(q.id, q.co_id, q.lo_id)]
+        if rows:
+            db.execute(insert(QuestionOutcomeMapping), rows)
+
+    def backfill(self, db: Session, batch_size: int = 1000) -> int:
+        """Rebuild the whole table from questions; commits. Returns rows written."""
+        db.query(QuestionOutcomeMapping).delete(synchronize_session=False)
+        written = 0
+        pending: List[Dict] = []
+        rows = db.query(Question.id, Question.co_id, Question.lo_id).filter(
+            (Question.co_id.isnot(None)) | (Question.lo_id.isnot(None))
+        ).yield_per(batch_size)
+        for question_id, co_id, lo_id in rows:
+            pending.extend(self.mapping_rows(question_id, co_id, lo_id))
+            if len(pending) >= batch_size:
+                db.execute(insert(QuestionOutcomeMapping), pending)
+                written += len(pending)
+                pending = []
+        if pending:
+            db.execute(insert(QuestionOutcomeMapping), pending)
+            written += len(pending)
+        db.commit()
+        logger.info(f"question_outcome_mapping backfilled: {written} rows")
+        return written
+
+    def ensure_backfilled(self, db: Session) -> Optional[int]:
+        """Backfill once when the table is empty but mapped questions exist."""
+        if db.query(QuestionOutcomeMapping.question_id).first() is not None:
+            return None
+        has_mapped = db.query(Question.id).filter(
+            (Question.co_id.isnot(None)) | (Question.lo_id.isnot(None))
+        ).first()
+        if has_mapped is None:
+            return None
+        return self.backfill(db)
+
+    def intensity_averages(self, db: Session, topic_id: int, kind: str, status: str = "approved") -> Dict[str, float]:
+        """Average vetter intensity per outcome code for a topic's questions (one GROUP BY)."""
+        rows = db.query(
+            QuestionOutcomeMapping.outcome_code,
+            func.avg(QuestionOutcomeMapping.intensity)
+        ).join(
+            Question, Question.id == QuestionOutcomeMapping.question_id
+        ).filter(
+            Question.topic_id == topic_id,
+            Question.status == status,
+            QuestionOutcomeMapping.kind == kind,
+            QuestionOutcomeMapping.intensity.isnot(None)
+        ).group_by(QuestionOutcomeMapping.outcome_code).all()
+        return {code: round(float(avg), 1) for code, avg in rows}
+
+    def code_counts(self, db: Session, kind: str, *filters) -> Dict[str, int]:
+        """Distinct questions per outcome code matching `filters` on Question (one GROUP BY)."""
+        rows = db.query(
+            QuestionOutcomeMapping.outcome_code,
+            func.count(QuestionOutcomeMapping.question_id)
+        ).join(
+            Question, Question.id == QuestionOutcomeMapping.question_id
+        ).filter(
+            QuestionOutcomeMapping.kind == kind, *filters
+        ).group_by(QuestionOutcomeMapping.outcome_code).all()
+        return {code: int(n) for code, n in rows}
+
+
+question_outcome_service = QuestionOutcomeService()
@@ -0,0 +1,54 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models.database import Question
+from .change_tracker import change_tracker, SUBJECT_LIST_SCOPE
+from .question_counter_service import question_counter_service
+from .question_outcome_service import question_outcome_service
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionWriter:
+    """
+    Saves generated questions with one INSERT ... RETURNING instead of an ORM
+    flush plus a refresh per row.
+
+    A bulk INSERT bypasses the flush, so the bookkeeping that normally rides on
+    flush events (question_outcome_mapping rows, the subject-list change
+    counter) is done here explicitly, in the same transaction, together with
+    the question counters.
+    """
+
+    def insert_many(self, db: Session, rows: List[Dict[str, Any]]) -> List[Question]:
+        """
+        Insert question rows (column -> value dicts, all with the same keys) and
+        commit; returns the loaded Questions ordered by id.
+        """
+        if not rows:
+            return []
+        now = datetime.utcnow()
+        rows = [{"status_changed_at": now, **row} for row in rows]
+
+        # Multi-row VALUES ... RETURNING: one statement however many rows
+        questions = sorted(
+            db.scalars(insert(Question).returning(Question), rows).all(),
+            key=lambda q: q.id
+        )
+        question_outcome_service.write_many(db, questions)
+        change_tracker.bump(db, SUBJECT_LIST_SCOPE)
+        question_counter_service.record_insert(db, questions)
+        ids = [q.id for q in questions]
+        db.commit()
+
+        # Commit expired them: reload all in one SELECT rather than one per row on access
+        db.query(Question).filter(Question.id.in_(ids)).all()
+        logger.info(f"Bulk-inserted {len(ids)} questions")
+        return questions
+
+
+question_writer = QuestionWriter()
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..models.database import Question, RagContextChunk
+
+logger = logging.getLogger(__name__)
+
+
+class RagContextStore:
+    """
+    Stores question provenance by reference.
+
+    Each context item (a retrieved chunk) is written once to rag_context_chunks,
+    keyed by its vector-store chunk id when retrieval supplied one and by a hash
+    of its content otherwise. Question.rag_context keeps only
+    {"context_refs": [{"id", "page"}, ...], "reasoning": ...}, so listing a
+    question's sources needs no chunk text at all.
+
+    load() turns stored values back into the {"context": [...], "reasoning": ...}
+    shape readers have always seen, resolving every reference of a page of
+    questions in one query; sources() returns short snippets for one question.
+    Rows written before references existed are rewritten by compact().
+    """
+
+    HASH_CHARS = 32
+    SNIPPET_CHARS = 300
+
+    def digest(self, item: Any) -> Tuple[str, str]:
+        """(key, canonical JSON) of one context item."""
+        content = json.dumps(item, sort_keys=True, ensure_ascii=False)
+        if isinstance(item, dict) and item.get("chunk_id"):
+            return str(item["chunk_id"]), content
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()[:self.HASH_CHARS], content
+
+    def pack_many(self, db: Session, contexts: Sequence[Tuple[Iterable[Any], Optional[str]]]) -> List[str]:
+        """
+        [(context items, reasoning)] -> rag_context values. New chunks are
+        written with a single INSERT (existing keys are left alone); call
+        before commit so they land with the questions.
+        """
+        chunks: Dict[str, str] = {}
+        packed = []
+        for items, reasoning in contexts:
+            refs = []
+            for item in items or []:
+                key, content = self.digest(item)
+                chunks.setdefault(key, content)
+                refs.append({"id": key, "page": item.get("page_number") if isinstance(item, dict) else None})
+            packed.append(json.dumps({"context_refs": refs, "reasoning": reasoning}))
+        if chunks:
+            db.execute(
+                sqlite_insert(RagContextChunk).on_conflict_do_nothing(index_elements=["hash"]),
+                [{"hash": key, "content": content} for key, content in chunks.items()]
+            )
+        return packed
+
+    def load(self, db: Session, raws: Sequence[Optional[str]]) -> List[Any]:
+        """Decode stored rag_context values (by reference or legacy inline); [] when absent."""
+        decoded = [self._decode(raw) for raw in raws]
+        chunks = self._fetch(db, {ref for value in decoded for ref in self._ref_ids(value)})
+
+        results = []
+        for value in decoded:
+            if self._is_packed(value):
+                value = {
+                    "context": [chunks[ref] for ref in self._ref_ids(value) if ref in chunks],
+                    "reasoning": value.get("reasoning"),
+                }
+            results.append(value)
+        return results
+
+    def load_one(self, db: Session, raw: Optional[str]) -> Any:
+        return self.load(db, [raw])[0]
+
+    def sources(self, db: Session, raw: Optional[str], full: bool = False) -> List[Dict[str, Any]]:
+        """One question's sources as [{ref, page_number, source, text}]; text is a snippet unless `full`."""
+        value = self._decode(raw)
+        if self._is_packed(value):
+            refs = [self._ref(entry) for entry in value.get("context_refs") or []]
+            chunks = self._fetch(db, {ref_id for ref_id, _ in refs})
+            items = [(ref_id, page, chunks.get(ref_id)) for ref_id, page in refs]
+        else:
+            context = value.get("context", []) if isinstance(value, dict) else value
+            items = [(None, None, item) for item in context or []]
+
+        results = []
+        for ref_id, page, item in items:
+            if item is None:
+                results.append({"ref": ref_id, "page_number": page, "source": None, "text": None})
+                continue
+            text = item.get("text", "") if isinstance(item, dict) else str(item)
+            if not full and len(text) > self.SNIPPET_CHARS:
+                text = text[:self.SNIPPET_CHARS].rstrip() + "..."
+            results.append({
+                "ref": ref_id,
+                "page_number": page if page is not None else (item.get("page_number") if isinstance(item, dict) else None),
+                "source": item.get("source") if isinstance(item, dict) else None,
+                "text": text,
+            })
+        return results
+
+    def compact(self, db: Session, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Rewrite legacy inline rag_context rows as references, committing per
+        batch. Safe to re-run: rows already holding references are skipped.
+        """
+        stats = {"questions": 0, "chunks_before": db.query(RagContextChunk).count()}
+        last_id = 0
+        update_stmt = update(Question.__table__).where(
+            Question.__table__.c.id == bindparam("question_id")
+        ).values(rag_context=bindparam("packed"))
+        while True:
+            rows = db.query(Question.id, Question.rag_context).filter(
+                Question.id > last_id,
+                Question.rag_context.isnot(None),
+                ~Question.rag_context.like('{"context_refs"%'),
+            ).order_by(Question.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            contexts = []
+            for row in rows:
+                value = self._decode(row.rag_context)
+                if isinstance(value, dict):
+                    contexts.append((value.get("context") or [], value.get("reasoning")))
+                else:
+                    contexts.append((value if isinstance(value, list) else [], None))
+            packed = self.pack_many(db, contexts)
+            db.execute(update_stmt, [
+                {"question_id": row.id, "packed": value} for row, value in zip(rows, packed)
+            ])
+            db.commit()
+            stats["questions"] += len(rows)
+        stats["chunks_written"] = db.query(RagContextChunk).count() - stats.pop("chunks_before")
+        logger.info(f"Compacted rag_context of {stats['questions']} questions into "
+                    f"{stats['chunks_written']} new shared chunks")
+        return stats
+
+    def _fetch(self, db: Session, refs: set) -> Dict[str, Any]:
+        if not refs:
+            return {}
+        rows = db.query(RagContextChunk.hash, RagContextChunk.content).filter(
+            RagContextChunk.hash.in_(refs)
+        ).all()
+        if len(rows) < len(refs):
+            logger.warning(f"{len(refs) - len(rows)} referenced context chunks are missing")
+        return {key: json.loads(content) for key, content in rows}
+
+    @staticmethod
+    def _is_packed(value: Any) -> bool:
+        return isinstance(value, dict) and "context_refs" in value
+
+    @staticmethod
+    def _ref(entry: Any) -> Tuple[str, Optional[int]]:
+        # {"id", "page"}; early rows stored the bare key
+        if isinstance(entry, dict):
+            return entry.get("id"), entry.get("page")
+        return entry, None
+
+    def _ref_ids(self, value: Any) -> List[str]:
+        if not self._is_packed(value):
+            return []
+        return [self._ref(entry)[0] for entry in value.get("context_refs") or []]
+
+    @staticmethod
+    def _decode(raw: Optional[str]) -> Any:
+        if not raw:
+            return []
+        try:
+            return json.loads(raw)
+        except (TypeError, ValueError):
+            return []
+
+
+rag_context_store = RagContextStore()
@@ -4,8 +4,11 @@ from .chunker import Chunker
 from .embedding_service import EmbeddingService
 from .vector_store import VectorStore
 from .llm_service import LLMService
-from typing import List, Dict, Any
+from .. import config
+from typing import List, Dict, Any, Tuple
+import asyncio
 import logging
+import time
 import uuid
 import os
 
@@ -22,6 +25,9 @@ class RAGService:
         self.embedding_service = EmbeddingService()
         self.vector_store = VectorStore()  # Default path
         self.llm_service = LLMService()
+        # (subject_id, topic_id) -> (expires_at, subtopics); see get_diverse_subtopics
+        self._subtopic_cache: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
+        self._subtopic_inflight: Dict[Tuple[str, str], asyncio.Future] = {}
 
     def index_document(self, file_path: str, subject_id: str, unit: str = None, topic: str = None):
         """
@@ -107,7 +113,7 @@ class RAGService:
     ) -> List[Dict[str, Any]]:
         """
         Retrieves context chunks alongside their metadata (pages, source).
-        Returns list of {"text": str, "page_number": int, "source": str}
+        Returns list of {"text": str, "page_number": int, "source": str, "chunk_id": str}
         """
         try:
             if use_mmr:
@@ -131,7 +137,8 @@ class RAGService:
                     filtered_chunks.append({
                         "text": doc,
                         "page_number": meta.get("page_number"),
-                        "source": meta.get("source", "Unknown Source")
+                        "source": meta.get("source", "Unknown Source"),
+                        "chunk_id": meta.get("chunk_id"),
                     })
 
             # Take top n_results
@@ -152,17 +159,44 @@ class RAGService:
         """
         Extracts unique sub-topics from the vector store chunks for this topic.
         Returns a list of 6-10 distinct sub-concepts to use as RAG queries.
+
+        Extracted lists are cached per topic for SUBTOPIC_CACHE_TTL_SECONDS and
+        concurrent callers share one extraction, so the units of a rubric that
+        land on the same topic pay for the LLM call once. Callers get a copy.
+        """
+        key = (str(subject_id), str(topic_id))
+        entry = self._subtopic_cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return list(entry[1])
+        task = self._subtopic_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._extract_subtopics(subject_id, topic_id))
+            self._subtopic_inflight[key] = task
+            task.add_done_callback(lambda _: self._subtopic_inflight.pop(key, None))
+        # Shielded: one caller being cancelled must not abort the others' extraction
+        subtopics, extracted = await asyncio.shield(task)
+        if extracted:
+            self._subtopic_cache[key] = (time.monotonic() + config.SUBTOPIC_CACHE_TTL_SECONDS, subtopics)
+        return list(subtopics)
+
+    async def _extract_subtopics(self, subject_id: str, topic_id: str = None) -> Tuple[List[str], bool]:
+        """
         Uses the first chunks (which contain chapter intro/outline) for better alignment.
+        Returns (subtopics, extracted); extracted is False for the fallback lists.
         """
         try:
             collection_name = f"subject_{subject_id}"
             
-            # Fetch raw chunks for this subject
-            results = self.vector_store.get_documents(collection_name)
+            # Fetch raw chunks for this topic (only its partition is read), else the whole subject
+            results = {}
+            if topic_id:
+                results = self.vector_store.get_documents(collection_name, where={"topic_id": str(topic_id)})
+            if not results.get("documents"):
+                results = self.vector_store.get_documents(collection_name)
             
             docs = results.get("documents", [])
             if not docs:
-                return []
+                return [], False
             
             # Strategy: Use the FIRST chunks (chapter intro/outline) plus a few
             # evenly-spaced chunks from the rest of the document for coverage
@@ -179,9 +213,8 @@ class RAGService:
                     seen.add(d)
                     sample_docs.append(d)
             
-            combined_text = "\n\n---\n\n".join(sample_docs)
-            
-            prompt = f"""
+            def render(parts, excerpts):
+                return f"""
             Analyze the following text excerpts from a textbook chapter.
             Identify 8-12 DISTINCT, SPECIFIC sub-topics or clinical concepts discussed across these excerpts.
             
@@ -192,10 +225,17 @@ class RAGService:
             - Focus on the MAJOR sections and key clinical concepts, not minor details.
             
             Excerpts:
-            {combined_text[:4000]}
+            {excerpts}
             """
-            
+
+            # Fit whole excerpts into the token budget (generate_response reserves 1000 output tokens)
+            from .prompt_budget import prompt_budget_planner
             from .. import config
+            prompt = prompt_budget_planner.plan(
+                render, {}, sample_docs, max_output_tokens=1000, label=f"subtopics topic {topic_id}",
+                max_context_tokens=config.PROMPT_CONTEXT_TOKEN_CAP["subtopics"]
+            ).prompt
+            
             response = await self.llm_service.generate_response(prompt, model=config.LLM_MODEL)
             
             import json
@@ -209,16 +249,16 @@ class RAGService:
                 subtopics = json.loads(clean_str)
                 if isinstance(subtopics, list) and len(subtopics) > 0:
                     logger.info(f"Dynamically extracted subtopics for topic {topic_id}: {subtopics}")
-                    return subtopics
+                    return subtopics, True
             except json.JSONDecodeError as e:
                 logger.error(f"Failed to parse subtopics JSON: {response}\nError: {e}")
                 
             # Fallback if parsing fails or LLM gives garbage
-            return ["clinical presentation", "diagnosis", "treatment options", "complications", "materials and techniques", "patient management"]
+            return ["clinical presentation", "diagnosis", "treatment options", "complications", "materials and techniques", "patient management"], False
             
         except Exception as e:
             logger.error(f"Error extracting diverse subtopics: {e}")
-            return ["diagnosis", "treatment", "complications"]
+            return ["diagnosis", "treatment", "complications"], False
 
     def retrieve_for_subtopic(
         self,
@@ -229,7 +269,7 @@ class RAGService:
     ) -> List[Dict[str, Any]]:
         """
         Retrieves highly focused and diverse context for a specific sub-topic.
-        Returns list of {text, page_number, source} dicts for provenance.
+        Returns list of {text, page_number, source, chunk_id} dicts for provenance.
         """
         try:
             query = f"{subtopic}"
@@ -253,6 +293,7 @@ class RAGService:
                         "page_number": meta.get("page_number"),
                         "source": source,
                         "filename": filename,
+                        "chunk_id": meta.get("chunk_id"),
                     })
             final_chunks = filtered[:n_results]
 
@@ -266,6 +307,28 @@ class RAGService:
             logger.error(f"Error retrieving subtopic context: {e}")
             return []
 
+    def _query_candidates(self, collection_name: str, query_embedding, query_text: str, k: int,
+                          fetch_k: int, lambda_mult: float, where_filter) -> Dict[str, Any]:
+        """MMR over dense candidates, or over fused dense + BM25 candidates in hybrid mode."""
+        if config.RETRIEVAL_MODE == "hybrid":
+            return self.vector_store.query_hybrid(
+                collection_name=collection_name,
+                query_embeddings=query_embedding,
+                query_text=query_text,
+                k=k,
+                fetch_k=min(fetch_k, k * config.HYBRID_FETCH_K_FACTOR),
+                lambda_mult=lambda_mult,
+                where=where_filter,
+            )
+        return self.vector_store.query_mmr(
+            collection_name=collection_name,
+            query_embeddings=query_embedding,
+            k=k,
+            fetch_k=fetch_k,
+            lambda_mult=lambda_mult,
+            where=where_filter,
+        )
+
     def _mmr_retrieve(
         self,
         query_text: str,
@@ -285,13 +348,8 @@ class RAGService:
             if topic_id:
                 where_filter = {"topic_id": str(topic_id)}
 
-            results = self.vector_store.query_mmr(
-                collection_name=collection_name,
-                query_embeddings=query_embedding,
-                k=k,
-                fetch_k=fetch_k,
-                lambda_mult=lambda_mult,
-                where=where_filter,
+            results = self._query_candidates(
+                collection_name, query_embedding, query_text, k, fetch_k, lambda_mult, where_filter
             )
 
             if results and results.get("documents"):
@@ -310,7 +368,8 @@ class RAGService:
             results = self.vector_store.query_similar(
                 collection_name=collection_name,
                 query_embeddings=query_embedding,
-                n_results=n_results
+                n_results=n_results,
+                where={"topic_id": str(topic_id)} if topic_id else None
             )
 
             if results and results.get("documents"):
@@ -338,19 +397,14 @@ class RAGService:
             if topic_id:
                 where_filter = {"topic_id": str(topic_id)}
 
-            results = self.vector_store.query_mmr(
-                collection_name=collection_name,
-                query_embeddings=query_embedding,
-                k=k,
-                fetch_k=fetch_k,
-                lambda_mult=lambda_mult,
-                where=where_filter,
+            results = self._query_candidates(
+                collection_name, query_embedding, query_text, k, fetch_k, lambda_mult, where_filter
             )
 
             if results and results.get("documents") and results["documents"][0]:
                 docs = results["documents"][0]
                 metas = results.get("metadatas", [[]])[0] if results.get("metadatas") else [{} for _ in docs]
-                return docs, metas
+                return docs, self._with_chunk_ids(metas, results)
             return [], []
         except Exception as e:
             logger.error(f"MMR with meta retrieval failed: {e}")
@@ -365,18 +419,25 @@ class RAGService:
             results = self.vector_store.query_similar(
                 collection_name=collection_name,
                 query_embeddings=query_embedding,
-                n_results=n_results
+                n_results=n_results,
+                where={"topic_id": str(topic_id)} if topic_id else None
             )
 
             if results and results.get("documents") and results["documents"][0]:
                 docs = results["documents"][0]
                 metas = results.get("metadatas", [[]])[0] if results.get("metadatas") else [{} for _ in docs]
-                return docs, metas
+                return docs, self._with_chunk_ids(metas, results)
             return [], []
         except Exception as e:
             logger.error(f"Raw with meta retrieval failed: {e}")
             return [], []
 
+    @staticmethod
+    def _with_chunk_ids(metas: List[Dict[str, Any]], results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Copy each chunk's vector-store id into its metadata as chunk_id (used for provenance refs)."""
+        ids = (results.get("ids") or [[]])[0] or []
+        return [{**(meta or {}), "chunk_id": chunk_id} for meta, chunk_id in zip(metas, ids)] or metas
+
     def query(self, query_text: str, subject_id: str, n_results: int = 12, topic_id: str = None) -> Dict[str, Any]:
         """
         Queries the RAG system for relevant context and generates an answer.
@@ -0,0 +1,127 @@
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+import logging
+
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..models.database import Question, QuestionReportRollup, QuestionOutcomeMapping
+from .outcome_codes import parse_outcome_mappings
+# Imported for its mapper events: keeps question_outcome_mapping current on every save
+from .question_outcome_service import question_outcome_service  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+# (subject_id, topic_id, status, bloom_level, day, co_codes)
+Snapshot = Tuple[int, int, str, str, str, Tuple[str, ...]]
+
+
+class ReportRollupService:
+    """
+    Maintains QuestionReportRollup so /reports reads a few hundred pre-aggregated
+    rows instead of scanning `questions`.
+
+    Writers call record_insert / record_delete / record_transition on the same
+    session (and transaction) as the question change; rebuild() recomputes the
+    whole table in SQL for backfill or repair.
+    """
+
+    ALL_COS = "*"  # co_code of the one-row-per-question grain
+
+    def snapshot(self, question: Question) -> Snapshot:
+        """Capture the rollup dimensions of a question before it is mutated."""
+        changed_at = question.status_changed_at
+        return (
+            question.subject_id or 0,
+            question.topic_id or 0,
+            question.status or "pending",
+            question.bloom_level or "",
+            changed_at.strftime("%Y-%m-%d") if changed_at else "",
+            tuple(code for code, _ in parse_outcome_mappings(question.co_id, "co")),
+        )
+
+    def record_insert(self, db: Session, questions: Iterable[Question]):
+        deltas = Counter()
+        for q in questions:
+            if q.status_changed_at is None:
+                q.status_changed_at = datetime.utcnow()
+            self._add(deltas, self.snapshot(q), 1)
+        self._apply(db, deltas)
+
+    def record_delete(self, db: Session, questions: Iterable[Question]):
+        deltas = Counter()
+        for q in questions:
+            self._add(deltas, self.snapshot(q), -1)
+        self._apply(db, deltas)
+
+    def record_transition(self, db: Session, before: Snapshot, question: Question):
+        """Move a question from its `before` snapshot to its current dimensions."""
+        deltas = Counter()
+        self._add(deltas, before, -1)
+        self._add(deltas, self.snapshot(question), 1)
+        self._apply(db, deltas)
+
+    def _add(self, deltas: Counter, snap: Snapshot, delta: int):
+        subject_id, topic_id, status, bloom, day, co_codes = snap
+        deltas[(subject_id, topic_id, self.ALL_COS, status, bloom, day)] += delta
+        for code in co_codes:
+            deltas[(subject_id, topic_id, code, status, bloom, day)] += delta
+
+    def _apply(self, db: Session, deltas: Counter):
+        for (subject_id, topic_id, co_code, status, bloom, day), delta in deltas.items():
+            if not delta:
+                continue
+            stmt = sqlite_insert(QuestionReportRollup).values(
+                subject_id=subject_id, topic_id=topic_id, co_code=co_code,
+                status=status, bloom_level=bloom, day=day, count=delta
+            )
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["subject_id", "topic_id", "co_code", "status", "bloom_level", "day"],
+                set_={"count": QuestionReportRollup.count + delta}
+            ))
+
+    def rebuild(self, db: Session) -> int:
+        """
+        Recompute the rollup from `questions` with two INSERT ... SELECT GROUP BY
+        statements (question grain, then per-CO grain via question_outcome_mapping);
+        commits. Returns rows written.
+        """
+        Rollup = QuestionReportRollup
+        dims = (
+            func.coalesce(Question.subject_id, 0),
+            func.coalesce(Question.topic_id, 0),
+            func.coalesce(func.nullif(Question.status, ""), "pending"),
+            func.coalesce(Question.bloom_level, ""),
+            func.coalesce(func.strftime("%Y-%m-%d", Question.status_changed_at), ""),
+        )
+        target_cols = ["subject_id", "topic_id", "status", "bloom_level", "day", "co_code", "count"]
+
+        per_question = select(*dims, literal(self.ALL_COS), func.count(Question.id)).group_by(*dims)
+        per_co = select(
+            *dims, QuestionOutcomeMapping.outcome_code, func.count(Question.id)
+        ).join(
+            QuestionOutcomeMapping,
+            (QuestionOutcomeMapping.question_id == Question.id) & (QuestionOutcomeMapping.kind == "co")
+        ).group_by(*dims, QuestionOutcomeMapping.outcome_code)
+
+        db.query(Rollup).delete(synchronize_session=False)
+        db.execute(insert(Rollup).from_select(target_cols, per_question))
+        db.execute(insert(Rollup).from_select(target_cols, per_co))
+        db.commit()
+
+        written = db.query(func.count()).select_from(Rollup).scalar()
+        logger.info(f"Report rollup rebuilt: {written} rows")
+        return written
+
+    def ensure_backfilled(self, db: Session) -> Optional[int]:
+        """Rebuild once when the rollup is empty but questions exist (first start after upgrade)."""
+        if db.query(QuestionReportRollup).first() is not None:
+            return None
+        if db.query(Question.id).first() is None:
+            return None
+        return self.rebuild(db)
+
+
+report_rollup_service = ReportRollupService()
@@ -2,45 +2,54 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func, case, desc
 from typing import Dict, List, Any, Optional
-import json
 from ..models import vetting_models, database
+from .report_rollup_service import report_rollup_service
 
 class ReportsService:
     """
     Service for generating analytics and reports based on the Enhanced Vetting System.
     """
 
+    def _rollup_query(self, db: Session, *columns, subject_id: Optional[int] = None, per_co: bool = False):
+        """Base query over the report rollup at question grain ('*') or per-CO grain."""
+        Rollup = database.QuestionReportRollup
+        query = db.query(*columns)
+        if per_co:
+            query = query.filter(Rollup.co_code != report_rollup_service.ALL_COS)
+        else:
+            query = query.filter(Rollup.co_code == report_rollup_service.ALL_COS)
+        if subject_id:
+            query = query.filter(Rollup.subject_id == subject_id)
+        return query
+
+    def get_status_totals(self, db: Session, subject_id: Optional[int] = None, since_day: Optional[str] = None) -> Dict[str, int]:
+        """Question counts per status from the rollup, optionally only for status changes on/after since_day."""
+        Rollup = database.QuestionReportRollup
+        query = self._rollup_query(db, Rollup.status, func.sum(Rollup.count), subject_id=subject_id)
+        if since_day:
+            query = query.filter(Rollup.day >= since_day)
+        return {status: int(n or 0) for status, n in query.group_by(Rollup.status).all()}
+
     def get_overview_stats(self, db: Session, subject_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Get high-level statistics: generated, approved, rejected, pending.
         """
         # Query both tables: GeneratedQuestion (Vetting) and Question (Quick Gen)
         
-        # 1. GeneratedQuestion (Vetting flow)
-        q_gen = db.query(vetting_models.GeneratedQuestion)
+        # 1. GeneratedQuestion (legacy vetting flow) — one grouped query
+        q_gen = db.query(vetting_models.GeneratedQuestion.status, func.count(vetting_models.GeneratedQuestion.id))
         if subject_id:
             q_gen = q_gen.join(database.GeneratedBatch).filter(database.GeneratedBatch.subject_id == subject_id)
-            
-        gen_total = q_gen.count()
-        gen_approved = q_gen.filter(vetting_models.GeneratedQuestion.status == "approved").count()
-        gen_rejected = q_gen.filter(vetting_models.GeneratedQuestion.status == "rejected").count()
-        gen_pending = q_gen.filter(vetting_models.GeneratedQuestion.status == "pending").count()
+        gen = dict(q_gen.group_by(vetting_models.GeneratedQuestion.status).all())
 
-        # 2. Question (Quick Gen flow)
-        q_quick = db.query(database.Question)
-        if subject_id:
-            q_quick = q_quick.filter(database.Question.subject_id == subject_id)
-            
-        quick_total = q_quick.count()
-        quick_approved = q_quick.filter(database.Question.status == "approved").count()
-        quick_rejected = q_quick.filter(database.Question.status == "rejected").count()
-        quick_pending = q_quick.filter(database.Question.status == "pending").count()
+        # 2. Question — read the incrementally maintained rollup
+        quick = self.get_status_totals(db, subject_id)
 
         # Aggregate
-        total_questions = gen_total + quick_total
-        approved = gen_approved + quick_approved
-        rejected = gen_rejected + quick_rejected
-        pending = gen_pending + quick_pending
+        total_questions = sum(gen.values()) + sum(quick.values())
+        approved = gen.get("approved", 0) + quick.get("approved", 0)
+        rejected = gen.get("rejected", 0) + quick.get("rejected", 0)
+        pending = gen.get("pending", 0) + quick.get("pending", 0)
         
         # Calculate approval rate based on reviewed questions
         reviewed = approved + rejected
@@ -61,56 +70,33 @@ class ReportsService:
         Analyze Course Outcome coverage for APPROVED questions.
         Returns percentage progress for each CO based on question distribution.
         """
+        Rollup = database.QuestionReportRollup
+
         # 1. Get all COs for the subject to initialize the map
-        cos = db.query(database.CourseOutcome).filter(database.CourseOutcome.subject_id == subject_id).all()
-        co_map = {co.code: 0 for co in cos}
+        cos = db.query(database.CourseOutcome.code).filter(database.CourseOutcome.subject_id == subject_id).all()
+        co_map = {code: 0 for (code,) in cos if code}
         
         if not co_map:
             return []
 
-        # 2. Fetch approved questions for the subject
-        questions = db.query(vetting_models.GeneratedQuestion)\
-            .join(database.GeneratedBatch)\
-            .filter(
-                database.GeneratedBatch.subject_id == subject_id,
-                vetting_models.GeneratedQuestion.status == "approved"
-            ).all()
-
-        # 3. Aggregate CO counts from JSON mappings
-        # Mappings structure: [{"co_code": "CO1", "intensity": 3}, ...]
-        total_mapped_questions = 0
-        for q in questions:
-            if not q.co_mappings:
-                continue
-                
-            mappings = q.co_mappings
-            if isinstance(mappings, str):
-                try:
-                    mappings = json.loads(mappings)
-                except:
-                    continue
-            
-            if isinstance(mappings, list):
-                has_mapping = False
-                for m in mappings:
-                    code = m.get("co_code")
-                    if code and code in co_map:
-                        co_map[code] += 1
-                        has_mapping = True
-                
-                if has_mapping:
-                    total_mapped_questions += 1
+        # 2. Approved question count per mapped CO, straight from the rollup
+        counts = self._rollup_query(
+            db, Rollup.co_code, func.sum(Rollup.count), subject_id=subject_id, per_co=True
+        ).filter(Rollup.status == "approved").group_by(Rollup.co_code).all()
+        for code, count in counts:
+            if code in co_map:
+                co_map[code] = int(count or 0)
+
+        total_approved = self.get_status_totals(db, subject_id).get("approved", 0)
 
-        # 4. Calculate relative distribution (for progress bars)
-        # We can also assume a "target" if defined, but for now we show distribution/count.
+        # 3. Percentage of approved questions that cover each CO
+        # Note: Sum of % can be > 100% since one question maps to multiple COs
         result = []
         for code in sorted(co_map.keys()):
             count = co_map[code]
-            # Simple percentage of total approved questions that cover this CO
-            # Note: Sum of % can be > 100% since one question maps to multiple COs
             percentage = 0.0
-            if total_mapped_questions > 0:
-                percentage = round((count / total_mapped_questions) * 100, 1)
+            if total_approved > 0:
+                percentage = round((count / total_approved) * 100, 1)
                 
             result.append({
                 "co_code": code,
@@ -124,22 +110,20 @@ class ReportsService:
         """
         Get count of approved questions per Bloom's Taxonomy level.
         """
-        results = db.query(
-            vetting_models.GeneratedQuestion.bloom_level,
-            func.count(vetting_models.GeneratedQuestion.id)
-        ).join(database.GeneratedBatch).filter(
-            database.GeneratedBatch.subject_id == subject_id,
-            vetting_models.GeneratedQuestion.status == "approved"
-        ).group_by(vetting_models.GeneratedQuestion.bloom_level).all()
+        Rollup = database.QuestionReportRollup
+        results = self._rollup_query(
+            db, Rollup.bloom_level, func.sum(Rollup.count), subject_id=subject_id
+        ).filter(Rollup.status == "approved").group_by(Rollup.bloom_level).all()
         
-        # Normalize keys to lowercase for frontend consistency if needed, 
-        # or keep as stored (Title Case)
-        return {level: count for level, count in results if level}
+        # Keep levels as stored (e.g. "K3-Apply")
+        return {level: int(count or 0) for level, count in results if level}
 
     def get_topic_coverage(self, db: Session, subject_id: int) -> List[Dict[str, Any]]:
         """
         Get approved question counts per topic.
         """
+        Rollup = database.QuestionReportRollup
+
         # 1. Get all topics for subject (to show 0s)
         topics = db.query(database.Topic.id, database.Topic.name)\
             .filter(database.Topic.subject_id == subject_id).all()
@@ -150,18 +134,13 @@ class ReportsService:
             return []
 
         # 2. Count approved questions per topic
-        counts = db.query(
-            vetting_models.GeneratedQuestion.topic_id,
-            func.count(vetting_models.GeneratedQuestion.id)
-        ).join(database.GeneratedBatch).filter(
-            database.GeneratedBatch.subject_id == subject_id,
-            vetting_models.GeneratedQuestion.status == "approved",
-            vetting_models.GeneratedQuestion.topic_id.isnot(None)
-        ).group_by(vetting_models.GeneratedQuestion.topic_id).all()
+        counts = self._rollup_query(
+            db, Rollup.topic_id, func.sum(Rollup.count), subject_id=subject_id
+        ).filter(Rollup.status == "approved").group_by(Rollup.topic_id).all()
         
         for topic_id, count in counts:
             if topic_id in topic_map:
-                topic_map[topic_id]["count"] = count
+                topic_map[topic_id]["count"] = int(count or 0)
                 
         # Format list
         result = [
@@ -200,13 +179,11 @@ class ReportsService:
         """
         Get total question counts (all statuses) partitioned by subject.
         """
-        results = db.query(
-            database.Subject.name,
-            func.count(vetting_models.GeneratedQuestion.id)
-        ).join(database.GeneratedBatch, database.GeneratedBatch.subject_id == database.Subject.id)\
-         .join(vetting_models.GeneratedQuestion, vetting_models.GeneratedQuestion.batch_id == database.GeneratedBatch.id)\
-         .group_by(database.Subject.name).all()
+        Rollup = database.QuestionReportRollup
+        results = self._rollup_query(db, database.Subject.name, func.sum(Rollup.count))\
+            .join(database.Subject, database.Subject.id == Rollup.subject_id)\
+            .group_by(database.Subject.name).all()
          
-        return [{"subject": name, "question_count": count} for name, count in results]
+        return [{"subject": name, "question_count": int(count or 0)} for name, count in results]
 
 reports_service = ReportsService()
@@ -0,0 +1,250 @@
+"""
+Offline retrieval evaluation.
+
+Ingests a fixed corpus into a throwaway vector store once per chunking setup,
+runs a labeled query set against each retrieval configuration and reports
+recall@k, MRR, p50/p95 retrieval latency, on-disk index size and the resident
+size of the scanned vectors (see VectorStore.vector_bytes). A retrieved
+chunk counts as a hit when its page span overlaps the query's expected pages
+and, if the query names one, it contains the expected phrase (the bundled
+corpora pack many items per page, so the page alone is too coarse).
+Optional padding chunks, drawn at random from the corpus's vocabulary and
+never relevant, bring a small corpus up to a realistic subject size.
+
+Driven by scripts/evaluate_retrieval.py; the embedder is passed in so the same
+run can be repeated against different models.
+"""
+import json
+import logging
+import math
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .chunker import Chunker
+from .vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+Embedder = Callable[[List[str]], List[List[float]]]
+
+COLLECTION = "eval"
+
+
+@dataclass
+class EvalQuery:
+    query: str
+    pages: List[str]  # expected source pages (printed labels, as stored in chunk metadata)
+    contains: Optional[str] = None  # phrase the relevant chunk must contain
+
+
+@dataclass
+class RetrievalConfig:
+    name: str
+    mode: str = "hybrid"  # "dense" (query_mmr) or "hybrid" (query_hybrid)
+    fetch_k: int = 36
+    lambda_mult: float = 0.7
+    chunk_size: int = 2000
+    overlap: int = 400
+    noise_filter: bool = True  # Chunker noise rules at ingest and on retrieved chunks
+    storage: str = "float32"  # embedding storage of the collection (config.EMBEDDING_STORAGE)
+
+    @property
+    def ingest_key(self) -> Tuple[int, int, bool, str]:
+        return self.chunk_size, self.overlap, self.noise_filter, self.storage
+
+
+@dataclass
+class EvalResult:
+    config: RetrievalConfig
+    chunks: int
+    recall: float
+    mrr: float
+    p50_ms: float
+    p95_ms: float
+    index_bytes: int
+    vector_bytes: int
+    misses: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result["config"] = asdict(self.config)
+        return result
+
+
+class _UnfilteredChunker(Chunker):
+    """Chunker with the noise rules switched off, to measure what they buy."""
+
+    @classmethod
+    def is_noisy_chunk(cls, text: str) -> bool:
+        return False
+
+
+def load_queries(path: str) -> List[EvalQuery]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [EvalQuery(query=q["query"], pages=[str(p) for p in q["pages"]], contains=q.get("contains"))
+            for q in data["queries"]]
+
+
+def page_span(page_number: Any) -> set:
+    """Pages covered by a chunk's page_number ("4" or a "4-5" span)."""
+    if page_number in (None, ""):
+        return set()
+    text = str(page_number)
+    match = re.fullmatch(r"(\d+)-(\d+)", text)
+    if match:
+        start, end = int(match.group(1)), int(match.group(2))
+        return {str(p) for p in range(start, end + 1)}
+    return {text}
+
+
+def _normalise(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+
+def is_relevant(query: EvalQuery, text: str, metadata: Optional[Dict[str, Any]]) -> bool:
+    if not page_span((metadata or {}).get("page_number")) & set(query.pages):
+        return False
+    return query.contains is None or _normalise(query.contains) in _normalise(text)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(first_hits: Sequence[Optional[int]], latencies_ms: Sequence[float]) -> Dict[str, float]:
+    """first_hits: 1-based rank of the first relevant chunk per query (None = missed)."""
+    n = len(first_hits) or 1
+    return {
+        "recall": sum(1 for r in first_hits if r is not None) / n,
+        "mrr": sum(1 / r for r in first_hits if r is not None) / n,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+    }
+
+
+def directory_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+class RetrievalEvaluator:
+    PADDING_WORDS = 60  # words per padding chunk
+    PADDING_BATCH = 5000
+
+    def __init__(self, embed: Embedder, pages: List[Dict[str, Any]], source: str = "corpus", padding: int = 0):
+        """`pages` as returned by PDFParser.extract_text_with_pages."""
+        self.embed = embed
+        self.pages = pages
+        self.source = source
+        self.padding = padding
+        self._padding_chunks: Optional[Tuple[List[str], List[List[float]]]] = None
+
+    def run(self, configs: Sequence[RetrievalConfig], queries: Sequence[EvalQuery], k: int,
+            repeats: int = 3) -> List[EvalResult]:
+        """
+        Evaluate every config; configs sharing chunking settings share one
+        ingest. Latency covers the vector-store query and noise filtering only
+        (query embeddings are computed up front, they don't vary by config),
+        recording all `repeats` runs of every query, so the percentiles
+        include the slow runs. Hybrid configs use the strict query path: a
+        sparse-side failure raises instead of silently measuring dense.
+        """
+        query_embeddings = self.embed([q.query for q in queries])
+        groups: Dict[Tuple[int, int, bool, str], List[RetrievalConfig]] = {}
+        for cfg in configs:
+            groups.setdefault(cfg.ingest_key, []).append(cfg)
+
+        results: Dict[str, EvalResult] = {}
+        for (chunk_size, overlap, noise_filter, storage), group in groups.items():
+            directory = tempfile.mkdtemp(prefix="retrieval-eval-")
+            try:
+                store = VectorStore(directory, embedding_storage=storage)
+                chunks = self._ingest(store, chunk_size, overlap, noise_filter)
+                sizes = (directory_bytes(directory), store.vector_bytes(COLLECTION))
+                for cfg in group:
+                    results[cfg.name] = self._evaluate(store, cfg, queries, query_embeddings, k,
+                                                       repeats, chunks, sizes)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        return [results[cfg.name] for cfg in configs]
+
+    def _ingest(self, store: VectorStore, chunk_size: int, overlap: int, noise_filter: bool) -> int:
+        chunker_cls = Chunker if noise_filter else _UnfilteredChunker
+        chunks = chunker_cls(chunk_size=chunk_size, overlap=overlap).chunk_text_with_pages(
+            self.pages, {"source": self.source})
+        if not chunks:
+            raise ValueError(f"No chunks produced from {self.source} at {chunk_size}/{overlap}")
+        texts = [c["text"] for c in chunks]
+        store.add_documents(
+            COLLECTION, texts, [c["metadata"] for c in chunks],
+            [f"chunk-{i}" for i in range(len(chunks))], self.embed(texts),
+        )
+        if self.padding:
+            pad_texts, pad_embeddings = self._padding_set()
+            for start in range(0, self.padding, self.PADDING_BATCH):  # Chroma limits the batch size
+                batch = range(start, min(start + self.PADDING_BATCH, self.padding))
+                store.add_documents(
+                    COLLECTION, [pad_texts[i] for i in batch],
+                    [{"source": "padding", "page_number": ""} for _ in batch],
+                    [f"pad-{i}" for i in batch], [pad_embeddings[i] for i in batch],
+                )
+        logger.info(f"Eval ingest {chunk_size}/{overlap} (noise filter {noise_filter}): "
+                    f"{len(chunks)} chunks + {self.padding} padding")
+        return len(chunks) + self.padding
+
+    def _padding_set(self) -> Tuple[List[str], List[List[float]]]:
+        """Padding chunks and their embeddings, built once and shared by every ingest."""
+        if self._padding_chunks is None:
+            # Whole corpus sentences would duplicate the labeled passages and bury them
+            vocabulary = sorted({w for page in self.pages for w in re.findall(r"[A-Za-z]{3,}", page.get("text", ""))})
+            rng = random.Random(0)
+            texts = [" ".join(rng.choices(vocabulary, k=self.PADDING_WORDS)) for _ in range(self.padding)]
+            self._padding_chunks = (texts, list(self.embed(texts)))
+        return self._padding_chunks
+
+    def _retrieve(self, store: VectorStore, cfg: RetrievalConfig, query: EvalQuery,
+                  embedding: List[float], k: int) -> Tuple[List[str], List[Dict[str, Any]]]:
+        if cfg.mode == "dense":
+            result = store.query_mmr(COLLECTION, [embedding], k=k, fetch_k=cfg.fetch_k,
+                                     lambda_mult=cfg.lambda_mult)
+        elif cfg.mode == "hybrid":
+            result = store.query_hybrid(COLLECTION, [embedding], query.query, k=k, fetch_k=cfg.fetch_k,
+                                        lambda_mult=cfg.lambda_mult, strict=True)
+        else:
+            raise ValueError(f"Unknown retrieval mode: {cfg.mode}")
+        docs, metas = result["documents"][0], result["metadatas"][0]
+        if cfg.noise_filter:
+            kept = [(d, m) for d, m in zip(docs, metas) if not Chunker.is_noisy_chunk(d)]
+            docs, metas = [d for d, _ in kept], [m for _, m in kept]
+        return docs, metas
+
+    def _evaluate(self, store: VectorStore, cfg: RetrievalConfig, queries: Sequence[EvalQuery],
+                  query_embeddings: List[List[float]], k: int, repeats: int,
+                  chunks: int, sizes: Tuple[int, int]) -> EvalResult:
+        self._retrieve(store, cfg, queries[0], query_embeddings[0], k)  # warm-up: collection and index loads
+        first_hits, latencies, misses = [], [], []
+        for query, embedding in zip(queries, query_embeddings):
+            for _ in range(max(1, repeats)):
+                start = time.perf_counter()
+                docs, metas = self._retrieve(store, cfg, query, embedding, k)
+                latencies.append((time.perf_counter() - start) * 1000)
+            rank = next((i for i, (d, m) in enumerate(zip(docs, metas), 1) if is_relevant(query, d, m)), None)
+            first_hits.append(rank)
+            if rank is None:
+                misses.append(query.query)
+        return EvalResult(config=cfg, chunks=chunks, index_bytes=sizes[0], vector_bytes=sizes[1], misses=misses,
+                          **summarize(first_hits, latencies))
@@ -5,6 +5,7 @@ from datetime import datetime
 from ..models import database
 from ..models import rubric_models
 from sqlalchemy.orm import Session
+from .question_outcome_service import question_outcome_service
 
 EXAM_PRESETS = {
     "final": {
@@ -124,6 +125,41 @@ class RubricService:
         db.commit()
         db.refresh(rubric)
         return rubric
+
+    def check_co_distribution(self, db: Session, rubric_id: str) -> Dict:
+        """
+        Compare the rubric's target CO distribution with the COs actually mapped
+        to its generated questions (one GROUP BY over question_outcome_mapping).
+        Percentages are per question, so actuals can sum past 100 when a question
+        maps to several COs.
+        """
+        rubric = db.query(database.Rubric).filter(database.Rubric.id == rubric_id).first()
+        if not rubric:
+            raise ValueError("Rubric not found")
+
+        target = json.loads(rubric.co_distribution) if rubric.co_distribution else {}
+        total = db.query(database.Question).filter(database.Question.rubric_id == str(rubric.id)).count()
+        counts = question_outcome_service.code_counts(
+            db, "co", database.Question.rubric_id == str(rubric.id)
+        )
+
+        distribution = []
+        for code in sorted(set(target) | set(counts)):
+            actual_pct = round(counts.get(code, 0) / total * 100, 1) if total else 0.0
+            target_pct = float(target[code]) if code in target else None
+            distribution.append({
+                "co_code": code,
+                "question_count": counts.get(code, 0),
+                "actual_percentage": actual_pct,
+                "target_percentage": target_pct,
+                "deviation": round(actual_pct - target_pct, 1) if target_pct is not None else None,
+            })
+
+        return {
+            "rubric_id": str(rubric.id),
+            "total_questions": total,
+            "distribution": distribution,
+        }
     
 
 
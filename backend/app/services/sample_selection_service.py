@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from ..models.sample_question import SampleQuestion
+from .sample_vector_store import SampleVectorStore
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+
+class SampleSelectionService:
+    """
+    Picks few-shot examples by relevance to the subtopic being generated.
+
+    Selection runs on the per-topic SampleVectorStore indexes (the same FAISS
+    indexes the sample upload endpoint writes): MMR over the topic's samples
+    of the requested type, mapped back to SampleQuestion rows. Embedding work
+    (uploads, the query, a first index load) runs in a worker thread so it
+    never blocks the event loop.
+    """
+
+    def __init__(self, sample_store: SampleVectorStore = None):
+        self._sample_store = sample_store
+
+    @property
+    def sample_store(self) -> SampleVectorStore:
+        # Created on first use (the ollama/local backend is read from config then)
+        if self._sample_store is None:
+            self._sample_store = SampleVectorStore()
+        return self._sample_store
+
+    @staticmethod
+    def record(sample) -> Dict[str, Any]:
+        """A SampleQuestion (or a row with the same columns) as a SampleVectorStore entry."""
+        return {"question_text": sample.question_text, "type": sample.question_type,
+                "difficulty": sample.difficulty or "medium"}
+
+    async def index_samples(self, topic_id: int, records: List[Dict[str, Any]]):
+        """Add newly saved samples (see `record`) to the topic's index."""
+        await asyncio.to_thread(self.sample_store.add_samples, topic_id, records)
+
+    async def select(
+        self,
+        db: Session,
+        subject_id: int,
+        topic_id: int,
+        question_type: str,
+        query_text: str,
+        k: int = config.SAMPLE_FEW_SHOT_K,
+    ) -> List[SampleQuestion]:
+        """The k samples most relevant to `query_text`, diversified with MMR."""
+        if not self.sample_store.has_index(topic_id):
+            # Samples saved before the topic was indexed (or under another embedding backend)
+            rows = db.query(
+                SampleQuestion.question_text, SampleQuestion.question_type, SampleQuestion.difficulty
+            ).filter(SampleQuestion.topic_id == topic_id).order_by(SampleQuestion.id).all()
+            if not rows:
+                return []
+            records = [self.record(r) for r in rows]
+            await asyncio.to_thread(self.sample_store.rebuild, topic_id, records)
+            logger.info(f"Indexed {len(records)} stored samples for topic {topic_id}")
+
+        docs = await asyncio.to_thread(self.sample_store.select_diverse, topic_id, query_text, k, question_type)
+        texts = [d.page_content for d in docs]
+        if not texts:
+            return []
+        by_text = {}
+        for s in db.query(SampleQuestion).filter(
+            SampleQuestion.subject_id == subject_id,
+            SampleQuestion.topic_id == topic_id,
+            SampleQuestion.question_type == question_type,
+            SampleQuestion.question_text.in_(texts),
+        ):
+            by_text.setdefault(s.question_text, s)
+        # Index entries whose rows were deleted are skipped
+        return [by_text[t] for t in texts if t in by_text]
+
+
+sample_selection_service = SampleSelectionService()
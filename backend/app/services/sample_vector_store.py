@@ -1,81 +1,282 @@
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_ollama import OllamaEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from collections import OrderedDict
 import os
+import shutil
+import threading
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from .. import config
 
 logger = logging.getLogger(__name__)
 
+class SentenceTransformerEmbeddings(Embeddings):
+    """LangChain adapter over the shared in-process EmbeddingService (batched encode + cache)."""
+
+    def __init__(self, embedding_service=None):
+        self._embedding_service = embedding_service
+
+    @property
+    def embedding_service(self):
+        # Loaded on the first embed call, which callers make off the event loop
+        if self._embedding_service is None:
+            from .embedding_service import EmbeddingService
+            self._embedding_service = EmbeddingService()
+        return self._embedding_service
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedding_service.generate_embeddings(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embedding_service.generate_embeddings([text])[0]
+
+
 class SampleVectorStore:
-    def __init__(self):
-        # Initialize embeddings with optimal model
+    """
+    Per-topic FAISS indexes of sample questions for few-shot retrieval.
+
+    On disk each topic has a base index plus append-only shards:
+        data/vectors/topic_{id}/index.faiss|index.pkl          (base)
+        data/vectors/topic_{id}/shards/000001/index.faiss|pkl   (one per add_samples call)
+    add_samples only writes the new shard; once there are more than
+    SAMPLE_INDEX_MAX_SHARDS they are compacted into the base.
+
+    Loaded indexes are kept in a process-wide LRU (SAMPLE_INDEX_CACHE_SIZE topics)
+    keyed by store path and validated against the files' mtimes, so a query is
+    one in-memory search unless another process/instance changed the index.
+    Cached indexes are never modified in place (searches run outside the lock):
+    add_samples merges into a copy and swaps it in.
+    """
+
+    # store_path -> (signature, FAISS); shared by every instance in the process
+    _index_cache: "OrderedDict[str, Tuple[tuple, FAISS]]" = OrderedDict()
+    _cache_lock = threading.RLock()
+
+    def __init__(self, backend: Optional[str] = None):
+        # "ollama" (default) or "local" — see config.SAMPLE_EMBEDDING_BACKEND
+        self.backend = backend or config.SAMPLE_EMBEDDING_BACKEND
         try:
-            self.embeddings = OllamaEmbeddings(
-                base_url=config.OLLAMA_BASE_URL,
-                model=config.EMBEDDING_MODEL
-            )
+            if self.backend == "local":
+                self.embeddings = SentenceTransformerEmbeddings()
+            else:
+                self.embeddings = OllamaEmbeddings(
+                    base_url=config.OLLAMA_BASE_URL,
+                    model=config.EMBEDDING_MODEL
+                )
         except Exception as e:
             logger.error(f"Failed to initialize embeddings: {e}")
             raise
 
     def _get_store_path(self, topic_id: int) -> str:
-        # data/vectors/topic_{topic_id}
+        # data/vectors/topic_{topic_id}; other backends get their own tree since
+        # vectors from different models are not comparable
         base_dir = os.path.join(os.getcwd(), "data", "vectors")
+        if getattr(self, "backend", "ollama") != "ollama":
+            base_dir = os.path.join(base_dir, self.backend)
         os.makedirs(base_dir, exist_ok=True)
         return os.path.join(base_dir, f"topic_{topic_id}")
 
+    @staticmethod
+    def _shard_dirs(store_path: str) -> List[str]:
+        shards_root = os.path.join(store_path, "shards")
+        if not os.path.isdir(shards_root):
+            return []
+        return [
+            os.path.join(shards_root, name)
+            for name in sorted(os.listdir(shards_root))
+            if os.path.exists(os.path.join(shards_root, name, "index.faiss"))
+        ]
+
+    def _signature(self, store_path: str) -> tuple:
+        """(path, mtime_ns, size) of every index file that makes up the topic store."""
+        parts = []
+        for root in [store_path] + self._shard_dirs(store_path):
+            index_file = os.path.join(root, "index.faiss")
+            if os.path.exists(index_file):
+                st = os.stat(index_file)
+                parts.append((root, st.st_mtime_ns, st.st_size))
+        return tuple(parts)
+
+    def _load(self, store_path: str) -> Optional[FAISS]:
+        """Load base + shards from disk into one in-memory index."""
+        store = None
+        for root in [store_path] + self._shard_dirs(store_path):
+            if not os.path.exists(os.path.join(root, "index.faiss")):
+                continue
+            part = FAISS.load_local(root, self.embeddings, allow_dangerous_deserialization=True)
+            if store is None:
+                store = part
+            else:
+                store.merge_from(part)
+        return store
+
+    def _get_index(self, store_path: str) -> Optional[FAISS]:
+        signature = self._signature(store_path)
+        if not signature:
+            return None
+        with self._cache_lock:
+            cached = self._index_cache.get(store_path)
+            if cached and cached[0] == signature:
+                self._index_cache.move_to_end(store_path)
+                return cached[1]
+
+            store = self._load(store_path)
+            self._cache_put(store_path, signature, store)
+            return store
+
+    @staticmethod
+    def _copy(store: FAISS) -> FAISS:
+        """An independent copy of a loaded index (FAISS data, docstore and id map)."""
+        import faiss
+        return FAISS(
+            store.embedding_function,
+            faiss.clone_index(store.index),
+            InMemoryDocstore(dict(store.docstore._dict)),
+            dict(store.index_to_docstore_id),
+        )
+
+    def _cache_put(self, store_path: str, signature: tuple, store: FAISS):
+        self._index_cache[store_path] = (signature, store)
+        self._index_cache.move_to_end(store_path)
+        while len(self._index_cache) > config.SAMPLE_INDEX_CACHE_SIZE:
+            evicted, _ = self._index_cache.popitem(last=False)
+            logger.debug(f"Evicted sample index {evicted} from cache")
+
+    def _build_shard(self, questions: List[Dict[str, Any]]) -> Optional[FAISS]:
+        """Embed sample questions into a new in-memory index (None if none have text)."""
+        texts = []
+        metadatas = []
+        for q in questions:
+            # Content to embed: The question text itself
+            content = q.get("question_text", "")
+            if not content:
+                continue
+                
+            # Store metadata for filtering/retrieval
+            texts.append(content)
+            metadatas.append({
+                "type": q.get("type", "unknown"),
+                "difficulty": q.get("difficulty", "medium"),
+                "full_json": str(q) # Store full object to reconstruct example
+            })
+        
+        if not texts:
+            return None
+
+        # One batched embedding call for the whole upload
+        vectors = self.embeddings.embed_documents(texts)
+        return FAISS.from_embeddings(list(zip(texts, vectors)), self.embeddings, metadatas=metadatas)
+
     def add_samples(self, topic_id: int, questions: List[Dict[str, Any]]):
         """
         Embeds and indexes sample questions for a topic.
         """
         try:
-            docs = []
-            for q in questions:
-                # Content to embed: The question text itself
-                content = q.get("question_text", "")
-                if not content:
-                    continue
-                    
-                # Store metadata for filtering/retrieval
-                metadata = {
-                    "type": q.get("type", "unknown"),
-                    "difficulty": q.get("difficulty", "medium"),
-                    "full_json": str(q) # Store full object to reconstruct example
-                }
-                
-                docs.append(Document(page_content=content, metadata=metadata))
-            
-            if not docs:
+            shard = self._build_shard(questions)
+            if shard is None:
                 return
 
             store_path = self._get_store_path(topic_id)
-            
-            # Check if store already exists to append
-            if os.path.exists(os.path.join(store_path, "index.faiss")):
-                vector_store = FAISS.load_local(store_path, self.embeddings, allow_dangerous_deserialization=True)
-                vector_store.add_documents(docs)
-            else:
-                vector_store = FAISS.from_documents(docs, self.embeddings)
-            
-            vector_store.save_local(store_path)
-            logger.info(f"Indexed {len(docs)} samples for topic {topic_id}")
+
+            with self._cache_lock:
+                signature_before = self._signature(store_path)
+                self._write_shard(store_path, shard)
+
+                # Keep a current cached copy current instead of reloading it from disk;
+                # searches may be running on the cached object, so merge into a copy
+                cached = self._index_cache.get(store_path)
+                if cached and cached[0] == signature_before:
+                    merged = self._copy(cached[1])
+                    merged.merge_from(shard)
+                    self._cache_put(store_path, self._signature(store_path), merged)
+                elif not signature_before:
+                    self._cache_put(store_path, self._signature(store_path), shard)
+                else:
+                    self._index_cache.pop(store_path, None)
+
+                if len(self._shard_dirs(store_path)) > config.SAMPLE_INDEX_MAX_SHARDS:
+                    self._compact(store_path)
+
+            logger.info(f"Indexed {shard.index.ntotal} samples for topic {topic_id}")
             
         except Exception as e:
             logger.error(f"Error adding samples to vector store: {e}")
             raise
 
+    def rebuild(self, topic_id: int, questions: List[Dict[str, Any]]) -> int:
+        """
+        Replace a topic's index with one built from `questions` (every sample of
+        the topic, e.g. from the sample_questions table). Used after switching
+        SAMPLE_EMBEDDING_BACKEND, whose indexes live in a separate tree.
+        """
+        shard = self._build_shard(questions)
+        store_path = self._get_store_path(topic_id)
+        with self._cache_lock:
+            shutil.rmtree(store_path, ignore_errors=True)
+            self._index_cache.pop(store_path, None)
+            if shard is None:
+                return 0
+            self._write_shard(store_path, shard)
+            self._cache_put(store_path, self._signature(store_path), shard)
+        logger.info(f"Rebuilt sample index for topic {topic_id}: {shard.index.ntotal} samples")
+        return shard.index.ntotal
+
+    def _write_shard(self, store_path: str, shard: FAISS):
+        """Persist only the new documents; existing files are never rewritten."""
+        shards_root = os.path.join(store_path, "shards")
+        os.makedirs(shards_root, exist_ok=True)
+        existing = [int(n) for n in os.listdir(shards_root) if n.isdigit()]
+        target = os.path.join(shards_root, f"{max(existing, default=0) + 1:06d}")
+        tmp = target + ".tmp"
+        shard.save_local(tmp)
+        os.replace(tmp, target)
+
+    def _compact(self, store_path: str):
+        """Fold all shards into the base index (rare; bounded by SAMPLE_INDEX_MAX_SHARDS)."""
+        store = self._get_index(store_path)
+        if store is None:
+            return
+        tmp = os.path.join(store_path, "base.tmp")
+        store.save_local(tmp)
+        for name in ("index.faiss", "index.pkl"):
+            os.replace(os.path.join(tmp, name), os.path.join(store_path, name))
+        shutil.rmtree(tmp, ignore_errors=True)
+        shutil.rmtree(os.path.join(store_path, "shards"), ignore_errors=True)
+        self._cache_put(store_path, self._signature(store_path), store)
+        logger.info(f"Compacted sample index shards into {store_path}")
+
+    def has_index(self, topic_id: int) -> bool:
+        return bool(self._signature(self._get_store_path(topic_id)))
+
+    def select_diverse(self, topic_id: int, query: str, k: int = config.SAMPLE_FEW_SHOT_K,
+                       question_type: Optional[str] = None,
+                       lambda_mult: float = config.SAMPLE_MMR_LAMBDA) -> List[Document]:
+        """
+        The k samples most relevant to `query` (e.g. the subtopic being
+        generated), diversified with MMR. Blocking (embeds the query); call it
+        off the event loop.
+        """
+        vector_store = self._get_index(self._get_store_path(topic_id))
+        if vector_store is None:
+            return []
+        # A topic holds tens to hundreds of samples, so MMR can consider all of them
+        return vector_store.max_marginal_relevance_search(
+            query, k=k, fetch_k=vector_store.index.ntotal, lambda_mult=lambda_mult,
+            filter={"type": question_type} if question_type else None,
+        )
+
     def retrieve_similar(self, topic_id: int, query: str, k: int = 3, filter_dict: Dict = None) -> List[Document]:
         """
         Retrieves similar sample questions.
         """
         try:
             store_path = self._get_store_path(topic_id)
-            if not os.path.exists(os.path.join(store_path, "index.faiss")):
+            vector_store = self._get_index(store_path)
+            if vector_store is None:
                 return []
-                
-            vector_store = FAISS.load_local(store_path, self.embeddings, allow_dangerous_deserialization=True)
             
             # Perform search
             # Note: FAISS filter support varies, simple filter might need post-processing
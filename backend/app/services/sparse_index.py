@@ -0,0 +1,229 @@
+import gzip
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Keeps hyphenated terms and abbreviations ("co-cr", "pmma", "2mm") whole
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a an and are as at be been but by can for from has have in into is it its of on or
+that the their there these this those to was were which while with will would not
+no such than then they them also may more most other some what when where who how
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def corpus_stats(indexes: Sequence["SparseIndex"], query: str) -> Tuple[int, int, Dict[str, int]]:
+    """Summed term_stats of several indexes, for searching them as one corpus."""
+    chunks, total_length, frequencies = 0, 0, Counter()
+    for index in indexes:
+        n, length, dfs = index.term_stats(query)
+        chunks += n
+        total_length += length
+        frequencies.update(dfs)
+    return chunks, total_length, dict(frequencies)
+
+
+class SparseIndex:
+    """
+    BM25 inverted index over one collection's chunks.
+
+    Dense MiniLM retrieval is weak on exact domain terms (material names,
+    anatomical terms, abbreviations); this index finds them directly and is
+    fused with the dense ranking by VectorStore.query_hybrid. Only topic_id is
+    kept from the metadata, for the topic-filtered queries RAGService makes.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    FILTER_KEYS = ("topic_id",)
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.lengths: List[int] = []
+        self.topics: List[Optional[str]] = []
+        self.postings: Dict[str, Dict[int, int]] = {}  # term -> {doc ordinal: term frequency}
+        self._ordinals: Dict[str, int] = {}
+        self._total_length = 0
+        self._borrowed: set = set()  # terms whose posting is still shared with the index copied from
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], metadatas: Optional[Sequence[Dict[str, Any]]] = None):
+        metadatas = metadatas or [{}] * len(ids)
+        for chunk_id, text, meta in zip(ids, texts, metadatas):
+            if chunk_id in self._ordinals:
+                continue  # chunks are immutable once indexed
+            ordinal = len(self.ids)
+            terms = Counter(tokenize(text))
+            self.ids.append(chunk_id)
+            self._ordinals[chunk_id] = ordinal
+            length = sum(terms.values())
+            self.lengths.append(length)
+            self._total_length += length
+            topic_id = (meta or {}).get("topic_id")
+            self.topics.append(str(topic_id) if topic_id not in (None, "") else None)
+            for term, tf in terms.items():
+                posting = self.postings.get(term)
+                if posting is None:
+                    posting = self.postings[term] = {}
+                elif term in self._borrowed:
+                    posting = self.postings[term] = dict(posting)
+                    self._borrowed.discard(term)
+                posting[ordinal] = tf
+
+    def copy(self) -> "SparseIndex":
+        """
+        A copy to add() to while searches keep running on this index; postings
+        are shared until the copy writes to them.
+        """
+        index = SparseIndex()
+        index.ids = list(self.ids)
+        index.lengths = list(self.lengths)
+        index.topics = list(self.topics)
+        index.postings = dict(self.postings)
+        index._ordinals = dict(self._ordinals)
+        index._total_length = self._total_length
+        index._borrowed = set(self.postings)
+        return index
+
+    def term_stats(self, query: str) -> Tuple[int, int, Dict[str, int]]:
+        """(chunks, total length, document frequency of each query term): what BM25 scores depend on."""
+        return len(self.ids), self._total_length, {t: len(self.postings.get(t, ())) for t in set(tokenize(query))}
+
+    def search(self, query: str, k: int, where: Optional[Dict[str, Any]] = None,
+               corpus: Optional[Tuple[int, int, Dict[str, int]]] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k (chunk id, BM25 score); `where` supports equality on topic_id.
+        `corpus` (see corpus_stats) scores with the statistics of several
+        indexes instead of this one's, so their hits can be merged by score.
+        """
+        if not self.ids:
+            return []
+        allowed = self._filter(where)
+        n, total_length, frequencies = corpus or self.term_stats(query)
+        avg_length = total_length / n or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            df = frequencies[term]
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for ordinal, tf in posting.items():
+                if allowed is not None and ordinal not in allowed:
+                    continue
+                norm = self.K1 * (1 - self.B + self.B * self.lengths[ordinal] / avg_length)
+                scores[ordinal] = scores.get(ordinal, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.ids[ordinal], score) for ordinal, score in best]
+
+    def _filter(self, where: Optional[Dict[str, Any]]) -> Optional[set]:
+        if not where:
+            return None
+        unsupported = set(where) - set(self.FILTER_KEYS)
+        if unsupported:
+            raise ValueError(f"Sparse index cannot filter on {sorted(unsupported)}")
+        topic_id = str(where["topic_id"])
+        return {i for i, t in enumerate(self.topics) if t == topic_id}
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Postings as parallel [ordinals, tfs] lists: far smaller than per-entry objects
+        return {
+            "ids": self.ids,
+            "lengths": self.lengths,
+            "topics": self.topics,
+            "postings": {term: [list(p.keys()), list(p.values())] for term, p in self.postings.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SparseIndex":
+        index = cls()
+        index.ids = data["ids"]
+        index.lengths = data["lengths"]
+        index.topics = data["topics"]
+        index.postings = {term: dict(zip(ordinals, tfs)) for term, (ordinals, tfs) in data["postings"].items()}
+        index._ordinals = {chunk_id: i for i, chunk_id in enumerate(index.ids)}
+        index._total_length = sum(index.lengths)
+        return index
+
+
+class SparseIndexStore:
+    """
+    Per-collection SparseIndex files (gzipped JSON) next to the Chroma data.
+
+    Loaded indexes are shared by every VectorStore on the same directory and
+    reloaded when the file changes, so an ingest through one instance is seen
+    by the others. Cached indexes are never modified in place (searches run
+    outside the lock): add() writes into a copy and swaps it in, and ingests
+    into the store are serialized.
+    """
+
+    _cache: Dict[str, Tuple[float, SparseIndex]] = {}
+    _lock = threading.Lock()
+    _write_lock = threading.Lock()
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, collection_name: str) -> str:
+        return os.path.join(self.directory, f"{collection_name}.json.gz")
+
+    def get(self, collection_name: str) -> Optional[SparseIndex]:
+        """The collection's index, or None if it has never been built."""
+        path = self.path(collection_name)
+        with self._lock:
+            if not os.path.exists(path):
+                return None
+            mtime = os.path.getmtime(path)
+            cached = self._cache.get(path)
+            if cached and cached[0] == mtime:
+                return cached[1]
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                index = SparseIndex.from_dict(json.load(f))
+            self._cache[path] = (mtime, index)
+            return index
+
+    def add(self, collection_name: str, ids: Sequence[str], texts: Sequence[str],
+            metadatas: Optional[Sequence[Dict[str, Any]]] = None) -> SparseIndex:
+        with self._write_lock:
+            current = self.get(collection_name)
+            index = current.copy() if current is not None else SparseIndex()
+            index.add(ids, texts, metadatas)
+            self.save(collection_name, index)
+        return index
+
+    def save(self, collection_name: str, index: SparseIndex):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(collection_name)
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(index.to_dict(), f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+            self._cache[path] = (os.path.getmtime(path), index)
+        logger.info(f"Sparse index for {collection_name}: {len(index)} chunks, {len(index.postings)} terms")
+
+    def drop(self, collection_name: str):
+        """Forget a collection's index (it is rebuilt from the vector store on next use)."""
+        path = self.path(collection_name)
+        with self._lock:
+            self._cache.pop(path, None)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def size_bytes(self, collection_name: str) -> int:
+        path = self.path(collection_name)
+        return os.path.getsize(path) if os.path.exists(path) else 0
@@ -12,6 +12,8 @@ from ..models import database
 from ..services.llm_service import LLMService
 from ..services.rag_service import RAGService
 from ..services.pdf_parser import PDFParser
+from .change_tracker import change_tracker
+from .topic_outcome_cache import topic_outcome_cache
 from ..services.docx_parser import DocxParser
 from ..prompts.syllabus_extraction_prompts import SYLLABUS_EXTRACTION_PROMPT
 from .. import config
@@ -200,6 +202,7 @@ class SubjectSetupService:
          self.rag_service.index_document(file_path, subject_id)
 
     def _save_subject_to_db(self, db: Session, name: str, code: str, department: str, credits: int, paper_type: str, data: Dict) -> database.Subject:
+        stale_topic_ids = []  # topics of a re-imported subject, dropped from topic_outcome_cache
         # Check if exists
         subject = db.query(database.Subject).filter(database.Subject.code == code).first()
         if not subject:
@@ -222,8 +225,10 @@ class SubjectSetupService:
             # Reset relations if re-importing? 
             # For this MVP, we might append or duplicate if we are not careful.
             # Let's clear existing structure for this subject to be safe (full update)
-            db.query(database.CourseOutcome).filter(database.CourseOutcome.subject_id == subject.id).delete()
-            db.query(database.Topic).filter(database.Topic.subject_id == subject.id).delete()
+            stale_topic_ids = [t_id for (t_id,) in db.query(database.Topic.id).filter(database.Topic.subject_id == subject.id)]
+            # (bulk deletes skip flush events, so change_tracker bumps GET /subjects' version here)
+            change_tracker.bulk_delete(db.query(database.CourseOutcome).filter(database.CourseOutcome.subject_id == subject.id))
+            change_tracker.bulk_delete(db.query(database.Topic).filter(database.Topic.subject_id == subject.id))
             # Topics and LOs cascade delete usually, but SQLAlchemy needs configuration.
             # Assuming basic setup:
             # cascading deletes might not be set up in database.py, so manual cleanup might be needed.
@@ -312,6 +317,9 @@ class SubjectSetupService:
                 db.add(default_lo)
 
         db.commit()
+        # Bulk deletes above skip the cache's invalidation hooks
+        for t_id in stale_topic_ids:
+            topic_outcome_cache.invalidate(t_id)
         return subject
 
 subject_setup_service = SubjectSetupService()
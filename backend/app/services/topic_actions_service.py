@@ -1,9 +1,10 @@
 import os
 import json
+import asyncio
 import csv
 import logging
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Callable, Awaitable
 from datetime import datetime
 from sqlalchemy.orm import Session
 
@@ -17,6 +18,11 @@ from ..services.chunker import Chunker
 from ..services.vector_store import VectorStore
 from ..services.embedding_service import EmbeddingService
 from ..services.hybrid_generator import HybridGenerationSystem
+from ..services.question_writer import question_writer
+from ..services.rag_context_store import rag_context_store
+from ..services.topic_outcome_cache import topic_outcome_cache
+from ..services.sample_selection_service import sample_selection_service
+from ..services.prompt_budget import prompt_budget_planner
 from .. import config
 
 # Configure logging
@@ -62,7 +68,9 @@ class TopicActionsService:
         question_type: str,  # 'mcq', 'short_answer', 'essay'
         count: int,
         difficulty: str = 'medium',
-        pre_retrieved_context: Optional[str] = None
+        pre_retrieved_context: Optional[str] = None,
+        checkpoint: Optional[Callable[[], Awaitable[None]]] = None,
+        saved_ids: Optional[List[int]] = None
     ) -> Dict[str, Any]:
         """
         Sub-batch generation for faculty reference:
@@ -70,6 +78,15 @@ class TopicActionsService:
         - Different RAG context per batch (different queries)
         - Unique scenario parameters per batch (diff patient, focus, setting)
         - This forces structural diversity: same question logic, different parameters
+
+        checkpoint: awaited between questions (see GenerationScheduler) so a
+        more urgent job can take over the LLM slot; never called mid-question.
+        When it returns False (job cancelled) the questions so far are saved
+        and returned.
+
+        saved_ids: optional list that receives the ids of the saved questions. It
+        is also filled when the call is cancelled mid-question (the questions
+        already generated are saved before CancelledError propagates).
         """
         logger.info(f"Quick generating {count} {question_type} questions for topic {topic_id}")
         
@@ -86,7 +103,8 @@ class TopicActionsService:
             subject_id,
             topic_id,
             question_type,
-            limit=3
+            limit=3,
+            query_text=topic['name']
         )
         
         # Step 3: Check for trained skill (shared across batches)
@@ -108,220 +126,198 @@ class TopicActionsService:
         
         context = ""  # Used by fallback inside loop or pre_retrieved
 
-        if pre_retrieved_context:
-            # PER-QUESTION generation even for bulk path to ensure diversity
-            logger.info("Using pre-retrieved context — per-question generation for diversity")
-            questions = []
-            exclusion_texts = [sq.get('question_text', '') for sq in sample_questions if sq.get('question_text')]
-            
-            for i in range(count):
-                # Build novelty instruction from exclusion list
-                novelty_instruction = ""
-                if exclusion_texts:
-                    novelty_instruction = "\nNOVELTY ENFORCEMENT - YOU MUST NOT REPEAT THESE SCENARIOS:\n"
-                    for idx, ext in enumerate(exclusion_texts[-5:], 1):
-                        novelty_instruction += f"{idx}. {ext[:150]}...\n"
-                    novelty_instruction += "\nYOUR NEW QUESTION MUST:\n"
-                    novelty_instruction += "- Test a COMPLETELY DIFFERENT clinical concept from the above.\n"
-                    novelty_instruction += "- Use totally different patient parameters/measurements.\n"
-                    novelty_instruction += "- Use a different question stem structure.\n"
+        questions = []
+        try:
+            if pre_retrieved_context:
+                # PER-QUESTION generation even for bulk path to ensure diversity
+                logger.info("Using pre-retrieved context — per-question generation for diversity")
+                questions = []
+                exclusion_texts = [sq.get('question_text', '') for sq in sample_questions if sq.get('question_text')]
+            
+                for i in range(count):
+                    if checkpoint and i and not await checkpoint():
+                        logger.info(f"Job cancelled: stopping after {len(questions)} questions")
+                        break
+                    # Build novelty instruction from exclusion list
+                    novelty_instruction = ""
+                    if exclusion_texts:
+                        novelty_instruction = "\nNOVELTY ENFORCEMENT - YOU MUST NOT REPEAT THESE SCENARIOS:\n"
+                        for idx, ext in enumerate(exclusion_texts[-5:], 1):
+                            novelty_instruction += f"{idx}. {ext[:150]}...\n"
+                        novelty_instruction += "\nYOUR NEW QUESTION MUST:\n"
+                        novelty_instruction += "- Test a COMPLETELY DIFFERENT clinical concept from the above.\n"
+                        novelty_instruction += "- Use totally different patient parameters/measurements.\n"
+                        novelty_instruction += "- Use a different question stem structure.\n"
                 
-                logger.info(f"Bulk path: generating question {i+1}/{count}")
-                q_result = await self._generate_with_few_shot(
-                    context=pre_retrieved_context,
-                    topic=topic,
-                    question_type=question_type,
-                    count=1,
-                    sample_questions=sample_questions,
-                    difficulty=difficulty,
-                    skill_instructions=skill_instructions,
-                    subject_name=subject_name,
-                    scenario_seed=novelty_instruction,
-                    existing_texts=exclusion_texts,
-                )
-                if q_result:
-                    questions.extend(q_result)
-                    for q in q_result:
-                        if q.get('question_text'):
-                            exclusion_texts.append(q['question_text'])
-        else:
-            # PER-QUESTION GENERATION: 1 question per call with unique sub-topics
-            # This is slower but guarantees high diversity and novelty (no repetition)
-            questions = []
+                    logger.info(f"Bulk path: generating question {i+1}/{count}")
+                    q_result = await self._generate_with_few_shot(
+                        context=pre_retrieved_context,
+                        topic=topic,
+                        question_type=question_type,
+                        count=1,
+                        sample_questions=sample_questions,
+                        difficulty=difficulty,
+                        skill_instructions=skill_instructions,
+                        subject_name=subject_name,
+                        scenario_seed=novelty_instruction,
+                        existing_texts=exclusion_texts,
+                    )
+                    if q_result:
+                        questions.extend(q_result)
+                        for q in q_result:
+                            if q.get('question_text'):
+                                exclusion_texts.append(q['question_text'])
+            else:
+                # PER-QUESTION GENERATION: 1 question per call with unique sub-topics
+                # This is slower but guarantees high diversity and novelty (no repetition)
+                questions = []
             
-            # Extract 6-10 distinct clinical sub-topics from the vector store for this topic
-            subtopics = await self.rag_service.get_diverse_subtopics(str(subject_id), str(topic_id))
+                # Extract 6-10 distinct clinical sub-topics from the vector store for this topic
+                subtopics = await self.rag_service.get_diverse_subtopics(str(subject_id), str(topic_id))
             
-            # Shuffle subtopics so repeated generations aren't predictable
-            import random
-            if subtopics:
-                random.shuffle(subtopics)
-            else:
-                # Fallback: use the topic name itself as the only subtopic
-                subtopics = [topic.get('name', 'general topic')]
+                # Shuffle subtopics so repeated generations aren't predictable
+                import random
+                if subtopics:
+                    random.shuffle(subtopics)
+                else:
+                    # Fallback: use the topic name itself as the only subtopic
+                    subtopics = [topic.get('name', 'general topic')]
             
-            # Keep track of ALL generated text (samples + newly generated) to prevent repetition
-            exclusion_texts = [sq.get('question_text', '') for sq in sample_questions if sq.get('question_text')]
+                # Keep track of ALL generated text (samples + newly generated) to prevent repetition
+                exclusion_texts = [sq.get('question_text', '') for sq in sample_questions if sq.get('question_text')]
             
-            for i in range(count):
-                # Pick a subtopic for this question, cycling if we run out
-                current_subtopic = subtopics[i % len(subtopics)]
+                for i in range(count):
+                    if checkpoint and i and not await checkpoint():
+                        logger.info(f"Job cancelled: stopping after {len(questions)} questions")
+                        break
+                    # Pick a subtopic for this question, cycling if we run out
+                    current_subtopic = subtopics[i % len(subtopics)]
                 
-                # Retrieve highly focused, diverse chunks for THIS specific subtopic
-                # Returns List[Dict] with {text, page_number, source} per chunk
-                q_context = self.rag_service.retrieve_for_subtopic(
-                    subtopic=current_subtopic,
-                    subject_id=str(subject_id),
-                    topic_id=str(topic_id),
-                    n_results=8  # 8 diverse chunks per question for richer context
-                )
+                    # Retrieve highly focused, diverse chunks for THIS specific subtopic
+                    # Returns List[Dict] with {text, page_number, source} per chunk
+                    q_context = self.rag_service.retrieve_for_subtopic(
+                        subtopic=current_subtopic,
+                        subject_id=str(subject_id),
+                        topic_id=str(topic_id),
+                        n_results=8  # 8 diverse chunks per question for richer context
+                    )
                 
-                if not q_context:
-                    # Fallback: use the pre-retrieved bulk context (structured or flat)
-                    if context:
-                        q_context = context
-                    else:
-                        q_context = self.rag_service.retrieve_context_with_metadata(
-                            query_text=topic['name'], subject_id=str(subject_id), n_results=8
-                        )
+                    if not q_context:
+                        # Fallback: use the pre-retrieved bulk context (structured or flat)
+                        if context:
+                            q_context = context
+                        else:
+                            q_context = self.rag_service.retrieve_context_with_metadata(
+                                query_text=topic['name'], subject_id=str(subject_id), n_results=8
+                            )
                 
-                # Build the explicit exclusion prompt
-                # Send the last 5 generated questions so the model knows what NOT to do
-                novelty_instruction = "\nNOVELTY ENFORCEMENT - YOU MUST NOT REPEAT THESE SCENARIOS:\n"
-                if exclusion_texts:
-                    recent_exclusions = exclusion_texts[-5:]
-                    for idx, ext in enumerate(recent_exclusions, 1):
-                        novelty_instruction += f"{idx}. {ext[:150]}...\n"
-                    novelty_instruction += "\nYOUR NEW QUESTION MUST:\n"
-                    novelty_instruction += "- Test a COMPLETELY DIFFERENT clinical concept from the above.\n"
-                    novelty_instruction += "- Use totally different patient parameters/measurements.\n"
-                else:
-                    novelty_instruction += "(No previous questions. You may start fresh.)\n"
+                    # Build the explicit exclusion prompt
+                    # Send the last 5 generated questions so the model knows what NOT to do
+                    novelty_instruction = "\nNOVELTY ENFORCEMENT - YOU MUST NOT REPEAT THESE SCENARIOS:\n"
+                    if exclusion_texts:
+                        recent_exclusions = exclusion_texts[-5:]
+                        for idx, ext in enumerate(recent_exclusions, 1):
+                            novelty_instruction += f"{idx}. {ext[:150]}...\n"
+                        novelty_instruction += "\nYOUR NEW QUESTION MUST:\n"
+                        novelty_instruction += "- Test a COMPLETELY DIFFERENT clinical concept from the above.\n"
+                        novelty_instruction += "- Use totally different patient parameters/measurements.\n"
+                    else:
+                        novelty_instruction += "(No previous questions. You may start fresh.)\n"
+
+                    logger.info(f"Generating Question {i+1}/{count} | Focus: {current_subtopic}")
 
-                logger.info(f"Generating Question {i+1}/{count} | Focus: {current_subtopic}")
+                    # Few-shot examples closest to this subtopic (vector lookup over the topic's samples)
+                    q_samples = await self._get_sample_questions(
+                        db, subject_id, topic_id, question_type,
+                        limit=3, query_text=current_subtopic
+                    ) or sample_questions
                 
-                # Generate exactly 1 question per call
-                q_result = await self._generate_with_few_shot(
-                    context=q_context,
-                    topic=topic,
-                    question_type=question_type,
-                    count=1,  # Strictly 1 per call
-                    sample_questions=sample_questions,
-                    difficulty=difficulty,
-                    skill_instructions=skill_instructions,
-                    subject_name=subject_name,
-                    scenario_seed=novelty_instruction, # Misused seed param for novelty injection
-                    existing_texts=exclusion_texts,
-                )
+                    # Generate exactly 1 question per call
+                    q_result = await self._generate_with_few_shot(
+                        context=q_context,
+                        topic=topic,
+                        question_type=question_type,
+                        count=1,  # Strictly 1 per call
+                        sample_questions=q_samples,
+                        difficulty=difficulty,
+                        skill_instructions=skill_instructions,
+                        subject_name=subject_name,
+                        scenario_seed=novelty_instruction, # Misused seed param for novelty injection
+                        existing_texts=exclusion_texts,
+                    )
                 
-                if q_result:
-                    # POST-GENERATION VALIDATION + SELF-CORRECTION for MCQs
-                    if question_type.lower() == 'mcq':
-                        validated = []
-                        for q in q_result:
-                            # Layer 1: Programmatic pre-filter (instant, no LLM cost)
-                            precheck = self._programmatic_quality_check(q)
-                            if not precheck["passed"]:
-                                # Skip LLM validation — go straight to correction
-                                validation = {"passed": False, "issues": precheck["issues"], "suggested_answer": None}
-                            else:
-                                # Layer 2: LLM validation (only if pre-filter passed)
-                                validation = await self._validate_mcq(q, q_context)
-                            if validation["passed"]:
-                                validated.append(q)
-                            else:
-                                # SELF-CORRECTION with RETRY LOOP: up to 3 attempts since 3b model is fast
-                                MAX_CORRECTION_RETRIES = 3
-                                correction_succeeded = False
-                                current_q = q
-                                current_validation = validation
+                    if q_result:
+                        # POST-GENERATION VALIDATION + SELF-CORRECTION for MCQs
+                        if question_type.lower() == 'mcq':
+                            validated = []
+                            for q in q_result:
+                                # Layer 1: Programmatic pre-filter (instant, no LLM cost)
+                                precheck = self._programmatic_quality_check(q)
+                                if not precheck["passed"]:
+                                    # Skip LLM validation — go straight to correction
+                                    validation = {"passed": False, "issues": precheck["issues"], "suggested_answer": None}
+                                else:
+                                    # Layer 2: LLM validation (only if pre-filter passed)
+                                    validation = await self._validate_mcq(q, q_context)
+                                if validation["passed"]:
+                                    validated.append(q)
+                                else:
+                                    # SELF-CORRECTION with RETRY LOOP: up to 3 attempts since 3b model is fast
+                                    MAX_CORRECTION_RETRIES = 3
+                                    correction_succeeded = False
+                                    current_q = q
+                                    current_validation = validation
                                 
-                                for retry in range(MAX_CORRECTION_RETRIES):
-                                    logger.info(f"Correction attempt {retry+1}/{MAX_CORRECTION_RETRIES} for: {current_q.get('question_text', '')[:60]}...")
-                                    corrected = await self._correct_mcq(current_q, q_context, current_validation)
-                                    if corrected:
-                                        re_validation = await self._revalidate_mcq(corrected)
-                                        if re_validation["passed"]:
-                                            logger.info(f"✅ Self-correction SUCCEEDED on attempt {retry+1}")
-                                            validated.append(corrected)
-                                            correction_succeeded = True
-                                            break
+                                    for retry in range(MAX_CORRECTION_RETRIES):
+                                        logger.info(f"Correction attempt {retry+1}/{MAX_CORRECTION_RETRIES} for: {current_q.get('question_text', '')[:60]}...")
+                                        corrected = await self._correct_mcq(current_q, q_context, current_validation)
+                                        if corrected:
+                                            re_validation = await self._revalidate_mcq(corrected)
+                                            if re_validation["passed"]:
+                                                logger.info(f"✅ Self-correction SUCCEEDED on attempt {retry+1}")
+                                                validated.append(corrected)
+                                                correction_succeeded = True
+                                                break
+                                            else:
+                                                logger.warning(f"Correction attempt {retry+1} failed: {re_validation.get('issues', [])}")
+                                                # Feed the corrected question back for next retry
+                                                current_q = corrected
+                                                current_validation = re_validation
                                         else:
-                                            logger.warning(f"Correction attempt {retry+1} failed: {re_validation.get('issues', [])}")
-                                            # Feed the corrected question back for next retry
-                                            current_q = corrected
-                                            current_validation = re_validation
-                                    else:
-                                        logger.warning(f"Correction attempt {retry+1} returned empty result")
-                                        break  # No point retrying if model returns nothing
+                                            logger.warning(f"Correction attempt {retry+1} returned empty result")
+                                            break  # No point retrying if model returns nothing
                                 
-                                if not correction_succeeded:
-                                    logger.warning(f"❌ All {MAX_CORRECTION_RETRIES} correction attempts failed, discarding question")
+                                    if not correction_succeeded:
+                                        logger.warning(f"❌ All {MAX_CORRECTION_RETRIES} correction attempts failed, discarding question")
                         
-                        questions.extend(validated)
-                    else:
-                        questions.extend(q_result)
+                            questions.extend(validated)
+                        else:
+                            questions.extend(q_result)
                     
-                    # Add to exclusion list regardless
-                    for q in q_result:
-                        text = q.get('question_text', '')
-                        if text:
-                            exclusion_texts.append(text)
+                        # Add to exclusion list regardless
+                        for q in q_result:
+                            text = q.get('question_text', '')
+                            if text:
+                                exclusion_texts.append(text)
                             
-            logger.info(f"Per-question generation complete: {len(questions)} distinct questions generated.")
-        
-        # Step 5: Save (is_reference=True, auto-approved)
-        saved_questions = []
-        for q in questions:
-            # Extract bloom_level from LLM output (e.g. "K3-Apply")
-            bloom_level = q.get("bloom_level") or None
-            
-            db_q = database.Question(
-                subject_id=subject_id,
-                topic_id=topic_id,
-                question_text=q.get("question_text") or q.get("question"),
-                question_type=question_type,
-                options=json.dumps(q.get("options")) if q.get("options") else None,
-                correct_answer=q.get("answer") or q.get("correct_answer"),
-                difficulty=q.get("difficulty") or difficulty,  # Prefer LLM's output, fallback to request param
-                bloom_level=bloom_level,
-                marks=1 if question_type.lower() == 'mcq' else (10 if question_type.lower() == 'essay' else 5),
-                is_reference=1, # True
-                rubric_id=None,
-                status="approved", # No vetting needed
-                co_id=q.get("mapped_co") or q.get("co_mapping"),
-                lo_id=q.get("mapped_lo") or q.get("lo_mapping"),
-                rag_context=json.dumps({
-                    "context": q.get("source_context", [context] if context else []),
-                    "reasoning": q.get("reasoning", "No reasoning provided by model.")
-                })
-            )
-            
-            # Handle list formats for CO/LO
-            if isinstance(db_q.co_id, list):
-                db_q.co_id = ", ".join(str(x) for x in db_q.co_id)
-            if isinstance(db_q.lo_id, list):
-                db_q.lo_id = ", ".join(str(x) for x in db_q.lo_id)
-                
-            # Only use topic-level CO/LO codes as FALLBACK when model didn't map specific ones
-            # This ensures question-specific CO/LO mappings are preserved
-            if not db_q.co_id:
-                topic_co_codes = ", ".join(topic.get('co_codes', []))
-                if topic_co_codes:
-                    db_q.co_id = topic_co_codes
-            if not db_q.lo_id:
-                topic_lo_codes = ", ".join(topic.get('lo_codes', []))
-                if topic_lo_codes:
-                    db_q.lo_id = topic_lo_codes
+                logger.info(f"Per-question generation complete: {len(questions)} distinct questions generated.")
+        except asyncio.CancelledError:
+            # Aborted mid-question (job cancelled with abort_in_flight): keep what is done
+            if questions:
+                saved_questions = self._save_quick_questions(
+                    db, subject_id, topic_id, question_type, difficulty, topic, context, questions
+                )
+                if saved_ids is not None:
+                    saved_ids.extend(q.id for q in saved_questions)
+                logger.info(f"Job cancelled mid-question: saved {len(saved_questions)} questions")
+            raise
 
-            db.add(db_q)
-            saved_questions.append(db_q)
-        
-        db.commit()
-        
-        # Refresh to get IDs
-        for q in saved_questions:
-            db.refresh(q)
+        # Step 5: Save
+        saved_questions = self._save_quick_questions(
+            db, subject_id, topic_id, question_type, difficulty, topic, context, questions
+        )
+        if saved_ids is not None:
+            saved_ids.extend(q.id for q in saved_questions)
 
         return {
             "questions": saved_questions,
@@ -334,6 +330,56 @@ class TopicActionsService:
             }
         }
     
+    def _save_quick_questions(self, db: Session, subject_id: int, topic_id: int, question_type: str,
+                              difficulty: str, topic: Dict[str, Any], context, questions: List[Dict]) -> list:
+        """Save generated questions (is_reference=True, auto-approved) in one INSERT."""
+        # Source chunks go to the shared context store and questions reference them
+        rows = []
+        contexts = []
+        for q in questions:
+            # Extract bloom_level from LLM output (e.g. "K3-Apply")
+            bloom_level = q.get("bloom_level") or None
+            co_id = q.get("mapped_co") or q.get("co_mapping")
+            lo_id = q.get("mapped_lo") or q.get("lo_mapping")
+            
+            # Handle list formats for CO/LO
+            if isinstance(co_id, list):
+                co_id = ", ".join(str(x) for x in co_id)
+            if isinstance(lo_id, list):
+                lo_id = ", ".join(str(x) for x in lo_id)
+                
+            # Only use topic-level CO/LO codes as FALLBACK when model didn't map specific ones
+            # This ensures question-specific CO/LO mappings are preserved
+            if not co_id:
+                co_id = ", ".join(topic.get('co_codes', [])) or None
+            if not lo_id:
+                lo_id = ", ".join(topic.get('lo_codes', [])) or None
+
+            rows.append({
+                "subject_id": subject_id,
+                "topic_id": topic_id,
+                "question_text": q.get("question_text") or q.get("question"),
+                "question_type": question_type,
+                "options": json.dumps(q.get("options")) if q.get("options") else None,
+                "correct_answer": q.get("answer") or q.get("correct_answer"),
+                "difficulty": q.get("difficulty") or difficulty,  # Prefer LLM's output, fallback to request param
+                "bloom_level": bloom_level,
+                "marks": 1 if question_type.lower() == 'mcq' else (10 if question_type.lower() == 'essay' else 5),
+                "is_reference": 1, # True
+                "rubric_id": None,
+                "status": "approved", # No vetting needed
+                "co_id": co_id,
+                "lo_id": lo_id,
+            })
+            contexts.append((
+                q.get("source_context", [context] if context else []),
+                q.get("reasoning", "No reasoning provided by model.")
+            ))
+
+        for row, rag_context in zip(rows, rag_context_store.pack_many(db, contexts)):
+            row["rag_context"] = rag_context
+        return question_writer.insert_many(db, rows)
+
     # ===== ACTION 2: Upload Sample Questions =====
     async def upload_sample_questions(
         self,
@@ -473,34 +519,30 @@ class TopicActionsService:
     
     async def _get_topic_with_cos(self, db: Session, subject_id: int, topic_id: int) -> Dict:
         """Get topic with its CO mappings including full descriptions"""
-        topic = db.query(database.Topic).filter(database.Topic.id == topic_id).first()
+        # One joined query on a miss, then served from the TTL cache
+        topic = topic_outcome_cache.get(db, topic_id)
         if not topic:
             raise ValueError(f"Topic {topic_id} not found")
         
-        # Get CO mappings with weights from TopicCOMapping
-        topic_co_mappings = db.query(database.TopicCOMapping).filter(database.TopicCOMapping.topic_id == topic_id).all()
-        
         co_mappings = []
         co_codes = []
-        for mapping in topic_co_mappings:
-            co = db.query(database.CourseOutcome).filter(database.CourseOutcome.id == mapping.course_outcome_id).first()
-            if co:
-                # Include full description so the LLM understands what this CO means
-                weight_str = f" ({mapping.weight} Priority)" if mapping.weight and mapping.weight != "None" else ""
-                desc = f": {co.description}" if co.description else ""
-                co_mappings.append(f"{co.code}{weight_str}{desc}")
-                co_codes.append(co.code)
+        for co in topic["cos"]:
+            # Include full description so the LLM understands what this CO means
+            weight_str = f" ({co['weight']} Priority)" if co["weight"] and co["weight"] != "None" else ""
+            desc = f": {co['description']}" if co["description"] else ""
+            co_mappings.append(f"{co['code']}{weight_str}{desc}")
+            co_codes.append(co["code"])
                 
         lo_mappings = []
         lo_codes = []
-        for lo in topic.mapped_los:
-            desc = f": {lo.description}" if lo.description else ""
-            lo_mappings.append(f"{lo.code}{desc}")
-            lo_codes.append(lo.code)
+        for lo in topic["los"]:
+            desc = f": {lo['description']}" if lo["description"] else ""
+            lo_mappings.append(f"{lo['code']}{desc}")
+            lo_codes.append(lo["code"])
         
         return {
-            "id": topic.id,
-            "name": topic.name,
+            "id": topic["id"],
+            "name": topic["name"],
             "co_mappings": co_mappings,
             "lo_mappings": lo_mappings,
             "co_codes": co_codes,
@@ -758,9 +800,25 @@ class TopicActionsService:
         subject_id: int,
         topic_id: int,
         question_type: str,
-        limit: int = 3
+        limit: int = 3,
+        query_text: Optional[str] = None
     ) -> List[Dict]:
-        """Fetch sample questions for few-shot learning"""
+        """
+        Fetch sample questions for few-shot learning.
+        With `query_text` (e.g. the current subtopic), returns the `limit` most
+        relevant samples with MMR diversity from the topic's SampleVectorStore
+        index; otherwise, or if none are indexed, the first `limit` rows.
+        """
+        if query_text:
+            try:
+                samples = await sample_selection_service.select(
+                    db, subject_id, topic_id, question_type, query_text, k=limit
+                )
+                if samples:
+                    return [self._sample_to_example(s) for s in samples]
+            except Exception as e:
+                logger.warning(f"Semantic sample selection failed, using first {limit} samples: {e}")
+
         # Try to filter by topic_id first if possible, or topic name
         topic = db.query(database.Topic).filter(database.Topic.id == topic_id).first()
         topic_name = topic.name if topic else ""
@@ -781,37 +839,36 @@ class TopicActionsService:
              query = query.filter(SampleQuestion.topic == topic_name)
              
         samples = query.limit(limit).all()
-        
-        result = []
-        for s in samples:
-            # Parse options if JSON string
-            options = s.options
-            if isinstance(options, str):
-                try:
-                    import json
-                    options = json.loads(options)
-                except:
-                    options = {}
-            elif not options:
+        return [self._sample_to_example(s) for s in samples]
+
+    @staticmethod
+    def _sample_to_example(s: SampleQuestion) -> Dict:
+        """Shape a SampleQuestion row as a few-shot example dict."""
+        # Parse options if JSON string
+        options = s.options
+        if isinstance(options, str):
+            try:
+                options = json.loads(options)
+            except:
                 options = {}
+        elif not options:
+            options = {}
 
-            # Handle co_mapping types
-            co_val = s.co_mapping
-            if isinstance(co_val, dict):
-                co_val = ", ".join(co_val.keys())
-            elif isinstance(co_val, list):
-                co_val = ", ".join(str(x) for x in co_val)
-            elif not co_val:
-                co_val = s.co_ids or "N/A"
+        # Handle co_mapping types
+        co_val = s.co_mapping
+        if isinstance(co_val, dict):
+            co_val = ", ".join(co_val.keys())
+        elif isinstance(co_val, list):
+            co_val = ", ".join(str(x) for x in co_val)
+        elif not co_val:
+            co_val = s.co_ids or "N/A"
 
-            result.append({
-                "question_text": s.question_text,
-                "options": options,
-                "correct_answer": s.correct_answer or "N/A",
-                "co_mapping": co_val
-            })
-        
-        return result
+        return {
+            "question_text": s.question_text,
+            "options": options,
+            "correct_answer": s.correct_answer or "N/A",
+            "co_mapping": co_val
+        }
     
     @staticmethod
     def _sanitize_rag_context(context: str) -> str:
@@ -889,19 +946,18 @@ class TopicActionsService:
         co_codes_str = ", ".join(topic.get('co_codes', [])) or "N/A"
         lo_codes_str = ", ".join(topic.get('lo_codes', [])) or "N/A"
         
-        # 1. Handle structured vs flat context
+        # 1. Handle structured vs flat context — kept as ranked chunks (retrieval order)
+        # so the budget planner can drop the lowest-ranked ones first
         structured_context = []
-        flat_context_str = ""
         
         if isinstance(context, list):
             structured_context = context
-            # Convert to flat string for the LLM prompt
-            flat_context_str = "\n\n---\n\n".join([c.get("text", "") for c in context])
+            chunk_texts = [c.get("text", "") for c in context]
         else:
-            flat_context_str = context
+            chunk_texts = (context or "").split("\n\n---\n\n")
             
         # Clean source-material references from RAG context
-        context_str = self._sanitize_rag_context(flat_context_str)
+        chunk_texts = [self._sanitize_rag_context(c) for c in chunk_texts]
         
         # Get Bloom's taxonomy guidance based on difficulty (with per-question assignments)
         bloom_guidance = get_bloom_instruction_for_difficulty(difficulty, count)
@@ -915,68 +971,38 @@ class TopicActionsService:
                 novelty_exclusion += f"{idx}. {t[:150]}...\n"
             novelty_exclusion += "\nYour question MUST test a COMPLETELY DIFFERENT concept, use different measurements, and a different question stem.\n"
         
-        # Use appropriate prompt template
+        # Use appropriate prompt template (rag_context/few_shot_section/novelty_exclusion filled by the planner)
+        template_fields = dict(
+            subject_name=subject_name,
+            topic_name=topic['name'],
+            topic=topic['name'],
+            co_desc=co_desc_str,
+            lo_desc=lo_desc_str,
+            co_code=co_codes_str,
+            lo_code=lo_codes_str,
+            count=count,
+            difficulty=difficulty,
+            bloom_guidance=bloom_guidance,
+            question_type=question_type,
+        )
         if question_type.lower() in ('mcq', 'multiple_choice'):
             from ..prompts.generation_prompts import get_random_answer_letter
-            prompt = MCQ_GENERATION_WITH_FEWSHOT.format(
-                subject_name=subject_name,
-                topic_name=topic['name'],
-                co_desc=co_desc_str,
-                lo_desc=lo_desc_str,
-                co_code=co_codes_str,
-                lo_code=lo_codes_str,
-                rag_context=context_str[:10000],
-                few_shot_section=few_shot_section,
-                count=count,
-                difficulty=difficulty,
-                bloom_guidance=bloom_guidance,
-                novelty_exclusion=novelty_exclusion,
-                example_answer=get_random_answer_letter()
-            )
+            template = MCQ_GENERATION_WITH_FEWSHOT
+            template_fields["example_answer"] = get_random_answer_letter()
         elif question_type.lower() in ('short_answer', 'short'):
-            prompt = SHORT_ANSWER_PROMPT_TEMPLATE.format(
-                subject_name=subject_name,
-                rag_context=context_str[:3000],
-                count=count,
-                topic=topic['name'],
-                difficulty=difficulty,
-                marks=6,
-                co_desc=co_desc_str,
-                lo_desc=lo_desc_str,
-                co_code=co_codes_str,
-                lo_code=lo_codes_str,
-                bloom_guidance=bloom_guidance,
-                novelty_exclusion=novelty_exclusion
-            )
+            template = SHORT_ANSWER_PROMPT_TEMPLATE
+            template_fields["marks"] = 6
         elif question_type.lower() in ('essay', 'long_answer'):
-            prompt = ESSAY_PROMPT_TEMPLATE.format(
-                subject_name=subject_name,
-                rag_context=context_str[:4000],
-                count=count,
-                topic=topic['name'],
-                difficulty=difficulty,
-                marks=10,
-                co_desc=co_desc_str,
-                lo_desc=lo_desc_str,
-                co_code=co_codes_str,
-                lo_code=lo_codes_str,
-                bloom_guidance=bloom_guidance,
-                novelty_exclusion=novelty_exclusion
-            )
+            template = ESSAY_PROMPT_TEMPLATE
+            template_fields["marks"] = 10
         elif question_type.lower() == 'assignment':
-            prompt = ASSIGNMENT_PROMPT_TEMPLATE.format(
-                subject_name=subject_name,
-                rag_context=context_str[:3000],
-                count=count,
-                topic=topic['name'],
-                difficulty=difficulty,
-                marks=10,
-            )
+            template = ASSIGNMENT_PROMPT_TEMPLATE
+            template_fields["marks"] = 10
         else:
             # Generic fallback — still request JSON
-            prompt = f"""Generate {count} {question_type} questions about {topic['name']}.
+            template = """Generate {count} {question_type} questions about {topic_name}.
 
-CONTEXT: {context_str[:3000]}
+CONTEXT: {rag_context}
 
 OUTPUT FORMAT (strict JSON):
 {{
@@ -990,15 +1016,44 @@ OUTPUT FORMAT (strict JSON):
   ]
 }}"""
             
-            
-        if skill_instructions:
+        prompt_parts = {
             # Optimize skill instructions to save context
-            relevant_skill = self._extract_skill_section(skill_instructions, question_type)
-            prompt = f"{relevant_skill}\n\n{prompt}"
-        
-        # Inject scenario parameters for sub-batch diversity
-        if scenario_seed:
-            prompt = f"{scenario_seed}\n\n{prompt}"
+            "skill": self._extract_skill_section(skill_instructions, question_type) if skill_instructions else "",
+            "few_shot": few_shot_section,
+            # Scenario seed is already the head of the novelty block
+            "novelty": novelty_exclusion,
+        }
+
+        def render(parts: Dict[str, str], rag_context: str) -> str:
+            # Skill text is constant for the topic, so it can lead; the templates
+            # keep per-call parts (few-shot samples chosen for the subtopic, novelty,
+            # reference material, task) at the end
+            prompt = template.format(
+                rag_context=rag_context,
+                few_shot_section=parts["few_shot"],
+                novelty_exclusion=parts["novelty"],
+                **template_fields
+            )
+            if parts["skill"]:
+                prompt = f"{parts['skill']}\n\n{prompt}"
+            return prompt
+
+        max_tokens = 3000 if count <= 3 else 4000
+        plan = prompt_budget_planner.plan(
+            render, prompt_parts, chunk_texts,
+            max_output_tokens=max_tokens,
+            trim_order=("skill", "few_shot"),
+            label=f"{question_type} x{count} topic {topic.get('id', '')}",
+            max_context_tokens=config.PROMPT_CONTEXT_TOKEN_CAP.get(
+                {"multiple_choice": "mcq", "short": "short_answer", "long_answer": "essay"}.get(
+                    question_type.lower(), question_type.lower()),
+                config.PROMPT_CONTEXT_TOKEN_CAP["default"]
+            ),
+        )
+        prompt = plan.prompt
+        if structured_context:
+            # Provenance should only list the chunks the model actually saw
+            structured_context = [structured_context[i] for i in plan.chunk_indices]
         
         # Direct single-call generation (replaces slow hybrid council)
         logger.info(f"Generating {count} {question_type} questions directly")
@@ -1011,8 +1066,9 @@ OUTPUT FORMAT (strict JSON):
                 prompt=prompt,
                 model=config.GENERATION_MODEL,
                 temperature=0.7,
-                max_tokens=3000 if count <= 3 else 4000,
-                expect_json=True
+                max_tokens=max_tokens,
+                expect_json=True,
+                session=f"topic:{topic.get('id', '')}:{question_type}"
             )
             
             # Handle case where result is a string instead of dict
@@ -1273,6 +1329,7 @@ OUTPUT FORMAT (strict JSON):
     ) -> int:
         """Save sample questions to database"""
         saved_count = 0
+        samples = []
         for q in questions:
             sample = SampleQuestion(
                 subject_id=subject_id,
@@ -1287,9 +1344,18 @@ OUTPUT FORMAT (strict JSON):
                 file_path=filename
             )
             db.add(sample)
+            samples.append(sample)
             saved_count += 1
+        records = [sample_selection_service.record(s) for s in samples]  # before commit expires the rows
         
         db.commit()
+
+        # Index for few-shot selection (off the event loop); a topic without an
+        # index is built from its rows on first selection
+        try:
+            await sample_selection_service.index_samples(topic_id, records)
+        except Exception as e:
+            logger.warning(f"Failed to index sample questions for topic {topic_id}: {e}")
         return saved_count
     
     def _save_notes_file(
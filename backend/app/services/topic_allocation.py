@@ -0,0 +1,125 @@
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .. import config
+from ..models.database import QuestionReportRollup, TopicCOMapping
+from .report_rollup_service import ReportRollupService
+
+logger = logging.getLogger(__name__)
+
+CO_WEIGHT_VALUES = {"low": 1.0, "moderate": 2.0, "high": 3.0}
+# Questions that still count towards a topic's coverage
+COVERED_STATUSES = ("approved", "pending")
+
+
+class TopicAllocationPlanner:
+    """
+    Spreads each rubric section's question count across the subject's topics.
+
+    A topic's share is its summed CO weight (TopicCOMapping.weight; unmapped
+    topics count as "low") times how much indexed content it has (saturating at
+    TOPIC_ALLOCATION_CHUNK_HALF chunks, so topics without chunks get nothing
+    while others have some). Shares are then shifted towards topics that are
+    under-covered by the questions already in the bank.
+
+    Questions are dealt one at a time to the topic furthest behind its share,
+    across sections, so a 20-MCQ section lands on many topics instead of
+    hammering one topic's subtopics (and the dedup check) twenty times. The
+    result is one unit per (section, topic), grouped by topic so a topic's
+    units reuse its subtopics and context caches.
+    """
+
+    def weights(self, db: Session, subject_id: int, topic_ids: List[int], total_questions: int,
+                chunk_counts: Optional[Dict[int, int]] = None) -> Dict[int, float]:
+        """Normalised share of this rubric's questions per topic."""
+        co_weight = {t: 0.0 for t in topic_ids}
+        for topic_id, weight in db.query(TopicCOMapping.topic_id, TopicCOMapping.weight).filter(
+            TopicCOMapping.topic_id.in_(topic_ids)
+        ):
+            co_weight[topic_id] += CO_WEIGHT_VALUES.get((weight or "moderate").lower(), CO_WEIGHT_VALUES["moderate"])
+
+        half = config.TOPIC_ALLOCATION_CHUNK_HALF
+        base = {}
+        for t in topic_ids:
+            score = co_weight[t] or CO_WEIGHT_VALUES["low"]
+            if chunk_counts and any(chunk_counts.values()):
+                chunks = chunk_counts.get(t, 0)
+                score *= chunks / (chunks + half)
+            base[t] = score
+        if not any(base.values()):
+            base = {t: 1.0 for t in topic_ids}
+        base = self._normalise(base)
+
+        covered = self._covered(db, subject_id, topic_ids)
+        grand_total = sum(covered.values()) + total_questions
+        need = {t: max(0.0, base[t] * grand_total - covered[t]) for t in topic_ids}
+        return self._normalise(need) if any(need.values()) else base
+
+    def plan(self, db: Session, subject_id: int, sections: List[Dict[str, Any]], topic_ids: List[int],
+             chunk_counts: Optional[Dict[int, int]] = None) -> List[Dict[str, Any]]:
+        """Sections ({question_type, count, marks_each, difficulty}) -> units with a topic_id and count."""
+        topic_ids = [t for t in topic_ids if t is not None]
+        if not topic_ids:
+            return [{**section, "topic_id": None} for section in sections]
+        total = sum(s["count"] for s in sections)
+        weights = self.weights(db, subject_id, topic_ids, total, chunk_counts)
+        units = self.allocate(sections, weights)
+        logger.info(f"Topic spread for {total} questions: "
+                    f"{dict(Counter({u['topic_id']: u['count'] for u in units}))}")
+        return units
+
+    @staticmethod
+    def allocate(sections: List[Dict[str, Any]], weights: Dict[int, float]) -> List[Dict[str, Any]]:
+        order = {t: i for i, t in enumerate(weights)}
+        assigned = Counter()
+        dealt = 0
+        units = []
+        for section_index, section in enumerate(sections):
+            per_topic = Counter()
+            for _ in range(section["count"]):
+                dealt += 1
+                # Furthest behind its share so far; ties go to the earlier topic
+                topic = max(weights, key=lambda t: (weights[t] * dealt - assigned[t], -order[t]))
+                assigned[topic] += 1
+                per_topic[topic] += 1
+            units.extend(
+                (order[topic], section_index, {**section, "topic_id": topic, "count": count})
+                for topic, count in per_topic.items()
+            )
+        return [unit for _, _, unit in sorted(units, key=lambda u: u[:2])]
+
+    @staticmethod
+    def chunk_counts(vector_store, subject_id: int, topic_ids: List[int]) -> Optional[Dict[int, int]]:
+        """Indexed chunks per topic, or None when the vector store can't tell."""
+        if vector_store is None:
+            return None
+        try:
+            return {
+                t: vector_store.count_documents(f"subject_{subject_id}", where={"topic_id": str(t)})
+                for t in topic_ids if t is not None
+            }
+        except Exception as e:
+            logger.warning(f"Could not count chunks per topic for subject {subject_id}: {e}")
+            return None
+
+    @staticmethod
+    def _covered(db: Session, subject_id: int, topic_ids: List[int]) -> Counter:
+        rows = db.query(QuestionReportRollup.topic_id, func.sum(QuestionReportRollup.count)).filter(
+            QuestionReportRollup.subject_id == subject_id,
+            QuestionReportRollup.topic_id.in_(topic_ids),
+            QuestionReportRollup.co_code == ReportRollupService.ALL_COS,
+            QuestionReportRollup.status.in_(COVERED_STATUSES),
+        ).group_by(QuestionReportRollup.topic_id).all()
+        return Counter({topic_id: int(count or 0) for topic_id, count in rows})
+
+    @staticmethod
+    def _normalise(scores: Dict[int, float]) -> Dict[int, float]:
+        total = sum(scores.values())
+        return {t: s / total for t, s in scores.items()}
+
+
+topic_allocation_planner = TopicAllocationPlanner()
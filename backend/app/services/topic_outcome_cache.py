@@ -0,0 +1,101 @@
+import copy
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from ..models.database import Topic, TopicCOMapping, CourseOutcome
+
+logger = logging.getLogger(__name__)
+
+
+class TopicOutcomeCache:
+    """
+    TTL cache of a topic's CO/LO mappings (codes, descriptions, CO weights).
+
+    Generation reads this at the start of every run, so a miss loads the topic,
+    its weighted CO mappings and its LOs in a single joined query. Mapping
+    endpoints call invalidate() after committing so edits are visible at once;
+    the TTL only bounds staleness for writes that bypass those endpoints.
+
+    Loads run outside the lock; a load that overlaps an invalidate() of its
+    topic is returned but not cached (per-topic generation counters).
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0):
+        self.ttl_seconds = ttl_seconds
+        self._cache: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._generations: Dict[int, int] = {}  # topic_id -> invalidate() count
+        self._epoch = 0  # invalidate() of everything
+
+    def _generation(self, topic_id: int) -> tuple:
+        return self._epoch, self._generations.get(topic_id, 0)
+
+    def get(self, db: Session, topic_id: int) -> Optional[Dict[str, Any]]:
+        """Return {"id", "name", "subject_id", "cos": [...], "los": [...]}, or None if the topic doesn't exist."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(topic_id)
+            if entry and entry[0] > now:
+                return copy.deepcopy(entry[1])
+            generation = self._generation(topic_id)
+
+        data = self._load(db, topic_id)
+        if data is not None:
+            with self._lock:
+                if self._generation(topic_id) == generation:
+                    self._cache[topic_id] = (now + self.ttl_seconds, data)
+        return copy.deepcopy(data)
+
+    def invalidate(self, topic_id: Optional[int] = None):
+        """Drop one topic, or everything when topic_id is None."""
+        with self._lock:
+            if topic_id is None:
+                self._cache.clear()
+                self._generations.clear()
+                self._epoch += 1
+            else:
+                self._cache.pop(topic_id, None)
+                self._generations[topic_id] = self._generations.get(topic_id, 0) + 1
+
+    def _load(self, db: Session, topic_id: int) -> Optional[Dict[str, Any]]:
+        rows = db.query(Topic, TopicCOMapping.weight, CourseOutcome).outerjoin(
+            TopicCOMapping, TopicCOMapping.topic_id == Topic.id
+        ).outerjoin(
+            CourseOutcome, CourseOutcome.id == TopicCOMapping.course_outcome_id
+        ).options(
+            joinedload(Topic.mapped_los)
+        ).filter(
+            Topic.id == topic_id
+        ).order_by(CourseOutcome.order, CourseOutcome.id).all()
+
+        if not rows:
+            return None
+
+        topic = rows[0][0]
+        cos = []
+        seen_co_ids = set()
+        for _, weight, co in rows:
+            if co is None or co.id in seen_co_ids:
+                continue
+            seen_co_ids.add(co.id)
+            cos.append({"id": co.id, "code": co.code, "description": co.description, "weight": weight})
+
+        los = [
+            {"id": lo.id, "code": lo.code, "description": lo.description}
+            for lo in sorted(topic.mapped_los, key=lambda lo: (lo.order or 0, lo.id))
+        ]
+
+        return {
+            "id": topic.id,
+            "name": topic.name,
+            "subject_id": topic.subject_id,
+            "cos": cos,
+            "los": los,
+        }
+
+
+topic_outcome_cache = TopicOutcomeCache()
@@ -1,10 +1,17 @@
 import chromadb
 import numpy as np
 from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
+from chromadb.errors import NotFoundError
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 from pathlib import Path
+from collections import defaultdict
 import os
+import re
+
+from .. import config
+from .quantized_index import STORAGE_MODES, QuantizedIndexStore
+from .sparse_index import SparseIndexStore, corpus_stats
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,7 +23,23 @@ _DEFAULT_CHROMA_PATH = os.path.join(_BASE_DIR, "data", "chroma_data")
 
 
 class VectorStore:
-    def __init__(self, persistence_path: str = None):
+    """
+    Per-subject chunk collections. A subject collection (`subject_{id}`) is
+    stored as one Chroma collection per topic (`subject_{id}__topic_{topic_id}`)
+    plus the subject collection itself for chunks without a topic, so
+    topic-filtered queries and listings only touch that topic's vectors.
+    Callers keep using the subject collection name and a topic_id filter;
+    unfiltered queries merge the subject collection and the partitions listed
+    in its metadata.
+    """
+
+    PARTITION_SEPARATOR = "__topic_"
+
+    def __init__(self, persistence_path: str = None, embedding_storage: str = None):
+        # Storage mode for collections this instance creates (see config.EMBEDDING_STORAGE)
+        self.embedding_storage = embedding_storage or config.EMBEDDING_STORAGE
+        if self.embedding_storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown embedding storage {self.embedding_storage!r}, expected one of {STORAGE_MODES}")
         try:
             if persistence_path is None:
                 persistence_path = _DEFAULT_CHROMA_PATH
@@ -27,6 +50,10 @@ class VectorStore:
                 path=persistence_path,
                 settings=Settings(anonymized_telemetry=False)
             )
+            # BM25 side of hybrid retrieval, maintained on every add_documents
+            self.sparse = SparseIndexStore(os.path.join(persistence_path, "sparse"))
+            # Vectors of float16/int8 collections; Chroma keeps only their documents and metadata
+            self.quantized = QuantizedIndexStore(os.path.join(persistence_path, "quantized"))
             logger.info(f"Initialized ChromaDB at {persistence_path}")
         except Exception as e:
             logger.error(f"Failed to initialize ChromaDB: {e}")
@@ -37,40 +64,78 @@ class VectorStore:
         Gets or creates a collection in ChromaDB.
         """
         try:
-            return self.client.get_or_create_collection(name=name)
+            # Storage mode and partition layout are recorded at creation; only the partition keys change later
+            metadata = {"topic_partitions": True}
+            if self.embedding_storage != "float32":
+                metadata["embedding_storage"] = self.embedding_storage
+            return self.client.get_or_create_collection(name=name, metadata=metadata)
         except Exception as e:
             logger.error(f"Error getting/creating collection {name}: {e}")
             raise
 
+    @staticmethod
+    def _partition_key(topic_id: Any) -> str:
+        return re.sub(r'[^A-Za-z0-9._-]', '_', str(topic_id))
+
+    def partition_name(self, collection_name: str, topic_id: Any) -> str:
+        """Chroma collection holding one topic's chunks of a subject collection."""
+        return f"{collection_name}{self.PARTITION_SEPARATOR}{self._partition_key(topic_id)}"
+
     def add_documents(self, collection_name: str, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str], embeddings: Optional[List[List[float]]] = None):
         """
-        Adds documents to a collection.
+        Adds documents to a collection; chunks with a topic_id go to that topic's partition.
         """
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for i, meta in enumerate(metadatas):
+            topic_id = (meta or {}).get("topic_id")
+            groups["" if topic_id in (None, "") else self._partition_key(topic_id)].append(i)
+        self._register_partitions(collection_name, [key for key in groups if key])
+        for key, rows in groups.items():
+            name = f"{collection_name}{self.PARTITION_SEPARATOR}{key}" if key else collection_name
+            self._add_to_collection(
+                name, [documents[i] for i in rows], [metadatas[i] for i in rows], [ids[i] for i in rows],
+                None if embeddings is None else [embeddings[i] for i in rows],
+            )
+
+    def _add_to_collection(self, collection_name: str, documents: List[str], metadatas: List[Dict[str, Any]],
+                           ids: List[str], embeddings: Optional[List[List[float]]]):
         try:
             collection = self.get_or_create_collection(collection_name)
-            collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids,
-                embeddings=embeddings
-            )
+            storage = self._storage(collection)
+            if storage == "float32":
+                collection.add(
+                    documents=documents,
+                    metadatas=metadatas,
+                    ids=ids,
+                    embeddings=embeddings
+                )
+            else:
+                if embeddings is None:
+                    raise ValueError(f"{storage} collections need precomputed embeddings")
+                # A 1-d placeholder keeps Chroma's own vector index trivially small
+                collection.add(documents=documents, metadatas=metadatas, ids=ids, embeddings=[[0.0]] * len(ids))
+                self.quantized.add(collection_name, storage, ids, embeddings, metadatas)
             logger.info(f"Added {len(documents)} documents to collection {collection_name}")
         except Exception as e:
             logger.error(f"Error adding documents to {collection_name}: {e}")
             raise
+        try:
+            if self.sparse.get(collection_name) is None:
+                self.sparse_index(collection_name)  # first build also covers chunks added before it existed
+            else:
+                self.sparse.add(collection_name, ids, documents, metadatas)
+        except Exception as e:
+            # Dense retrieval still works; the index is rebuilt on next use (see sparse_index)
+            logger.error(f"Error updating sparse index for {collection_name}: {e}")
+            self.sparse.drop(collection_name)
 
     def query_similar(self, collection_name: str, query_embeddings: List[List[float]], n_results: int = 5, where: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Queries a collection for similar documents (cosine similarity).
         """
         try:
-            collection = self.get_or_create_collection(collection_name)
-            results = collection.query(
-                query_embeddings=query_embeddings,
-                n_results=n_results,
-                where=where
-            )
-            return results
+            found = self._dense_candidates(self._targets(collection_name, where), query_embeddings, n_results)
+            return {key: [found[key]] for key in ("ids", "documents", "metadatas", "distances")}
         except Exception as e:
             logger.error(f"Error querying collection {collection_name}: {e}")
             raise
@@ -98,98 +163,386 @@ class VectorStore:
             where: Optional metadata filter.
 
         Returns:
-            Dict with 'documents' and 'metadatas' keys (same shape as query_similar).
+            Dict with 'ids', 'documents' and 'metadatas' keys (same shape as query_similar).
         """
         try:
-            collection = self.get_or_create_collection(collection_name)
-
             # Step 1: Fetch a broad set of candidates with embeddings
-            results = collection.query(
-                query_embeddings=query_embeddings,
-                n_results=min(fetch_k, collection.count() or fetch_k),
-                where=where,
-                include=["documents", "metadatas", "embeddings", "distances"],
-            )
+            candidates = self._dense_candidates(self._targets(collection_name, where), query_embeddings, fetch_k)
 
-            if not results or not results.get("documents") or not results["documents"][0]:
-                return {"documents": [[]], "metadatas": [[]]}
+            if not candidates["documents"]:
+                return {"ids": [[]], "documents": [[]], "metadatas": [[]]}
 
-            docs = results["documents"][0]
-            metas = results["metadatas"][0]
-            embeddings_list = results.get("embeddings", [[]])[0]
+            ids = candidates["ids"]
+            docs = candidates["documents"]
+            metas = candidates["metadatas"]
+            embeddings_list = candidates["embeddings"]
 
             # If no embeddings returned (collection doesn't store them), fall back
             if embeddings_list is None or (hasattr(embeddings_list, '__len__') and len(embeddings_list) == 0):
                 logger.warning("MMR fallback: no embeddings in results, returning top-k by similarity")
                 return {
+                    "ids": [ids[:k]],
                     "documents": [docs[:k]],
                     "metadatas": [metas[:k]],
                 }
 
             # Step 2: MMR re-ranking
-            query_vec = np.array(query_embeddings[0], dtype=np.float32)
-            doc_vecs = np.array(embeddings_list, dtype=np.float32)
+            selected_indices = self._mmr_select(query_embeddings[0], embeddings_list, k, lambda_mult)
 
-            # Normalise for cosine similarity
-            query_norm = query_vec / (np.linalg.norm(query_vec) + 1e-10)
-            doc_norms = doc_vecs / (np.linalg.norm(doc_vecs, axis=1, keepdims=True) + 1e-10)
+            # Step 3: Return re-ranked results
+            mmr_ids = [ids[i] for i in selected_indices]
+            mmr_docs = [docs[i] for i in selected_indices]
+            mmr_metas = [metas[i] for i in selected_indices]
 
-            # Similarity of each candidate to the query
-            sim_to_query = doc_norms @ query_norm  # shape (fetch_k,)
+            logger.info(f"MMR: fetched {len(docs)} candidates, selected {len(mmr_docs)} diverse results")
+            return {
+                "ids": [mmr_ids],
+                "documents": [mmr_docs],
+                "metadatas": [mmr_metas],
+            }
 
-            selected_indices: List[int] = []
-            candidate_indices = list(range(len(docs)))
+        except Exception as e:
+            logger.error(f"Error in MMR query for {collection_name}: {e}")
+            # Fallback to simple similarity
+            return self.query_similar(collection_name, query_embeddings, n_results=k, where=where)
 
-            for _ in range(min(k, len(docs))):
-                if not candidate_indices:
-                    break
+    @staticmethod
+    def _mmr_select(query_embedding, doc_embeddings, k: int, lambda_mult: float,
+                    relevance: Optional[np.ndarray] = None) -> List[int]:
+        """
+        Indices of `k` candidates balancing relevance and diversity. Relevance
+        defaults to cosine similarity to the query; hybrid retrieval passes its
+        fused score instead. Redundancy is always embedding cosine similarity.
+        """
+        query_vec = np.array(query_embedding, dtype=np.float32)
+        doc_vecs = np.array(doc_embeddings, dtype=np.float32)
 
-                best_idx = None
-                best_score = -float("inf")
+        # Normalise for cosine similarity
+        query_norm = query_vec / (np.linalg.norm(query_vec) + 1e-10)
+        doc_norms = doc_vecs / (np.linalg.norm(doc_vecs, axis=1, keepdims=True) + 1e-10)
 
-                for idx in candidate_indices:
-                    relevance = float(sim_to_query[idx])
+        # Similarity of each candidate to the query
+        sim_to_query = doc_norms @ query_norm if relevance is None else relevance
 
-                    # Max similarity to any already-selected document
-                    if selected_indices:
-                        selected_vecs = doc_norms[selected_indices]
-                        redundancy = float(np.max(selected_vecs @ doc_norms[idx]))
-                    else:
-                        redundancy = 0.0
+        selected_indices: List[int] = []
+        candidate_indices = list(range(len(doc_vecs)))
 
-                    mmr_score = float(lambda_mult * relevance - (1 - lambda_mult) * redundancy)
+        for _ in range(min(k, len(doc_vecs))):
+            if not candidate_indices:
+                break
 
-                    if mmr_score > best_score:
-                        best_score = mmr_score
-                        best_idx = idx
+            best_idx = None
+            best_score = -float("inf")
 
-                if best_idx is not None:
-                    selected_indices.append(best_idx)
-                    candidate_indices.remove(best_idx)
+            for idx in candidate_indices:
+                relevance_score = float(sim_to_query[idx])
 
-            # Step 3: Return re-ranked results
-            mmr_docs = [docs[i] for i in selected_indices]
-            mmr_metas = [metas[i] for i in selected_indices]
+                # Max similarity to any already-selected document
+                if selected_indices:
+                    selected_vecs = doc_norms[selected_indices]
+                    redundancy = float(np.max(selected_vecs @ doc_norms[idx]))
+                else:
+                    redundancy = 0.0
 
-            logger.info(f"MMR: fetched {len(docs)} candidates, selected {len(mmr_docs)} diverse results")
+                mmr_score = float(lambda_mult * relevance_score - (1 - lambda_mult) * redundancy)
+
+                if mmr_score > best_score:
+                    best_score = mmr_score
+                    best_idx = idx
+
+            if best_idx is not None:
+                selected_indices.append(best_idx)
+                candidate_indices.remove(best_idx)
+
+        return selected_indices
+
+    def sparse_index(self, collection_name: str):
+        """The collection's BM25 index, built from the stored chunks if it doesn't exist yet."""
+        index = self.sparse.get(collection_name)
+        if index is None:
+            stored = self.get_or_create_collection(collection_name).get(include=["documents", "metadatas"])
+            index = self.sparse.add(collection_name, stored["ids"], stored["documents"], stored["metadatas"])
+            logger.info(f"Built sparse index for {collection_name} from {len(index)} stored chunks")
+        return index
+
+    def query_hybrid(
+        self,
+        collection_name: str,
+        query_embeddings: List[List[float]],
+        query_text: str,
+        k: int = 12,
+        fetch_k: int = 36,
+        lambda_mult: float = 0.7,
+        where: Dict[str, Any] = None,
+        strict: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Dense + BM25 retrieval fused by reciprocal rank, then MMR re-ranked.
+
+        Each side contributes its top `fetch_k`; a chunk's fused score is
+        sum(1 / (HYBRID_RRF_K + rank)) over the rankings it appears in. Exact
+        term matches that the dense ranking buries surface through the sparse
+        side, so a much smaller fetch_k finds them than dense-only MMR needs.
+        Same return shape as query_mmr. Each partition has its own BM25 index;
+        a query spanning several scores them all with their combined corpus
+        statistics, so their hits merge by score as if from one index. On error it falls back
+        to query_mmr, unless `strict`, in which case the error is raised.
+        """
+        try:
+            targets = self._targets(collection_name, where)
+            dense = self._dense_candidates(targets, query_embeddings, fetch_k)
+            pool: Dict[str, tuple] = {}
+            for chunk_id, doc, meta, emb in zip(dense["ids"], dense["documents"],
+                                                dense["metadatas"], dense["embeddings"]):
+                pool[chunk_id] = (doc, meta, emb)
+
+            sparse_indexes = [self.sparse_index(name) for _, name, _ in targets]
+            corpus = corpus_stats(sparse_indexes, query_text) if len(sparse_indexes) > 1 else None
+            sparse_hits = []  # (chunk id, score, target)
+            for t, (index, (_, _, target_where)) in enumerate(zip(sparse_indexes, targets)):
+                sparse_hits += [(chunk_id, score, t)
+                                for chunk_id, score in index.search(query_text, fetch_k, target_where, corpus)]
+            sparse_hits = sorted(sparse_hits, key=lambda hit: hit[1], reverse=True)[:fetch_k]
+            missing = defaultdict(list)
+            for chunk_id, _, t in sparse_hits:
+                if chunk_id not in pool:
+                    missing[t].append(chunk_id)
+            for t, chunk_ids in missing.items():
+                extra = self._get_with_embeddings(targets[t][0], targets[t][1], chunk_ids)
+                for chunk_id, doc, meta, emb in zip(extra["ids"], extra["documents"],
+                                                    extra["metadatas"], extra["embeddings"]):
+                    pool[chunk_id] = (doc, meta, emb)
+
+            fused = defaultdict(float)
+            for ranking in (dense["ids"], [chunk_id for chunk_id, _, _ in sparse_hits]):
+                for rank, chunk_id in enumerate(ranking, 1):
+                    if chunk_id in pool:
+                        fused[chunk_id] += 1.0 / (config.HYBRID_RRF_K + rank)
+            if not fused:
+                return {"ids": [[]], "documents": [[]], "metadatas": [[]]}
+
+            candidates = sorted(fused, key=fused.get, reverse=True)
+            relevance = np.array([fused[c] for c in candidates])
+            relevance /= relevance.max()  # same 0-1 scale as cosine relevance in lambda_mult
+            selected = self._mmr_select(query_embeddings[0], [pool[c][2] for c in candidates],
+                                        k, lambda_mult, relevance)
+
+            logger.info(f"Hybrid: {len(dense['ids'])} dense + {len(sparse_hits)} sparse candidates "
+                        f"({sum(map(len, missing.values()))} sparse-only), selected {len(selected)}")
             return {
-                "documents": [mmr_docs],
-                "metadatas": [mmr_metas],
+                "ids": [[candidates[i] for i in selected]],
+                "documents": [[pool[candidates[i]][0] for i in selected]],
+                "metadatas": [[pool[candidates[i]][1] for i in selected]],
             }
+        except Exception as e:
+            logger.error(f"Error in hybrid query for {collection_name}: {e}")
+            if strict:
+                raise
+            return self.query_mmr(collection_name, query_embeddings, k=k, fetch_k=fetch_k,
+                                  lambda_mult=lambda_mult, where=where)
+
+    @staticmethod
+    def _storage(collection) -> str:
+        return (collection.metadata or {}).get("embedding_storage", "float32")
+
+    @staticmethod
+    def _is_partitioned(collection) -> bool:
+        return bool((collection.metadata or {}).get("topic_partitions"))
+
+    def _existing(self, name: str):
+        """The named Chroma collection, or None (reads never create collections)."""
+        try:
+            return self.client.get_collection(name=name)
+        except (NotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def _partition_keys(collection) -> List[str]:
+        return list(filter(None, (collection.metadata or {}).get("topic_partition_keys", "").split(",")))
+
+    def _register_partitions(self, collection_name: str, keys: List[str]):
+        """
+        Record a subject's partitions in its own collection's metadata, so an
+        unfiltered query finds them without listing every collection (about
+        30 ms per call at 200 collections).
+        """
+        base = self.get_or_create_collection(collection_name)
+        known = self._partition_keys(base)
+        new = [key for key in keys if key not in known]
+        if new:
+            # modify() replaces the whole metadata, embedding_storage included
+            base.modify(metadata={**(base.metadata or {}), "topic_partition_keys": ",".join(known + new)})
+
+    def _targets(self, collection_name: str, where: Dict[str, Any] = None) -> List[Tuple[Any, str, Optional[Dict[str, Any]]]]:
+        """
+        (collection, name, where) for each Chroma collection a query on a
+        subject collection has to search. A topic_id filter selects the topic's
+        partition, plus the subject collection itself while it still holds
+        topic chunks ingested before partitioning (see partition_by_topic);
+        anything else spans the subject collection and all its partitions.
+        """
+        base = self._existing(collection_name)
+        topic_id = (where or {}).get("topic_id")
+        if topic_id is not None and not isinstance(topic_id, dict):
+            name = self.partition_name(collection_name, topic_id)
+            rest = {key: value for key, value in where.items() if key != "topic_id"} or None
+            targets = [(self._existing(name), name, rest)]
+            if base is not None and not self._is_partitioned(base):
+                targets.append((base, collection_name, where))
+        else:
+            targets = [(base, collection_name, where)]
+            names = [f"{collection_name}{self.PARTITION_SEPARATOR}{key}" for key in self._partition_keys(base)] \
+                if base is not None else []
+            targets += [(self._existing(name), name, where) for name in names]
+        return [target for target in targets if target[0] is not None]
 
+    def _dense_candidates(self, targets: List[Tuple[Any, str, Optional[Dict[str, Any]]]],
+                          query_embeddings: List[List[float]], n: int) -> Dict[str, Any]:
+        """Top-n dense matches across `targets` (see _targets), merged by distance."""
+        keys = ("ids", "documents", "metadatas", "embeddings", "distances")
+        parts = [self._collection_candidates(collection, name, query_embeddings, n, target_where)
+                 for collection, name, target_where in targets]
+        if len(parts) == 1:
+            return parts[0]
+        ranked = sorted((part["distances"][i], p, i) for p, part in enumerate(parts) for i in range(len(part["ids"])))
+        return {key: [parts[p][key][i] for _, p, i in ranked[:n]] for key in keys}
+
+    def _collection_candidates(self, collection, collection_name: str, query_embeddings: List[List[float]],
+                               n: int, where: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Top-n dense matches in one Chroma collection as flat ids/documents/
+        metadatas/embeddings/distances lists. float32 collections are queried in
+        Chroma; quantized ones scan their QuantizedIndex for
+        n x QUANTIZED_RESCORE_FACTOR candidates and keep the n best by exact
+        similarity. Distances are squared L2 between unit vectors either way
+        (Chroma's default space), so partitions of mixed storage merge.
+        """
+        keys = ("ids", "documents", "metadatas", "embeddings", "distances")
+        if self._storage(collection) == "float32":
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=min(n, collection.count() or n),
+                where=where,
+                include=["documents", "metadatas", "embeddings", "distances"],
+            )
+            return {key: results[key][0] if results.get(key) is not None else [] for key in keys}
+
+        index = self.quantized.get(collection_name)
+        if index is None or not len(index):
+            return {key: [] for key in keys}
+        if not where:
+            allowed = None
+        elif set(where) == {"topic_id"} and not isinstance(where["topic_id"], dict):
+            allowed = index.topic_mask(where["topic_id"])  # no metadata round trip for the common filter
+        else:
+            allowed = index.mask(collection.get(where=where, include=[])["ids"])
+        rows = index.search(query_embeddings[0], n * config.QUANTIZED_RESCORE_FACTOR, allowed)
+        rows, sims = index.rescore(rows, query_embeddings[0], n)
+        found = self._get_with_embeddings(collection, collection_name, [index.ids[r] for r in rows])
+        similarity = {index.ids[r]: sim for r, sim in zip(rows, sims)}
+        found["distances"] = [2.0 - 2.0 * similarity[chunk_id] for chunk_id in found["ids"]]
+        return found
+
+    def _get_with_embeddings(self, collection, collection_name: str, ids: List[str]) -> Dict[str, Any]:
+        """Chunks by id with their full-precision embeddings, in the order of `ids` (unknown ids dropped)."""
+        if self._storage(collection) == "float32":
+            got = collection.get(ids=ids, include=["documents", "metadatas", "embeddings"])
+            stored = {i: (d, m, e) for i, d, m, e in zip(got["ids"], got["documents"], got["metadatas"], got["embeddings"])}
+        else:
+            index = self.quantized.get(collection_name)
+            got = collection.get(ids=ids, include=["documents", "metadatas"])
+            rows = index.rows(got["ids"]) if index is not None else [None] * len(got["ids"])
+            present = [(i, d, m, r) for i, d, m, r in zip(got["ids"], got["documents"], got["metadatas"], rows)
+                       if r is not None]
+            vectors = index.vectors([r for *_, r in present]) if present else []
+            stored = {i: (d, m, v) for (i, d, m, _), v in zip(present, vectors)}
+        ordered = [i for i in ids if i in stored]
+        return {
+            "ids": ordered,
+            "documents": [stored[i][0] for i in ordered],
+            "metadatas": [stored[i][1] for i in ordered],
+            "embeddings": [stored[i][2] for i in ordered],
+        }
+
+    def vector_bytes(self, collection_name: str) -> int:
+        """
+        Resident bytes of the vectors an unfiltered dense query scans: the codes
+        of quantized collections, or the raw float32 vectors Chroma loads (its
+        graph overhead not included), summed over the partitions.
+        """
+        total = 0
+        for collection, name, _ in self._targets(collection_name):
+            if self._storage(collection) != "float32":
+                index = self.quantized.get(name)
+                total += index.nbytes if index is not None else 0
+                continue
+            sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+            if sample is not None and len(sample):
+                total += collection.count() * len(sample[0]) * 4
+        return total
+
+    def partition_by_topic(self, collection_name: str, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Move the topic chunks of a subject collection created before topic
+        partitions into their partitions, then mark it partitioned so topic
+        queries stop searching it. Chunks without a topic stay. Safe to re-run:
+        chunks already in a partition are skipped by Chroma and both side indexes.
+        """
+        base = self._existing(collection_name)
+        if base is None:
+            return {"moved": 0, "kept": 0}
+        stored = base.get(include=["metadatas"])
+        topic_ids = [chunk_id for chunk_id, meta in zip(stored["ids"], stored["metadatas"])
+                     if (meta or {}).get("topic_id") not in (None, "")]
+        moving = set(topic_ids)
+        kept_ids = [chunk_id for chunk_id in stored["ids"] if chunk_id not in moving]
+        kept = self._get_with_embeddings(base, collection_name, kept_ids)
+
+        for start in range(0, len(topic_ids), batch_size):
+            chunks = self._get_with_embeddings(base, collection_name, topic_ids[start:start + batch_size])
+            self.add_documents(collection_name, chunks["documents"], chunks["metadatas"], chunks["ids"],
+                               np.asarray(chunks["embeddings"], dtype=np.float32).tolist())
+            base.delete(ids=chunks["ids"])
+
+        # Side indexes of the subject collection only ever grow; rebuild them from what stayed
+        self.sparse.drop(collection_name)
+        storage = self._storage(base)
+        if storage != "float32":
+            self.quantized.drop(collection_name)
+            if kept["ids"]:
+                self.quantized.add(collection_name, storage, kept["ids"],
+                                   np.asarray(kept["embeddings"], dtype=np.float32).tolist(), kept["metadatas"])
+        base = self.client.get_collection(name=collection_name)  # now with the partition keys
+        base.modify(metadata={**(base.metadata or {}), "topic_partitions": True})
+        logger.info(f"Partitioned {collection_name}: {len(topic_ids)} topic chunks moved, {len(kept_ids)} kept")
+        return {"moved": len(topic_ids), "kept": len(kept_ids)}
+
+    def count_documents(self, collection_name: str, where: Dict[str, Any] = None) -> int:
+        """Number of chunks in a collection matching the metadata filter (ids only)."""
+        try:
+            total = 0
+            for collection, _, target_where in self._targets(collection_name, where):
+                if target_where is None:
+                    total += collection.count()
+                else:
+                    total += len(collection.get(where=target_where, include=[])["ids"])
+            return total
         except Exception as e:
-            logger.error(f"Error in MMR query for {collection_name}: {e}")
-            # Fallback to simple similarity
-            return self.query_similar(collection_name, query_embeddings, n_results=k, where=where)
+            logger.error(f"Error counting documents in {collection_name}: {e}")
+            return 0
 
     def get_documents(self, collection_name: str, where: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Fetches documents from a collection that match the given metadata filter.
-        Does not use embeddings/similarity.
+        Does not use embeddings/similarity. A topic filter reads only that
+        topic's partition; chunks keep their ingest order within each partition.
         """
         try:
-            collection = self.get_or_create_collection(collection_name)
-            results = collection.get(where=where, include=["documents", "metadatas"])
+            results = {"ids": [], "documents": [], "metadatas": []}
+            for collection, _, target_where in self._targets(collection_name, where):
+                got = collection.get(where=target_where, include=["documents", "metadatas"])
+                for key in results:
+                    results[key].extend(got[key] or [])
             return results
         except Exception as e:
             logger.error(f"Error getting documents from {collection_name}: {e}")
@@ -1,9 +1,12 @@
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, defer
 from datetime import datetime
 from ..models import vetting_models
 from ..models.database import Subject, GeneratedBatch, Question, Rubric, Topic
-from sqlalchemy import func
+from sqlalchemy import func, case
+from .question_counter_service import question_counter_service
+from .report_rollup_service import report_rollup_service
+from .rag_context_store import rag_context_store
 import json
 
 class VettingService:
@@ -18,50 +21,69 @@ class VettingService:
         {"id": "other", "label": "Other", "prompt_fix": None}
     ]
     
+    STATUSES = ("pending", "approved", "rejected", "quarantined")
+
+    def count_questions_by_status(self, db: Session, key_column) -> Dict[str, Dict[str, int]]:
+        """
+        Count questions per status for every value of `key_column`
+        (Question.batch_id or Question.rubric_id) in one grouped query.
+        Returns {key: {"total", "pending", "approved", "rejected", "quarantined"}}.
+        Served by the (batch_id, status) / (rubric_id, status) composite indexes.
+        """
+        rows = db.query(
+            key_column,
+            func.count(Question.id),
+            *[func.sum(case((Question.status == s, 1), else_=0)) for s in self.STATUSES]
+        ).filter(
+            key_column.isnot(None)
+        ).group_by(key_column).all()
+
+        counts = {}
+        for key, total, *per_status in rows:
+            entry = {"total": total}
+            for s, n in zip(self.STATUSES, per_status):
+                entry[s] = int(n or 0)
+            counts[str(key)] = entry
+        return counts
+
+    @staticmethod
+    def review_status(counts: Dict[str, int]) -> str:
+        reviewed = counts["approved"] + counts["rejected"] + counts["quarantined"]
+        if counts["pending"] == 0 and counts["total"] > 0:
+            return "completed"
+        elif reviewed > 0:
+            return "in_progress"
+        return "pending"
+
     async def get_pending_batches(self, db: Session) -> list:
         """Get all batches that have questions (both from GeneratedBatch and Rubric tables)"""
-        # from ..models import database # Already imported above
-        
         batches = []
         seen_rubric_ids = set()
         
+        # Rubric-only questions have no counter row, so they still need one aggregate
+        rubric_counts = self.count_questions_by_status(db, Question.rubric_id)
+        
         # Source 1: GeneratedBatch table (rubric-based generation)
+        # Counts come from the batch's maintained counter columns (see QuestionCounterService)
         gen_batches = db.query(GeneratedBatch).order_by(
             GeneratedBatch.generated_at.desc()
         ).all()
         
         for gb in gen_batches:
-            # Count questions linked to this batch via batch_id
-            total = db.query(Question).filter(
-                Question.batch_id == gb.id
-            ).count()
-            
-            if total == 0:
+            counts = {
+                s: getattr(gb, f"{s}_count") or 0 for s in self.STATUSES
+            }
+            counts["total"] = sum(counts.values())
+            if not counts["total"]:
                 continue
             
-            pending = db.query(Question).filter(
-                Question.batch_id == gb.id, 
-                Question.status == "pending"
-            ).count()
-            approved = db.query(Question).filter(
-                Question.batch_id == gb.id, 
-                Question.status == "approved"
-            ).count()
-            rejected = db.query(Question).filter(
-                Question.batch_id == gb.id, 
-                Question.status == "rejected"
-            ).count()
-            quarantined = db.query(Question).filter(
-                Question.batch_id == gb.id, 
-                Question.status == "quarantined"
-            ).count()
+            total = counts["total"]
+            pending = counts["pending"]
+            approved = counts["approved"]
+            rejected = counts["rejected"]
+            quarantined = counts["quarantined"]
             reviewed = approved + rejected + quarantined
-            
-            status = "pending"
-            if pending == 0 and total > 0:
-                status = "completed"
-            elif reviewed > 0:
-                status = "in_progress"
+            status = self.review_status(counts)
             
             batches.append({
                 "id": str(gb.id),
@@ -101,36 +123,17 @@ class VettingService:
             if str(r.id) in seen_rubric_ids:
                 continue  # Already covered by GeneratedBatch
             
-            total = db.query(Question).filter(
-                Question.rubric_id == str(r.id)
-            ).count()
-            
-            if total == 0:
+            counts = rubric_counts.get(str(r.id))
+            if not counts:
                 continue
             
-            pending = db.query(Question).filter(
-                Question.rubric_id == str(r.id), 
-                Question.status == "pending"
-            ).count()
-            approved = db.query(Question).filter(
-                Question.rubric_id == str(r.id), 
-                Question.status == "approved"
-            ).count()
-            rejected = db.query(Question).filter(
-                Question.rubric_id == str(r.id), 
-                Question.status == "rejected"
-            ).count()
-            quarantined = db.query(Question).filter(
-                Question.rubric_id == str(r.id), 
-                Question.status == "quarantined"
-            ).count()
+            total = counts["total"]
+            pending = counts["pending"]
+            approved = counts["approved"]
+            rejected = counts["rejected"]
+            quarantined = counts["quarantined"]
             reviewed = approved + rejected + quarantined
-            
-            status = "pending"
-            if pending == 0 and total > 0:
-                status = "completed"
-            elif reviewed > 0:
-                status = "in_progress"
+            status = self.review_status(counts)
             
             batches.append({
                 "id": str(r.id),
@@ -159,9 +162,20 @@ class VettingService:
         
         return batches
     
-    async def get_batch_detail(self, db: Session, batch_id: str) -> Dict[str, Any]:
+    async def get_batch_detail(
+        self,
+        db: Session,
+        batch_id: str,
+        include_context: bool = False,
+        cursor: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
-        Get batch with questions grouped by type, including RAG context and Topic COs/LOs
+        Get batch with questions grouped by type, including Topic COs/LOs.
+
+        The rag_context blob is deferred unless include_context=True; each question
+        carries hasProvenance and clients fetch it via GET /questions/{id}/provenance.
+        With `limit`, questions are keyset-paginated by id and nextCursor is set.
         """
         from ..models import database  # Import here to ensure it's available for fallback logic
 
@@ -187,13 +201,32 @@ class VettingService:
         from ..models import database
         from sqlalchemy import or_
         
-        questions = db.query(database.Question).filter(
+        query = db.query(
+            database.Question,
+            database.Question.rag_context.isnot(None).label("has_provenance")
+        ).filter(
             or_(
                 database.Question.batch_id == batch_id,
                 database.Question.rubric_id == batch_id,
                 database.Question.rubric_id == (batch.rubric_id if batch and batch.rubric_id else batch_id)
             )
-        ).all()
+        )
+        if not include_context:
+            query = query.options(defer(database.Question.rag_context))
+        if cursor is not None:
+            query = query.filter(database.Question.id > cursor)
+        query = query.order_by(database.Question.id)
+
+        next_cursor = None
+        if limit:
+            rows = query.limit(limit + 1).all()
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = rows[-1][0].id
+        else:
+            rows = query.all()
+        questions = [q for q, _ in rows]
+        has_provenance = {q.id: bool(flag) for q, flag in rows}
         
         # Helper to get topic COs/LOs
         topics = db.query(database.Topic).filter(database.Topic.subject_id == batch.subject_id).all()
@@ -214,15 +247,14 @@ class VettingService:
             "short_answer": [],
             "essay": []
         }
+        rag_contexts = {}
+        if include_context:
+            rag_contexts = dict(zip(
+                (q.id for q in questions),
+                rag_context_store.load(db, [q.rag_context for q in questions])
+            ))
         
         for q in questions:
-            # Parse RAG context
-            rag_context = []
-            if q.rag_context:
-                try:
-                    rag_context = json.loads(q.rag_context)
-                except:
-                    pass
             
             # Get Topic COs/LOs
             topic_cos = []
@@ -243,8 +275,7 @@ class VettingService:
                 "status": q.status,
                 "co_id": q.co_id,
                 "lo_id": q.lo_id,
-                "ragContext": rag_context,
-                "rag_context": rag_context, # Dual support
+                "hasProvenance": has_provenance[q.id],
                 "topicCOs": topic_cos,
                 "topicLOs": topic_los,
                 "rubric_id": q.rubric_id,
@@ -253,6 +284,10 @@ class VettingService:
                 "topic_id": q.topic_id,
                 "bloom_level": getattr(q, 'bloom_level', None)
             }
+            if include_context:
+                rag_context = rag_contexts[q.id]
+                q_dict["ragContext"] = rag_context
+                q_dict["rag_context"] = rag_context  # Dual support
             
             formatted_questions.append(q_dict)
 
@@ -273,6 +308,7 @@ class VettingService:
             "batch": batch,
             "sections": sections,
             "questions": formatted_questions,  
+            "nextCursor": next_cursor,
             "subjectCOs": [{"id": co.id, "code": co.code, "description": co.description} for co in subject_cos],
             "subjectLOs": [{"id": lo.id, "code": lo.code, "description": lo.description} for lo in subject_los],
             "progress": {
@@ -308,6 +344,7 @@ class VettingService:
             raise ValueError("Question not found")
             
         old_status = question.status
+        rollup_before = report_rollup_service.snapshot(question)
         question.status = "approved"
         
         # Save feedback
@@ -320,15 +357,17 @@ class VettingService:
         }
         question.approval_feedback = json.dumps(feedback_data)
         
-        # Update batch counts
-        if question.batch_id:
-             self._update_batch_counts(db, question.batch_id, old_status, "approved")
+        # Update batch/subject counters in the same transaction
+        question_counter_service.record_status_change(db, question, old_status)
         
         # Persist CO/LO intensity mappings back to question
         if co_adjustment:
             question.co_id = json.dumps(co_adjustment)
         if lo_adjustment:
             question.lo_id = json.dumps(lo_adjustment)
+        
+        question.status_changed_at = datetime.utcnow()
+        report_rollup_service.record_transition(db, rollup_before, question)
             
         db.commit()
         db.refresh(question)
@@ -358,12 +397,12 @@ class VettingService:
             raise ValueError("Question not found")
             
         old_status = question.status
+        rollup_before = report_rollup_service.snapshot(question)
         question.status = "rejected"
         question.rejection_reason = rejection_reason
         
-        # Update batch counts
-        if question.batch_id:
-             self._update_batch_counts(db, question.batch_id, old_status, "rejected")
+        # Update batch/subject counters in the same transaction
+        question_counter_service.record_status_change(db, question, old_status)
         
         # Log feedback
         feedback = vetting_models.VettingFeedback(
@@ -376,6 +415,9 @@ class VettingService:
         )
         db.add(feedback)
         
+        question.status_changed_at = datetime.utcnow()
+        report_rollup_service.record_transition(db, rollup_before, question)
+        
         db.commit()
         db.refresh(question)
         return question
@@ -404,12 +446,12 @@ class VettingService:
             raise ValueError("Question not found")
             
         old_status = question.status
+        rollup_before = report_rollup_service.snapshot(question)
         question.status = "quarantined"
         question.rejection_reason = quarantine_reason
         
-        # Update batch counts
-        if question.batch_id:
-             self._update_batch_counts(db, question.batch_id, old_status, "quarantined")
+        # Update batch/subject counters in the same transaction
+        question_counter_service.record_status_change(db, question, old_status)
         
         # Log feedback
         feedback = vetting_models.VettingFeedback(
@@ -422,38 +464,13 @@ class VettingService:
         )
         db.add(feedback)
         
+        question.status_changed_at = datetime.utcnow()
+        report_rollup_service.record_transition(db, rollup_before, question)
+        
         db.commit()
         db.refresh(question)
         return question
 
-    def _update_batch_counts(self, db: Session, batch_id: str, old_status: str, new_status: str):
-        batch = db.query(GeneratedBatch).filter(
-            GeneratedBatch.id == batch_id
-        ).first()
-        
-        if not batch:
-            return
-
-        if old_status == "pending":
-            batch.pending_count -= 1
-        elif old_status == "approved":
-            batch.approved_count -= 1
-        elif old_status == "rejected":
-            batch.rejected_count -= 1
-            
-        if new_status == "approved":
-            batch.approved_count += 1
-        elif new_status == "rejected":
-            batch.rejected_count += 1
-        elif new_status == "pending":
-            batch.pending_count += 1
-            
-        # Update batch status
-        if batch.pending_count == 0:
-            batch.status = "complete"
-        else:
-            batch.status = "in_progress"
-
     async def get_rejection_analytics(
         self, 
         db: Session,
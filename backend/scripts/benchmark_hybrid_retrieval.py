@@ -0,0 +1,115 @@
+"""
+Compares dense-only MMR retrieval (fetch_k = k x 8) with hybrid dense + BM25
+retrieval (fetch_k = k x HYBRID_FETCH_K_FACTOR) on a small labeled set of
+prosthodontics passages whose queries hinge on material names, anatomical
+terms and abbreviations. Reports recall@k, MRR and p50/p95 query latency.
+
+Uses the real embedding model (EMBEDDING_MODEL_PATH or a download) and a
+throwaway Chroma directory.
+
+Run from backend/: python -m scripts.benchmark_hybrid_retrieval [--k 3] [--filler 300]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app import config
+from app.services.embedding_service import EmbeddingService
+from app.services.vector_store import VectorStore
+
+# (id, passage)
+PASSAGES = [
+    ("pvs", "Polyvinyl siloxane (PVS) shows the least dimensional change of the elastomeric impression materials and can be poured repeatedly."),
+    ("zoe", "Zinc oxide eugenol (ZOE) impression paste is used for edentulous final impressions but irritates mucosa in some patients."),
+    ("pmma", "Heat-cured PMMA denture base resin is processed by compression moulding; residual monomer causes mucosal irritation."),
+    ("cocr", "Co-Cr alloys are preferred for removable partial denture frameworks because of their high modulus of elasticity."),
+    ("retromolar", "The retromolar pad is a primary stress-bearing area and the posterior limit of the mandibular denture."),
+    ("hamular", "The hamular notch defines the posterior border of the maxillary denture and is used to locate the post dam."),
+    ("buccal-shelf", "The buccal shelf area lies between the buccal frenum and the retromolar pad and resists vertical forces."),
+    ("vdo", "Loss of VDO (vertical dimension of occlusion) leads to angular cheilitis and reduced masticatory efficiency."),
+    ("cr", "Centric relation is a bone-to-bone relationship recorded with the condyles in the most anterior-superior position."),
+    ("kennedy", "Kennedy Class I describes bilateral edentulous areas located posterior to the remaining natural teeth."),
+    ("tmj", "Parafunctional habits such as bruxism load the TMJ and may cause disc displacement."),
+    ("abutment", "Ante's law states that the pericemental area of abutment teeth should equal or exceed that of the teeth replaced."),
+]
+
+# (query, relevant passage id)
+QUERIES = [
+    ("dimensional stability of PVS", "pvs"),
+    ("ZOE paste mucosal irritation", "zoe"),
+    ("residual monomer PMMA", "pmma"),
+    ("Co-Cr framework modulus", "cocr"),
+    ("posterior limit mandibular denture retromolar pad", "retromolar"),
+    ("hamular notch post dam", "hamular"),
+    ("reduced VDO angular cheilitis", "vdo"),
+    ("Kennedy Class I", "kennedy"),
+    ("Ante's law pericemental area", "abutment"),
+    ("TMJ disc displacement bruxism", "tmj"),
+]
+
+FILLER = (
+    "Complete denture treatment begins with diagnosis, preliminary impressions and a custom tray. "
+    "Patient education and follow-up appointments improve adaptation to the prosthesis. "
+    "Occlusal adjustments are carried out at insertion and review visits, case {i}."
+)
+
+
+def evaluate(store, embedder, mode: str, k: int):
+    hits, reciprocal_ranks, latencies = 0, [], []
+    for query, relevant in QUERIES:
+        start = time.perf_counter()
+        query_embedding = embedder.generate_embeddings([query])
+        if mode == "dense":
+            result = store.query_mmr("bench", query_embedding, k=k, fetch_k=k * 8)
+        else:
+            result = store.query_hybrid("bench", query_embedding, query, k=k,
+                                        fetch_k=k * config.HYBRID_FETCH_K_FACTOR)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids = result["ids"][0]
+        if relevant in ids:
+            hits += 1
+            reciprocal_ranks.append(1 / (ids.index(relevant) + 1))
+        else:
+            reciprocal_ranks.append(0.0)
+    latencies.sort()
+    return {
+        "recall": hits / len(QUERIES),
+        "mrr": sum(reciprocal_ranks) / len(QUERIES),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--filler", type=int, default=300, help="generic distractor chunks added to the corpus")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="hybrid-bench-")
+    try:
+        embedder = EmbeddingService()
+        store = VectorStore(directory)
+        ids = [pid for pid, _ in PASSAGES] + [f"filler-{i}" for i in range(args.filler)]
+        docs = [text for _, text in PASSAGES] + [FILLER.format(i=i) for i in range(args.filler)]
+        store.add_documents("bench", docs, [{"topic_id": "1"}] * len(ids), ids, embedder.generate_embeddings(docs))
+        evaluate(store, embedder, "hybrid", args.k)  # warm-up: model, collection and index loads
+
+        print(f"{len(ids)} chunks, {len(QUERIES)} labeled queries, k={args.k}, "
+              f"sparse index {store.sparse.size_bytes('bench') / 1024:.1f} KB")
+        for mode in ("dense", "hybrid"):
+            r = evaluate(store, embedder, mode, args.k)
+            print(f"{mode:7s} recall@{args.k}={r['recall']:.2f}  MRR={r['mrr']:.2f}  "
+                  f"p50={r['p50_ms']:.1f} ms  p95={r['p95_ms']:.1f} ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
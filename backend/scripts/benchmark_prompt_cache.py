@@ -0,0 +1,116 @@
+"""
+Measures prompt-eval cost per call for one topic's per-question generation,
+comparing the legacy prompt layout (novelty block and reference material ahead
+of the static instructions) with the current one (static parts first,
+per-question parts last). As in quick generation, each question gets its own
+few-shot samples (selected for its subtopic).
+
+By default runs against scripts/fake_ollama.py, which simulates prefix KV
+cache reuse. Pass --url to run the same prompts against a real Ollama server
+(the model must be pulled; use a small --num-predict).
+
+Run from backend/: python -m scripts.benchmark_prompt_cache [--questions 8] [--url http://localhost:11434]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app import config
+from app.prompts.generation_prompts import (
+    MCQ_GENERATION_WITH_FEWSHOT, build_few_shot_section, get_bloom_instruction_for_difficulty
+)
+from app.services.llm_service import LLMService
+from app.services.llm_router import LLMRouter
+from scripts.fake_ollama import FakeOllamaServer
+
+SAMPLES = [
+    {"question_text": "A 45-year-old patient presents with a 2 mm vertical discrepancy after insertion.", "options": {"A": "a"}},
+    {"question_text": "Which impression material is preferred for a full-arch implant case?", "options": {"A": "a"}},
+    {"question_text": "A border-molded tray shows 3 mm overextension in the buccal vestibule.", "options": {"A": "a"}},
+    {"question_text": "Which jaw relation record is taken first for an edentulous patient?", "options": {"A": "a"}},
+    {"question_text": "A denture base shows 1.5 mm porosity near the palatal vault after curing.", "options": {"A": "a"}},
+    {"question_text": "Which factor most affects retention of a maxillary complete denture?", "options": {"A": "a"}},
+]
+
+
+def build_prompts(n: int, layout: str):
+    fields = dict(
+        subject_name="Prosthodontics", topic_name="Complete Dentures", topic="Complete Dentures",
+        co_desc="CO1 (High Priority): Plan complete denture treatment", lo_desc="LO1: Record jaw relations",
+        co_code="CO1", lo_code="LO1", count=1, difficulty="medium",
+        bloom_guidance=get_bloom_instruction_for_difficulty("medium", 1), question_type="mcq",
+    )
+    skill = "SKILL: Prefer clinically grounded stems.\n" * 20
+    rng = random.Random(0)
+    prompts, history = [], []
+    for i in range(n):
+        context = "\n\n---\n\n".join(
+            f"Subtopic {i} excerpt {j}: " + " ".join(rng.choice(["occlusion", "border", "seal", "tray", "resin"]) for _ in range(200))
+            for j in range(4)
+        )
+        novelty = "\nNOVELTY ENFORCEMENT - YOU MUST NOT REPEAT THESE SCENARIOS:\n" + "".join(
+            f"{k}. {h[:150]}...\n" for k, h in enumerate(history[-5:], 1)
+        )
+        answer = rng.choice("ABCD")
+        # Per-subtopic selection: 3 of the topic's samples, different from question to question
+        few_shot = build_few_shot_section(rng.sample(SAMPLES, 3))
+        if layout == "current":
+            prompt = f"{skill}\n\n" + MCQ_GENERATION_WITH_FEWSHOT.format(
+                rag_context=context, few_shot_section=few_shot, novelty_exclusion=novelty,
+                example_answer=answer, **fields)
+        else:
+            # Legacy: per-question blocks prepended, reference material in the middle
+            body = MCQ_GENERATION_WITH_FEWSHOT.format(
+                rag_context="", few_shot_section="", novelty_exclusion="", example_answer=answer, **fields)
+            prompt = (f"{novelty}\n\n{skill}\n\nREFERENCE MATERIAL:\n---\n{context}\n---\n\n"
+                      f"{few_shot}\n\n{body}")
+        prompts.append(prompt)
+        history.append(f"Generated question {i} about subtopic {i} and its clinical implications")
+    return prompts
+
+
+async def run(url: str, model: str, prompts, num_predict: int, session: str):
+    service = LLMService(router=LLMRouter([url]))
+    start = time.perf_counter()
+    for prompt in prompts:
+        await service.query(prompt, model=model, max_tokens=num_predict, timeout=config.OLLAMA_TIMEOUT,
+                            session=session)
+    elapsed = time.perf_counter() - start
+    return service.get_session_stats(session), elapsed
+
+
+async def main_async(args):
+    results = {}
+    for layout in ("legacy", "current"):
+        prompts = build_prompts(args.questions, layout)
+        if args.url:
+            stats, elapsed = await run(args.url, args.model, prompts, args.num_predict, layout)
+        else:
+            with FakeOllamaServer(ms_per_token=args.ms_per_token) as server:
+                stats, elapsed = await run(server.url, args.model, prompts, args.num_predict, layout)
+        results[layout] = stats
+        # First call is always cold; report the steady state too
+        print(f"{layout:8s}: {stats['avg_prompt_eval_count']:8.1f} prompt tokens evaluated/call  "
+              f"{stats['avg_prompt_eval_ms']:8.1f} ms prompt eval/call  ({elapsed:.2f}s total, {stats['calls']} calls)")
+    legacy, current = results["legacy"], results["current"]
+    if current["prompt_eval_count"]:
+        print(f"reduction: {legacy['prompt_eval_count'] / current['prompt_eval_count']:.1f}x fewer prompt tokens evaluated")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=8)
+    parser.add_argument("--url", default=None, help="real Ollama server; omit to use the fake server")
+    parser.add_argument("--model", default=config.GENERATION_MODEL)
+    parser.add_argument("--num-predict", type=int, default=16)
+    parser.add_argument("--ms-per-token", type=float, default=0.2, help="fake server prompt-eval cost")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
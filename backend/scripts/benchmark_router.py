@@ -0,0 +1,60 @@
+"""
+Measures how rubric-style generation scales with the number of Ollama hosts
+behind the LLM router.
+
+Starts several scripts/fake_ollama.py servers (one request at a time each, like
+a CPU box running qwen2.5:7b) and runs the same set of concurrent jobs, each a
+sequence of per-question calls, against 1..N of them.
+
+Run from backend/: python -m scripts.benchmark_router [--hosts 3] [--jobs 6] [--questions 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app import config
+from app.services.llm_service import LLMService
+from app.services.llm_router import LLMRouter
+from scripts.fake_ollama import FakeOllamaServer
+
+
+async def run_jobs(service: LLMService, jobs: int, questions: int, model: str) -> float:
+    async def job(j):
+        for q in range(questions):
+            await service.query(f"Rubric job {j}, question {q}", model=model, session=f"job:{j}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(job(j) for j in range(jobs)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=6)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--eval-ms-per-token", type=float, default=2.0, help="fake server generation cost")
+    parser.add_argument("--model", default=config.GENERATION_MODEL)
+    args = parser.parse_args()
+
+    servers = [FakeOllamaServer(eval_ms_per_token=args.eval_ms_per_token).start() for _ in range(args.hosts)]
+    try:
+        baseline = None
+        for n in range(1, args.hosts + 1):
+            service = LLMService(router=LLMRouter([(s.url, 1) for s in servers[:n]]))
+            elapsed = asyncio.run(run_jobs(service, args.jobs, args.questions, args.model))
+            baseline = baseline or elapsed
+            calls = args.jobs * args.questions
+            print(f"{n} host(s): {elapsed:6.2f}s for {calls} calls  "
+                  f"({calls / elapsed:5.1f} calls/s, {baseline / elapsed:.2f}x)")
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
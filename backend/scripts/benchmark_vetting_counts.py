@@ -0,0 +1,137 @@
+"""
+Regression benchmark for the vetter home screen batch listing.
+
+Seeds a throwaway SQLite DB with 500 GeneratedBatch rows x 50 questions each,
+then times VettingService.get_pending_batches against the legacy
+per-batch COUNT(*) pattern and reports the number of SQL statements issued.
+
+Run from backend/: python -m scripts.benchmark_vetting_counts [--batches 500] [--per-batch 50]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.database import Base, Subject, Rubric, GeneratedBatch, Question
+from app.services.vetting_service import VettingService
+from app.services.question_counter_service import question_counter_service
+
+STATUSES = ["pending", "approved", "rejected", "quarantined"]
+
+
+def seed(session, n_batches: int, per_batch: int):
+    subject = Subject(name="Benchmark Subject", code="BENCH01")
+    session.add(subject)
+    session.flush()
+
+    now = datetime.utcnow()
+    for b in range(n_batches):
+        rubric_id = f"rubric-{b}"
+        batch_id = f"batch-{b}"
+        session.add(Rubric(id=rubric_id, subject_id=subject.id, title=f"Rubric {b}", created_at=now - timedelta(minutes=b)))
+        session.add(GeneratedBatch(
+            id=batch_id, rubric_id=rubric_id, subject_id=subject.id, title=f"Rubric {b}",
+            generated_by="Faculty", generated_at=now - timedelta(minutes=b),
+            total_questions=per_batch, pending_count=0,
+        ))
+    session.flush()
+
+    rows = []
+    for b in range(n_batches):
+        for _ in range(per_batch):
+            rows.append({
+                "subject_id": subject.id,
+                "question_text": "Benchmark question?",
+                "question_type": "mcq",
+                "difficulty": "medium",
+                "marks": 1,
+                "status": random.choice(STATUSES),
+                "rubric_id": f"rubric-{b}",
+                "batch_id": f"batch-{b}",
+            })
+    session.bulk_insert_mappings(Question, rows)
+    session.commit()
+    # bulk_insert_mappings bypasses the counter layer; backfill like startup does
+    question_counter_service.reconcile(session)
+
+
+def legacy_pending_batches(db):
+    """The pre-aggregate implementation: five COUNT(*) per batch."""
+    result = []
+    seen_rubric_ids = set()
+    for gb in db.query(GeneratedBatch).order_by(GeneratedBatch.generated_at.desc()).all():
+        seen_rubric_ids.add(str(gb.rubric_id))
+        total = db.query(Question).filter(Question.batch_id == gb.id).count()
+        if total == 0:
+            continue
+        counts = {
+            s: db.query(Question).filter(Question.batch_id == gb.id, Question.status == s).count()
+            for s in STATUSES
+        }
+        result.append((gb.id, total, counts))
+    for r in db.query(Rubric).order_by(Rubric.created_at.desc()).all():
+        if str(r.id) in seen_rubric_ids:
+            continue
+        db.query(Question).filter(Question.rubric_id == str(r.id)).count()
+    return result
+
+
+def measure(engine, fn):
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    return elapsed, len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batches", type=int, default=500)
+    parser.add_argument("--per-batch", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+
+        session = Session()
+        print(f"Seeding {args.batches} batches x {args.per_batch} questions...")
+        seed(session, args.batches, args.per_batch)
+        session.close()
+
+        service = VettingService()
+
+        db = Session()
+        legacy_time, legacy_queries = measure(engine, lambda: legacy_pending_batches(db))
+        db.close()
+
+        db = Session()
+        agg_time, agg_queries = measure(engine, lambda: asyncio.run(service.get_pending_batches(db)))
+        db.close()
+
+        print(f"legacy   : {legacy_time * 1000:8.1f} ms  {legacy_queries:6d} queries")
+        print(f"aggregate: {agg_time * 1000:8.1f} ms  {agg_queries:6d} queries")
+        if agg_time > 0:
+            print(f"speedup  : {legacy_time / agg_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Offline retrieval evaluation: ingests a fixed corpus (by default the bundled
+"prostho mcqs.pdf") into throwaway vector stores and runs a labeled query set
+against each retrieval configuration, reporting recall@k, MRR, p50/p95
+retrieval latency, index size and resident vector memory. Use it before
+changing fetch_k, lambda_mult, chunk size/overlap, the noise filters or the
+embedding storage (float32 / float16 / int8). --pad adds never-relevant chunks
+recombined from the corpus so storage modes can be compared at subject scale.
+
+Uses the real embedding model (EMBEDDING_MODEL_PATH or a download).
+
+Run from backend/: python -m scripts.evaluate_retrieval [--k 5] [--pad 20000] [--json results.json]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app import config
+from app.services.embedding_service import EmbeddingService
+from app.services.pdf_parser import PDFParser
+from app.services.retrieval_eval import RetrievalConfig, RetrievalEvaluator, load_queries
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CORPUS = os.path.join(os.path.dirname(BACKEND_DIR), "prostho mcqs.pdf")
+DEFAULT_QUERIES = os.path.join(BACKEND_DIR, "data", "eval", "prostho_mcqs_queries.json")
+
+
+def default_configs(k: int):
+    """Current production settings first, then one change at a time."""
+    hybrid_fetch = k * config.HYBRID_FETCH_K_FACTOR
+    return [
+        RetrievalConfig("dense fetch=k*8", mode="dense", fetch_k=k * 8),
+        RetrievalConfig("hybrid fetch=k*3", mode="hybrid", fetch_k=hybrid_fetch),
+        RetrievalConfig("hybrid fetch=k*8", mode="hybrid", fetch_k=k * 8),
+        RetrievalConfig("dense fetch=k*3", mode="dense", fetch_k=hybrid_fetch),
+        RetrievalConfig("hybrid lambda=0.5", mode="hybrid", fetch_k=hybrid_fetch, lambda_mult=0.5),
+        RetrievalConfig("hybrid lambda=0.9", mode="hybrid", fetch_k=hybrid_fetch, lambda_mult=0.9),
+        RetrievalConfig("hybrid no noise filter", mode="hybrid", fetch_k=hybrid_fetch, noise_filter=False),
+        RetrievalConfig("dense chunks 800/150", mode="dense", fetch_k=k * 8, chunk_size=800, overlap=150),
+        RetrievalConfig("hybrid chunks 800/150", mode="hybrid", fetch_k=hybrid_fetch, chunk_size=800, overlap=150),
+        RetrievalConfig("dense float16", mode="dense", fetch_k=k * 8, storage="float16"),
+        RetrievalConfig("dense int8", mode="dense", fetch_k=k * 8, storage="int8"),
+        RetrievalConfig("hybrid float16", mode="hybrid", fetch_k=hybrid_fetch, storage="float16"),
+        RetrievalConfig("hybrid int8", mode="hybrid", fetch_k=hybrid_fetch, storage="int8"),
+    ]
+
+
+def load_pages(path: str):
+    if path.lower().endswith(".pdf"):
+        return PDFParser().extract_text_with_pages(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return [{"text": f.read(), "page_number": 1}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="PDF (page-labelled) or plain text file")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="labeled query set (JSON)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--pad", type=int, default=0, help="never-relevant padding chunks added to every ingest")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per query (all are kept)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    embedder = EmbeddingService()
+    evaluator = RetrievalEvaluator(embedder.generate_embeddings, load_pages(args.corpus),
+                                   source=os.path.basename(args.corpus), padding=args.pad)
+    results = evaluator.run(default_configs(args.k), queries, args.k, repeats=args.repeats)
+
+    print(f"{os.path.basename(args.corpus)}: {len(queries)} labeled queries, k={args.k}\n")
+    print(f"{'config':26s} {'chunks':>6s} {'recall':>7s} {'MRR':>5s} {'p50 ms':>7s} {'p95 ms':>7s} "
+          f"{'index KB':>9s} {'vectors KB':>10s}")
+    for r in results:
+        print(f"{r.config.name:26s} {r.chunks:6d} {r.recall:7.2f} {r.mrr:5.2f} "
+              f"{r.p50_ms:7.2f} {r.p95_ms:7.2f} {r.index_bytes / 1024:9.1f} {r.vector_bytes / 1024:10.1f}")
+    for r in results:
+        for miss in r.misses:
+            print(f"  miss [{r.config.name}]: {miss}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"corpus": args.corpus, "k": args.k, "results": [r.as_dict() for r in results]}, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
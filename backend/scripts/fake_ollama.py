@@ -0,0 +1,206 @@
+"""
+Minimal stand-in for an Ollama server, for benchmarks and load tests that
+should not depend on a GPU/model being available.
+
+Implements POST /api/generate (non-streaming), /api/ps, /api/tags and
+GET /. Prompt processing is simulated with a per-model prompt cache: the
+longest common prefix with the previous prompt on that model is "reused",
+so prompt_eval_count only covers the uncached suffix, like llama.cpp's KV
+cache reuse. Tokens are approximated as 4 characters.
+
+Generation time is simulated with `eval_ms_per_token` x eval_tokens, and
+in_flight/max_in_flight record how many calls the server handled at once.
+Failures can be injected with `fail_mode` ("error" or "hang").
+
+Model residency is simulated too: a model that is not loaded (or whose
+keep_alive expired) pays `load_ms` and reports it as load_duration, and with
+`max_loaded` set the least recently used model is evicted, like Ollama
+under OLLAMA_MAX_LOADED_MODELS / memory pressure.
+
+Run standalone from backend/: python -m scripts.fake_ollama [--port 11435] [--ms-per-token 0.5] [--load-ms 3000]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHARS_PER_TOKEN = 4
+
+
+class FakeOllamaServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, ms_per_token: float = 0.0,
+                 response_text: str = '{"questions": []}', eval_tokens: int = 32,
+                 load_ms: float = 0.0, max_loaded: int = None, eval_ms_per_token: float = 0.0):
+        self.ms_per_token = ms_per_token
+        self.eval_ms_per_token = eval_ms_per_token
+        self.load_ms = load_ms
+        self.max_loaded = max_loaded
+        self.loads = []         # models cold-loaded, in order
+        # Failure injection: None, "error" (HTTP 500) or "hang" (sleep hang_s before answering)
+        self.fail_mode = None
+        self.hang_s = 30.0
+        self.response_text = response_text
+        self.eval_tokens = eval_tokens
+        self.lock = threading.Lock()
+        self.last_prompt = {}   # model -> previous prompt (one KV slot per model)
+        self.loaded = {}        # model -> expiry timestamp (keep_alive), in LRU order
+        self.requests = []      # (model, prompt_eval_count, keep_alive)
+        self.in_flight = 0      # concurrent /api/generate calls, and the peak seen
+        self.max_in_flight = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def generate(self, body: dict) -> dict:
+        model = body.get("model", "")
+        prompt = body.get("prompt") or ""
+        keep_alive = body.get("keep_alive")
+        with self.lock:
+            now = time.time()
+            cold = self.loaded.pop(model, 0) <= now
+            if cold:
+                self.last_prompt.pop(model, None)
+                self.loads.append(model)
+                if self.max_loaded:
+                    live = [m for m, expiry in self.loaded.items() if expiry > now]
+                    for evicted in live[:max(0, len(live) - self.max_loaded + 1)]:
+                        del self.loaded[evicted]
+                        self.last_prompt.pop(evicted, None)
+            seconds = _seconds(keep_alive) if keep_alive is not None else 300
+            self.loaded[model] = float("inf") if seconds < 0 else now + seconds
+            previous = self.last_prompt.get(model, "")
+            shared = len(os.path.commonprefix([previous, prompt]))
+            if prompt:
+                self.last_prompt[model] = prompt
+        load_s = self.load_ms / 1000 if cold else 0.0
+        if load_s:
+            time.sleep(load_s)
+        if not prompt:
+            # Empty prompt: load/keep-alive request only
+            return {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "response": "",
+                    "done": True, "done_reason": "load", "load_duration": int(load_s * 1e9)}
+        total_tokens = max(1, len(prompt) // CHARS_PER_TOKEN)
+        cached_tokens = shared // CHARS_PER_TOKEN
+        evaluated = max(1, total_tokens - cached_tokens)
+        prompt_eval_s = evaluated * self.ms_per_token / 1000
+        eval_s = self.eval_tokens * self.eval_ms_per_token / 1000
+        if prompt_eval_s + eval_s:
+            time.sleep(prompt_eval_s + eval_s)
+        with self.lock:
+            self.requests.append((model, evaluated, keep_alive))
+        return {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": self.response_text,
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((prompt_eval_s + eval_s + load_s) * 1e9),
+            "load_duration": int(load_s * 1e9),
+            "prompt_eval_count": evaluated,
+            "prompt_eval_duration": int(prompt_eval_s * 1e9),
+            "eval_count": self.eval_tokens,
+            "eval_duration": int(eval_s * 1e9),
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, payload: dict, status: int = 200):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send({"models": [{"name": m, "model": m} for m in server.last_prompt]})
+                elif self.path == "/api/ps":
+                    now = time.time()
+                    with server.lock:
+                        models = [m for m, expiry in server.loaded.items() if expiry > now]
+                    self._send({"models": [{"name": m, "model": m} for m in models]})
+                else:
+                    self._send({"status": "Ollama is running"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path == "/api/generate":
+                    if server.fail_mode == "error":
+                        self._send({"error": "simulated failure"}, status=500)
+                        return
+                    with server.lock:
+                        server.in_flight += 1
+                        server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    try:
+                        if server.fail_mode == "hang":
+                            time.sleep(server.hang_s)
+                        payload = server.generate(body)
+                    finally:
+                        with server.lock:
+                            server.in_flight -= 1
+                    self._send(payload)
+                else:
+                    self._send({"error": f"unsupported path {self.path}"}, status=404)
+
+        return Handler
+
+
+def _seconds(keep_alive) -> float:
+    if isinstance(keep_alive, (int, float)):
+        return float(keep_alive)
+    units = {"s": 1, "m": 60, "h": 3600}
+    text = str(keep_alive).strip()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ms-per-token", type=float, default=0.5)
+    parser.add_argument("--eval-ms-per-token", type=float, default=0.0, help="simulated generation cost")
+    parser.add_argument("--load-ms", type=float, default=0.0, help="simulated cold model load")
+    parser.add_argument("--max-loaded", type=int, default=None)
+    args = parser.parse_args()
+    server = FakeOllamaServer(port=args.port, ms_per_token=args.ms_per_token,
+                              eval_ms_per_token=args.eval_ms_per_token,
+                              load_ms=args.load_ms, max_loaded=args.max_loaded)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Migration: move the chunk text inlined in existing Question.rag_context values
+into the shared rag_context_chunks table, leaving references behind, then
+VACUUM so the freed pages are returned to the filesystem.
+
+Safe to re-run: questions already holding references are skipped.
+
+Run from backend/: python -m scripts.migrate_compact_rag_context [--batch-size 500] [--no-vacuum]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import text
+
+from app.models.database import SessionLocal, engine, init_db, _DB_PATH
+from app.services.rag_context_store import rag_context_store
+
+
+def _size_mb() -> float:
+    return os.path.getsize(_DB_PATH) / 1024 / 1024 if os.path.exists(_DB_PATH) else 0.0
+
+
+def migrate(batch_size: int = 500, vacuum: bool = True):
+    init_db()  # creates rag_context_chunks if missing
+    before = _size_mb()
+    db = SessionLocal()
+    try:
+        stats = rag_context_store.compact(db, batch_size=batch_size)
+    finally:
+        db.close()
+    print(f"rag_context: {stats['questions']} questions compacted, {stats['chunks_written']} shared chunks written")
+
+    if vacuum:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+        print(f"Database size: {before:.1f} MB -> {_size_mb():.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact inline rag_context into shared chunk references")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--no-vacuum", action="store_true")
+    args = parser.parse_args()
+    migrate(args.batch_size, vacuum=not args.no_vacuum)
@@ -0,0 +1,29 @@
+"""
+Migration: create question_outcome_mapping and fill it from the existing
+comma-joined / JSON Question.co_id and lo_id values.
+
+Safe to re-run: the table is rebuilt from questions each time.
+
+Run from backend/: python -m scripts.migrate_question_outcome_mapping
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.database import SessionLocal, init_db
+from app.services.question_outcome_service import question_outcome_service
+
+
+def migrate():
+    init_db()  # creates the table and its indexes if missing
+    db = SessionLocal()
+    try:
+        rows = question_outcome_service.backfill(db)
+        print(f"question_outcome_mapping: {rows} rows written")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,40 @@
+"""
+Migration: move the topic chunks of subject collections created before topic
+partitions (one Chroma collection per subject) into per-topic collections,
+so topic-filtered retrieval and subtopic listing only read that topic's
+vectors. Chunks without a topic stay in the subject collection.
+
+Until a subject is migrated its chunks are still found (topic queries also
+search the subject collection), just without the speedup.
+Safe to re-run: already-partitioned subjects are skipped.
+
+Run from backend/: python -m scripts.migrate_topic_partitions [--batch-size 500]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.vector_store import VectorStore
+
+
+def migrate(batch_size: int = 500):
+    store = VectorStore()
+    names = sorted(getattr(c, "name", c) for c in store.client.list_collections())
+    subjects = [name for name in names
+                if name.startswith("subject_") and VectorStore.PARTITION_SEPARATOR not in name]
+    for name in subjects:
+        collection = store.client.get_collection(name=name)
+        if (collection.metadata or {}).get("topic_partitions"):
+            print(f"{name}: already partitioned")
+            continue
+        stats = store.partition_by_topic(name, batch_size=batch_size)
+        print(f"{name}: {stats['moved']} chunks moved to topic partitions, {stats['kept']} without a topic kept")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split subject collections into per-topic collections")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    migrate(args.batch_size)
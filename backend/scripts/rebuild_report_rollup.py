@@ -0,0 +1,31 @@
+"""
+Rebuild the question_report_rollup table from the questions table.
+Use for the initial backfill after upgrading, or to repair drift after
+bulk SQL edits that bypassed ReportRollupService. The CO grain is read
+from question_outcome_mapping, so that table is re-derived first.
+
+Run from backend/: python -m scripts.rebuild_report_rollup
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.database import SessionLocal, init_db
+from app.services.report_rollup_service import report_rollup_service
+from app.services.question_outcome_service import question_outcome_service
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        question_outcome_service.backfill(db)
+        rows = report_rollup_service.rebuild(db)
+        print(f"Rebuilt report rollup: {rows} rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Recompute GeneratedBatch and SubjectQuestionStats counters from the
+questions table and repair any drift (e.g. after manual SQL edits or
+bulk imports that bypass QuestionCounterService).
+
+Run from backend/: python -m scripts.reconcile_question_counters
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.database import SessionLocal, init_db
+from app.services.question_counter_service import question_counter_service
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        result = question_counter_service.reconcile(db)
+        print(f"Repaired {result['batches_repaired']} batches, {result['subjects_repaired']} subjects")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
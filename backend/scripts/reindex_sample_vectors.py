@@ -0,0 +1,55 @@
+"""
+Rebuild the per-topic few-shot sample indexes (SampleVectorStore) from the
+sample_questions table for the configured SAMPLE_EMBEDDING_BACKEND.
+
+Each backend keeps its indexes in its own tree (data/vectors/ for ollama,
+data/vectors/local/ for local), so after switching backends every topic has
+an empty index until this is run. Also repairs indexes that drifted from
+the table. Safe to re-run: each topic's index is replaced, not appended to.
+
+Run from backend/: python -m scripts.reindex_sample_vectors [--backend local] [--topic-id 12]
+"""
+import argparse
+import os
+import sys
+from collections import defaultdict
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.database import SessionLocal, init_db
+from app.models.sample_question import SampleQuestion
+from app.services.sample_vector_store import SampleVectorStore
+
+
+def reindex(backend: str = None, topic_id: int = None):
+    init_db()
+    db = SessionLocal()
+    try:
+        query = db.query(
+            SampleQuestion.topic_id, SampleQuestion.question_text,
+            SampleQuestion.question_type, SampleQuestion.difficulty,
+        ).filter(SampleQuestion.topic_id.isnot(None))
+        if topic_id is not None:
+            query = query.filter(SampleQuestion.topic_id == topic_id)
+        by_topic = defaultdict(list)
+        for row in query.order_by(SampleQuestion.id):
+            by_topic[row.topic_id].append({
+                "question_text": row.question_text,
+                "type": row.question_type or "unknown",
+                "difficulty": row.difficulty or "medium",
+            })
+    finally:
+        db.close()
+
+    store = SampleVectorStore(backend)
+    for tid, questions in sorted(by_topic.items()):
+        print(f"topic {tid}: {store.rebuild(tid, questions)} samples indexed ({store.backend})")
+    print(f"Reindexed {len(by_topic)} topics")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild few-shot sample indexes from sample_questions")
+    parser.add_argument("--backend", choices=["ollama", "local"], help="default: SAMPLE_EMBEDDING_BACKEND")
+    parser.add_argument("--topic-id", type=int)
+    args = parser.parse_args()
+    reindex(args.backend, args.topic_id)
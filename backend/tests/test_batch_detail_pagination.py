@@ -0,0 +1,71 @@
+import sys
+import os
+import asyncio
+import json
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Subject, GeneratedBatch, Question
+from app.services.vetting_service import VettingService
+
+
+class TestBatchDetailPagination(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.service = VettingService()
+
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        self.db.add(subject)
+        self.db.flush()
+
+        self.db.add(GeneratedBatch(id="b1", subject_id=subject.id, title="Batch", total_questions=5))
+        for i in range(5):
+            self.db.add(Question(subject_id=subject.id, question_text=f"Q{i}?", question_type="mcq",
+                                 difficulty="medium", marks=1, status="pending", batch_id="b1",
+                                 rag_context=json.dumps({"context": ["x" * 1000], "reasoning": "r"}) if i % 2 == 0 else None))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def _detail(self, **kwargs):
+        return asyncio.run(self.service.get_batch_detail(self.db, "b1", **kwargs))
+
+    def test_rag_context_deferred_by_default(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(self.engine, "before_cursor_execute", listener)
+        try:
+            result = self._detail()
+        finally:
+            event.remove(self.engine, "before_cursor_execute", listener)
+
+        self.assertFalse(any("questions.rag_context AS" in s for s in statements))
+        q = result["questions"][0]
+        self.assertNotIn("ragContext", q)
+        self.assertEqual([q["hasProvenance"] for q in result["questions"]], [True, False, True, False, True])
+
+    def test_include_context(self):
+        q = self._detail(include_context=True)["questions"][0]
+        self.assertEqual(q["ragContext"]["reasoning"], "r")
+
+    def test_keyset_pages(self):
+        page1 = self._detail(limit=2)
+        page2 = self._detail(limit=2, cursor=page1["nextCursor"])
+        page3 = self._detail(limit=2, cursor=page2["nextCursor"])
+
+        ids = [q["id"] for p in (page1, page2, page3) for q in p["questions"]]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), 5)
+        self.assertIsNone(page3["nextCursor"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import sys
+import os
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Subject, Topic, Question
+from app.services.change_tracker import change_tracker, SUBJECT_LIST_SCOPE
+
+
+class TestChangeTracker(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+
+    def tearDown(self):
+        self.db.close()
+
+    def _version(self):
+        return change_tracker.get_version(self.db, SUBJECT_LIST_SCOPE)
+
+    def test_catalog_changes_bump_version(self):
+        self.assertEqual(self._version(), 0)
+
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        self.db.add(subject)
+        self.db.commit()
+        v1 = self._version()
+        self.assertGreater(v1, 0)
+
+        topic = Topic(subject_id=subject.id, name="Impressions")
+        self.db.add(topic)
+        self.db.commit()
+        v2 = self._version()
+        self.assertGreater(v2, v1)
+
+        topic.name = "Impression Materials"
+        self.db.commit()
+        v3 = self._version()
+        self.assertGreater(v3, v2)
+
+        question = Question(subject_id=subject.id, question_text="Q?", question_type="mcq",
+                            difficulty="medium", marks=1, status="pending")
+        self.db.add(question)
+        self.db.commit()
+        v4 = self._version()
+        self.assertGreater(v4, v3)
+
+        # Vetting a question doesn't change the subject list payload
+        question.status = "approved"
+        self.db.commit()
+        self.assertEqual(self._version(), v4)
+
+    def test_rollback_discards_bump(self):
+        self.db.add(Subject(name="Orthodontics", code="ORTH01"))
+        self.db.flush()
+        self.db.rollback()
+        self.assertEqual(self._version(), 0)
+
+    def test_bulk_delete_bumps_version(self):
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        self.db.add(subject)
+        self.db.flush()
+        self.db.add(Topic(subject_id=subject.id, name="Impressions"))
+        self.db.commit()
+        v1 = self._version()
+
+        # Query.delete() alone skips flush events; a re-import must still change the ETag
+        deleted = change_tracker.bulk_delete(self.db.query(Topic).filter(Topic.subject_id == subject.id))
+        self.db.commit()
+        self.assertEqual(deleted, 1)
+        self.assertGreater(self._version(), v1)
+
+        v2 = self._version()
+        change_tracker.bulk_delete(self.db.query(Topic).filter(Topic.subject_id == subject.id))
+        self.db.commit()
+        self.assertEqual(self._version(), v2)
+
+
+if __name__ == '__main__':
+    unittest.main()
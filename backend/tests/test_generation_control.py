@@ -0,0 +1,426 @@
+import sys
+import os
+import asyncio
+import json
+import time
+import types
+import unittest
+from unittest import mock
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import database, schemas
+from app.models.database import Base, Subject, Question, Rubric, Topic, GeneratedBatch
+from app.services.generation_manager import GenerationManager
+from app.services.generation_scheduler import GenerationScheduler
+from app.services.llm_router import LLMRouter
+from app.services.llm_service import LLMService
+from app.services import generation_manager as manager_module
+from scripts.fake_ollama import FakeOllamaServer
+
+
+class FakeTopicActions:
+    """Stands in for TopicActionsService: one question per step, saved at the end (or on abort)."""
+
+    vector_store = None
+
+    def __init__(self, step=None):
+        self.step = step or (lambda i: asyncio.sleep(0.02))
+
+    async def quick_generate_questions(self, db, subject_id, topic_id, question_type, count,
+                                       difficulty="medium", pre_retrieved_context=None, checkpoint=None,
+                                       saved_ids=None):
+        texts = []
+        try:
+            for i in range(count):
+                if checkpoint and i and not await checkpoint():
+                    break
+                await self.step(i)
+                texts.append(f"Question {i}?")
+        except asyncio.CancelledError:
+            if texts:
+                self._save(db, subject_id, question_type, texts, saved_ids)
+            raise
+        return {"questions": self._save(db, subject_id, question_type, texts, saved_ids)}
+
+    @staticmethod
+    def _save(db, subject_id, question_type, texts, saved_ids):
+        questions = [Question(subject_id=subject_id, question_text=t, question_type=question_type,
+                              status="approved", is_reference=1) for t in texts]
+        db.add_all(questions)
+        db.commit()
+        if saved_ids is not None:
+            saved_ids.extend(q.id for q in questions)
+        return questions
+
+
+class TestSchedulerPause(unittest.TestCase):
+    def test_pause_frees_slot_and_resume_continues(self):
+        scheduler = GenerationScheduler(concurrency=1)
+        events = []
+
+        async def job(job_id, steps, delay=0.0):
+            await asyncio.sleep(delay)
+            async with scheduler.slot(job_id, "batch", job_id, total_steps=steps) as ticket:
+                for i in range(steps):
+                    if i and not await ticket.checkpoint():
+                        events.append(f"{job_id}:stopped")
+                        return
+                    events.append(job_id)
+                    await asyncio.sleep(0.01)
+
+        async def scenario():
+            long_job = asyncio.create_task(job("long", 4))
+            await asyncio.sleep(0.005)
+            scheduler.pause("long")
+            other = asyncio.create_task(job("other", 2, delay=0.001))
+            await other  # runs while "long" is parked
+            self.assertTrue(scheduler.tickets["long"].paused)
+            scheduler.resume("long")
+            await long_job
+
+        asyncio.run(scenario())
+        self.assertEqual(events, ["long", "other", "other", "long", "long", "long"])
+
+    def test_cancel_while_paused_stops_job(self):
+        scheduler = GenerationScheduler(concurrency=1)
+        events = []
+
+        async def scenario():
+            async def job():
+                async with scheduler.slot("j", total_steps=3) as ticket:
+                    for i in range(3):
+                        if i and not await ticket.checkpoint():
+                            return "stopped"
+                        events.append(i)
+                        await asyncio.sleep(0.01)
+                return "done"
+            task = asyncio.create_task(job())
+            await asyncio.sleep(0.005)
+            scheduler.pause("j")
+            await asyncio.sleep(0.01)
+            scheduler.cancel("j")
+            return await task
+
+        self.assertEqual(asyncio.run(scenario()), "stopped")
+        self.assertEqual(events, [0])
+        self.assertEqual(scheduler.tickets, {})
+
+
+class TestGenerationManagerControl(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine)
+        db = self.Session()
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        db.add(subject)
+        db.commit()
+        self.subject_id = subject.id
+        db.close()
+
+        self.scheduler = GenerationScheduler(concurrency=1)
+        for patcher in (
+            mock.patch.object(database, "SessionLocal", self.Session),
+            mock.patch.object(manager_module, "generation_scheduler", self.scheduler),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.manager = GenerationManager()
+
+    def use_topic_actions(self, fake):
+        module = types.ModuleType("app.services.topic_actions_service")
+        module.topic_actions_service = fake
+        patcher = mock.patch.dict(sys.modules, {"app.services.topic_actions_service": module})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def params(self, count):
+        return schemas.QuickGenerateRequest(subject_id=self.subject_id, question_type="mcq", count=count)
+
+    def test_cancel_at_question_boundary_keeps_questions(self):
+        self.use_topic_actions(FakeTopicActions())
+
+        async def scenario():
+            batch_id = await self.manager.start_quick_generation(self.params(10), None)
+            await asyncio.sleep(0.05)
+            self.assertTrue(self.manager.cancel(batch_id, abort_in_flight=False))
+            await self.manager._tasks[batch_id]
+            return batch_id
+
+        batch_id = asyncio.run(scenario())
+        status = self.manager.get_status(batch_id)
+        self.assertEqual(status["status"], "cancelled")
+        saved = self.Session().query(Question).count()
+        self.assertGreater(saved, 0)
+        self.assertLess(saved, 10)
+        self.assertEqual(status["result"]["count"], saved)
+
+    def test_abort_in_flight_cancels_ollama_request(self):
+        server = FakeOllamaServer().start()
+        self.addCleanup(server.stop)
+        server.fail_mode, server.hang_s = "hang", 5
+        router = LLMRouter([server.url])
+        llm = LLMService(router=router)
+        self.use_topic_actions(FakeTopicActions(step=lambda i: llm.query("q", model="m", timeout=600)))
+
+        async def scenario():
+            batch_id = await self.manager.start_quick_generation(self.params(3), None)
+            await asyncio.sleep(0.2)
+            in_flight = router.primary.in_flight
+            start = asyncio.get_running_loop().time()
+            self.manager.cancel(batch_id)
+            with self.assertRaises(asyncio.CancelledError):
+                await self.manager._tasks[batch_id]
+            return batch_id, in_flight, asyncio.get_running_loop().time() - start
+
+        batch_id, in_flight, elapsed = asyncio.run(scenario())
+        self.assertEqual(in_flight, 1)
+        self.assertLess(elapsed, 1)
+        self.assertEqual(router.primary.in_flight, 0)
+        self.assertEqual(router.primary.failures, 0)  # a cancel is not a host failure
+        self.assertEqual(self.manager.get_status(batch_id)["status"], "cancelled")
+        self.assertEqual(self.scheduler.status()["running"], [])
+
+    def test_abort_in_flight_keeps_finished_questions(self):
+        self.use_topic_actions(FakeTopicActions(step=lambda i: asyncio.sleep(0.01 if i == 0 else 5)))
+
+        async def scenario():
+            batch_id = await self.manager.start_quick_generation(self.params(3), None)
+            await asyncio.sleep(0.1)  # first question done, second in flight
+            self.manager.cancel(batch_id)
+            with self.assertRaises(asyncio.CancelledError):
+                await self.manager._tasks[batch_id]
+            return batch_id
+
+        status = self.manager.get_status(asyncio.run(scenario()))
+        self.assertEqual(status["status"], "cancelled")
+        self.assertEqual(self.Session().query(Question).count(), 1)
+        self.assertEqual(status["result"]["count"], 1)
+
+    def cancel_queued(self, start_queued, abort_in_flight):
+        """Cancel a job queued behind a running quick job; returns its final status."""
+        self.use_topic_actions(FakeTopicActions())
+        db = self.Session()
+        db.query(Question).delete()
+        db.commit()
+        db.close()
+
+        async def scenario():
+            running = await self.manager.start_quick_generation(self.params(3), None)
+            running_task = self.manager._tasks[running]
+            await asyncio.sleep(0.01)
+            queued = await start_queued()
+            await asyncio.sleep(0.01)
+            self.assertEqual(self.manager.get_status(queued)["queue_position"], 1)
+            self.assertTrue(self.manager.cancel(queued, abort_in_flight=abort_in_flight))
+            await asyncio.gather(self.manager._tasks[queued], return_exceptions=True)
+            await running_task
+            return self.manager.get_status(queued)
+
+        status = asyncio.run(scenario())
+        # Only the running job's questions were saved
+        self.assertEqual(self.Session().query(Question).count(), 3)
+        self.assertEqual(self.scheduler.tickets, {})
+        return status
+
+    def test_cancel_queued_quick_job(self):
+        for abort_in_flight in (True, False):
+            with self.subTest(abort_in_flight=abort_in_flight):
+                status = self.cancel_queued(
+                    lambda: self.manager.start_quick_generation(self.params(3), None), abort_in_flight
+                )
+                self.assertEqual(status["status"], "cancelled")
+
+    def test_cancel_queued_rubric_job(self):
+        db = self.Session()
+        self.addCleanup(db.close)
+        db.add(Rubric(id="r1", subject_id=self.subject_id, title="Final",
+                      sections=json.dumps({"mcq": {"count": 2, "marks_each": 1}})))
+        db.commit()
+        for abort_in_flight in (True, False):
+            with self.subTest(abort_in_flight=abort_in_flight):
+                status = self.cancel_queued(
+                    lambda: self.manager.start_rubric_generation("r1", db), abort_in_flight
+                )
+                self.assertEqual(status["status"], "cancelled")
+                # Never admitted, so no batch was created
+                self.assertEqual(db.query(GeneratedBatch).count(), 0)
+
+
+class TestRubricFanOut(unittest.TestCase):
+    SECTIONS = {"mcq": {"count": 3, "marks_each": 1}, "short_answer": {"count": 2, "marks_each": 5},
+                "essay": {"count": 1, "marks_each": 10}, "multiple_choice": {"count": 2, "marks_each": 1},
+                "long_answer": {"count": 1, "marks_each": 10}}
+
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine)
+        self.db = self.Session()
+        self.addCleanup(self.db.close)
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        self.db.add(subject)
+        self.db.commit()
+        self.db.add_all([Topic(subject_id=subject.id, name=f"Topic {i}") for i in range(3)])
+        self.db.add(Rubric(id="r1", subject_id=subject.id, title="Final", sections=json.dumps(self.SECTIONS)))
+        self.db.commit()
+
+        module = types.ModuleType("app.services.topic_actions_service")
+        module.topic_actions_service = FakeTopicActions(step=lambda i: asyncio.sleep(0.05))
+        self.scheduler = GenerationScheduler(concurrency=5)
+        for patcher in (
+            mock.patch.object(database, "SessionLocal", self.Session),
+            mock.patch.object(manager_module, "generation_scheduler", self.scheduler),
+            mock.patch.dict(sys.modules, {"app.services.topic_actions_service": module}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.manager = GenerationManager()
+
+    def run_rubric(self):
+        async def scenario():
+            batch_id = await self.manager.start_rubric_generation("r1", self.db)
+            await self.manager._tasks[batch_id]
+            return batch_id
+        start = time.perf_counter()
+        batch_id = asyncio.run(scenario())
+        return batch_id, time.perf_counter() - start
+
+    def test_sections_run_in_parallel(self):
+        batch_id, elapsed = self.run_rubric()
+        # Longest unit is at most 3 questions x 50 ms; sequential would be 9 x 50 ms
+        self.assertLess(elapsed, 0.3)
+        status = self.manager.get_status(batch_id)
+        self.assertEqual(status["status"], "completed")
+        self.assertEqual(status["result"]["count"], 9)
+        self.assertEqual({u["status"] for u in status["units"]}, {"done"})
+        # 9 questions over 3 equally weighted topics
+        per_topic = {}
+        for u in status["units"]:
+            per_topic[u["topic_id"]] = per_topic.get(u["topic_id"], 0) + u["count"]
+        self.assertEqual(sorted(per_topic.values()), [3, 3, 3])
+
+        session = self.Session()
+        questions = session.query(Question).filter(Question.batch_id == batch_id).all()
+        self.assertEqual(len(questions), 9)
+        self.assertEqual(sorted(q.marks for q in questions), [1] * 5 + [5] * 2 + [10] * 2)
+        batch = session.query(GeneratedBatch).filter(GeneratedBatch.id == batch_id).one()
+        self.assertEqual(batch.status, "complete")
+        self.assertEqual(batch.pending_count, 9)
+        self.assertEqual(self.scheduler.tickets, {})
+
+    def test_failed_unit_does_not_sink_the_rubric(self):
+        fake = sys.modules["app.services.topic_actions_service"].topic_actions_service
+        generate = fake.quick_generate_questions
+
+        async def flaky(db, subject_id, topic_id, question_type, count, **kwargs):
+            if question_type == "essay":
+                raise RuntimeError("model went away")
+            return await generate(db, subject_id, topic_id, question_type, count, **kwargs)
+        fake.quick_generate_questions = flaky
+
+        batch_id, _ = self.run_rubric()
+        status = self.manager.get_status(batch_id)
+        self.assertEqual(status["status"], "completed")
+        self.assertEqual(status["result"]["count"], 7)
+        failed = [u for u in status["units"] if u["status"] == "failed"]
+        self.assertEqual({u["question_type"] for u in failed}, {"essay"})
+        self.assertEqual(sum(u["count"] for u in failed), 2)
+
+    def test_abort_keeps_questions_of_running_units(self):
+        rubric = self.db.query(Rubric).filter(Rubric.id == "r1").one()
+        rubric.sections = json.dumps({"mcq": {"count": 6, "marks_each": 1}})  # 2 per topic
+        self.db.commit()
+        fake = sys.modules["app.services.topic_actions_service"].topic_actions_service
+        fake.step = lambda i: asyncio.sleep(0.05 if i == 0 else 5)
+
+        async def scenario():
+            batch_id = await self.manager.start_rubric_generation("r1", self.db)
+            await asyncio.sleep(0.15)  # every unit has its first question done and the second in flight
+            self.manager.cancel(batch_id)
+            await asyncio.gather(self.manager._tasks[batch_id], return_exceptions=True)
+            return batch_id
+
+        batch_id = asyncio.run(scenario())
+        status = self.manager.get_status(batch_id)
+        self.assertEqual(status["status"], "cancelled")
+        session = self.Session()
+        questions = session.query(Question).all()
+        self.assertEqual(len(status["units"]), 3)
+        self.assertEqual(len(questions), 3)
+        self.assertTrue(all(q.batch_id == batch_id and q.is_reference == 0 for q in questions))
+        batch = session.query(GeneratedBatch).filter(GeneratedBatch.id == batch_id).one()
+        self.assertEqual((batch.status, batch.total_questions), ("cancelled", len(questions)))
+
+    def test_aggregator_error_stops_units_and_fails_batch(self):
+        rubric = self.db.query(Rubric).filter(Rubric.id == "r1").one()
+        rubric.sections = json.dumps({"mcq": {"count": 6, "marks_each": 1}, "essay": {"count": 3, "marks_each": 10}})
+        self.db.commit()
+        fake = sys.modules["app.services.topic_actions_service"].topic_actions_service
+        fake.step = lambda i: asyncio.sleep(0.05 if i == 0 else 5)  # essays finish, MCQ units hang on their 2nd
+        self.scheduler._concurrency = 20
+        attach = self.manager._attach_unit
+        calls = []
+
+        def flaky_attach(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError("database is locked")
+            return attach(*args)
+        self.manager._attach_unit = flaky_attach
+
+        batch_id, elapsed = self.run_rubric()
+        self.assertLess(elapsed, 1)  # the hung units were stopped, not waited for
+        status = self.manager.get_status(batch_id)
+        self.assertEqual(status["status"], "failed")
+
+        session = self.Session()
+        questions = session.query(Question).all()
+        self.assertEqual(len(questions), 6)  # 3 essays + the first MCQ of each unit
+        self.assertTrue(all(q.batch_id == batch_id and q.is_reference == 0 for q in questions))
+        batch = session.query(GeneratedBatch).filter(GeneratedBatch.id == batch_id).one()
+        self.assertEqual((batch.status, batch.total_questions), ("failed", 6))
+
+    def test_cancel_keeps_units_that_already_finished(self):
+        fake = sys.modules["app.services.topic_actions_service"].topic_actions_service
+        generate = fake.quick_generate_questions
+
+        async def cancel_after_essays(db, subject_id, topic_id, question_type, count, **kwargs):
+            if question_type != "essay":
+                await asyncio.sleep(1)
+            result = await generate(db, subject_id, topic_id, question_type, count, **kwargs)
+            # The unit has saved its questions; cancel before the aggregator moves them
+            for batch_id in list(self.manager._tasks):
+                self.manager.cancel(batch_id)
+            return result
+        fake.quick_generate_questions = cancel_after_essays
+        self.scheduler._concurrency = 20  # every unit starts at once
+
+        async def scenario():
+            batch_id = await self.manager.start_rubric_generation("r1", self.db)
+            await asyncio.gather(self.manager._tasks[batch_id], return_exceptions=True)
+            return batch_id
+
+        batch_id = asyncio.run(scenario())
+        status = self.manager.get_status(batch_id)
+        self.assertEqual(status["status"], "cancelled")
+
+        session = self.Session()
+        questions = session.query(Question).all()
+        self.assertGreater(len(questions), 0)
+        # Nothing left behind as a standalone reference question
+        self.assertTrue(all(q.batch_id == batch_id and q.is_reference == 0 for q in questions))
+        self.assertEqual({q.question_type for q in questions}, {"essay"})
+        self.assertEqual(status["questions_generated"], len(questions))
+        batch = session.query(GeneratedBatch).filter(GeneratedBatch.id == batch_id).one()
+        self.assertEqual((batch.status, batch.total_questions), ("cancelled", len(questions)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest import mock
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import config
+from app.services.generation_scheduler import GenerationScheduler
+from app.services.llm_router import LLMRouter
+from app.services import generation_scheduler as scheduler_module
+
+
+class TestGenerationScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = GenerationScheduler(concurrency=1)
+        self.events = []
+
+    async def job(self, job_id, priority, user, steps, delay=0.0):
+        if delay:
+            await asyncio.sleep(delay)
+        async with self.scheduler.slot(job_id, priority, user, total_steps=steps) as ticket:
+            for i in range(steps):
+                if i:
+                    await ticket.checkpoint()
+                self.events.append(job_id)
+                await asyncio.sleep(0.01)  # one "question"
+
+    def test_interactive_preempts_batch_between_questions(self):
+        async def scenario():
+            await asyncio.gather(
+                self.job("rubric", "batch", "alice", 6),
+                self.job("quick", "interactive", "bob", 2, delay=0.025),
+            )
+        asyncio.run(scenario())
+        # Rubric finishes its current question, then the quick job runs to completion
+        first_quick = self.events.index("quick")
+        self.assertIn(first_quick, (2, 3))
+        self.assertEqual(self.events[first_quick:first_quick + 2], ["quick", "quick"])
+        self.assertEqual(self.events.count("rubric"), 6)
+
+    def test_fair_share_across_users(self):
+        async def scenario():
+            with mock.patch.object(config, "GENERATION_FAIR_QUANTUM", 2):
+                await asyncio.gather(
+                    self.job("a1", "batch", "alice", 4),
+                    self.job("a2", "batch", "alice", 4, delay=0.001),
+                    self.job("b1", "batch", "bob", 4, delay=0.002),
+                )
+        asyncio.run(scenario())
+        # bob's job gets a turn after alice's first quantum, ahead of alice's second job
+        self.assertEqual(self.events[:4], ["a1", "a1", "b1", "b1"])
+        self.assertLess(self.events.index("b1"), self.events.index("a2"))
+
+    def test_queue_position_and_estimated_wait(self):
+        async def scenario():
+            running = self.scheduler.ticket("rubric", "batch", "alice", total_steps=10)
+            await self.scheduler.acquire(running)
+            self.scheduler.ticket("rubric2", "batch", "bob", total_steps=4)
+            self.scheduler.ticket("quick", "interactive", "carol", total_steps=3)
+            return (self.scheduler.queue_info("rubric"), self.scheduler.queue_info("rubric2"),
+                    self.scheduler.queue_info("quick"))
+
+        with mock.patch.object(config, "GENERATION_SECONDS_PER_QUESTION", 10):
+            running, batch, quick = asyncio.run(scenario())
+        self.assertEqual(running["queue_position"], 0)
+        self.assertEqual(quick["queue_position"], 1)
+        # Only the running batch job's current question is ahead of the interactive job
+        self.assertEqual(quick["estimated_wait_seconds"], 10)
+        self.assertEqual(batch["queue_position"], 2)
+        self.assertEqual(batch["estimated_wait_seconds"], (10 + 3) * 10)
+
+    def test_concurrency_follows_backend_capacity(self):
+        router = LLMRouter([("http://box1:11434", 2), ("http://box2:11434", 1)])
+        with mock.patch.object(scheduler_module, "llm_router", router), \
+                mock.patch.object(config, "GENERATION_CONCURRENCY", 0):
+            self.assertEqual(GenerationScheduler().concurrency, 3)
+        with mock.patch.object(config, "GENERATION_CONCURRENCY", 5):
+            self.assertEqual(GenerationScheduler().concurrency, 5)
+
+    def test_unknown_priority_rejected(self):
+        with self.assertRaises(ValueError):
+            self.scheduler.ticket("x", "urgent")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.sparse_index import SparseIndex, SparseIndexStore, corpus_stats, tokenize
+from app.services.vector_store import VectorStore
+
+
+class TestSparseIndex(unittest.TestCase):
+    def test_bm25_ranks_exact_terms_and_filters_by_topic(self):
+        index = SparseIndex()
+        index.add(
+            ["a", "b", "c"],
+            ["PMMA denture base resin is heat-cured.",
+             "Cobalt-chromium (Co-Cr) frameworks for removable partial dentures.",
+             "Denture base shrinkage and PMMA porosity; PMMA monomer."],
+            [{"topic_id": "1"}, {"topic_id": "1"}, {"topic_id": "2"}],
+        )
+        self.assertIn("co-cr", tokenize("Co-Cr framework"))
+        self.assertEqual([i for i, _ in index.search("PMMA", 3)], ["c", "a"])
+        self.assertEqual([i for i, _ in index.search("PMMA", 3, where={"topic_id": 1})], ["a"])
+        self.assertEqual(index.search("zirconia", 3), [])
+
+    def test_partitions_scored_as_one_corpus(self):
+        # "clasp" is rare in one partition and common in the other: local IDFs disagree
+        first = ["Clasp arm on the premolar.", "Heat-cured resin.", "Resin porosity.", "Resin monomer."]
+        second = ["Clasp design.", "Clasp retention and clasp flexibility.", "Clasp fatigue."]
+        whole, parts = SparseIndex(), [SparseIndex(), SparseIndex()]
+        whole.add([f"a{i}" for i in range(4)] + [f"b{i}" for i in range(3)], first + second)
+        parts[0].add([f"a{i}" for i in range(4)], first)
+        parts[1].add([f"b{i}" for i in range(3)], second)
+
+        corpus = corpus_stats(parts, "clasp")
+        merged = sorted(parts[0].search("clasp", 10, corpus=corpus) + parts[1].search("clasp", 10, corpus=corpus),
+                        key=lambda hit: hit[1], reverse=True)
+        expected = whole.search("clasp", 10)
+        self.assertEqual([i for i, _ in merged], [i for i, _ in expected])
+        np.testing.assert_allclose([s for _, s in merged], [s for _, s in expected])
+        local = sorted(parts[0].search("clasp", 10) + parts[1].search("clasp", 10), key=lambda hit: hit[1], reverse=True)
+        self.assertEqual(local[0][0], "a0")  # raw per-partition scores overrate the rare-term partition
+
+    def test_store_round_trip_is_shared(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        SparseIndexStore(directory).add("subject_1", ["a"], ["Border molding with green stick compound"])
+        loaded = SparseIndexStore(directory).get("subject_1")
+        self.assertEqual(loaded.search("compound", 1)[0][0], "a")
+        self.assertGreater(SparseIndexStore(directory).size_bytes("subject_1"), 0)
+
+    def test_add_does_not_mutate_index_in_use(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        store = SparseIndexStore(directory)
+        store.add("subject_1", ["a"], ["Alginate impression"], [{"topic_id": 1}])
+        in_use = store.get("subject_1")
+        store.add("subject_1", ["b"], ["Alginate tray"], [{"topic_id": 1}])
+        self.assertEqual(in_use.ids, ["a"])
+        self.assertEqual(in_use.postings["alginate"], {0: 1})
+        self.assertEqual([c for c, _ in store.get("subject_1").search("alginate", 5)], ["a", "b"])
+
+    def test_concurrent_adds_all_land(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        threads = [
+            threading.Thread(target=SparseIndexStore(directory).add,
+                             args=("subject_1", [f"c{i}"], [f"Chunk {i} about occlusion"]))
+            for i in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted(SparseIndexStore(directory).get("subject_1").ids), [f"c{i}" for i in range(8)])
+
+
+class TestHybridQuery(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = VectorStore(self.directory)
+        rng = np.random.default_rng(0)
+        query = rng.normal(size=32)
+        self.query = (query / np.linalg.norm(query)).tolist()
+
+        ids, docs, embs = [], [], []
+        for i in range(60):
+            # Generic passages that sit close to the query in embedding space
+            ids.append(f"generic-{i}")
+            docs.append(f"Complete denture impressions and jaw relation records, passage {i}.")
+            embs.append((np.array(self.query) + rng.normal(scale=0.3, size=32)).tolist())
+        # The one passage naming the material, embedded far from the query
+        ids.append("target")
+        docs.append("Polyvinyl siloxane (PVS) has the best dimensional stability of elastomeric impression materials.")
+        embs.append(rng.normal(size=32).tolist())
+        self.store.add_documents("subject_1", docs, [{"topic_id": "1"}] * len(ids), ids, embs)
+
+    def test_sparse_side_finds_term_dense_misses(self):
+        text = "dimensional stability of polyvinyl siloxane"
+        dense = self.store.query_mmr("subject_1", [self.query], k=4, fetch_k=12)
+        hybrid = self.store.query_hybrid("subject_1", [self.query], text, k=4, fetch_k=12)
+        self.assertNotIn("target", dense["ids"][0])
+        self.assertIn("target", hybrid["ids"][0])
+        self.assertEqual(len(hybrid["documents"][0]), 4)
+
+    def test_index_built_at_ingest_and_rebuilt_when_missing(self):
+        # Topic chunks live in (and are indexed per) the topic's partition
+        partition = self.store.partition_name("subject_1", "1")
+        self.assertEqual(len(self.store.sparse.get(partition)), 61)
+        self.store.sparse.drop(partition)
+        self.assertEqual(len(self.store.sparse_index(partition)), 61)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import sys
+import os
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ollama
+
+from app import config
+from app.services.llm_service import LLMService
+from app.services.llm_router import LLMRouter
+from app.services.llm_resilience import (
+    CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, ModelSpeedTracker
+)
+from app.services.model_residency import ModelResidencyManager
+from app.services import llm_service as llm_module
+from app.services import llm_router as llm_router_module
+from scripts.fake_ollama import FakeOllamaServer
+
+PRIMARY, FALLBACK = "qwen2.5:7b", "llama3.2:3b"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10,
+                                      max_reset_timeout=30, clock=self.clock)
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        self.breaker.allow()
+        self.breaker.record_failure("boom")
+        self.breaker.allow()
+        self.breaker.record_failure("boom")
+        self.assertTrue(self.breaker.is_open)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.allow()
+        self.assertEqual(self.breaker.snapshot()["state"], "open")
+
+    def test_half_open_allows_single_trial(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 11
+        self.breaker.allow()  # trial
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.allow()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.snapshot()["state"], "closed")
+        self.breaker.allow()
+
+    def test_failed_trial_doubles_reset_timeout(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 11
+        self.breaker.allow()
+        self.breaker.record_failure("still down")
+        self.assertEqual(self.breaker.reset_timeout, 20)
+        self.clock.now = 25
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.allow()
+        self.clock.now = 32
+        self.breaker.allow()
+
+    def test_released_trial_admits_next_call(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 11
+        self.breaker.allow()
+        self.breaker.release_trial()  # trial call abandoned
+        self.breaker.allow()
+
+
+class TestAdaptiveTimeout(unittest.TestCase):
+    def test_timeout_tracks_observed_speed(self):
+        tracker = ModelSpeedTracker()
+        default = tracker.timeout_for(PRIMARY, 1000, 2000)
+        # 500 tokens/sec observed: 20x faster than the configured 25
+        tracker.observe(PRIMARY, {"eval_count": 500, "eval_duration": int(1e9)})
+        fast = tracker.timeout_for(PRIMARY, 1000, 2000)
+        self.assertLess(fast, default)
+        self.assertGreaterEqual(fast, config.LLM_TIMEOUT_MIN_SECONDS)
+        self.assertLessEqual(default, config.OLLAMA_TIMEOUT)
+
+    def test_cold_model_gets_load_allowance(self):
+        tracker = ModelSpeedTracker()
+        warm = tracker.timeout_for(FALLBACK, 500, 300)
+        cold = tracker.timeout_for(FALLBACK, 500, 300, cold=True)
+        self.assertEqual(cold - warm, config.LLM_MODEL_LOAD_SECONDS)
+
+
+class TestLLMServiceResilience(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeOllamaServer(response_text='{"questions": [{"question_text": "q"}]}').start()
+        self.registry = CircuitBreakerRegistry()
+        self.manager = ModelResidencyManager(router=LLMRouter([self.server.url]))
+        for patcher in (
+            mock.patch.object(llm_router_module, "circuit_breakers", self.registry),
+            mock.patch.object(llm_module, "model_residency_manager", self.manager),
+            mock.patch.object(LLMService, "_backoff", staticmethod(lambda attempt: 0)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.service = LLMService(router=LLMRouter([self.server.url]))
+        self.service.primary_model, self.service.fallback_model = PRIMARY, FALLBACK
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_breaker_opens_then_fails_fast(self):
+        self.server.fail_mode = "error"
+
+        async def scenario():
+            with self.assertRaises(ollama.ResponseError):
+                await self.service.query("hi", model=PRIMARY)
+            start = time.perf_counter()
+            with self.assertRaises(CircuitOpenError):
+                await self.service.query("hi", model=PRIMARY)
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(scenario())
+        self.assertLess(elapsed, 0.05)
+        state = self.registry.snapshot()[f"{self.server.url}|{PRIMARY}"]
+        self.assertEqual(state["state"], "open")
+
+    def test_hung_call_times_out_on_adaptive_budget(self):
+        self.server.fail_mode = "hang"
+        self.server.hang_s = 3
+
+        async def scenario():
+            start = time.perf_counter()
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.service.query("hi", model=PRIMARY, max_tokens=10, timeout=600)
+            return time.perf_counter() - start
+
+        with mock.patch.multiple(config, LLM_TIMEOUT_BASE_SECONDS=0, LLM_TIMEOUT_MIN_SECONDS=0.2,
+                                 LLM_MODEL_LOAD_SECONDS=0, LLM_MAX_ATTEMPTS=1):
+            elapsed = asyncio.run(scenario())
+        self.assertLess(elapsed, 2)
+
+    def test_cancel_during_half_open_trial_frees_circuit(self):
+        breaker = self.registry.get(f"{self.server.url}|{PRIMARY}")
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure("down")
+        breaker.reset_timeout = 0  # due for its trial call
+        self.server.fail_mode, self.server.hang_s = "hang", 5
+
+        async def scenario():
+            trial = asyncio.create_task(self.service.query("hi", model=PRIMARY, timeout=600))
+            await asyncio.sleep(0.2)
+            trial.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await trial
+            self.server.fail_mode = None
+            return await self.service.query("hi", model=PRIMARY)
+
+        self.assertIn("question_text", asyncio.run(scenario()))
+        self.assertEqual(breaker.snapshot()["state"], "closed")
+
+    def test_generate_falls_back_when_primary_circuit_open(self):
+        primary = self.registry.get(f"{self.server.url}|{PRIMARY}")
+        for _ in range(primary.failure_threshold):
+            primary.record_failure("down")
+
+        result = asyncio.run(self.service.generate("hi", model=PRIMARY))
+        self.assertEqual(result["questions"][0]["question_text"], "q")
+        self.assertEqual([r[0] for r in self.server.requests], [FALLBACK])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import sys
+import os
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.llm_service import LLMService
+from app.services.llm_router import LLMRouter
+from app.services.llm_resilience import CircuitBreakerRegistry
+from app.services import llm_router as llm_router_module
+from scripts.fake_ollama import FakeOllamaServer
+
+MODEL = "qwen2.5:7b"
+
+
+class TestLLMRouter(unittest.TestCase):
+    def setUp(self):
+        # ~0.1 s per call (32 eval tokens)
+        self.servers = [FakeOllamaServer(eval_ms_per_token=3).start() for _ in range(3)]
+        patcher = mock.patch.object(llm_router_module, "circuit_breakers", CircuitBreakerRegistry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for server in self.servers:
+            server.stop()
+
+    def service(self, servers, limit=1):
+        return LLMService(router=LLMRouter([(s.url, limit) for s in servers]))
+
+    def test_concurrent_calls_spread_across_hosts(self):
+        service = self.service(self.servers)
+
+        async def scenario():
+            start = time.perf_counter()
+            await asyncio.gather(*(service.query(f"prompt {i}", model=MODEL) for i in range(6)))
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(scenario())
+        self.assertEqual([len(s.requests) for s in self.servers], [2, 2, 2])
+        self.assertEqual([s.max_in_flight for s in self.servers], [1, 1, 1])
+        # Two rounds of ~0.1 s, not six
+        self.assertLess(elapsed, 0.45)
+
+    def test_per_host_concurrency_limit(self):
+        server = self.servers[0]
+        service = self.service([server], limit=2)
+
+        async def scenario():
+            await asyncio.gather(*(service.query(f"prompt {i}", model=MODEL) for i in range(6)))
+
+        asyncio.run(scenario())
+        self.assertEqual(len(server.requests), 6)
+        self.assertEqual(server.max_in_flight, 2)
+        self.assertEqual(service.router.capacity, 2)
+
+    def test_failed_call_retries_on_another_host(self):
+        broken, healthy = self.servers[:2]
+        broken.fail_mode = "error"
+        service = self.service([broken, healthy])
+
+        asyncio.run(service.query("prompt", model=MODEL))
+        self.assertEqual(len(healthy.requests), 1)
+        status = {b["url"]: b for b in service.router.status()}
+        self.assertEqual(status[broken.url]["failures"], 1)
+        self.assertEqual(status[healthy.url]["requests"], 1)
+
+    def test_open_circuit_host_is_skipped(self):
+        down, up = self.servers[:2]
+        service = self.service([down, up])
+        breaker = service.router.backends[0].breaker(MODEL)
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure("down")
+
+        async def scenario():
+            await asyncio.gather(*(service.query(f"prompt {i}", model=MODEL) for i in range(3)))
+
+        asyncio.run(scenario())
+        self.assertEqual((len(down.requests), len(up.requests)), (0, 3))
+
+    def test_prefers_faster_host_and_keeps_session_affinity(self):
+        slow, fast = self.servers[:2]
+        slow.eval_ms_per_token = 8
+        fast.eval_ms_per_token = 1
+        service = self.service([slow, fast])
+
+        async def scenario():
+            for i in range(4):
+                await service.query(f"prompt {i}", model=MODEL)
+            fast_before = len(fast.requests)
+            # A session sticks to its host, even the slower one
+            service.router.affinity["topic:1:mcq"] = slow.url
+            for i in range(3):
+                await service.query(f"session prompt {i}", model=MODEL, session="topic:1:mcq")
+            return fast_before
+
+        fast_before = asyncio.run(scenario())
+        # One call each to measure both hosts, then the fast one
+        self.assertEqual((len(slow.requests) - 3, fast_before), (1, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
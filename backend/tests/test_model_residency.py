@@ -0,0 +1,115 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest import mock
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import config
+from app.services.llm_service import LLMService
+from app.services.llm_router import LLMRouter
+from app.services.model_residency import ModelResidencyManager
+from app.services import llm_service as llm_module
+from scripts.fake_ollama import FakeOllamaServer
+
+PRIMARY, FALLBACK = "qwen2.5:7b", "llama3.2:3b"
+
+
+class TestModelResidency(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeOllamaServer(load_ms=60, max_loaded=1).start()
+        self.manager = ModelResidencyManager(router=LLMRouter([self.server.url]))
+        patcher = mock.patch.object(config, "COLD_START_THRESHOLD_SECONDS", 0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def run_async(self, coro):
+        return asyncio.run(coro)
+
+    def test_warm_records_cold_start_once(self):
+        async def scenario():
+            await self.manager.warm(PRIMARY)
+            await self.manager.warm(PRIMARY)
+        self.run_async(scenario())
+
+        status = self.manager.status()
+        self.assertEqual(status["cold_starts"], 1)
+        self.assertEqual(status["recent_cold_starts"][0]["model"], PRIMARY)
+        self.assertEqual(status["recent_cold_starts"][0]["reason"], "startup")
+        self.assertIn(PRIMARY, status["loaded"])
+
+    def test_pinned_while_jobs_queued(self):
+        async def scenario():
+            self.manager.job_queued(PRIMARY)
+            self.manager.job_queued(PRIMARY)
+            await asyncio.sleep(0.2)
+            pinned = (self.manager.keep_alive(), self.server.loaded[PRIMARY])
+            self.manager.job_finished(PRIMARY)
+            still_pinned = self.manager.keep_alive()
+            self.manager.job_finished(PRIMARY)
+            await asyncio.sleep(0.1)
+            return pinned, still_pinned, self.manager.keep_alive(), self.server.loaded[PRIMARY]
+
+        (pinned_keep_alive, pinned_expiry), still_pinned, keep_alive, expiry = self.run_async(scenario())
+        self.assertEqual(pinned_keep_alive, config.OLLAMA_PINNED_KEEP_ALIVE)
+        self.assertEqual(pinned_expiry, float("inf"))
+        self.assertEqual(still_pinned, config.OLLAMA_PINNED_KEEP_ALIVE)
+        self.assertEqual(keep_alive, config.OLLAMA_KEEP_ALIVE)
+        self.assertNotEqual(expiry, float("inf"))
+
+    def test_fallback_refused_when_models_do_not_fit(self):
+        async def scenario():
+            await self.manager.warm(PRIMARY)
+            with mock.patch.object(config, "OLLAMA_MODEL_MEMORY_GB", 6):
+                tight = await self.manager.allow_fallback(PRIMARY, FALLBACK)
+            with mock.patch.object(config, "OLLAMA_MODEL_MEMORY_GB", 16):
+                roomy = await self.manager.allow_fallback(PRIMARY, FALLBACK)
+            return tight, roomy
+
+        tight, roomy = self.run_async(scenario())
+        self.assertFalse(tight)
+        self.assertTrue(roomy)
+        self.assertEqual(self.manager.status()["fallbacks_refused"], 1)
+
+    def test_residency_tracked_per_host(self):
+        other = FakeOllamaServer(load_ms=60, max_loaded=1).start()
+        self.addCleanup(other.stop)
+        manager = ModelResidencyManager(router=LLMRouter([self.server.url, other.url]))
+
+        async def scenario():
+            # Only the first host has the primary loaded: the fallback can go to the second
+            await manager.router.backends[0].client.generate(model=PRIMARY, prompt="")
+            with mock.patch.object(config, "OLLAMA_MODEL_MEMORY_GB", 6):
+                one_host = await manager.allow_fallback(PRIMARY, FALLBACK)
+                on_other = await manager.loaded_models(url=other.url)
+                await manager.warm(PRIMARY)
+                await manager.loaded_models(refresh=True)
+                every_host = await manager.allow_fallback(PRIMARY, FALLBACK)
+            return one_host, on_other, every_host
+
+        one_host, on_other, every_host = self.run_async(scenario())
+        self.assertTrue(one_host)
+        self.assertNotIn(PRIMARY, on_other)
+        self.assertFalse(every_host)
+        self.assertEqual(manager.status()["loaded_by_host"], {self.server.url: [PRIMARY], other.url: [PRIMARY]})
+
+    def test_llm_service_reports_cold_start_and_uses_pinned_keep_alive(self):
+        async def scenario():
+            service = LLMService(router=LLMRouter([self.server.url]))
+            self.manager.pinned_jobs = 1
+            await service.query("hello", model=PRIMARY)
+            await service.query("hello again", model=PRIMARY)
+
+        with mock.patch.object(llm_module, "model_residency_manager", self.manager):
+            self.run_async(scenario())
+        self.assertEqual(self.manager.status()["cold_starts"], 1)
+        self.assertEqual({r[2] for r in self.server.requests}, {config.OLLAMA_PINNED_KEEP_ALIVE})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import sys
+import os
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.prompt_budget import TokenCounter, PromptBudgetPlanner
+
+
+def render(parts, context):
+    return f"{parts.get('skill', '')}\nINSTRUCTIONS\n{parts.get('few_shot', '')}\nCONTEXT:\n{context}\nEND"
+
+
+class TestPromptBudget(unittest.TestCase):
+    def setUp(self):
+        # 4 chars per token, no tokenizer files: deterministic estimates
+        self.counter = TokenCounter(tokenizer_path=None, chars_per_token=4.0)
+        self.planner = PromptBudgetPlanner(self.counter, context_window=1000, safety_tokens=0, min_chunk_tokens=20)
+
+    def test_fits_within_window_and_drops_lowest_ranked(self):
+        chunks = [f"chunk{i} " + "x" * 792 for i in range(6)]  # ~200 tokens each
+        plan = self.planner.plan(render, {"few_shot": "", "skill": ""}, chunks, max_output_tokens=300)
+
+        self.assertLessEqual(self.counter.count(plan.prompt), 700)
+        self.assertEqual(plan.chunk_indices[:3], [0, 1, 2])
+        self.assertNotIn("chunk5", plan.prompt)
+        self.assertIn("chunk0", plan.prompt)
+        self.assertEqual(plan.report["chunks_total"], 6)
+        self.assertEqual(plan.report["chunks_kept"] + plan.report["chunks_dropped"], 6)
+
+    def test_trims_last_fitting_chunk_instead_of_overflowing(self):
+        chunks = ["a" * 400, "b. " * 1000]
+        plan = self.planner.plan(render, {}, chunks, max_output_tokens=300)
+        self.assertEqual(plan.chunk_indices, [0, 1])
+        self.assertEqual(plan.report["chunk_trimmed"], 1)
+        self.assertLessEqual(self.counter.count(plan.prompt), 700)
+
+    def test_optional_parts_trimmed_in_order_when_fixed_prompt_too_big(self):
+        parts = {"skill": "s" * 2400, "few_shot": "f" * 1200}
+        plan = self.planner.plan(render, parts, ["context " * 50], max_output_tokens=300,
+                                 trim_order=("skill", "few_shot"))
+        self.assertEqual(plan.report["parts_trimmed"], ["skill"])
+        self.assertEqual(plan.parts["few_shot"], parts["few_shot"])
+        self.assertLess(len(plan.parts["skill"]), len(parts["skill"]))
+        self.assertEqual(plan.chunk_indices, [0])
+        self.assertLessEqual(self.counter.count(plan.prompt), 700)
+
+    def test_context_cap(self):
+        chunks = ["y" * 200 for _ in range(10)]  # 50 tokens each
+        plan = self.planner.plan(render, {}, chunks, max_output_tokens=100, max_context_tokens=120)
+        self.assertLessEqual(plan.report["context_tokens"], 120)
+        self.assertEqual(len(plan.chunk_indices), 2)
+
+    def test_report_accounts_for_parts(self):
+        plan = self.planner.plan(render, {"few_shot": "f" * 80}, ["c" * 40], max_output_tokens=100)
+        report = plan.report
+        self.assertEqual(report["parts"]["few_shot"], 20)
+        self.assertEqual(report["context_tokens"], 10)
+        self.assertEqual(report["free_tokens"], 1000 - 100 - report["prompt_tokens"])
+        self.assertTrue(report["estimated"])
+
+    def test_calibration_ignores_cache_hits(self):
+        self.counter.observe(4000, 2000)  # 2 chars/token observed
+        self.assertLess(self.counter.chars_per_token, 4.0)
+        calibrated = self.counter.chars_per_token
+        # Reused KV prefix: server only counts the suffix, ratio is implausible
+        self.counter.observe(4000, 50)
+        self.assertEqual(self.counter.chars_per_token, calibrated)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import sys
+import os
+import asyncio
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.prompts.generation_prompts import (
+    MCQ_GENERATION_WITH_FEWSHOT, SHORT_ANSWER_PROMPT_TEMPLATE, ESSAY_PROMPT_TEMPLATE,
+    build_few_shot_section,
+)
+from app.services.llm_service import LLMService
+from app.services.llm_router import LLMRouter
+from scripts.fake_ollama import FakeOllamaServer
+
+FIELDS = dict(
+    subject_name="Prosthodontics", topic_name="Dentures", topic="Dentures", co_desc="CO1", lo_desc="LO1",
+    co_code="CO1", lo_code="LO1", count=1, difficulty="medium", bloom_guidance="BLOOM", question_type="mcq",
+    marks=6,
+)
+SAMPLES = [{"question_text": "A patient presents with 2 mm discrepancy", "options": {"A": "x"}},
+           {"question_text": "Which material is used?", "options": {"A": "x"}}]
+OTHER_SAMPLES = [{"question_text": "Which border molding material is used?", "options": {"A": "x"}}]
+
+
+def render(template, context, novelty, answer, samples=SAMPLES):
+    return template.format(rag_context=context, novelty_exclusion=novelty, example_answer=answer,
+                           few_shot_section=build_few_shot_section(samples), **FIELDS)
+
+
+class TestPromptLayout(unittest.TestCase):
+    def test_per_question_parts_come_after_static_prefix(self):
+        for template in (MCQ_GENERATION_WITH_FEWSHOT, SHORT_ANSWER_PROMPT_TEMPLATE, ESSAY_PROMPT_TEMPLATE):
+            # Few-shot samples are re-selected per subtopic, so they vary per call too
+            a = render(template, "first context", "avoid alpha", "A")
+            b = render(template, "second context", "exclude beta", "C", samples=OTHER_SAMPLES)
+            shared = os.path.commonprefix([a, b])
+            self.assertIn("OUTPUT FORMAT", shared)
+            self.assertNotIn("avoid alpha", shared)
+            self.assertGreater(len(shared), 0.6 * len(a))
+
+    def test_few_shot_section_is_deterministic(self):
+        self.assertEqual(build_few_shot_section(SAMPLES), build_few_shot_section(list(reversed(SAMPLES))))
+
+
+class TestLLMServiceSession(unittest.TestCase):
+    def test_keep_alive_and_session_stats(self):
+        async def run(url):
+            service = LLMService(router=LLMRouter([url]))
+            prefix = "STATIC INSTRUCTIONS " * 200
+            for i in range(3):
+                await service.query(prefix + f"question {i}", model="m", session="topic:1:mcq", keep_alive="10m")
+            return service.get_session_stats("topic:1:mcq")
+
+        with FakeOllamaServer() as server:
+            stats = asyncio.run(run(server.url))
+            keep_alives = {r[2] for r in server.requests}
+            evaluated = [r[1] for r in server.requests]
+
+        self.assertEqual(keep_alives, {"10m"})
+        self.assertEqual(stats["calls"], 3)
+        # Only the first call pays for the shared prefix
+        self.assertGreater(evaluated[0], 10 * evaluated[1])
+        self.assertEqual(stats["prompt_eval_count"], sum(evaluated))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.quantized_index import QuantizedIndex, QuantizedIndexStore
+from app.services.vector_store import VectorStore
+
+
+def exact_top(vectors, query, n):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return list(np.argsort(-(unit @ (query / np.linalg.norm(query))))[:n])
+
+
+class TestQuantizedIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.vectors = rng.normal(size=(3000, 64)).astype(np.float32)
+        self.queries = rng.normal(size=(20, 64)).astype(np.float32)
+        self.ids = [f"c{i}" for i in range(len(self.vectors))]
+
+    def test_rescored_scan_matches_exact_search(self):
+        for storage in ("int8", "float16"):
+            index = QuantizedIndex.empty(storage, 64)
+            index = index.add(self.ids, self.vectors)
+            hits = 0
+            for query in self.queries:
+                rows, sims = index.rescore(index.search(query, 40), query, 10)
+                hits += len(set(rows) & set(exact_top(self.vectors, query, 10)))
+                self.assertEqual(sims, sorted(sims, reverse=True))
+            self.assertGreaterEqual(hits / (10 * len(self.queries)), 0.98, storage)
+
+        self.assertLess(index.nbytes, self.vectors.nbytes / 1.9)  # float16
+        int8 = QuantizedIndex.empty("int8", 64)
+        int8 = int8.add(self.ids, self.vectors)
+        self.assertLess(int8.nbytes, self.vectors.nbytes / 3.5)
+
+    def test_mask_and_idempotent_add(self):
+        index = QuantizedIndex.empty("int8", 64)
+        index = index.add(self.ids[:100], self.vectors[:100])
+        self.assertIs(index.add(self.ids[:100], self.vectors[:100]), index)
+        self.assertEqual(len(index), 100)
+        allowed = index.mask(["c3", "c7", "missing"])
+        self.assertEqual(sorted(index.search(self.queries[0], 10, allowed)), [3, 7])
+
+    def test_store_round_trip_memory_maps_full_vectors(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        QuantizedIndexStore(directory).add("subject_1", "int8", self.ids[:50], self.vectors[:50].tolist())
+        QuantizedIndexStore(directory).add("subject_1", "int8", self.ids[50:80], self.vectors[50:80].tolist())
+        loaded = QuantizedIndexStore(directory).get("subject_1")
+        self.assertEqual(len(loaded), 80)
+        self.assertIsInstance(loaded.full, np.memmap)
+        np.testing.assert_allclose(loaded.vectors([79, 3]), self.vectors[[79, 3]])
+        # Appended in place, not rewritten: exactly one float32 row per vector
+        self.assertEqual(os.path.getsize(os.path.join(directory, "subject_1", "full.f32")), 80 * 64 * 4)
+
+    def test_add_does_not_mutate_index_in_use(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        store = QuantizedIndexStore(directory)
+        store.add("subject_1", "int8", self.ids[:50], self.vectors[:50].tolist())
+        in_use = store.get("subject_1")
+        store.add("subject_1", "int8", self.ids[50:80], self.vectors[50:80].tolist())
+        self.assertEqual((len(in_use), len(in_use.codes), len(in_use.full)), (50, 50, 50))
+        self.assertEqual(len(in_use.search(self.queries[0], 10)), 10)
+        self.assertEqual(len(store.get("subject_1")), 80)
+
+    def test_add_drops_rows_of_an_interrupted_add(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        store = QuantizedIndexStore(directory)
+        store.add("subject_1", "int8", self.ids[:50], self.vectors[:50].tolist())
+        with open(os.path.join(directory, "subject_1", "full.f32"), "ab") as f:
+            f.write(self.vectors[200:210].tobytes())  # appended, but ids.json never written
+        store.add("subject_1", "int8", self.ids[50:80], self.vectors[50:80].tolist())
+        np.testing.assert_allclose(store.get("subject_1").vectors([50, 79]), self.vectors[[50, 79]])
+
+
+class TestQuantizedVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        rng = np.random.default_rng(1)
+        # Unit vectors like MiniLM's, so Chroma's L2 ranking equals the cosine ranking
+        embeddings = rng.normal(size=(400, 32))
+        self.embeddings = (embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)).tolist()
+        self.ids = [f"chunk-{i}" for i in range(400)]
+        self.docs = [f"Passage {i} on {'clasp design' if i % 2 else 'border moulding'}." for i in range(400)]
+        self.metas = [{"topic_id": str(i % 2), "page_number": i} for i in range(400)]
+        self.query = [rng.normal(size=32).tolist()]
+
+    def _store(self, storage, name="subject_1"):
+        store = VectorStore(os.path.join(self.directory, storage), embedding_storage=storage)
+        store.add_documents(name, self.docs, self.metas, self.ids, self.embeddings)
+        return store
+
+    def test_quantized_queries_match_float32(self):
+        full = self._store("float32")
+        quantized = self._store("int8")
+        for where in (None, {"topic_id": "1"}):
+            expected = full.query_mmr("subject_1", self.query, k=5, fetch_k=20, where=where)
+            got = quantized.query_mmr("subject_1", self.query, k=5, fetch_k=20, where=where)
+            self.assertEqual(got["ids"][0], expected["ids"][0])
+            self.assertEqual(got["documents"][0], expected["documents"][0])
+        similar = quantized.query_similar("subject_1", self.query, n_results=3, where={"topic_id": "0"})
+        self.assertTrue(all(m["topic_id"] == "0" for m in similar["metadatas"][0]))
+        hybrid = quantized.query_hybrid("subject_1", self.query, "clasp design", k=5, fetch_k=15)
+        self.assertEqual(len(hybrid["ids"][0]), 5)
+        self.assertLess(quantized.vector_bytes("subject_1"), full.vector_bytes("subject_1") / 3)
+
+    def test_existing_collection_keeps_its_storage(self):
+        self._store("float32")
+        reopened = VectorStore(os.path.join(self.directory, "float32"), embedding_storage="int8")
+        reopened.add_documents("subject_1", ["Late addition on clasp design."], [{"topic_id": "1"}],
+                               ["late"], [self.embeddings[0]])
+        self.assertIsNone(reopened.quantized.get(reopened.partition_name("subject_1", "1")))
+        self.assertEqual(reopened.count_documents("subject_1"), 401)
+        with self.assertRaises(ValueError):
+            VectorStore(self.directory, embedding_storage="int4")
+
+
+if __name__ == "__main__":
+    unittest.main()
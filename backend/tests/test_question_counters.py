@@ -0,0 +1,85 @@
+import sys
+import os
+import asyncio
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Subject, GeneratedBatch, Question, SubjectQuestionStats
+from app.services.vetting_service import VettingService
+from app.services.question_counter_service import question_counter_service
+
+
+class TestQuestionCounters(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.service = VettingService()
+
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        self.db.add(subject)
+        self.db.flush()
+        self.subject_id = subject.id
+
+        self.db.add(GeneratedBatch(id="b1", subject_id=self.subject_id, title="Batch", pending_count=0))
+        self.questions = [
+            Question(subject_id=self.subject_id, question_text=f"Q{i}?", question_type="mcq",
+                     difficulty="medium", marks=1, status="pending", batch_id="b1")
+            for i in range(3)
+        ]
+        self.db.add_all(self.questions)
+        question_counter_service.record_insert(self.db, self.questions)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def _batch(self):
+        self.db.expire_all()
+        return self.db.query(GeneratedBatch).filter(GeneratedBatch.id == "b1").one()
+
+    def test_insert_counts_batch_and_subject(self):
+        batch = self._batch()
+        self.assertEqual(batch.pending_count, 3)
+        self.assertEqual(batch.status, "in_progress")
+        self.assertEqual(question_counter_service.get_subject_stats(self.db, self.subject_id),
+                         {"total": 3, "pending": 3, "approved": 0, "rejected": 0, "quarantined": 0})
+
+    def test_vetting_transitions_update_counters(self):
+        ids = [q.id for q in self.questions]
+        asyncio.run(self.service.approve_question(self.db, str(ids[0]), "v1"))
+        asyncio.run(self.service.reject_question(self.db, str(ids[1]), "v1", "ambiguous"))
+        asyncio.run(self.service.quarantine_question(self.db, str(ids[2]), "v1", "other"))
+
+        batch = self._batch()
+        self.assertEqual((batch.pending_count, batch.approved_count, batch.rejected_count, batch.quarantined_count),
+                         (0, 1, 1, 1))
+        self.assertEqual(batch.status, "complete")
+
+        stats = question_counter_service.get_subject_stats(self.db)
+        self.assertEqual(stats, {"total": 3, "pending": 0, "approved": 1, "rejected": 1, "quarantined": 1})
+
+    def test_reconcile_repairs_drift(self):
+        self.assertEqual(question_counter_service.reconcile(self.db),
+                         {"batches_repaired": 0, "subjects_repaired": 0})
+
+        # Simulate writes that bypassed the counter layer
+        self.db.query(Question).filter(Question.id == self.questions[0].id).update({"status": "approved"})
+        self.db.query(SubjectQuestionStats).delete()
+        self.db.commit()
+
+        result = question_counter_service.reconcile(self.db)
+        self.assertEqual(result, {"batches_repaired": 1, "subjects_repaired": 1})
+
+        batch = self._batch()
+        self.assertEqual((batch.pending_count, batch.approved_count), (2, 1))
+        self.assertEqual(question_counter_service.get_subject_stats(self.db, self.subject_id)["approved"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
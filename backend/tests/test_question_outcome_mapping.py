@@ -0,0 +1,89 @@
+import sys
+import os
+import asyncio
+import json
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Subject, Topic, Rubric, Question, QuestionOutcomeMapping
+from app.services.vetting_service import VettingService
+from app.services.rubric_service import RubricService
+from app.services.question_outcome_service import question_outcome_service
+
+
+class TestQuestionOutcomeMapping(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        self.db.add(subject)
+        self.db.flush()
+        topic = Topic(subject_id=subject.id, name="Impressions")
+        self.db.add(topic)
+        self.db.add(Rubric(id="r1", subject_id=subject.id, title="Final",
+                           co_distribution=json.dumps({"CO1": 50, "CO2": 50})))
+        self.db.flush()
+        self.topic_id = topic.id
+
+        self.questions = [
+            Question(subject_id=subject.id, topic_id=topic.id, question_text=f"Q{i}?", question_type="mcq",
+                     difficulty="medium", marks=1, status="pending", rubric_id="r1", co_id=co, lo_id=lo)
+            for i, (co, lo) in enumerate([("CO1", "LO1"), ("CO1, CO3", None), (None, None), ("CO1", "LO2.1")])
+        ]
+        self.db.add_all(self.questions)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def _mappings(self, question_id):
+        return sorted(
+            (m.kind, m.outcome_code, m.intensity)
+            for m in self.db.query(QuestionOutcomeMapping).filter(QuestionOutcomeMapping.question_id == question_id)
+        )
+
+    def test_filled_on_save(self):
+        self.assertEqual(self._mappings(self.questions[0].id), [("co", "CO1", None), ("lo", "LO1", None)])
+        self.assertEqual(self._mappings(self.questions[1].id), [("co", "CO1", None), ("co", "CO3", None)])
+        self.assertEqual(self._mappings(self.questions[2].id), [])
+
+    def test_vetter_adjustment_rewrites_rows(self):
+        asyncio.run(VettingService().approve_question(
+            self.db, str(self.questions[0].id), "v1",
+            co_adjustment=[{"co_code": "CO2", "intensity": 3}],
+            lo_adjustment=[{"lo_code": "LO1", "intensity": 2}]
+        ))
+        self.assertEqual(self._mappings(self.questions[0].id), [("co", "CO2", 3), ("lo", "LO1", 2)])
+        self.assertEqual(question_outcome_service.intensity_averages(self.db, self.topic_id, "co"), {"CO2": 3.0})
+
+    def test_delete_removes_rows(self):
+        qid = self.questions[1].id
+        self.db.delete(self.questions[1])
+        self.db.commit()
+        self.assertEqual(self._mappings(qid), [])
+
+    def test_backfill_matches_incremental(self):
+        incremental = sorted((m.question_id, m.kind, m.outcome_code) for m in self.db.query(QuestionOutcomeMapping))
+        question_outcome_service.backfill(self.db)
+        rebuilt = sorted((m.question_id, m.kind, m.outcome_code) for m in self.db.query(QuestionOutcomeMapping))
+        self.assertEqual(rebuilt, incremental)
+
+    def test_rubric_co_distribution(self):
+        result = RubricService().check_co_distribution(self.db, "r1")
+        by_code = {d["co_code"]: d for d in result["distribution"]}
+        self.assertEqual(result["total_questions"], 4)
+        self.assertEqual(by_code["CO1"]["actual_percentage"], 75.0)
+        self.assertEqual(by_code["CO1"]["deviation"], 25.0)
+        self.assertEqual(by_code["CO2"]["question_count"], 0)
+        self.assertIsNone(by_code["CO3"]["target_percentage"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import sys
+import os
+import json
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import (
+    Base, Subject, Question, QuestionOutcomeMapping, SubjectQuestionStats, RagContextChunk
+)
+from app.services.change_tracker import change_tracker, SUBJECT_LIST_SCOPE
+from app.services.question_writer import QuestionWriter
+from app.services.rag_context_store import RagContextStore
+
+
+class TestQuestionWriter(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        self.db.add(subject)
+        self.db.commit()
+        self.subject_id = subject.id
+        self.writer = QuestionWriter()
+        self.store = RagContextStore()
+
+    def tearDown(self):
+        self.db.close()
+
+    def rows(self, n):
+        return [{"subject_id": self.subject_id, "question_text": f"Question {i}?", "question_type": "mcq",
+                 "status": "approved", "is_reference": 1, "co_id": "CO1", "lo_id": None} for i in range(n)]
+
+    def capture(self):
+        statements = []
+        listener = lambda conn, cursor, statement, params, context, many: statements.append(statement)
+        event.listen(self.engine, "before_cursor_execute", listener)
+        self.addCleanup(event.remove, self.engine, "before_cursor_execute", listener)
+        return statements
+
+    def test_one_insert_and_one_reload(self):
+        version = change_tracker.get_version(self.db, SUBJECT_LIST_SCOPE)
+        statements = self.capture()
+        questions = self.writer.insert_many(self.db, self.rows(20))
+        texts = [q.question_text for q in questions]  # no lazy load per row
+
+        self.assertEqual(texts, [f"Question {i}?" for i in range(20)])
+        self.assertEqual(sum(s.startswith("INSERT INTO questions") for s in statements), 1)
+        self.assertEqual(sum(s.startswith("SELECT") for s in statements), 1)
+        self.assertTrue(all(q.status_changed_at is not None for q in questions))
+
+        # Bookkeeping normally done by flush events
+        self.assertEqual(self.db.query(QuestionOutcomeMapping).count(), 20)
+        self.assertEqual(change_tracker.get_version(self.db, SUBJECT_LIST_SCOPE), version + 1)
+        stats = self.db.query(SubjectQuestionStats).filter_by(subject_id=self.subject_id).one()
+        self.assertEqual((stats.total_count, stats.approved_count), (20, 20))
+
+    def test_shared_chunks_stored_once(self):
+        chunk = {"text": "Border molding records the functional depth of the vestibule.", "page_number": 12, "source": "prostho.pdf"}
+        other = {"text": "Centric relation is a bone-to-bone relationship.", "page_number": 40, "source": "prostho.pdf"}
+        packed = self.store.pack_many(self.db, [([chunk, other], "Uses the border molding passage."),
+                                                ([chunk], "Same passage again.")])
+        packed += self.store.pack_many(self.db, [([dict(reversed(list(chunk.items())))], None)])
+        self.db.commit()
+
+        self.assertEqual(self.db.query(RagContextChunk).count(), 2)
+        self.assertNotIn("vestibule", packed[1])  # reference, not a copy
+        loaded = self.store.load(self.db, packed)
+        self.assertEqual(loaded[0], {"context": [chunk, other], "reasoning": "Uses the border molding passage."})
+        self.assertEqual(loaded[2]["context"], [chunk])
+
+    def test_legacy_and_empty_values_pass_through(self):
+        legacy = json.dumps({"context": ["inline chunk"], "reasoning": "old row"})
+        self.assertEqual(self.store.load(self.db, [legacy, None, "not json"]),
+                         [{"context": ["inline chunk"], "reasoning": "old row"}, [], []])
+
+
+class TestRagContextCompaction(unittest.TestCase):
+    CHUNK = "Border molding records the functional depth and width of the vestibule. " * 10
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.db.add(Subject(name="Prosthodontics", code="PROS01"))
+        self.db.commit()
+        self.store = RagContextStore()
+
+    def tearDown(self):
+        self.db.close()
+
+    def add_legacy(self, n):
+        item = {"text": self.CHUNK, "page_number": 12, "source": "prostho.pdf"}
+        self.db.add_all([Question(subject_id=1, question_text=f"Q{i}?", rag_context=json.dumps(
+            {"context": [item, f"Loose chunk {i % 2}"], "reasoning": f"Reason {i}"})) for i in range(n)])
+        self.db.add(Question(subject_id=1, question_text="Old list?", rag_context=json.dumps(["Loose chunk 0"])))
+        self.db.commit()
+
+    def test_compact_rewrites_legacy_rows_as_references(self):
+        self.add_legacy(10)
+        before = [q.rag_context for q in self.db.query(Question).order_by(Question.id)]
+        expected = self.store.load(self.db, before)
+
+        stats = self.store.compact(self.db, batch_size=4)
+        self.assertEqual(stats, {"questions": 11, "chunks_written": 3})
+        after = [q.rag_context for q in self.db.query(Question).order_by(Question.id)]
+        self.assertTrue(all(json.loads(raw).get("context_refs") for raw in after))
+        self.assertLess(sum(map(len, after)), sum(map(len, before)) / 4)
+        self.assertEqual(self.store.load(self.db, after)[:10], expected[:10])
+        self.assertEqual(self.store.load(self.db, after)[10]["context"], ["Loose chunk 0"])
+
+        self.assertEqual(self.store.compact(self.db), {"questions": 0, "chunks_written": 0})
+
+    def test_vector_store_ids_and_pages_are_the_reference(self):
+        item = {"text": self.CHUNK, "page_number": 7, "source": "prostho.pdf", "chunk_id": "c-123"}
+        raw = self.store.pack_many(self.db, [([item], "why")])[0]
+        self.db.commit()
+        self.assertEqual(json.loads(raw)["context_refs"], [{"id": "c-123", "page": 7}])
+
+        sources = self.store.sources(self.db, raw)
+        self.assertEqual(sources[0]["ref"], "c-123")
+        self.assertEqual(sources[0]["page_number"], 7)
+        self.assertLessEqual(len(sources[0]["text"]), self.store.SNIPPET_CHARS + 3)
+        self.assertEqual(self.store.sources(self.db, raw, full=True)[0]["text"], self.CHUNK)
+
+
+if __name__ == "__main__":
+    unittest.main()
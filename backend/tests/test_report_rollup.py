@@ -0,0 +1,94 @@
+import sys
+import os
+import asyncio
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Subject, Topic, CourseOutcome, Question, QuestionReportRollup
+from app.services.vetting_service import VettingService
+from app.services.reports_service import ReportsService
+from app.services.question_counter_service import question_counter_service
+from app.services.report_rollup_service import report_rollup_service
+from app.services.outcome_codes import parse_outcome_mappings
+
+
+class TestReportRollup(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.vetting = VettingService()
+        self.reports = ReportsService()
+
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        self.db.add(subject)
+        self.db.flush()
+        self.subject_id = subject.id
+        topic = Topic(subject_id=subject.id, name="Impressions")
+        self.db.add(topic)
+        self.db.add_all([CourseOutcome(subject_id=subject.id, code=f"CO{i}", order=i) for i in (1, 2, 3)])
+        self.db.flush()
+        self.topic_id = topic.id
+
+        self.questions = [
+            Question(subject_id=subject.id, topic_id=topic.id, question_text=f"Q{i}?", question_type="mcq",
+                     difficulty="medium", marks=1, status="pending", bloom_level=bloom, co_id=co)
+            for i, (bloom, co) in enumerate([("K1-Remember", "CO1"), ("K3-Apply", "CO1, CO2"), ("K3-Apply", None)])
+        ]
+        self.db.add_all(self.questions)
+        question_counter_service.record_insert(self.db, self.questions)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def _rollup_rows(self):
+        return sorted(
+            (r.subject_id, r.topic_id, r.co_code, r.status, r.bloom_level, r.day, r.count)
+            for r in self.db.query(QuestionReportRollup).all() if r.count
+        )
+
+    def test_reports_follow_vetting(self):
+        q0, q1, q2 = [q.id for q in self.questions]
+        asyncio.run(self.vetting.approve_question(self.db, str(q0), "v1"))
+        asyncio.run(self.vetting.approve_question(
+            self.db, str(q1), "v1", co_adjustment=[{"co_code": "CO3", "intensity": 2}, {"co_code": "CO1", "intensity": 0}]
+        ))
+        asyncio.run(self.vetting.reject_question(self.db, str(q2), "v1", "ambiguous"))
+
+        overview = self.reports.get_overview_stats(self.db, self.subject_id)
+        self.assertEqual((overview["total_questions"], overview["approved"], overview["rejected"], overview["pending"]),
+                         (3, 2, 1, 0))
+
+        coverage = {c["co_code"]: c["question_count"] for c in self.reports.get_co_coverage(self.db, self.subject_id)}
+        self.assertEqual(coverage, {"CO1": 1, "CO2": 0, "CO3": 1})
+
+        self.assertEqual(self.reports.get_blooms_distribution(self.db, self.subject_id),
+                         {"K1-Remember": 1, "K3-Apply": 1})
+        self.assertEqual(self.reports.get_topic_coverage(self.db, self.subject_id)[0]["count"], 2)
+        self.assertEqual(self.reports.get_questions_by_subject(self.db),
+                         [{"subject": "Prosthodontics", "question_count": 3}])
+
+    def test_incremental_matches_rebuild(self):
+        asyncio.run(self.vetting.approve_question(
+            self.db, str(self.questions[1].id), "v1", co_adjustment=[{"co_code": "CO2", "intensity": 3}]
+        ))
+        incremental = self._rollup_rows()
+        report_rollup_service.rebuild(self.db)
+        self.assertEqual(self._rollup_rows(), incremental)
+
+    def test_parse_outcome_mappings(self):
+        self.assertEqual(parse_outcome_mappings("CO1, CO3"), [("CO1", None), ("CO3", None)])
+        self.assertEqual(parse_outcome_mappings('[{"co_code": "CO2", "intensity": 3}, {"co_code": "CO4", "intensity": 0}]'),
+                         [("CO2", 3)])
+        self.assertEqual(parse_outcome_mappings("LO1.2, LO3", "lo"), [("LO1.2", None), ("LO3", None)])
+        self.assertEqual(parse_outcome_mappings("N/A"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import sys
+import os
+import re
+import unittest
+import zlib
+from unittest import mock
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import retrieval_eval
+from app.services.retrieval_eval import (
+    EvalQuery, RetrievalConfig, RetrievalEvaluator, is_relevant, load_queries, page_span, percentile, summarize,
+)
+from app.services.vector_store import VectorStore
+
+
+def bag_of_words(texts):
+    """Deterministic stand-in for the embedding model: hashed word counts, 64-d."""
+    vectors = []
+    for text in texts:
+        vec = np.zeros(64, dtype=np.float32)
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            vec[zlib.crc32(word.encode()) % 64] += 1.0
+        vectors.append((vec / (np.linalg.norm(vec) + 1e-9)).tolist())
+    return vectors
+
+
+TOPICS = [
+    "The posterior palatal seal is placed between the anterior and posterior vibrating lines",
+    "Zirconia crowns are bonded after alumina air abrasion with an MDP containing primer",
+    "The neutral zone technique improves stability of a lower complete denture on resorbed ridges",
+    "Indirect retainers anterior to the fulcrum line resist rotation of a distal extension base",
+]
+
+
+class TestMetrics(unittest.TestCase):
+    def test_pages_and_relevance(self):
+        self.assertEqual(page_span("4-6"), {"4", "5", "6"})
+        self.assertEqual(page_span(7), {"7"})
+        self.assertEqual(page_span(None), set())
+        query = EvalQuery("seal", pages=["5"], contains="Posterior  palatal\nseal")
+        self.assertTrue(is_relevant(query, "the posterior palatal seal is ...", {"page_number": "4-5"}))
+        self.assertFalse(is_relevant(query, "the posterior palatal seal is ...", {"page_number": 6}))
+        self.assertFalse(is_relevant(query, "vibrating lines", {"page_number": 5}))
+
+    def test_summary(self):
+        summary = summarize([1, 2, None, 4], [float(ms) for ms in range(1, 21)])
+        self.assertEqual(summary["recall"], 0.75)
+        self.assertAlmostEqual(summary["mrr"], (1 + 0.5 + 0.25) / 4)
+        self.assertEqual(summary["p50_ms"], 10.0)
+        self.assertEqual(summary["p95_ms"], 19.0)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_bundled_query_set_loads(self):
+        path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "data", "eval", "prostho_mcqs_queries.json")
+        queries = load_queries(path)
+        self.assertGreaterEqual(len(queries), 10)
+        self.assertTrue(all(q.pages and q.contains for q in queries))
+
+
+class TestRetrievalEvaluator(unittest.TestCase):
+    def test_reports_each_config_and_shares_ingests(self):
+        # One topic per page, padded so each page chunks on its own at 400 chars
+        pages = [{"text": ". ".join([topic] * 4) + ".", "page_number": i + 1} for i, topic in enumerate(TOPICS)]
+        queries = [
+            EvalQuery("posterior palatal seal vibrating lines", ["1"], "posterior palatal seal"),
+            EvalQuery("bonding zirconia MDP primer", ["2"], "MDP containing primer"),
+            EvalQuery("neutral zone lower denture", ["3"], "neutral zone"),
+            EvalQuery("indirect retainer fulcrum line", ["4"], "fulcrum line"),
+        ]
+        ingests = []
+
+        def embed(texts):
+            ingests.append(len(texts))
+            return bag_of_words(texts)
+
+        configs = [
+            RetrievalConfig("dense", mode="dense", fetch_k=8, chunk_size=400, overlap=50),
+            RetrievalConfig("hybrid", mode="hybrid", fetch_k=6, chunk_size=400, overlap=50),
+            RetrievalConfig("hybrid unfiltered", mode="hybrid", fetch_k=6, chunk_size=400, overlap=50,
+                            noise_filter=False),
+        ]
+        results = RetrievalEvaluator(embed, pages).run(configs, queries, k=2, repeats=1)
+
+        self.assertEqual([r.config.name for r in results], ["dense", "hybrid", "hybrid unfiltered"])
+        self.assertEqual(len(ingests), 3)  # query embeddings + one ingest per (chunking, noise filter)
+        for r in results:
+            self.assertEqual(r.recall, 1.0, r.misses)
+            self.assertEqual(r.mrr, 1.0)
+            self.assertGreater(r.index_bytes, 0)
+            self.assertGreaterEqual(r.p95_ms, r.p50_ms)
+        self.assertEqual(results[0].index_bytes, results[1].index_bytes)
+
+    def _single_topic_run(self, cfg, repeats=1):
+        pages = [{"text": TOPICS[0], "page_number": 1}]
+        queries = [EvalQuery("posterior palatal seal", ["1"], "posterior palatal seal")] * 2
+        return RetrievalEvaluator(bag_of_words, pages).run([cfg], queries, k=1, repeats=repeats)
+
+    def test_every_timed_run_is_recorded(self):
+        recorded = []
+
+        def spy(first_hits, latencies_ms):
+            recorded.append(list(latencies_ms))
+            return summarize(first_hits, latencies_ms)
+
+        with mock.patch.object(retrieval_eval, "summarize", side_effect=spy):
+            self._single_topic_run(RetrievalConfig("dense", mode="dense", chunk_size=400, overlap=50), repeats=3)
+        self.assertEqual(len(recorded[0]), 6)  # 2 queries x 3 repeats, not one best-of per query
+
+    def test_hybrid_failure_is_not_measured_as_dense(self):
+        cfg = RetrievalConfig("hybrid", mode="hybrid", chunk_size=400, overlap=50)
+        with mock.patch.object(VectorStore, "sparse_index", side_effect=RuntimeError("sparse index broken")):
+            with self.assertRaises(RuntimeError):
+                self._single_topic_run(cfg)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Subject, Topic
+from app.models.sample_question import SampleQuestion
+from app.services.sample_selection_service import SampleSelectionService
+from app.services.sample_vector_store import SampleVectorStore
+
+# Toy vocabulary: each keyword is one axis, so similarity is keyword overlap
+VOCAB = ["impression", "alginate", "silicone", "tray", "denture", "occlusion", "implant"]
+
+
+class KeywordEmbeddings(Embeddings):
+    """Offline stand-in for the sample store's embedding backend; records the calling thread."""
+
+    def __init__(self):
+        self.calls = []
+
+    def _vec(self, text):
+        return [float(w in text.lower()) + 0.01 for w in VOCAB]
+
+    def embed_documents(self, texts):
+        self.calls.append((threading.current_thread(), list(texts)))
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text):
+        self.calls.append((threading.current_thread(), [text]))
+        return self._vec(text)
+
+
+class TestSampleSelection(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        SampleVectorStore._index_cache.clear()
+
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        self.db.add(subject)
+        self.db.flush()
+        topic = Topic(subject_id=subject.id, name="Impressions")
+        self.db.add(topic)
+        self.db.flush()
+        self.subject_id, self.topic_id = subject.id, topic.id
+
+        self.embeddings = KeywordEmbeddings()
+        store = SampleVectorStore.__new__(SampleVectorStore)
+        store.backend = "ollama"
+        store.embeddings = self.embeddings
+        self.service = SampleSelectionService(store)
+
+    def tearDown(self):
+        self.db.close()
+        SampleVectorStore._index_cache.clear()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _add(self, texts, question_type="mcq"):
+        samples = [
+            SampleQuestion(subject_id=self.subject_id, topic_id=self.topic_id,
+                           question_text=t, question_type=question_type)
+            for t in texts
+        ]
+        self.db.add_all(samples)
+        self.db.commit()
+        return samples
+
+    def _save(self, texts, question_type="mcq"):
+        samples = self._add(texts, question_type)
+        asyncio.run(self.service.index_samples(self.topic_id, [self.service.record(s) for s in samples]))
+
+    def _select(self, query, k, question_type="mcq"):
+        picked = asyncio.run(self.service.select(
+            self.db, self.subject_id, self.topic_id, question_type, query, k=k
+        ))
+        return [s.question_text for s in picked]
+
+    def test_upload_indexed_once_off_the_event_loop(self):
+        self._save(["Alginate impression", "Silicone impression", "Denture occlusion"])
+        self.assertEqual(len(self.embeddings.calls), 1)
+        self._select("denture", 1)
+        # Neither the upload nor the query embedding ran on the event loop's thread
+        self.assertTrue(all(t is not threading.main_thread() for t, _ in self.embeddings.calls))
+
+    def test_selects_relevant_samples_for_subtopic(self):
+        self._save([
+            "Alginate impression tray", "Denture occlusion", "Implant occlusion",
+            "Silicone impression", "Denture base", "Implant abutment",
+        ])
+        self.assertTrue(all("Implant" in t for t in self._select("implant", 2)))
+        self.assertEqual(set(self._select("impression", 2)), {"Alginate impression tray", "Silicone impression"})
+        self.assertEqual(len(self.embeddings.calls), 3)  # the upload, then one embedding per query
+
+    def test_filters_by_question_type(self):
+        self._save(["Alginate impression"], question_type="essay")
+        self._save(["Denture occlusion"])
+        self.assertEqual(self._select("denture", 3, question_type="essay"), ["Alginate impression"])
+
+    def test_unindexed_topic_is_indexed_from_its_rows(self):
+        # Rows saved without an index (e.g. before a backend switch)
+        self._add(["Alginate impression", "Implant abutment", "Denture occlusion"])
+        self.assertEqual(self._select("implant", 1), ["Implant abutment"])
+        self.assertTrue(self.service.sample_store.has_index(self.topic_id))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import unittest
+import sys
+import os
+import tempfile
+import hashlib
+from unittest import mock
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+
+from app import config
+from app.services.embedding_service import EmbeddingService
+from app.services.sample_vector_store import SampleVectorStore, SentenceTransformerEmbeddings
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic offline embeddings so the store can be exercised without Ollama."""
+
+    def __init__(self):
+        self.document_calls = 0
+
+    def _vec(self, text):
+        digest = hashlib.sha256(text.encode()).digest()
+        return [b / 255.0 for b in digest[:16]]
+
+    def embed_documents(self, texts):
+        self.document_calls += 1
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vec(text)
+
+
+def make_store():
+    store = SampleVectorStore.__new__(SampleVectorStore)
+    store.embeddings = HashEmbeddings()
+    return store
+
+
+class TestSampleVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        SampleVectorStore._index_cache.clear()
+
+    def tearDown(self):
+        SampleVectorStore._index_cache.clear()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def _samples(self, prefix, n):
+        return [{"question_text": f"{prefix} question {i}", "type": "mcq"} for i in range(n)]
+
+    def test_add_is_append_only_and_batched(self):
+        store = make_store()
+        store.add_samples(1, self._samples("a", 5))
+        store.add_samples(1, self._samples("b", 3))
+
+        self.assertEqual(store.embeddings.document_calls, 2)
+        path = store._get_store_path(1)
+        self.assertEqual(len(store._shard_dirs(path)), 2)
+        self.assertFalse(os.path.exists(os.path.join(path, "index.faiss")))
+
+        results = store.retrieve_similar(1, "b question 2", k=8)
+        self.assertEqual(len(results), 8)
+        self.assertEqual(results[0].page_content, "b question 2")
+
+    def test_repeated_queries_hit_memory(self):
+        store = make_store()
+        store.add_samples(1, self._samples("a", 4))
+        SampleVectorStore._index_cache.clear()
+
+        with mock.patch.object(FAISS, "load_local", wraps=FAISS.load_local) as load:
+            for _ in range(5):
+                self.assertTrue(store.retrieve_similar(1, "a question 1", k=2))
+            self.assertEqual(load.call_count, 1)
+
+    def test_other_writer_invalidates_cache(self):
+        reader, writer = make_store(), make_store()
+        reader.add_samples(1, self._samples("a", 3))
+        reader.retrieve_similar(1, "a question 0")
+
+        # Simulate another process: the write must not touch the shared cache
+        with mock.patch.object(SampleVectorStore, "_index_cache", {}):
+            writer.add_samples(1, self._samples("late", 1))
+
+        results = reader.retrieve_similar(1, "late question 0", k=1)
+        self.assertEqual(results[0].page_content, "late question 0")
+
+    def test_add_does_not_mutate_index_in_use(self):
+        store = make_store()
+        store.add_samples(1, self._samples("a", 3))
+        in_use = store._get_index(store._get_store_path(1))
+        store.add_samples(1, self._samples("b", 2))
+
+        # A search running on the old object keeps a consistent view; new searches see the merge
+        self.assertEqual(in_use.index.ntotal, 3)
+        self.assertEqual(len(in_use.docstore._dict), 3)
+        self.assertEqual(len(store.retrieve_similar(1, "b question 0", k=10)), 5)
+
+    def test_rebuild_replaces_topic_index(self):
+        store = make_store()
+        store.add_samples(1, self._samples("old", 4))
+        self.assertEqual(store.rebuild(1, self._samples("new", 2)), 2)
+
+        path = store._get_store_path(1)
+        self.assertEqual(len(store._shard_dirs(path)), 1)
+        SampleVectorStore._index_cache.clear()
+        results = store.retrieve_similar(1, "new question 0", k=10)
+        self.assertEqual(sorted(d.page_content for d in results), ["new question 0", "new question 1"])
+
+    def test_shards_compact_into_base(self):
+        store = make_store()
+        with mock.patch.object(config, "SAMPLE_INDEX_MAX_SHARDS", 2):
+            for i in range(3):
+                store.add_samples(1, self._samples(f"s{i}", 2))
+
+        path = store._get_store_path(1)
+        self.assertTrue(os.path.exists(os.path.join(path, "index.faiss")))
+        self.assertEqual(store._shard_dirs(path), [])
+
+        SampleVectorStore._index_cache.clear()
+        self.assertEqual(len(store.retrieve_similar(1, "s0 question 0", k=10)), 6)
+
+    def test_lru_is_bounded(self):
+        store = make_store()
+        with mock.patch.object(config, "SAMPLE_INDEX_CACHE_SIZE", 2):
+            for topic_id in (1, 2, 3):
+                store.add_samples(topic_id, self._samples(f"t{topic_id}", 1))
+                store.retrieve_similar(topic_id, "anything")
+            self.assertEqual(len(SampleVectorStore._index_cache), 2)
+            self.assertNotIn(store._get_store_path(1), SampleVectorStore._index_cache)
+            # Evicted topic is reloaded from disk on demand
+            self.assertEqual(len(store.retrieve_similar(1, "t1 question 0")), 1)
+
+
+class CountingModel:
+    """Stands in for the SentenceTransformer weights, which are not shipped with the repo."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts):
+        import numpy as np
+        self.encoded.append(list(texts))
+        return np.array([HashEmbeddings()._vec(t) for t in texts])
+
+
+class TestLocalSampleBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        SampleVectorStore._index_cache.clear()
+        EmbeddingService._cache.clear()
+
+        self.model = CountingModel()
+        service = EmbeddingService.__new__(EmbeddingService)
+        service.model = self.model
+        service.model_key = "test-model"
+        self.store = SampleVectorStore.__new__(SampleVectorStore)
+        self.store.backend = "local"
+        self.store.embeddings = SentenceTransformerEmbeddings(service)
+
+    def tearDown(self):
+        SampleVectorStore._index_cache.clear()
+        EmbeddingService._cache.clear()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_local_backend_batches_and_caches(self):
+        samples = [{"question_text": t} for t in ("alpha", "beta", "alpha")]
+        self.store.add_samples(1, samples)
+        # One encode call, duplicates collapsed
+        self.assertEqual(self.model.encoded, [["alpha", "beta"]])
+
+        results = self.store.retrieve_similar(1, "beta", k=1)
+        self.assertEqual(results[0].page_content, "beta")
+        # Query text was already embedded at upload time
+        self.assertEqual(len(self.model.encoded), 1)
+
+    def test_local_backend_has_own_store_path(self):
+        self.assertIn(os.path.join("vectors", "local", "topic_1"), self.store._get_store_path(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
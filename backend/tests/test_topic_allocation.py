@@ -0,0 +1,92 @@
+import sys
+import os
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Subject, Topic, CourseOutcome, TopicCOMapping, Question
+from app.services.question_counter_service import question_counter_service
+from app.services.topic_allocation import TopicAllocationPlanner
+
+
+class TestTopicAllocation(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        self.db.add(subject)
+        self.db.commit()
+        self.subject_id = subject.id
+        topics = [Topic(subject_id=subject.id, name=f"Topic {i}") for i in range(4)]
+        self.db.add_all(topics)
+        self.db.commit()
+        self.topic_ids = [t.id for t in topics]
+        self.planner = TopicAllocationPlanner()
+
+    def tearDown(self):
+        self.db.close()
+
+    def per_topic(self, units):
+        totals = {}
+        for u in units:
+            totals[u["topic_id"]] = totals.get(u["topic_id"], 0) + u["count"]
+        return totals
+
+    def test_large_section_is_spread_over_all_topics(self):
+        sections = [{"question_type": "mcq", "count": 20, "marks_each": 1, "difficulty": "medium"}]
+        units = self.planner.plan(self.db, self.subject_id, sections, self.topic_ids)
+        self.assertEqual(self.per_topic(units), {t: 5 for t in self.topic_ids})
+        self.assertTrue(all(u["marks_each"] == 1 and u["question_type"] == "mcq" for u in units))
+
+    def test_small_sections_rotate_across_topics(self):
+        sections = [{"question_type": q, "count": 1, "marks_each": 5} for q in ("mcq", "short_answer", "essay", "mcq")]
+        units = self.planner.plan(self.db, self.subject_id, sections, self.topic_ids)
+        self.assertEqual(len({u["topic_id"] for u in units}), 4)
+
+    def test_units_are_grouped_by_topic(self):
+        sections = [{"question_type": "mcq", "count": 8, "marks_each": 1},
+                    {"question_type": "essay", "count": 4, "marks_each": 10}]
+        units = self.planner.plan(self.db, self.subject_id, sections, self.topic_ids)
+        order = [u["topic_id"] for u in units]
+        self.assertEqual(order, sorted(order, key=self.topic_ids.index))
+        self.assertEqual(sum(u["count"] for u in units), 12)
+
+    def test_co_weight_and_content_shape_the_spread(self):
+        co = CourseOutcome(subject_id=self.subject_id, code="CO1", description="Plan treatment")
+        self.db.add(co)
+        self.db.commit()
+        self.db.add(TopicCOMapping(topic_id=self.topic_ids[0], course_outcome_id=co.id, weight="high"))
+        self.db.commit()
+        sections = [{"question_type": "mcq", "count": 12, "marks_each": 1}]
+        chunks = {self.topic_ids[0]: 40, self.topic_ids[1]: 40, self.topic_ids[2]: 40, self.topic_ids[3]: 0}
+
+        totals = self.per_topic(self.planner.plan(self.db, self.subject_id, sections, self.topic_ids, chunks))
+        self.assertNotIn(self.topic_ids[3], totals)  # nothing indexed to generate from
+        self.assertGreater(totals[self.topic_ids[0]], totals[self.topic_ids[1]])
+        self.assertEqual(sum(totals.values()), 12)
+
+    def test_under_covered_topics_catch_up(self):
+        existing = [Question(subject_id=self.subject_id, topic_id=self.topic_ids[0], question_text=f"Q{i}?",
+                             question_type="mcq", status="approved") for i in range(6)]
+        self.db.add_all(existing)
+        question_counter_service.record_insert(self.db, existing)
+        self.db.commit()
+
+        sections = [{"question_type": "mcq", "count": 6, "marks_each": 1}]
+        totals = self.per_topic(self.planner.plan(self.db, self.subject_id, sections, self.topic_ids))
+        self.assertNotIn(self.topic_ids[0], totals)
+        self.assertEqual(sorted(totals.values()), [2, 2, 2])
+
+    def test_no_topics(self):
+        sections = [{"question_type": "mcq", "count": 5, "marks_each": 1}]
+        units = self.planner.plan(self.db, self.subject_id, sections, [None])
+        self.assertEqual(units, [{"question_type": "mcq", "count": 5, "marks_each": 1, "topic_id": None}])
+
+
+if __name__ == "__main__":
+    unittest.main()
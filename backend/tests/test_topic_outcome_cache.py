@@ -0,0 +1,96 @@
+import sys
+import os
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Subject, Topic, CourseOutcome, LearningOutcome, TopicCOMapping
+from app.services.topic_outcome_cache import TopicOutcomeCache, topic_outcome_cache
+from app.services.outcome_mapper import outcome_mapping_service
+
+
+class TestTopicOutcomeCache(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        self.db.add(subject)
+        self.db.flush()
+        topic = Topic(subject_id=subject.id, name="Impressions")
+        self.db.add(topic)
+        cos = [CourseOutcome(subject_id=subject.id, code=f"CO{i}", description=f"co {i}", order=i) for i in range(1, 6)]
+        los = [LearningOutcome(subject_id=subject.id, code=f"LO{i}", description=f"lo {i}", order=i) for i in range(1, 6)]
+        self.db.add_all(cos + los)
+        self.db.flush()
+        for co in cos:
+            self.db.add(TopicCOMapping(topic_id=topic.id, course_outcome_id=co.id, weight="High"))
+        topic.mapped_los = los
+        self.db.commit()
+        self.topic_id = topic.id
+        self.co_ids = [co.id for co in cos]
+        self.db.expunge_all()
+        topic_outcome_cache.invalidate()
+
+    def tearDown(self):
+        self.db.close()
+        topic_outcome_cache.invalidate()
+
+    def _count_queries(self, fn):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(self.engine, "before_cursor_execute", listener)
+        try:
+            result = fn()
+        finally:
+            event.remove(self.engine, "before_cursor_execute", listener)
+        return result, len(statements)
+
+    def test_single_query_on_miss_none_on_hit(self):
+        cache = TopicOutcomeCache()
+        topic, misses = self._count_queries(lambda: cache.get(self.db, self.topic_id))
+        self.assertEqual(misses, 1)
+        self.assertEqual([co["code"] for co in topic["cos"]], ["CO1", "CO2", "CO3", "CO4", "CO5"])
+        self.assertEqual(topic["cos"][0]["weight"], "High")
+        self.assertEqual(len(topic["los"]), 5)
+
+        _, hits = self._count_queries(lambda: cache.get(self.db, self.topic_id))
+        self.assertEqual(hits, 0)
+
+    def test_expired_entry_reloads(self):
+        cache = TopicOutcomeCache(ttl_seconds=0)
+        cache.get(self.db, self.topic_id)
+        _, queries = self._count_queries(lambda: cache.get(self.db, self.topic_id))
+        self.assertEqual(queries, 1)
+
+    def test_missing_topic(self):
+        self.assertIsNone(TopicOutcomeCache().get(self.db, 9999))
+
+    def test_invalidate_during_load_is_not_overwritten(self):
+        cache = TopicOutcomeCache()
+        load = cache._load
+
+        def racing_load(db, topic_id):
+            data = load(db, topic_id)
+            cache.invalidate(topic_id)  # a mapping edit commits while this load is in flight
+            return data
+
+        cache._load = racing_load
+        cache.get(self.db, self.topic_id)
+        cache._load = load
+        _, queries = self._count_queries(lambda: cache.get(self.db, self.topic_id))
+        self.assertEqual(queries, 1)
+
+    def test_mapping_change_invalidates(self):
+        self.assertEqual(len(topic_outcome_cache.get(self.db, self.topic_id)["cos"]), 5)
+        outcome_mapping_service.remove_mapping(self.db, self.co_ids[0], self.topic_id)
+        self.assertEqual(len(topic_outcome_cache.get(self.db, self.topic_id)["cos"]), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.vector_store import VectorStore
+
+
+class TestTopicPartitions(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        rng = np.random.default_rng(2)
+        embeddings = rng.normal(size=(300, 32))
+        self.embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        self.ids = [f"chunk-{i}" for i in range(300)]
+        self.docs = [f"Passage {i} on {('clasp design', 'border moulding', 'occlusion')[i % 3]}." for i in range(300)]
+        # Topics 0 and 1, plus chunks ingested without a topic
+        self.metas = [{"topic_id": str(i % 3), "page_number": i} if i % 3 < 2 else {"page_number": i}
+                      for i in range(300)]
+        self.query = rng.normal(size=32)
+        self.query = [(self.query / np.linalg.norm(self.query)).tolist()]
+
+    def _exact(self, rows, n):
+        sims = self.embeddings[rows] @ np.asarray(self.query[0])
+        return [self.ids[rows[i]] for i in np.argsort(-sims)[:n]]
+
+    def test_chunks_routed_to_topic_partitions(self):
+        store = VectorStore(self.directory)
+        store.add_documents("subject_1", self.docs, self.metas, self.ids, self.embeddings.tolist())
+        self.assertEqual(store.client.get_collection(store.partition_name("subject_1", "0")).count(), 100)
+        self.assertEqual(store.client.get_collection("subject_1").count(), 100)  # no topic
+        self.assertEqual(store.count_documents("subject_1"), 300)
+        self.assertEqual(store.count_documents("subject_1", where={"topic_id": "1"}), 100)
+
+        topic = store.query_similar("subject_1", self.query, n_results=5, where={"topic_id": "1"})
+        self.assertEqual(topic["ids"][0], self._exact(list(range(1, 300, 3)), 5))
+        merged = store.query_similar("subject_1", self.query, n_results=8)
+        self.assertEqual(merged["ids"][0], self._exact(list(range(300)), 8))
+
+        listed = store.get_documents("subject_1", where={"topic_id": "0"})
+        self.assertEqual(listed["ids"], self.ids[0::3])
+        self.assertEqual(len(store.get_documents("subject_1")["ids"]), 300)
+        self.assertEqual(store.get_documents("subject_2", where={"topic_id": "0"})["ids"], [])
+
+        hybrid = store.query_hybrid("subject_1", self.query, "clasp design", k=5, fetch_k=15,
+                                    where={"topic_id": "1"})
+        self.assertEqual(len(hybrid["ids"][0]), 5)
+        self.assertTrue(all(m["topic_id"] == "1" for m in hybrid["metadatas"][0]))
+
+    def test_legacy_collection_found_before_and_after_partitioning(self):
+        store = VectorStore(os.path.join(self.directory, "int8"), embedding_storage="int8")
+        # A subject collection from before topic partitions: every chunk in one collection
+        legacy = store.client.get_or_create_collection("subject_1")
+        legacy.add(ids=self.ids, documents=self.docs, metadatas=self.metas, embeddings=self.embeddings.tolist())
+        expected = store.query_mmr("subject_1", self.query, k=5, fetch_k=20, where={"topic_id": "0"})
+        self.assertEqual(len(expected["ids"][0]), 5)
+        self.assertEqual(store.count_documents("subject_1", where={"topic_id": "0"}), 100)
+
+        self.assertEqual(store.partition_by_topic("subject_1", batch_size=64), {"moved": 200, "kept": 100})
+        self.assertEqual(store.client.get_collection("subject_1").count(), 100)
+        self.assertEqual(store.count_documents("subject_1", where={"topic_id": "0"}), 100)
+        self.assertEqual(store.count_documents("subject_1"), 300)
+        got = store.query_mmr("subject_1", self.query, k=5, fetch_k=20, where={"topic_id": "0"})
+        self.assertEqual(got["ids"][0], expected["ids"][0])
+        # The legacy collection stays float32; only new partitions use the configured storage
+        self.assertIsNone(store.quantized.get("subject_1"))
+        self.assertEqual(len(store.quantized.get(store.partition_name("subject_1", "0"))), 100)
+        self.assertEqual(store.partition_by_topic("subject_1"), {"moved": 0, "kept": 100})
+
+
+if __name__ == "__main__":
+    unittest.main()
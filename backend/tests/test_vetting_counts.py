@@ -0,0 +1,86 @@
+import sys
+import os
+import asyncio
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Subject, Rubric, GeneratedBatch, Question
+from app.services.vetting_service import VettingService
+from app.services.question_counter_service import question_counter_service
+
+
+class TestVettingStatusCounts(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.service = VettingService()
+
+        subject = Subject(name="Prosthodontics", code="PROS01")
+        self.db.add(subject)
+        self.db.flush()
+        self.subject_id = subject.id
+
+    def tearDown(self):
+        self.db.close()
+
+    def _seed_batch(self, idx, statuses):
+        self.db.add(Rubric(id=f"r{idx}", subject_id=self.subject_id, title=f"Rubric {idx}"))
+        self.db.add(GeneratedBatch(id=f"b{idx}", rubric_id=f"r{idx}", subject_id=self.subject_id,
+                                   title=f"Rubric {idx}", total_questions=len(statuses),
+                                   pending_count=0))
+        questions = [
+            Question(subject_id=self.subject_id, question_text="Q?", question_type="mcq",
+                     difficulty="medium", marks=1, status=s,
+                     rubric_id=f"r{idx}", batch_id=f"b{idx}")
+            for s in statuses
+        ]
+        self.db.add_all(questions)
+        question_counter_service.record_insert(self.db, questions)
+        self.db.commit()
+
+    def _count_queries(self, fn):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(self.engine, "before_cursor_execute", listener)
+        try:
+            result = fn()
+        finally:
+            event.remove(self.engine, "before_cursor_execute", listener)
+        return result, len(statements)
+
+    def test_counts_per_batch(self):
+        self._seed_batch(1, ["pending", "approved", "approved", "rejected", "quarantined"])
+        self._seed_batch(2, ["approved", "rejected"])
+
+        batches = asyncio.run(self.service.get_pending_batches(self.db))
+        by_id = {b["id"]: b for b in batches}
+
+        self.assertEqual(len(batches), 2)
+        self.assertEqual(by_id["b1"]["total_questions"], 5)
+        self.assertEqual(by_id["b1"]["pending_count"], 1)
+        self.assertEqual(by_id["b1"]["approved_count"], 2)
+        self.assertEqual(by_id["b1"]["rejected_count"], 1)
+        self.assertEqual(by_id["b1"]["quarantined_count"], 1)
+        self.assertEqual(by_id["b1"]["status"], "in_progress")
+        self.assertEqual(by_id["b2"]["status"], "completed")
+
+    def test_query_count_independent_of_batch_count(self):
+        self._seed_batch(1, ["pending"] * 3)
+        _, small = self._count_queries(lambda: asyncio.run(self.service.get_pending_batches(self.db)))
+
+        for i in range(2, 30):
+            self._seed_batch(i, ["pending", "approved"])
+        batches, large = self._count_queries(lambda: asyncio.run(self.service.get_pending_batches(self.db)))
+
+        self.assertEqual(len(batches), 29)
+        self.assertEqual(small, large)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -39,7 +39,7 @@ type Props = NativeStackScreenProps<any, 'QuestionReview'>;
 
 export const QuestionReviewScreen = ({ route, navigation }: Props) => {
     const { batchId, questionId: initialQuestionId } = route.params as { batchId: string; questionId?: string };
-    const { currentBatch, startReview, approveQuestion, rejectQuestion, quarantineQuestion, isLoading } = useVetterStore();
+    const { currentBatch, startReview, approveQuestion, rejectQuestion, quarantineQuestion, fetchProvenance, isLoading } = useVetterStore();
     const insets = useSafeAreaInsets();
     const TAB_BAR_HEIGHT = 60; // Approximate height of the tab bar
 
@@ -174,6 +174,10 @@ export const QuestionReviewScreen = ({ route, navigation }: Props) => {
 
     const toggleRAG = () => {
         LayoutAnimation.configureNext(LayoutAnimation.Presets.easeInEaseOut);
+        // Provenance is loaded lazily the first time the panel is opened
+        if (!isExpandedRAG && question.ragContext === undefined && question.hasProvenance !== false) {
+            fetchProvenance(question.id).catch(() => { /* panel shows "No context" */ });
+        }
         setIsExpandedRAG(!isExpandedRAG);
     };
 
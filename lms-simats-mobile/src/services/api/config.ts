@@ -71,6 +71,7 @@ export const API_CONFIG = {
         QUESTIONS: '/questions',
         QUESTION_DETAIL: (id: string) => `/questions/${id}`,
         QUESTION_VALIDATE: (id: string) => `/questions/${id}/validate`,
+        QUESTION_PROVENANCE: (id: string) => `/questions/${id}/provenance`,
 
         // Vetting
         VETTING_PENDING: '/vetting/pending',
@@ -11,9 +11,18 @@ export { QuestionFilters, ValidationResult };
 
 
 export const questionService = {
+    // GET /questions is paginated: follow X-Next-Cursor until the last page
     getAll: async (filters?: QuestionFilters): Promise<Question[]> => {
-        const response = await api.get(API_CONFIG.ENDPOINTS.QUESTIONS, { params: filters });
-        return response.data;
+        const questions: Question[] = [];
+        let cursor: string | undefined;
+        do {
+            const response = await api.get(API_CONFIG.ENDPOINTS.QUESTIONS, {
+                params: { ...filters, cursor },
+            });
+            questions.push(...response.data);
+            cursor = response.headers['x-next-cursor'];
+        } while (cursor);
+        return questions;
     },
 
     getById: async (id: string): Promise<Question> => {
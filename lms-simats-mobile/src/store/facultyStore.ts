@@ -1,6 +1,7 @@
 import { create } from 'zustand';
 import type { Subject, Question, Rubric } from '../types';
 import { apiClient as api, API_CONFIG, APIError } from '../services/api';
+import { questionService } from '../services/questionService';
 
 interface Activity {
     id: string;
@@ -482,9 +483,9 @@ export const useFacultyStore = create<FacultyState>((set, get) => ({
     fetchQuestions: async (filters?: any) => {
         set({ isLoadingQuestions: true, error: null });
         try {
-            const response = await api.get(API_CONFIG.ENDPOINTS.QUESTIONS, { params: filters });
+            const questions = await questionService.getAll(filters);
             set({
-                questions: response.data,
+                questions,
                 isLoadingQuestions: false
             });
         } catch (error: any) {
@@ -18,9 +18,36 @@ interface VetterState {
     approveQuestion: (questionId: string, coAdjustments?: any[], loAdjustments?: any[]) => Promise<void>;
     rejectQuestion: (questionId: string, reason: string) => Promise<void>;
     quarantineQuestion: (questionId: string, notes: string) => Promise<void>;
+    fetchProvenance: (questionId: string) => Promise<void>;
     getBatchById: (batchId: string) => VettingBatch | undefined;
 }
 
+// Normalize RAG Context — preserve structured format {context: [...], reasoning: "..."}
+const normalizeRagContext = (rawRag: any): any => {
+    let cleanRagContext: any = null;
+    if (rawRag && typeof rawRag === 'object' && !Array.isArray(rawRag) && rawRag.context) {
+        // New structured format: {context: [...], reasoning: "..."}
+        cleanRagContext = rawRag;
+    } else if (Array.isArray(rawRag)) {
+        cleanRagContext = rawRag;
+    } else if (typeof rawRag === 'string') {
+        try {
+            const parsed = JSON.parse(rawRag);
+            if (parsed && typeof parsed === 'object' && !Array.isArray(parsed) && parsed.context) {
+                // Structured format stored as JSON string
+                cleanRagContext = parsed;
+            } else if (Array.isArray(parsed)) {
+                cleanRagContext = parsed;
+            } else if (parsed) {
+                cleanRagContext = parsed;
+            }
+        } catch {
+            if (rawRag.trim()) cleanRagContext = [rawRag];
+        }
+    }
+    return cleanRagContext;
+};
+
 const mockStats: VetterStats = {
     totalReviewedThisWeek: 0,
     totalReviewedThisMonth: 0,
@@ -186,29 +213,10 @@ export const useVetterStore = create<VetterState>((set, get) => ({
                         // ignore
                     }
 
-                    // Normalize RAG Context — preserve structured format
-                    let cleanRagContext: any = null;
+                    // RAG context is no longer inlined in the batch payload; it is
+                    // fetched on demand via fetchProvenance (undefined = not loaded yet)
                     const rawRag = (q as any).ragContext || (q as any).rag_context;
-                    if (rawRag && typeof rawRag === 'object' && !Array.isArray(rawRag) && rawRag.context) {
-                        // New structured format: {context: [...], reasoning: "..."}
-                        cleanRagContext = rawRag;
-                    } else if (Array.isArray(rawRag)) {
-                        cleanRagContext = rawRag;
-                    } else if (typeof rawRag === 'string') {
-                        try {
-                            const parsed = JSON.parse(rawRag);
-                            if (parsed && typeof parsed === 'object' && !Array.isArray(parsed) && parsed.context) {
-                                // Structured format stored as JSON string
-                                cleanRagContext = parsed;
-                            } else if (Array.isArray(parsed)) {
-                                cleanRagContext = parsed;
-                            } else if (parsed) {
-                                cleanRagContext = parsed;
-                            }
-                        } catch {
-                            if (rawRag.trim()) cleanRagContext = [rawRag];
-                        }
-                    }
+                    const cleanRagContext = rawRag !== undefined ? normalizeRagContext(rawRag) : undefined;
 
                     return {
                         id: q.id?.toString(),
@@ -228,6 +236,7 @@ export const useVetterStore = create<VetterState>((set, get) => ({
                         createdAt: q.created_at || q.createdAt,
                         validationScore: cleanScore,
                         ragContext: cleanRagContext,
+                        hasProvenance: (q as any).hasProvenance,
                         topicCOs: (q as any).topicCOs || [],
                         topicLOs: (q as any).topicLOs || [],
                         approvalFeedback: (q as any).approvalFeedback
@@ -376,6 +385,22 @@ export const useVetterStore = create<VetterState>((set, get) => ({
         }
     },
 
+    fetchProvenance: async (questionId: string) => {
+        const response = await api.get(API_CONFIG.ENDPOINTS.QUESTION_PROVENANCE(questionId));
+        const ragContext = normalizeRagContext(response.data.ragContext || response.data.rag_context);
+
+        const currentBatch = get().currentBatch;
+        if (!currentBatch) return;
+        set({
+            currentBatch: {
+                ...currentBatch,
+                questions: currentBatch.questions.map(q =>
+                    q.id === questionId ? { ...q, ragContext } : q
+                ),
+            }
+        });
+    },
+
     getBatchById: (batchId: string) => {
         const allBatches = [...get().pendingBatches, ...get().completedBatches];
         return allBatches.find(b => b.id === batchId);
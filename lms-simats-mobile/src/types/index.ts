@@ -69,6 +69,7 @@ export interface Question {
     validationScore?: number;
     ragContext?: any; // Structured: {context: [], reasoning: ""} or legacy string[]
     rag_context?: string[] | string;
+    hasProvenance?: boolean;
     topicCOs?: string[];
     topicLOs?: string[];
     approvalFeedback?: string; // JSON string